@@ -4,19 +4,19 @@ Shared dependencies, state, and utility functions for the API.
 This module contains global state (caches, storage) and helper functions
 that are used across multiple routers.
 """
-from typing import Dict, Any
 from fastapi import HTTPException
-from app.api.schemas.shared import AsyncTaskStatus, AnalyzeFileResponse
+from app.core.records_cache import RecordsCache
+from app.core.session_store import SessionStore
 
-# Global task storage (in production, use Redis or database)
-task_storage: Dict[str, AsyncTaskStatus] = {}
-analysis_storage: Dict[str, AnalyzeFileResponse] = {}
-interactive_sessions: Dict[str, Any] = {}
+# Async task status, file analyses, and interactive sessions, bounded by
+# SESSION_STORE_* settings (SESSION_STORE_BACKEND=postgres shares them across workers)
+task_storage = SessionStore("tasks")
+analysis_storage = SessionStore("analysis")
+interactive_sessions = SessionStore("interactive")
 
-# Cache for parsed file records to avoid double processing
-# Key: file_hash, Value: dict with 'raw_records', 'mapped_records', 'config_hash', 'timestamp'
-records_cache: Dict[str, Dict[str, Any]] = {}
-CACHE_TTL_SECONDS = 300  # 5 minutes
+# Parsed file records cached by /detect-mapping for /map-data, keyed by file hash
+# (bounded by RECORDS_CACHE_* settings; large entries spill to disk)
+records_cache = RecordsCache()
 
 
 def detect_file_type(filename: str) -> str:
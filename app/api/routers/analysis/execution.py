@@ -19,7 +19,7 @@ from app.api.schemas.shared import (
     MapDataResponse,
     AutoExecutionResult,
 )
-from app.api.dependencies import interactive_sessions
+from app.api.routers.analysis.interactive import discard_interactive_session
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -147,7 +147,7 @@ async def auto_retry_failed_auto_import(
                 f"{prompt_needed_msg} Open the Interactive tab for this file to review and approve the plan."
             )
             # Cleanup since we cannot move forward automatically
-            interactive_sessions.pop(interactive_response.thread_id, None)
+            discard_interactive_session(interactive_response.thread_id)
             return result
 
         execute_response = await execute_interactive_import_fn(
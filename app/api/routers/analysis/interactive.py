@@ -48,10 +48,19 @@ class InteractiveSessionState:
 
 
 def store_interactive_session(session: InteractiveSessionState) -> None:
-    """Persist interactive session state in the in-memory cache."""
+    """Persist interactive session state in the session store."""
     interactive_sessions[session.thread_id] = session
 
 
+def discard_interactive_session(thread_id: str) -> None:
+    """Drop an interactive session and its stored LLM conversation."""
+    interactive_sessions.pop(thread_id, None)
+    # Import here to avoid circular dependency
+    from app.domain.queries.analyzer import discard_file_analysis_thread
+
+    discard_file_analysis_thread(thread_id)
+
+
 def get_interactive_session(thread_id: str) -> InteractiveSessionState:
     """Retrieve an interactive session or raise if missing."""
     session = interactive_sessions.get(thread_id)
@@ -177,6 +186,7 @@ def run_interactive_session_step(
         can_execute = bool(session.llm_decision)
     
     session.last_error = None if session.llm_decision else session.last_error
+    store_interactive_session(session)
 
     return AnalyzeFileInteractiveResponse(
         success=True,
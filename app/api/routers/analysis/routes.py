@@ -17,7 +17,7 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
 from fastapi.params import Form as FormParam
 from sqlalchemy.orm import Session
-from typing import Optional, Any, List, Dict, Tuple
+from typing import Optional, Any, Callable, List, Dict, Tuple
 from dataclasses import dataclass, field
 
 import pandas as pd
@@ -43,21 +43,26 @@ from app.domain.imports.processors.csv_processor import (
     extract_raw_csv_rows,
     detect_csv_header,
     list_excel_sheets,
-    load_csv_sample,
 )
 from app.domain.imports.processors.json_processor import process_json
 from app.domain.imports.processors.xml_processor import process_xml
-from app.domain.queries.analyzer import analyze_file_for_import as _analyze_file_for_import, sample_file_data
+from app.domain.queries.analyzer import (
+    analyze_file_for_import as _analyze_file_for_import,
+    discard_file_analysis_thread,
+    sample_file_stream,
+)
 import app.integrations.auto_import as auto_import
 from app.domain.uploads.uploaded_files import (
     get_uploaded_file_by_id,
     update_file_status,
     insert_uploaded_file,
 )
+from app.domain.imports.archive_reader import ArchiveReader
 from app.domain.imports.jobs import create_import_job, update_import_job, complete_import_job, get_import_job
 from app.domain.imports.history import get_import_history, list_duplicate_rows
 from app.core.config import settings
 from app.domain.imports.jobs import fail_active_job
+from app.domain.imports.job_queue import enqueue_import_job, register_job_handler
 from app.db.llm_instructions import (
     get_llm_instruction,
     find_llm_instruction_by_content,
@@ -266,6 +271,23 @@ def _table_exists(table_name: str) -> bool:
         return False
 
 
+def _parse_file_records(
+    file_content: bytes,
+    file_type: str,
+    sheet_name: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Parse every record of an uploaded file; raises 400 for unsupported types."""
+    if file_type == 'csv':
+        return process_csv(file_content)
+    if file_type == 'excel':
+        return process_excel(file_content, sheet_name=sheet_name)
+    if file_type == 'json':
+        return process_json(file_content)
+    if file_type == 'xml':
+        return process_xml(file_content)
+    raise HTTPException(status_code=400, detail="Unsupported file type")
+
+
 def _build_structure_fingerprint(entry_bytes: bytes, entry_name: str) -> Optional[str]:
     """
     Build a lightweight structure fingerprint so similar files can reuse the same mapping decision.
@@ -902,8 +924,7 @@ def _process_archive_entry(
     entry_name: str,
     stored_file_name: str,
     archive_folder: str,
-    zip_file: zipfile.ZipFile,
-    zip_lock: threading.Lock,
+    archive_reader: ArchiveReader,
     fingerprint_cache: Dict[str, Dict[str, Any]],
     fingerprint_lock: threading.Lock,
     analysis_mode: AnalysisMode,
@@ -921,17 +942,16 @@ def _process_archive_entry(
     db_session = SessionLocal()
     
     try:
-        # 1. Safe file reading (serialized)
-        with zip_lock:
-            try:
-                entry_bytes = zip_file.read(archive_path)
-            except KeyError:
-                return ArchiveAutoProcessFileResult(
-                    archive_path=archive_path,
-                    stored_file_name=stored_file_name,
-                    status="failed",
-                    message="Unable to read archive member",
-                )
+        # 1. File reading (each worker thread has its own handle on the spooled archive)
+        try:
+            entry_bytes = archive_reader.read(archive_path)
+        except KeyError:
+            return ArchiveAutoProcessFileResult(
+                archive_path=archive_path,
+                stored_file_name=stored_file_name,
+                status="failed",
+                message="Unable to read archive member",
+            )
 
         return _process_entry_bytes(
             entry_bytes=entry_bytes,
@@ -1063,7 +1083,7 @@ def _run_archive_auto_process_job(
     *,
     file_id: str,
     archive_name: str,
-    archive_bytes: bytes,
+    archive_reader: ArchiveReader,
     supported_archive_paths: List[str],
     skipped_results: List[ArchiveAutoProcessFileResult],
     analysis_mode: AnalysisMode,
@@ -1076,7 +1096,12 @@ def _run_archive_auto_process_job(
     llm_instruction: Optional[str] = None,
     prefilled_results: Optional[List[ArchiveAutoProcessFileResult]] = None,
 ) -> None:
-    """Execute archive auto-processing off the main event loop."""
+    """
+    Execute archive auto-processing off the main event loop.
+
+    Takes ownership of ``archive_reader`` and closes it (removing the spooled
+    archive) when the job finishes.
+    """
     import threading
     
     prefilled_results = prefilled_results or []
@@ -1090,14 +1115,38 @@ def _run_archive_auto_process_job(
     skipped_files = len(skipped_results)
     fingerprint_cache: Dict[str, Dict[str, Any]] = {}
     fingerprint_lock = threading.Lock()
-    zip_lock = threading.Lock()
     
     results: List[ArchiveAutoProcessFileResult] = list(prefilled_results) + list(skipped_results)
     remaining_archive_paths = [path for path in supported_archive_paths if path not in prefilled_lookup]
+
+    # Byte-identical members would only re-import the same rows; process the first copy only
+    try:
+        identical_members = archive_reader.find_identical_members(
+            list(prefilled_lookup) + remaining_archive_paths
+        )
+    except Exception as exc:
+        archive_reader.close()
+        fail_active_job(file_id, job_id, f"Archive is corrupted: {exc}")
+        return
+    identical_results = [
+        ArchiveAutoProcessFileResult(
+            archive_path=path,
+            status="skipped",
+            message=f"Identical to '{identical_members[path]}'",
+        )
+        for path in remaining_archive_paths
+        if path in identical_members
+    ]
+    if identical_results:
+        logger.info("Skipping %d byte-identical archive entries", len(identical_results))
+        results.extend(identical_results)
+        skipped_files += len(identical_results)
+        remaining_archive_paths = [path for path in remaining_archive_paths if path not in identical_members]
+
     processing_paths = list(remaining_archive_paths)
     completed_archive_entries: List[Dict[str, str]] = [
         {"archive_path": res.archive_path, "status": res.status}
-        for res in prefilled_results + skipped_results
+        for res in prefilled_results + skipped_results + identical_results
     ]
     total_work_items = len(remaining_archive_paths) + initial_processed + initial_failed
 
@@ -1120,13 +1169,6 @@ def _run_archive_auto_process_job(
     )
 
     try:
-        try:
-            # ZipFile is not thread-safe for concurrent reads/seeks, so we must lock access
-            zip_file = zipfile.ZipFile(io.BytesIO(archive_bytes))
-        except zipfile.BadZipFile as exc:
-            fail_active_job(file_id, job_id, f"Archive is corrupted: {exc}")
-            return
-
         try:
             # Determine max workers - default to 4, but cap at CPU count
             max_workers = min(4, os.cpu_count() or 2)
@@ -1146,8 +1188,7 @@ def _run_archive_auto_process_job(
                         entry_name=entry_name,
                         stored_file_name=stored_file_name,
                         archive_folder=archive_folder,
-                        zip_file=zip_file,
-                        zip_lock=zip_lock,
+                        archive_reader=archive_reader,
                         fingerprint_cache=fingerprint_cache,
                         fingerprint_lock=fingerprint_lock,
                         analysis_mode=analysis_mode,
@@ -1320,7 +1361,7 @@ def _run_archive_auto_process_job(
                             }
                         )
         finally:
-            zip_file.close()
+            archive_reader.close()
             
     except Exception as exc:  # pragma: no cover - defensive
         logger.exception("Archive auto-process background task failed: %s", exc)
@@ -1648,6 +1689,134 @@ def _run_workbook_auto_process_job(
         }
     )
 
+
+def _start_auto_process_job(
+    *,
+    trigger_source: str,
+    file_id: str,
+    analysis_mode: AnalysisMode,
+    conflict_resolution: ConflictResolutionMode,
+    metadata: Dict[str, Any],
+    payload: Dict[str, Any],
+    run_inline: Callable[[str], None],
+    release_inline_resources: Optional[Callable[[], None]] = None,
+) -> str:
+    """
+    Create the import job and start it.
+
+    With the job queue enabled the job is enqueued for ``python -m app.worker``
+    (using ``trigger_source`` as the job type); otherwise it runs on the API
+    process executor as before. ``release_inline_resources`` is called when
+    ``run_inline`` will not run (queue mode or job creation failure).
+    """
+    job_kwargs = dict(
+        file_id=file_id,
+        trigger_source=trigger_source,
+        analysis_mode=analysis_mode.value,
+        conflict_mode=conflict_resolution.value,
+        metadata=metadata,
+    )
+    try:
+        if settings.job_queue_enabled:
+            job = enqueue_import_job(job_type=trigger_source, payload=payload, **job_kwargs)
+        else:
+            job = create_import_job(**job_kwargs)
+        job_id = job["id"]
+        update_file_status(file_id, "mapping", expected_active_job_id=job_id)
+    except Exception:
+        if release_inline_resources is not None:
+            release_inline_resources()
+        raise
+
+    if settings.job_queue_enabled:
+        if release_inline_resources is not None:
+            release_inline_resources()
+    else:
+        loop = asyncio.get_running_loop()
+        loop.run_in_executor(None, lambda: run_inline(job_id))
+    return job_id
+
+
+def _spool_archive_for_inline_job(archive_bytes: bytes) -> Optional[ArchiveReader]:
+    """
+    Spool an archive to disk for the in-process job runner.
+
+    The job then reads members through per-thread handles instead of keeping
+    the upload bytes alive. Queued jobs download their own copy in the worker.
+    """
+    if settings.job_queue_enabled:
+        return None
+    return ArchiveReader.from_bytes(archive_bytes)
+
+
+def _download_job_file(file_id: str) -> Tuple[Dict[str, Any], bytes]:
+    file_record = get_uploaded_file_by_id(file_id)
+    if not file_record:
+        raise RuntimeError(f"File {file_id} not found")
+    return file_record, _get_download_file_from_storage()(file_record["b2_file_path"])
+
+
+@register_job_handler("archive_auto_process", max_attempts=1)
+def _handle_archive_auto_process_job(job: Dict[str, Any]) -> None:
+    """Worker entry point for queued archive auto-processing."""
+    payload = job["payload"]
+    file_record, archive_bytes = _download_job_file(payload["file_id"])
+    archive_reader = ArchiveReader.from_bytes(archive_bytes)
+    del archive_bytes
+    _run_archive_auto_process_job(
+        file_id=payload["file_id"],
+        archive_name=file_record["file_name"],
+        archive_reader=archive_reader,
+        supported_archive_paths=payload["supported_archive_paths"],
+        skipped_results=[ArchiveAutoProcessFileResult(**res) for res in payload.get("skipped_results", [])],
+        analysis_mode=AnalysisMode(payload["analysis_mode"]),
+        conflict_resolution=ConflictResolutionMode(payload["conflict_resolution"]),
+        auto_execute_confidence_threshold=payload["auto_execute_confidence_threshold"],
+        max_iterations=payload["max_iterations"],
+        job_id=job["id"],
+        forced_table_name=payload.get("forced_table_name"),
+        forced_table_mode=payload.get("forced_table_mode"),
+        llm_instruction=payload.get("llm_instruction"),
+        prefilled_results=[ArchiveAutoProcessFileResult(**res) for res in payload.get("prefilled_results", [])],
+    )
+
+
+@register_job_handler("workbook_auto_process", max_attempts=1)
+def _handle_workbook_auto_process_job(job: Dict[str, Any]) -> None:
+    """Worker entry point for queued workbook auto-processing."""
+    payload = job["payload"]
+    file_record, workbook_bytes = _download_job_file(payload["file_id"])
+    skipped_results = [ArchiveAutoProcessFileResult(**res) for res in payload.get("skipped_results", [])]
+    sheet_entries: List[Tuple[str, bytes]] = []
+    for sheet_name in payload["sheet_names"]:
+        try:
+            sheet_entries.append((sheet_name, extract_excel_sheet_csv_bytes(workbook_bytes, sheet_name)))
+        except Exception as exc:
+            logger.warning("Failed to extract sheet %s from %s: %s", sheet_name, file_record["file_name"], exc)
+            skipped_results.append(
+                ArchiveAutoProcessFileResult(
+                    archive_path=sheet_name,
+                    sheet_name=sheet_name,
+                    status="failed",
+                    message=str(exc),
+                )
+            )
+    _run_workbook_auto_process_job(
+        file_id=payload["file_id"],
+        workbook_name=file_record["file_name"],
+        sheet_entries=sheet_entries,
+        skipped_results=skipped_results,
+        analysis_mode=AnalysisMode(payload["analysis_mode"]),
+        conflict_resolution=ConflictResolutionMode(payload["conflict_resolution"]),
+        auto_execute_confidence_threshold=payload["auto_execute_confidence_threshold"],
+        max_iterations=payload["max_iterations"],
+        job_id=job["id"],
+        forced_table_name=payload.get("forced_table_name"),
+        forced_table_mode=payload.get("forced_table_mode"),
+        llm_instruction=payload.get("llm_instruction"),
+    )
+
+
 async def _auto_retry_failed_auto_import(
     *,
     file_id: Optional[str],
@@ -1700,7 +1869,7 @@ async def _auto_retry_failed_auto_import(
                 f"{prompt_needed_msg} Open the Interactive tab for this file to review and approve the plan."
             )
             # Cleanup since we cannot move forward automatically
-            interactive_sessions.pop(interactive_response.thread_id, None)
+            _discard_interactive_session(interactive_response.thread_id)
             return result
 
         execute_response = await execute_interactive_import_endpoint(
@@ -1763,10 +1932,16 @@ class InteractiveSessionState:
 
 
 def _store_interactive_session(session: InteractiveSessionState) -> None:
-    """Persist interactive session state in the in-memory cache."""
+    """Persist interactive session state in the session store."""
     interactive_sessions[session.thread_id] = session
 
 
+def _discard_interactive_session(thread_id: str) -> None:
+    """Drop an interactive session and its stored LLM conversation."""
+    interactive_sessions.pop(thread_id, None)
+    discard_file_analysis_thread(thread_id)
+
+
 def _get_interactive_session(thread_id: str) -> InteractiveSessionState:
     """Retrieve an interactive session or raise if missing."""
     session = interactive_sessions.get(thread_id)
@@ -1869,6 +2044,7 @@ def _run_interactive_session_step(
 
     session.status = "ready_to_execute" if session.llm_decision else "awaiting_user"
     session.last_error = None if session.llm_decision else session.last_error
+    _store_interactive_session(session)
 
     return AnalyzeFileInteractiveResponse(
         success=True,
@@ -2050,24 +2226,14 @@ async def analyze_file_endpoint(
         
         # For CSV files, extract raw rows for LLM analysis WITHOUT parsing
         raw_csv_rows = None
-        records = []
         
         if file_type == 'csv':
             raw_csv_rows = extract_raw_csv_rows(file_content, num_rows=100)
-
-            # Load only a lightweight sample to avoid pulling whole multi-GB files into memory
-            records = load_csv_sample(file_content, sample_rows=1000)
-        elif file_type == 'excel':
-            records = process_excel(file_content)
-        elif file_type == 'json':
-            records = process_json(file_content)
-        elif file_type == 'xml':
-            records = process_xml(file_content)
-        else:
+        elif file_type not in ('excel', 'json', 'xml'):
             raise HTTPException(status_code=400, detail="Unsupported file type")
         
-        # Smart sampling
-        sample, total_rows = sample_file_data(records, sample_size, max_sample_size=50)
+        # Smart sampling in a single streaming pass; full records are only parsed for auto-execution
+        sample, total_rows = sample_file_stream(file_content, file_type, sample_size, max_sample_size=50)
         
         # Prepare metadata
         file_metadata = {
@@ -2179,7 +2345,7 @@ async def analyze_file_endpoint(
                 execution_result = _get_execute_llm_import_decision()(
                     file_content=file_content,
                     file_name=file_name,
-                    all_records=records,  # Use all records, not just sample
+                    all_records=_parse_file_records(file_content, file_type),  # Use all records, not just sample
                     llm_decision=llm_decision,
                     source_path=file_record.get("b2_file_path") if file_id else None
                 )
@@ -2543,12 +2709,13 @@ async def auto_process_archive_endpoint(
         )
 
     remaining_archive_paths = [info.filename for info in supported_entries]
+    archive_reader = _spool_archive_for_inline_job(archive_bytes)
 
-    job = create_import_job(
-        file_id=file_id,
+    job_id = _start_auto_process_job(
         trigger_source="archive_auto_process",
-        analysis_mode=analysis_mode.value,
-        conflict_mode=conflict_resolution.value,
+        file_id=file_id,
+        analysis_mode=analysis_mode,
+        conflict_resolution=conflict_resolution,
         metadata={
             "source": "auto-process-archive",
             "files_in_archive": len(supported_entries),
@@ -2557,17 +2724,22 @@ async def auto_process_archive_endpoint(
             "forced_table_name": forced_table_name,
             "forced_table_mode": forced_table_mode,
         },
-    )
-    job_id = job["id"]
-    update_file_status(file_id, "mapping", expected_active_job_id=job_id)
-
-    loop = asyncio.get_running_loop()
-    loop.run_in_executor(
-        None,
-        lambda: _run_archive_auto_process_job(
+        payload={
+            "file_id": file_id,
+            "supported_archive_paths": list(remaining_archive_paths),
+            "skipped_results": [result.model_dump() for result in skipped_results],
+            "analysis_mode": analysis_mode.value,
+            "conflict_resolution": conflict_resolution.value,
+            "auto_execute_confidence_threshold": auto_execute_confidence_threshold,
+            "max_iterations": max_iterations,
+            "forced_table_name": forced_table_name,
+            "forced_table_mode": forced_table_mode,
+            "llm_instruction": normalized_instruction,
+        },
+        run_inline=lambda job_id: _run_archive_auto_process_job(
             file_id=file_id,
             archive_name=archive_name,
-            archive_bytes=archive_bytes,
+            archive_reader=archive_reader,
             supported_archive_paths=[info.filename for info in supported_entries],
             skipped_results=skipped_results,
             analysis_mode=analysis_mode,
@@ -2579,6 +2751,7 @@ async def auto_process_archive_endpoint(
             forced_table_mode=forced_table_mode,
             llm_instruction=normalized_instruction,
         ),
+        release_inline_resources=archive_reader.close if archive_reader else None,
     )
 
     return ArchiveAutoProcessResponse(
@@ -2726,23 +2899,30 @@ async def resume_auto_process_archive_endpoint(
         job_metadata["resume_of_job_id"] = from_job_id
         job_metadata["resume_failed_entries_only"] = resume_failed_entries_only
 
-    job = create_import_job(
-        file_id=file_id,
+    archive_reader = _spool_archive_for_inline_job(archive_bytes)
+    job_id = _start_auto_process_job(
         trigger_source="archive_auto_process",
-        analysis_mode=analysis_mode.value,
-        conflict_mode=conflict_resolution.value,
+        file_id=file_id,
+        analysis_mode=analysis_mode,
+        conflict_resolution=conflict_resolution,
         metadata=job_metadata,
-    )
-    job_id = job["id"]
-    update_file_status(file_id, "mapping", expected_active_job_id=job_id)
-
-    loop = asyncio.get_running_loop()
-    loop.run_in_executor(
-        None,
-        lambda: _run_archive_auto_process_job(
+        payload={
+            "file_id": file_id,
+            "supported_archive_paths": list(remaining_archive_paths),
+            "skipped_results": [result.model_dump() for result in skipped_results],
+            "prefilled_results": [result.model_dump() for result in prefilled_results],
+            "analysis_mode": analysis_mode.value,
+            "conflict_resolution": conflict_resolution.value,
+            "auto_execute_confidence_threshold": auto_execute_confidence_threshold,
+            "max_iterations": max_iterations,
+            "forced_table_name": forced_table_name,
+            "forced_table_mode": forced_table_mode,
+            "llm_instruction": normalized_instruction,
+        },
+        run_inline=lambda job_id: _run_archive_auto_process_job(
             file_id=file_id,
             archive_name=archive_name,
-            archive_bytes=archive_bytes,
+            archive_reader=archive_reader,
             supported_archive_paths=remaining_archive_paths,
             skipped_results=skipped_results,
             analysis_mode=analysis_mode,
@@ -2755,6 +2935,7 @@ async def resume_auto_process_archive_endpoint(
             forced_table_mode=forced_table_mode,
             llm_instruction=normalized_instruction,
         ),
+        release_inline_resources=archive_reader.close if archive_reader else None,
     )
 
     processed_prefilled = sum(1 for res in prefilled_results if res.status == "processed")
@@ -2920,11 +3101,11 @@ async def auto_process_workbook_endpoint(
     remaining_sheets = [name for name, _ in sheet_entries]
     completed_seed = [{"archive_path": res.archive_path, "status": res.status} for res in skipped_results]
 
-    job = create_import_job(
-        file_id=file_id,
+    job_id = _start_auto_process_job(
         trigger_source="workbook_auto_process",
-        analysis_mode=analysis_mode.value,
-        conflict_mode=conflict_resolution.value,
+        file_id=file_id,
+        analysis_mode=analysis_mode,
+        conflict_resolution=conflict_resolution,
         metadata={
             "source": "auto-process-workbook",
             "files_in_archive": len(remaining_sheets) + len(skipped_results),
@@ -2934,14 +3115,19 @@ async def auto_process_workbook_endpoint(
             "forced_table_mode": forced_table_mode,
             "sheet_names": normalized_selection,
         },
-    )
-    job_id = job["id"]
-    update_file_status(file_id, "mapping", expected_active_job_id=job_id)
-
-    loop = asyncio.get_running_loop()
-    loop.run_in_executor(
-        None,
-        lambda: _run_workbook_auto_process_job(
+        payload={
+            "file_id": file_id,
+            "sheet_names": list(remaining_sheets),
+            "skipped_results": [result.model_dump() for result in skipped_results],
+            "analysis_mode": analysis_mode.value,
+            "conflict_resolution": conflict_resolution.value,
+            "auto_execute_confidence_threshold": auto_execute_confidence_threshold,
+            "max_iterations": max_iterations,
+            "forced_table_name": forced_table_name,
+            "forced_table_mode": forced_table_mode,
+            "llm_instruction": normalized_instruction,
+        },
+        run_inline=lambda job_id: _run_workbook_auto_process_job(
             file_id=file_id,
             workbook_name=workbook_name,
             sheet_entries=sheet_entries,
@@ -2986,15 +3172,7 @@ async def analyze_storage_file_endpoint(
         # Detect and process file
         file_type = detect_file_type(request.file_name)
         
-        if file_type == 'csv':
-            records = process_csv(file_content)
-        elif file_type == 'excel':
-            records = process_excel(file_content)
-        elif file_type == 'json':
-            records = process_json(file_content)
-        elif file_type == 'xml':
-            records = process_xml(file_content)
-        else:
+        if file_type not in ('csv', 'excel', 'json', 'xml'):
             raise HTTPException(status_code=400, detail="Unsupported file type")
 
         normalized_instruction, saved_instruction_id = _resolve_llm_instruction(
@@ -3006,7 +3184,7 @@ async def analyze_storage_file_endpoint(
         require_explicit_multi_value = bool(request.require_explicit_multi_value)
         
         # Smart sampling
-        sample, total_rows = sample_file_data(records, request.sample_size, max_sample_size=50)
+        sample, total_rows = sample_file_stream(file_content, file_type, request.sample_size, max_sample_size=50)
         
         # Prepare metadata
         file_metadata = {
@@ -3232,18 +3410,12 @@ async def analyze_file_interactive_endpoint(
             elif available_sheets:
                 target_sheet_name = available_sheets[0]
 
-        if file_type == 'csv':
-            records = process_csv(file_content)
-        elif file_type == 'excel':
-            records = process_excel(file_content, sheet_name=target_sheet_name)
-        elif file_type == 'json':
-            records = process_json(file_content)
-        elif file_type == 'xml':
-            records = process_xml(file_content)
-        else:
+        if file_type not in ('csv', 'excel', 'json', 'xml'):
             raise HTTPException(status_code=400, detail="Unsupported file type")
 
-        sample, total_rows = sample_file_data(records, None, max_sample_size=50)
+        sample, total_rows = sample_file_stream(
+            file_content, file_type, None, max_sample_size=50, sheet_name=target_sheet_name
+        )
         resolved_instruction, saved_instruction_id = _resolve_llm_instruction(
             llm_instruction=request.llm_instruction,
             llm_instruction_id=request.llm_instruction_id,
@@ -3356,16 +3528,7 @@ async def execute_interactive_import_endpoint(
             file_content = extract_excel_sheet_csv_bytes(file_content, session.sheet_name)
             file_type = "csv"
 
-        if file_type == 'csv':
-            records = process_csv(file_content)
-        elif file_type == 'excel':
-            records = process_excel(file_content, sheet_name=session.sheet_name)
-        elif file_type == 'json':
-            records = process_json(file_content)
-        elif file_type == 'xml':
-            records = process_xml(file_content)
-        else:
-            raise HTTPException(status_code=400, detail="Unsupported file type")
+        records = _parse_file_records(file_content, file_type, sheet_name=session.sheet_name)
 
         update_file_status(
             request.file_id,
@@ -3422,7 +3585,7 @@ async def execute_interactive_import_endpoint(
                 )
 
             session.status = "completed"
-            interactive_sessions.pop(request.thread_id, None)
+            _discard_interactive_session(request.thread_id)
 
             duplicates_skipped = execution_result.get("duplicates_skipped", 0) or 0
             duplicate_rows = execution_result.get("duplicate_rows")
@@ -7,7 +7,7 @@ from typing import Optional
 
 from app.db.session import get_db
 from app.core.security import get_current_user, User
-from app.core.api_key_auth import create_api_key, list_api_keys, delete_api_key, ApiKey
+from app.core.api_key_auth import create_api_key, list_api_keys, delete_api_key, invalidate_api_key_cache, ApiKey
 from app.api.schemas.api_keys import (
     CreateApiKeyRequest, CreateApiKeyResponse, ListApiKeysResponse, ApiKeyInfo,
     RevokeApiKeyResponse, UpdateApiKeyRequest, UpdateApiKeyResponse
@@ -203,6 +203,7 @@ async def update_api_key_endpoint(
         
         db.commit()
         db.refresh(api_key)
+        invalidate_api_key_cache(api_key.id)
         
         # Convert to response format
         key_preview = f"...{api_key.key_hash[-4:]}"
@@ -7,16 +7,20 @@ for exporting large datasets as CSV files.
 import re
 import time
 from typing import Optional
-from fastapi import APIRouter, HTTPException, Depends
+from uuid import uuid4
+from fastapi import APIRouter, HTTPException, Depends, Request
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from sqlalchemy import text
 from io import StringIO
 import csv
 
-from app.db.session import get_engine
+from app.db.session import get_read_engine
+from app.db.system_tables import SYSTEM_TABLES
 from app.core.config import settings
 from app.core.api_key_auth import get_api_key_from_header
+from app.domain.queries.cost_guard import QueryCostExceeded, guard_query_cost
+from app.domain.queries.running import QueryCancelled, run_cancelling_on_disconnect, track_query
 
 
 router = APIRouter(
@@ -25,24 +29,6 @@ router = APIRouter(
 )
 
 
-# Protected system tables (same as agent.py)
-PROTECTED_SYSTEM_TABLES = {
-    'import_history',
-    'mapping_errors',
-    'table_metadata',
-    'uploaded_files',
-    'users',
-    'file_imports',
-    'import_jobs',
-    'llm_instructions',
-    'api_keys',
-    'import_duplicates',
-    'query_messages',
-    'query_threads',
-    'table_fingerprints',
-}
-
-
 class ExportQueryRequest(BaseModel):
     """Request model for export query endpoint."""
     sql_query: str = Field(..., description="SQL SELECT query to execute")
@@ -63,7 +49,7 @@ def validate_export_query(sql_query: str) -> tuple[bool, Optional[str]]:
     
     # Check for protected system tables
     sql_upper = sql_query.upper()
-    for table in PROTECTED_SYSTEM_TABLES:
+    for table in SYSTEM_TABLES:
         table_patterns = [
             rf'\bFROM\s+["\']?{table.upper()}["\']?\b',
             rf'\bJOIN\s+["\']?{table.upper()}["\']?\b',
@@ -119,7 +105,7 @@ def generate_csv_stream(rows, columns):
 
 
 @router.post("/query", dependencies=[Depends(get_api_key_from_header)])
-async def export_query(request: ExportQueryRequest):
+async def export_query(request: ExportQueryRequest, http_request: Request):
     """
     Execute a SQL query and stream results as CSV download.
     
@@ -130,7 +116,11 @@ async def export_query(request: ExportQueryRequest):
     - Only SELECT queries allowed
     - No access to protected system tables
     - 120-second timeout (configurable via EXPORT_TIMEOUT_SECONDS)
+    - Queries over the planner cost limits are rejected before running
+      (QUERY_MAX_PLAN_COST / QUERY_MAX_PLAN_ROWS)
     - Requires API key authentication
+    - Listed under GET /queries/running while it runs, and cancelled when the
+      client disconnects
     
     **Example Request:**
     ```json
@@ -150,7 +140,7 @@ async def export_query(request: ExportQueryRequest):
         if not is_valid:
             raise HTTPException(status_code=400, detail=error_message)
         
-        engine = get_engine()
+        engine = get_read_engine(sql=request.sql_query)
         
         # Determine filename
         filename = request.filename or "export.csv"
@@ -158,37 +148,53 @@ async def export_query(request: ExportQueryRequest):
             filename += '.csv'
         
         start_time = time.time()
+        query_id = str(uuid4())
+        
+        def run_export():
+            with engine.connect() as conn:
+                # Set timeout based on configuration
+                timeout_ms = settings.export_timeout_seconds * 1000
+                conn.execute(text(f"SET statement_timeout = '{timeout_ms}'"))
+                
+                # Refuse queries the planner expects to be too expensive
+                try:
+                    sql_to_run = guard_query_cost(conn, request.sql_query, settings.export_row_limit)
+                except QueryCostExceeded as cost_error:
+                    raise HTTPException(status_code=400, detail=str(cost_error))
+                
+                # Execute query, registered so it can be cancelled while it runs
+                with track_query(conn, sql_to_run, "export", query_id=query_id):
+                    result = conn.execute(text(sql_to_run))
+                    columns = list(result.keys())
+                    
+                    # Fetch rows based on configuration
+                    rows = result.fetchmany(settings.export_row_limit)
+            return columns, rows
+        
+        # Runs off the event loop; a client disconnect cancels the query
+        try:
+            columns, rows = await run_cancelling_on_disconnect(http_request, query_id, run_export)
+        except QueryCancelled:
+            raise HTTPException(status_code=499, detail="Client disconnected; export query cancelled")
         
-        with engine.connect() as conn:
-            # Set timeout based on configuration
-            timeout_ms = settings.export_timeout_seconds * 1000
-            conn.execute(text(f"SET statement_timeout = '{timeout_ms}'"))
-            
-            # Execute query
-            result = conn.execute(text(request.sql_query))
-            columns = list(result.keys())
-            
-            # Fetch rows based on configuration
-            rows = result.fetchmany(settings.export_row_limit)
-            
-            execution_time = time.time() - start_time
-            
-            if not rows:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Query executed successfully but returned no results. Execution time: {execution_time:.2f}s"
-                )
-            
-            # Return streaming CSV response
-            return StreamingResponse(
-                generate_csv_stream(rows, columns),
-                media_type="text/csv",
-                headers={
-                    "Content-Disposition": f'attachment; filename="{filename}"',
-                    "X-Row-Count": str(len(rows)),
-                    "X-Execution-Time": f"{execution_time:.2f}s"
-                }
+        execution_time = time.time() - start_time
+        
+        if not rows:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Query executed successfully but returned no results. Execution time: {execution_time:.2f}s"
             )
+        
+        # Return streaming CSV response
+        return StreamingResponse(
+            generate_csv_stream(rows, columns),
+            media_type="text/csv",
+            headers={
+                "Content-Disposition": f'attachment; filename="{filename}"',
+                "X-Row-Count": str(len(rows)),
+                "X-Execution-Time": f"{execution_time:.2f}s"
+            }
+        )
     
     except HTTPException:
         raise
@@ -8,7 +8,7 @@ from typing import Optional
 from app.db.session import get_db
 from app.api.schemas.shared import (
     ImportHistoryListResponse, ImportHistoryRecord,
-    ImportHistoryDetailResponse, ImportStatisticsResponse,
+    ImportHistoryDetailResponse, ImportStatisticsResponse, ImportProfileResponse,
     ImportDuplicateRowsResponse, DuplicateDetailResponse,
     DuplicateMergeRequest, DuplicateMergeResponse,
     ImportMappingErrorsResponse, MappingErrorHistoryRecord,
@@ -18,6 +18,7 @@ from app.api.schemas.shared import (
 )
 from app.domain.imports.history import (
     get_import_history,
+    get_import_profile,
     get_import_statistics,
     list_duplicate_rows,
     get_duplicate_row_detail,
@@ -260,6 +261,31 @@ async def get_import_detail(
         raise HTTPException(status_code=500, detail=f"Failed to retrieve import details: {str(e)}")
 
 
+@router.get("/{import_id}/profile", response_model=ImportProfileResponse)
+async def get_import_profile_endpoint(
+    import_id: str,
+    db: Session = Depends(get_db)
+):
+    """
+    Get the performance profile recorded for an import.
+
+    Includes per-stage wall/CPU time and rows/sec, per-chunk timings, peak
+    memory, database round trips and bytes read. `profile` is null for imports
+    recorded before profiling was enabled.
+    """
+    try:
+        profile = get_import_profile(import_id)
+        if profile is None:
+            raise HTTPException(status_code=404, detail=f"Import {import_id} not found")
+
+        return ImportProfileResponse(success=True, **profile)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve import profile: {str(e)}")
+
+
 @router.get("/{import_id}/duplicates", response_model=ImportDuplicateRowsResponse)
 async def get_import_duplicate_rows(
     import_id: str,
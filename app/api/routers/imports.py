@@ -7,11 +7,11 @@ from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
 from sqlalchemy.orm import Session
 import json
 import hashlib
-import time
 
 from app.db.session import get_db
 from app.api.schemas.shared import MapDataRequest, MapDataResponse, MappingConfig, MapB2DataRequest, DuplicateCheckConfig
-from app.api.dependencies import records_cache, CACHE_TTL_SECONDS
+from app.api.dependencies import records_cache
+from app.core.metrics import record_cache_lookup
 from app.integrations.storage import download_file
 from app.core.security import get_optional_user, User
 
@@ -101,61 +101,29 @@ async def map_data_endpoint(
         file_hash = hashlib.sha256(file_content).hexdigest()
         
         # Check if we have cached records from /detect-mapping
-        cached_records = None
-        use_mapped_cache = False
-        current_time = time.time()
-        
-        # Generate config hash to check if mapping changed
-        config_hash = hashlib.sha256(mapping_json.encode()).hexdigest()
-        
-        if file_hash in records_cache:
-            cache_entry = records_cache[file_hash]
-            timestamp = cache_entry.get('timestamp', 0)
-            
-            # Check if cache is still valid (within TTL)
-            if current_time - timestamp <= CACHE_TTL_SECONDS:
-                # Check if we have mapped records with matching config
-                if cache_entry.get('config_hash') == config_hash and 'mapped_records' in cache_entry:
-                    cached_records = cache_entry['mapped_records']
-                    use_mapped_cache = True
-                    logger.info(
-                        "CACHE HIT: using cached mapped records for file hash %s... (%d records)",
-                        file_hash[:8],
-                        len(cached_records),
-                    )
-                elif 'raw_records' in cache_entry:
-                    cached_records = cache_entry['raw_records']
-                    logger.info(
-                        "CACHE HIT: using cached raw records for file hash %s... (%d records)",
-                        file_hash[:8],
-                        len(cached_records),
-                    )
-            else:
-                # Cache expired, remove it
-                del records_cache[file_hash]
-                logger.info("Cache expired for file hash %s...", file_hash[:8])
+        cached_records = records_cache.get(file_hash)
+        if cached_records is not None:
+            logger.info(
+                "CACHE HIT: using cached raw records for file hash %s... (%d records)",
+                file_hash[:8],
+                len(cached_records),
+            )
         else:
             logger.info("CACHE MISS: no cached records for file hash %s...", file_hash[:8])
         
+        record_cache_lookup("records", cached_records is not None)
+
         # Execute unified import with optional cached records
-        # Pass pre_mapped=True only if we're using cached MAPPED records
         result = execute_data_import(
             file_content=file_content,
             file_name=file.filename,
             mapping_config=config,
             source_type="local_upload",
-            pre_parsed_records=cached_records,
-            pre_mapped=use_mapped_cache
+            pre_parsed_records=cached_records
         )
         
-        # Update cache with mapped records if we didn't use mapped cache
-        # This allows subsequent imports with same config to skip mapping
-        if not use_mapped_cache and file_hash in records_cache:
-            # Note: We would need to get mapped_records from execute_data_import
-            # For now, we'll keep the cache entry but update timestamp
-            records_cache[file_hash]['timestamp'] = current_time
-            records_cache[file_hash]['config_hash'] = config_hash
-            logger.info("Updated cache entry for file hash %s...", file_hash[:8])
+        # Keep the entry warm so a re-import of the same file skips parsing
+        records_cache.touch(file_hash)
 
         return MapDataResponse(
             success=True,
@@ -5,11 +5,10 @@ import logging
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
 from sqlalchemy.orm import Session
 import hashlib
-import time
 
 from app.db.session import get_db
 from app.api.schemas.shared import DetectB2MappingRequest, DetectB2MappingResponse
-from app.api.dependencies import records_cache, CACHE_TTL_SECONDS
+from app.api.dependencies import records_cache
 from app.integrations.storage import download_file
 from app.domain.imports.mapper import detect_mapping_from_file
 
@@ -52,27 +51,13 @@ async def detect_mapping_endpoint(
             file_content, file.filename, return_records=True
         )
         
-        # Cache the parsed records for 5 minutes (to be used by /map-data)
-        current_time = time.time()
-        
-        # Store in enhanced cache structure
-        records_cache[file_hash] = {
-            'raw_records': records,
-            'timestamp': current_time,
-            'file_name': file.filename
-        }
-        
-        # Clean up old cache entries (older than TTL)
-        expired_keys = [k for k, v in records_cache.items() 
-                       if current_time - v.get('timestamp', 0) > CACHE_TTL_SECONDS]
-        for key in expired_keys:
-            del records_cache[key]
-        
-        logger.info(
-            "Cached %d raw records for file hash %s...",
-            len(records),
-            file_hash[:8],
-        )
+        # Cache the parsed records for /map-data (bounded, expires when unused)
+        if records_cache.put(file_hash, records, file_name=file.filename):
+            logger.info(
+                "Cached %d raw records for file hash %s...",
+                len(records),
+                file_hash[:8],
+            )
 
         return DetectB2MappingResponse(
             success=True,
@@ -5,7 +5,8 @@ from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db, get_engine
+from app.db.context import list_user_table_names
+from app.db.session import get_db, get_read_engine
 from app.api.schemas.shared import (
     QueryDatabaseRequest, QueryDatabaseResponse,
     GenerateSQLRequest, GenerateSQLResponse,
@@ -159,23 +160,10 @@ async def public_list_tables_endpoint(
     Requires `X-API-Key` header.
     """
     try:
-        engine = get_engine()
+        engine = get_read_engine()
         with engine.connect() as conn:
-            # Query information_schema for user-created tables (exclude system tables)
-            result = conn.execute(text("""
-                SELECT table_name
-                FROM information_schema.tables
-                WHERE table_schema = 'public'
-                AND table_name NOT IN ('spatial_ref_sys', 'geography_columns', 'geometry_columns', 'raster_columns', 'raster_overviews',
-                                     'file_imports', 'table_metadata', 'import_history', 'uploaded_files', 'users', 'mapping_errors', 'import_jobs', 'import_duplicates', 'mapping_chunk_status', 'api_keys', 'query_messages', 'query_threads', 'llm_instructions', 'table_fingerprints')
-                AND table_name NOT LIKE 'pg_%'
-                AND table_name NOT LIKE 'test\_%' ESCAPE '\\'
-                ORDER BY table_name
-            """))
-
             tables = []
-            for row in result:
-                table_name = row[0]
+            for table_name in list_user_table_names(conn):
 
                 # Get row count for each table
                 count_result = conn.execute(text(f"SELECT COUNT(*) FROM \"{table_name}\""))
@@ -219,7 +207,7 @@ async def public_get_table_schema_endpoint(
         if is_reserved_system_table(table_name):
             raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found")
 
-        engine = get_engine()
+        engine = get_read_engine([table_name])
         with engine.connect() as conn:
             # Validate table exists
             table_check = conn.execute(text("""
@@ -4,15 +4,18 @@ Natural language database query endpoint using LangChain agent.
 import logging
 from uuid import uuid4
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.exc import ProgrammingError
 
 from app.api.schemas.shared import (
+    CancelQueryResponse,
     QueryConversationListResponse,
     QueryConversationResponse,
     QueryDatabaseRequest,
     QueryDatabaseResponse,
+    RunningQueriesResponse,
 )
+from app.core.api_key_auth import get_api_key_from_header
 from app.domain.queries.agent import query_database_with_agent
 from app.domain.queries.history import (
     get_latest_query_conversation,
@@ -20,6 +23,7 @@ from app.domain.queries.history import (
     list_query_threads,
     save_query_message,
 )
+from app.domain.queries.running import cancel_query, list_running_queries
 
 router = APIRouter(tags=["query"])
 router_v1 = APIRouter(prefix="/api/v1", tags=["query"])
@@ -166,3 +170,42 @@ async def list_conversations(limit: int = 50, offset: int = 0):
         raise _log_and_wrap_error("list conversations", e)
     except Exception as e:
         raise _log_and_wrap_error("list conversations", e)
+
+
+# Running queries include SQL from the API-key protected export endpoint, so these need a key too
+@router.get("/queries/running", response_model=RunningQueriesResponse, dependencies=[Depends(get_api_key_from_header)])
+@router_v1.get("/queries/running", response_model=RunningQueriesResponse, dependencies=[Depends(get_api_key_from_header)])
+async def list_running_queries_endpoint():
+    """List agent and export queries that are currently executing, oldest first."""
+
+    try:
+        return RunningQueriesResponse(success=True, queries=list_running_queries())
+    except Exception as e:
+        raise _log_and_wrap_error("list running queries", e)
+
+
+@router.delete("/queries/{query_id}", response_model=CancelQueryResponse, dependencies=[Depends(get_api_key_from_header)])
+@router_v1.delete("/queries/{query_id}", response_model=CancelQueryResponse, dependencies=[Depends(get_api_key_from_header)])
+async def cancel_query_endpoint(query_id: str):
+    """
+    Cancel a running query with pg_cancel_backend.
+
+    The query stops with "canceling statement due to user request"; agent
+    queries report that error to the conversation, and exports fail.
+    """
+
+    try:
+        cancelled = cancel_query(query_id)
+    except Exception as e:
+        raise _log_and_wrap_error("cancel query", e)
+
+    if cancelled is None:
+        raise HTTPException(status_code=404, detail=f"Query '{query_id}' is not running")
+
+    logger.info("Cancel for query_id=%s %s", query_id, "sent" if cancelled else "was not accepted")
+    return CancelQueryResponse(
+        success=True,
+        query_id=query_id,
+        cancelled=cancelled,
+        message="Cancel request sent" if cancelled else "The database did not accept the cancel request",
+    )
@@ -6,12 +6,17 @@ import json
 from io import StringIO
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
 from fastapi.responses import StreamingResponse
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db, get_engine
+from app.db.context import list_user_table_names
+from app.db.session import get_db, get_engine, get_read_engine
+from app.domain.imports.column_profiles import delete_table_profiles, get_table_profile
+from app.db.models import forget_import_partitions
+from app.domain.imports.decision_cache import invalidate_cached_decisions
+from app.domain.queries.running import register_query, stream_cancelling_on_disconnect, unregister_query
 from app.api.schemas.shared import (
     TablesListResponse, TableInfo, TableDataResponse,
     TableSchemaResponse, ColumnInfo, TableStatsResponse,
@@ -33,23 +38,10 @@ async def list_tables(db: Session = Depends(get_db)):
     - List of table names with row counts
     """
     try:
-        engine = get_engine()
+        engine = get_read_engine()
         with engine.connect() as conn:
-            # Query information_schema for user-created tables (exclude system tables)
-            result = conn.execute(text("""
-                SELECT table_name
-                FROM information_schema.tables
-                WHERE table_schema = 'public'
-                AND table_name NOT IN ('spatial_ref_sys', 'geography_columns', 'geometry_columns', 'raster_columns', 'raster_overviews',
-                                     'file_imports', 'table_metadata', 'import_history', 'uploaded_files', 'users', 'mapping_errors', 'import_jobs', 'import_duplicates', 'mapping_chunk_status', 'api_keys', 'query_messages', 'query_threads', 'llm_instructions', 'table_fingerprints', 'import_validation_failures')
-                AND table_name NOT LIKE 'pg_%'
-                AND table_name NOT LIKE 'test\_%' ESCAPE '\\'
-                ORDER BY table_name
-            """))
-
             tables = []
-            for row in result:
-                table_name = row[0]
+            for table_name in list_user_table_names(conn):
 
                 # Get row count for each table
                 count_result = conn.execute(text(f"SELECT COUNT(*) FROM \"{table_name}\""))
@@ -121,7 +113,7 @@ async def query_table(
 
                 parsed_filters.append({"column": column, "operator": operator, "value": value})
 
-        engine = get_engine()
+        engine = get_read_engine([table_name])
         with engine.connect() as conn:
             table_check = conn.execute(text("""
                 SELECT table_name FROM information_schema.tables
@@ -247,6 +239,7 @@ async def query_table(
 @router.get("/{table_name}/export")
 async def export_table(
     table_name: str,
+    request: Request,
     limit: Optional[int] = Query(
         default=None,
         ge=1,
@@ -260,13 +253,14 @@ async def export_table(
     Stream the full contents of a user table as CSV.
 
     The export excludes metadata columns (prefixed with "_") and returns a streaming
-    CSV response so large tables do not exhaust memory.
+    CSV response so large tables do not exhaust memory. The query is listed under
+    GET /queries/running and cancelled if the client disconnects mid-download.
     """
     try:
         if is_reserved_system_table(table_name):
             raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found")
 
-        engine = get_engine()
+        engine = get_read_engine([table_name])
         conn = engine.connect()
         try:
             table_check = conn.execute(
@@ -332,7 +326,13 @@ async def export_table(
 
             query = text("\n".join(sql_parts))
 
-            stream_result = conn.execution_options(stream_results=True).execute(query, query_params)
+            # Rows are fetched while streaming, so the query runs until the stream ends
+            query_id = register_query(conn, str(query), "table_export")
+            try:
+                stream_result = conn.execution_options(stream_results=True).execute(query, query_params)
+            except Exception:
+                unregister_query(query_id)
+                raise
 
             def row_stream():
                 buffer = StringIO()
@@ -358,6 +358,7 @@ async def export_table(
                         buffer.seek(0)
                         buffer.truncate(0)
                 finally:
+                    unregister_query(query_id)
                     stream_result.close()
                     conn.close()
 
@@ -367,7 +368,7 @@ async def export_table(
             }
 
             return StreamingResponse(
-                row_stream(),
+                stream_cancelling_on_disconnect(request, query_id, row_stream()),
                 media_type="text/csv",
                 headers=headers,
             )
@@ -402,7 +403,7 @@ async def get_table_schema(table_name: str, db: Session = Depends(get_db)):
         if is_reserved_system_table(table_name):
             raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found")
 
-        engine = get_engine()
+        engine = get_read_engine([table_name])
         with engine.connect() as conn:
             # Validate table exists
             table_check = conn.execute(text("""
@@ -448,7 +449,9 @@ async def get_table_stats(table_name: str, db: Session = Depends(get_db)):
     Get basic table statistics.
     
     Returns summary statistics for a table including row count,
-    column count, and data type distribution.
+    column count, and data type distribution. Tables loaded through imports
+    also include per-column profiles (null counts, distinct estimates,
+    min/max, top values, numeric histograms) computed during ingest.
     
     Parameters:
     - table_name: Name of the table
@@ -460,7 +463,7 @@ async def get_table_stats(table_name: str, db: Session = Depends(get_db)):
         if is_reserved_system_table(table_name):
             raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found")
 
-        engine = get_engine()
+        engine = get_read_engine([table_name])
         with engine.connect() as conn:
             # Validate table exists
             table_check = conn.execute(text("""
@@ -488,12 +491,21 @@ async def get_table_stats(table_name: str, db: Session = Depends(get_db)):
             data_types = {row[0]: row[1] for row in columns_result}
             columns_count = len(data_types)
 
+        profile = get_table_profile(table_name)
+        column_profiles = None
+        if profile:
+            column_profiles = {
+                name: summary for name, summary in profile["columns"].items() if name in data_types
+            }
+
         return TableStatsResponse(
             success=True,
             table_name=table_name,
             total_rows=total_rows,
             columns_count=columns_count,
-            data_types=data_types
+            data_types=data_types,
+            profiled_rows=profile["rows_profiled"] if profile else None,
+            column_profiles=column_profiles,
         )
 
     except HTTPException:
@@ -600,6 +612,8 @@ async def delete_table(
                 WHERE table_name = :table_name
             """), {"table_name": table_name})
             file_imports_deleted = file_imports_result.rowcount
+
+            delete_table_profiles(conn, table_name)
             
             # Reset uploaded_files status to 'uploaded' (unmapped state)
             uploaded_files_result = conn.execute(text("""
@@ -612,6 +626,9 @@ async def delete_table(
                 WHERE mapped_table_name = :table_name
             """), {"table_name": table_name})
             uploaded_files_reset = uploaded_files_result.rowcount
+
+        invalidate_cached_decisions(table_name)
+        forget_import_partitions(table_name)
         
         return {
             "success": True,
@@ -1,15 +1,30 @@
 """
 Async task management endpoints for long-running operations.
 """
+from typing import Any, Dict, Optional
+
 from fastapi import APIRouter, HTTPException, BackgroundTasks
 import uuid
 
 from app.api.schemas.shared import MapB2DataAsyncRequest, AsyncTaskStatus, MapDataResponse, MappingConfig
 from app.api.dependencies import task_storage
+from app.core.config import settings
+from app.domain.imports.job_queue import enqueue_import_job, register_job_handler
+from app.domain.imports.jobs import get_import_job, update_import_job, complete_import_job
 from app.integrations.storage import download_file
 
 router = APIRouter(tags=["tasks"])
 
+MAP_B2_DATA_JOB_TYPE = "map_b2_data"
+
+# import_jobs.status -> AsyncTaskStatus.status
+_JOB_STATUS_TO_TASK_STATUS = {
+    "queued": "pending",
+    "running": "processing",
+    "succeeded": "completed",
+    "failed": "failed",
+}
+
 
 def process_storage_data_async(task_id: str, file_name: str, mapping: MappingConfig):
     """Background task for processing B2 data asynchronously."""
@@ -87,6 +102,85 @@ def process_storage_data_async(task_id: str, file_name: str, mapping: MappingCon
         )
 
 
+@register_job_handler(MAP_B2_DATA_JOB_TYPE)
+def process_storage_data_job(job: Dict[str, Any]) -> None:
+    """
+    Worker entry point for queued /map-b2-data-async requests.
+
+    Progress and the final MapDataResponse are stored on the import job so
+    /tasks/{task_id} can report them from any API replica. Unexpected errors
+    propagate so the worker can retry the job.
+    """
+    from app.domain.imports.orchestrator import execute_data_import
+    from app.db.models import FileAlreadyImportedException, DuplicateDataException
+
+    job_id = job["id"]
+    payload = job["payload"]
+    file_name = payload["file_name"]
+    mapping = MappingConfig(**payload["mapping"])
+
+    update_import_job(job_id, stage="download", progress=10, metadata={"message": "Downloading file from B2..."})
+    file_content = download_file(file_name)
+
+    update_import_job(job_id, stage="import", progress=30, metadata={"message": "Processing and importing data..."})
+    try:
+        result = execute_data_import(
+            file_content=file_content,
+            file_name=file_name,
+            mapping_config=mapping,
+            source_type="b2_storage",
+            source_path=file_name
+        )
+    except (FileAlreadyImportedException, DuplicateDataException) as e:
+        # Retrying cannot change the outcome
+        complete_import_job(job_id, success=False, error_message=str(e))
+        return
+
+    response = MapDataResponse(
+        success=True,
+        message="B2 data mapped and inserted successfully",
+        records_processed=result["records_processed"],
+        duplicates_skipped=result.get("duplicates_skipped", 0),
+        duplicate_rows=result.get("duplicate_rows"),
+        duplicate_rows_count=result.get("duplicate_rows_count"),
+        import_id=result.get("import_id"),
+        table_name=result["table_name"]
+    )
+    update_import_job(job_id, progress=100, metadata={"message": "Processing completed successfully"})
+    complete_import_job(job_id, success=True, result_metadata=response.model_dump(mode="json"))
+
+
+def _task_status_from_job(task_id: str) -> Optional[AsyncTaskStatus]:
+    """Build a task status from a queued map_b2_data job, if one exists."""
+    try:
+        uuid.UUID(task_id)
+    except ValueError:
+        return None
+    job = get_import_job(task_id)
+    if not job or job.get("job_type") != MAP_B2_DATA_JOB_TYPE:
+        return None
+
+    status = _JOB_STATUS_TO_TASK_STATUS.get(job["status"], "processing")
+    if status == "completed":
+        message = "Processing completed successfully"
+    elif status == "failed":
+        message = job.get("error_message") or "Processing failed"
+    else:
+        message = (job.get("metadata") or {}).get("message") or "Task queued for processing"
+
+    result = None
+    if status == "completed" and job.get("result_metadata"):
+        result = MapDataResponse(**job["result_metadata"])
+
+    return AsyncTaskStatus(
+        task_id=task_id,
+        status=status,
+        progress=100 if status == "completed" else (job.get("progress") or 0),
+        message=message,
+        result=result,
+    )
+
+
 @router.post("/map-b2-data-async", response_model=AsyncTaskStatus)
 async def map_storage_data_async_endpoint(
     request: MapB2DataAsyncRequest,
@@ -108,6 +202,23 @@ async def map_storage_data_async_endpoint(
     """
     task_id = str(uuid.uuid4())
 
+    if settings.job_queue_enabled:
+        # Hand off to `python -m app.worker`; the task id is the import job id
+        enqueue_import_job(
+            job_id=task_id,
+            job_type=MAP_B2_DATA_JOB_TYPE,
+            trigger_source="map_b2_data_async",
+            payload={
+                "file_name": request.file_name,
+                "mapping": request.mapping.model_dump(mode="json"),
+            },
+        )
+        return AsyncTaskStatus(
+            task_id=task_id,
+            status="pending",
+            message="Task queued for processing"
+        )
+
     # Initialize task status
     task_storage[task_id] = AsyncTaskStatus(
         task_id=task_id,
@@ -143,7 +254,10 @@ async def get_task_status(task_id: str):
     - Result (if completed)
     - Error message (if failed)
     """
-    if task_id not in task_storage:
-        raise HTTPException(status_code=404, detail="Task not found")
+    if task_id in task_storage:
+        return task_storage[task_id]
 
-    return task_storage[task_id]
+    queued_status = _task_status_from_job(task_id)
+    if queued_status is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return queued_status
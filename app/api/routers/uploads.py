@@ -2,8 +2,11 @@
 File upload endpoints for managing files in B2 storage.
 """
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Any, Dict, Optional
+import hashlib
+import os
 import traceback
 
 from app.db.session import get_db
@@ -27,7 +30,8 @@ from app.integrations.storage_multipart import (
     complete_multipart_upload,
     abort_multipart_upload,
     calculate_part_ranges,
-    get_optimal_part_size
+    get_optimal_part_size,
+    upload_stream_multipart
 )
 from app.domain.uploads.uploaded_files import (
     insert_uploaded_file, get_uploaded_file_by_name, get_uploaded_file_by_id,
@@ -54,6 +58,44 @@ def _ensure_within_size_limit(file_size: int, file_name: str) -> None:
         )
 
 
+def _upload_size(file: UploadFile) -> int:
+    """Size of a received upload; the body is already spooled, so this does not read it."""
+    if file.size is not None:
+        return file.size
+    file.file.seek(0, os.SEEK_END)
+    size = file.file.tell()
+    file.file.seek(0)
+    return size
+
+
+def _store_upload(file: UploadFile, file_size: int) -> Dict[str, Any]:
+    """
+    Send a received upload to storage.
+    
+    Files that fit in one part go up in a single PUT. Larger files are read
+    from the spooled upload part by part and pushed through a parallel
+    multipart upload, so the whole file is never held in memory.
+    """
+    part_size = get_optimal_part_size(file_size)
+    file.file.seek(0)
+    if file_size <= part_size:
+        file_content = file.file.read()
+        storage_result = upload_file_to_storage(
+            file_content=file_content,
+            file_name=file.filename,
+            folder="uploads"
+        )
+        storage_result["file_hash"] = hashlib.sha256(file_content).hexdigest()
+        return storage_result
+    return upload_stream_multipart(
+        file.file,
+        file.filename,
+        folder="uploads",
+        content_type=file.content_type,
+        part_size=part_size
+    )
+
+
 @router.post("/upload-to-b2", response_model=UploadFileResponse)
 async def upload_file_to_storage_endpoint(
     file: UploadFile = File(...),
@@ -96,23 +138,16 @@ async def upload_file_to_storage_endpoint(
         else:
             print(f"[UPLOAD] File not found in database, proceeding with new upload")
         
-        # Read file content
-        print(f"[UPLOAD] Reading file content...")
-        file_content = await file.read()
-        file_size = len(file_content)
+        file_size = _upload_size(file)
         _ensure_within_size_limit(file_size, file.filename)
         print(f"[UPLOAD] File size: {file_size} bytes ({file_size / 1024:.2f} KB)")
         
         # Upload to storage
-        print(f"[UPLOAD] Calling upload_file_to_storage()...")
+        print(f"[UPLOAD] Uploading to storage...")
         print(f"[UPLOAD] Target folder: uploads")
         print(f"[UPLOAD] Target filename: {file.filename}")
         
-        storage_result = upload_file_to_storage(
-            file_content=file_content,
-            file_name=file.filename,
-            folder="uploads"
-        )
+        storage_result = await run_in_threadpool(_store_upload, file, file_size)
         
         print(f"[UPLOAD] Storage upload successful!")
         print(f"[UPLOAD] File ID: {storage_result['file_id']}")
@@ -127,7 +162,8 @@ async def upload_file_to_storage_endpoint(
             b2_file_path=storage_result["file_path"],
             file_size=file_size,
             content_type=file.content_type,
-            user_id=None  # TODO: Get from auth context
+            user_id=None,  # TODO: Get from auth context
+            file_hash=storage_result.get("file_hash")
         )
         
         print(f"[UPLOAD] Database record created: {uploaded_file['id']}")
@@ -175,17 +211,11 @@ async def overwrite_file_in_storage_endpoint(
             # Delete old database record
             delete_uploaded_file(existing_file["id"])
         
-        # Read file content
-        file_content = await file.read()
-        file_size = len(file_content)
+        file_size = _upload_size(file)
         _ensure_within_size_limit(file_size, file.filename)
         
         # Upload new version to storage
-        storage_result = upload_file_to_storage(
-            file_content=file_content,
-            file_name=file.filename,
-            folder="uploads"
-        )
+        storage_result = await run_in_threadpool(_store_upload, file, file_size)
         
         # Store in database
         uploaded_file = insert_uploaded_file(
@@ -194,7 +224,8 @@ async def overwrite_file_in_storage_endpoint(
             b2_file_path=storage_result["file_path"],
             file_size=file_size,
             content_type=file.content_type,
-            user_id=None  # TODO: Get from auth context
+            user_id=None,  # TODO: Get from auth context
+            file_hash=storage_result.get("file_hash")
         )
         
         return UploadFileResponse(
@@ -5,27 +5,10 @@ from typing import Any, Dict, List, Optional, Literal
 
 from pydantic import BaseModel, Field, field_validator
 
+from app.db.system_tables import SYSTEM_TABLES
 
-RESERVED_SYSTEM_TABLES = {
-    # Import + mapping infrastructure
-    "file_imports",
-    "table_metadata",
-    "import_history",
-    "mapping_errors",
-    "uploaded_files",
-    "import_duplicates",
-    "import_jobs",
-    "mapping_chunk_status",
-    # Query + conversation storage
-    "query_threads",
-    "query_messages",
-    # Core platform tables
-    "users",
-    "api_keys",
-    "llm_instructions",
-    "table_fingerprints",
-    "import_validation_failures",
-}
+
+RESERVED_SYSTEM_TABLES = SYSTEM_TABLES
 
 _RESERVED_TABLES_LOWER = {name.lower() for name in RESERVED_SYSTEM_TABLES}
 _RESERVED_TABLE_SUFFIX = "_user_data"
@@ -278,12 +261,26 @@ class TableDataResponse(BaseModel):
     offset: int
 
 
+class ColumnProfileSummary(BaseModel):
+    """Column statistics accumulated while rows were imported."""
+    non_null_count: int
+    null_count: int
+    null_fraction: float
+    distinct_estimate: int
+    min: Optional[Any] = None
+    max: Optional[Any] = None
+    top_values: List[Dict[str, Any]] = []
+    histogram: List[Dict[str, Any]] = []
+
+
 class TableStatsResponse(BaseModel):
     success: bool
     table_name: str
     total_rows: int
     columns_count: int
     data_types: Dict[str, str]
+    profiled_rows: Optional[int] = None
+    column_profiles: Optional[Dict[str, ColumnProfileSummary]] = None
 
 
 class MapB2DataAsyncRequest(BaseModel):
@@ -393,6 +390,30 @@ class QueryConversationListResponse(BaseModel):
     conversations: List[QueryConversationSummary]
 
 
+class RunningQueryInfo(BaseModel):
+    """An agent or export query that is currently executing."""
+    query_id: str
+    pid: int
+    target: str  # 'primary' or 'replica'
+    source: str  # 'agent', 'export', or 'table_export'
+    thread_id: Optional[str] = None
+    sql: str
+    started_at: datetime
+    elapsed_seconds: float
+
+
+class RunningQueriesResponse(BaseModel):
+    success: bool
+    queries: List[RunningQueryInfo]
+
+
+class CancelQueryResponse(BaseModel):
+    success: bool
+    query_id: str
+    cancelled: bool
+    message: str
+
+
 class AnalysisMode(str, Enum):
     """Controls auto-execution behavior"""
     MANUAL = "manual"
@@ -528,6 +549,26 @@ class ImportHistoryDetailResponse(BaseModel):
     import_record: ImportHistoryRecord
 
 
+class MappingChunkTiming(BaseModel):
+    """Timing for one mapping chunk, from mapping_chunk_status"""
+    chunk_number: int
+    status: str
+    errors_count: int = 0
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    duration_seconds: Optional[float] = None
+
+
+class ImportProfileResponse(BaseModel):
+    """Performance profile recorded for one import"""
+    success: bool
+    import_id: str
+    status: Optional[str] = None
+    timings: Dict[str, Optional[float]]
+    profile: Optional[Dict[str, Any]] = None  # None for imports recorded before profiling existed
+    mapping_chunks: List[MappingChunkTiming] = Field(default_factory=list)
+
+
 class ImportStatisticsResponse(BaseModel):
     """Response for import statistics"""
     success: bool
@@ -811,7 +852,8 @@ class AbortMultipartUploadResponse(BaseModel):
 class ImportJobInfo(BaseModel):
     """Metadata about a long-running import job."""
     id: str
-    file_id: str
+    file_id: Optional[str] = None
+    job_type: Optional[str] = None
     status: str
     stage: Optional[str] = None
     progress: Optional[int] = None
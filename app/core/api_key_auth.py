@@ -4,14 +4,22 @@ Provides API key-based authentication for external applications.
 """
 import secrets
 import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from fastapi import Depends, HTTPException, status
 from fastapi.security import APIKeyHeader
 from sqlalchemy.orm import Session
-from sqlalchemy import Column, String, Integer, DateTime, Boolean, Text, JSON
+from sqlalchemy import Column, String, Integer, DateTime, Boolean, Text, JSON, text
+from app.core.config import settings
+from app.core.metrics import record_cache_lookup
 from app.db.session import Base, get_db
 
+logger = logging.getLogger(__name__)
+
 def _utcnow() -> datetime:
     """Return a timezone-aware UTC timestamp."""
     return datetime.now(timezone.utc)
@@ -93,16 +101,217 @@ def verify_api_key(db: Session, api_key: str) -> Optional[ApiKey]:
         return None
     
     # Check expiration
+    if _is_expired(api_key_record):
+        return None
+    
+    return api_key_record
+
+
+def _is_expired(api_key_record: ApiKey) -> bool:
     expires_at = api_key_record.expires_at
-    if expires_at:
-        # Normalize naive timestamps to UTC to avoid offset-aware comparison errors
-        if expires_at.tzinfo is None:
-            expires_at = expires_at.replace(tzinfo=timezone.utc)
+    if not expires_at:
+        return False
+    # Normalize naive timestamps to UTC to avoid offset-aware comparison errors
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    return expires_at < _utcnow()
+
+
+def _detached_copy(api_key_record: ApiKey) -> ApiKey:
+    """Copy column values into a session-free ApiKey safe to share across requests."""
+    return ApiKey(**{
+        column.name: getattr(api_key_record, column.name)
+        for column in ApiKey.__table__.columns
+    })
+
+
+class _ApiKeyCache:
+    """
+    In-process TTL cache of API key lookups keyed by key hash.
+
+    Valid keys are cached for ``api_key_cache_ttl_seconds``; unknown, revoked,
+    or expired keys are cached as misses for the (shorter) negative TTL so a
+    client retrying a bad key doesn't hit the database on every call.
+    Revoke/delete/update invalidate entries in this process; other processes
+    pick up the change once their entry expires.
+    """
+
+    def __init__(self) -> None:
+        self._entries: "OrderedDict[str, Tuple[float, Optional[ApiKey]]]" = OrderedDict()
+        self._lock = threading.Lock()
 
-        if expires_at < _utcnow():
+    def get(self, key_hash: str) -> Tuple[bool, Optional[ApiKey]]:
+        """Return (hit, record); record is None for a cached miss."""
+        with self._lock:
+            entry = self._entries.get(key_hash)
+            if entry is None:
+                return False, None
+            expires_at, record = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key_hash]
+                return False, None
+            self._entries.move_to_end(key_hash)
+            return True, record
+
+    def put(self, key_hash: str, record: Optional[ApiKey]) -> None:
+        ttl = (
+            settings.api_key_cache_ttl_seconds
+            if record is not None
+            else settings.api_key_negative_cache_ttl_seconds
+        )
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key_hash] = (time.monotonic() + ttl, record)
+            self._entries.move_to_end(key_hash)
+            while len(self._entries) > max(1, settings.api_key_cache_max_entries):
+                self._entries.popitem(last=False)
+
+    def invalidate(self, api_key_id: Optional[str] = None, key_hash: Optional[str] = None) -> None:
+        with self._lock:
+            if api_key_id is None and key_hash is None:
+                self._entries.clear()
+                return
+            if key_hash is not None:
+                self._entries.pop(key_hash, None)
+            if api_key_id is not None:
+                stale = [
+                    cached_hash
+                    for cached_hash, (_, record) in self._entries.items()
+                    if record is not None and record.id == api_key_id
+                ]
+                for cached_hash in stale:
+                    del self._entries[cached_hash]
+
+
+_api_key_cache = _ApiKeyCache()
+
+
+def invalidate_api_key_cache(api_key_id: Optional[str] = None) -> None:
+    """Drop cached lookups for one API key, or for all keys when no id is given."""
+    _api_key_cache.invalidate(api_key_id=api_key_id)
+
+
+def verify_api_key_cached(db: Session, api_key: str) -> Optional[ApiKey]:
+    """
+    Verify an API key, serving repeat lookups from the in-process cache.
+
+    Returns a detached ApiKey copy (not attached to ``db``) when valid.
+    """
+    key_hash = hash_api_key(api_key)
+    hit, record = _api_key_cache.get(key_hash)
+    record_cache_lookup("api_key", hit)
+    if hit:
+        if record is not None and _is_expired(record):
+            _api_key_cache.put(key_hash, None)
             return None
-    
-    return api_key_record
+        return record
+
+    api_key_record = verify_api_key(db, api_key)
+    record = _detached_copy(api_key_record) if api_key_record else None
+    _api_key_cache.put(key_hash, record)
+    return record
+
+
+class _LastUsedBuffer:
+    """Coalesces last_used_at updates so they can be written in one batch per interval."""
+
+    def __init__(self) -> None:
+        self._pending: Dict[str, datetime] = {}
+        self._lock = threading.Lock()
+
+    def record(self, api_key_id: str, used_at: datetime) -> None:
+        with self._lock:
+            self._pending[api_key_id] = used_at
+
+    def drain(self) -> Dict[str, datetime]:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            return pending
+
+    def restore(self, pending: Dict[str, datetime]) -> None:
+        with self._lock:
+            for api_key_id, used_at in pending.items():
+                current = self._pending.get(api_key_id)
+                if current is None or current < used_at:
+                    self._pending[api_key_id] = used_at
+
+
+_last_used_buffer = _LastUsedBuffer()
+_flusher: Optional[threading.Thread] = None
+_flusher_stop = threading.Event()
+_flusher_lock = threading.Lock()
+
+
+def record_api_key_use(api_key_id: str) -> None:
+    """Note that a key was used; the background flusher persists the timestamp."""
+    _last_used_buffer.record(api_key_id, _utcnow())
+
+
+def _flush_loop(stop: threading.Event, interval: float) -> None:
+    while not stop.wait(interval):
+        flush_api_key_last_used()
+
+
+def start_api_key_usage_flusher() -> None:
+    """Start the thread that writes buffered last_used_at timestamps every interval."""
+    global _flusher, _flusher_stop
+    with _flusher_lock:
+        if _flusher is not None and _flusher.is_alive():
+            return
+        _flusher_stop = threading.Event()
+        _flusher = threading.Thread(
+            target=_flush_loop,
+            args=(_flusher_stop, max(1, settings.api_key_last_used_flush_seconds)),
+            name="api-key-usage-flusher",
+            daemon=True,
+        )
+        _flusher.start()
+
+
+def stop_api_key_usage_flusher() -> None:
+    """Stop the flusher thread and persist whatever is still buffered."""
+    global _flusher
+    with _flusher_lock:
+        flusher, _flusher = _flusher, None
+        _flusher_stop.set()
+    if flusher is not None:
+        flusher.join(timeout=5)
+    flush_api_key_last_used()
+
+
+def flush_api_key_last_used() -> int:
+    """
+    Persist buffered last_used_at timestamps in a single transaction.
+
+    Failures are logged and the timestamps are kept for the next flush.
+
+    Returns:
+        Number of API keys updated
+    """
+    pending = _last_used_buffer.drain()
+    if not pending:
+        return 0
+
+    from app.db.session import get_engine
+
+    try:
+        with get_engine().begin() as conn:
+            conn.execute(
+                text(
+                    "UPDATE api_keys SET last_used_at = :used_at "
+                    "WHERE id = :id AND (last_used_at IS NULL OR last_used_at < :used_at)"
+                ),
+                [
+                    {"id": api_key_id, "used_at": used_at.replace(tzinfo=None)}
+                    for api_key_id, used_at in pending.items()
+                ],
+            )
+    except Exception as e:
+        logger.warning("Failed to flush API key last_used_at for %d key(s): %s", len(pending), e)
+        _last_used_buffer.restore(pending)
+        return 0
+    return len(pending)
 
 
 def update_last_used(db: Session, api_key_id: str):
@@ -143,8 +352,8 @@ def get_api_key_from_header(
             headers={"WWW-Authenticate": "ApiKey"},
         )
     
-    # Verify API key
-    api_key_record = verify_api_key(db, api_key)
+    # Verify API key (cached; repeat calls skip the database)
+    api_key_record = verify_api_key_cached(db, api_key)
     
     if not api_key_record:
         raise HTTPException(
@@ -153,8 +362,8 @@ def get_api_key_from_header(
             headers={"WWW-Authenticate": "ApiKey"},
         )
     
-    # Update last used timestamp (async in background would be better)
-    update_last_used(db, api_key_record.id)
+    # Buffer the last used timestamp; written in batches by flush_api_key_last_used
+    record_api_key_use(api_key_record.id)
     
     return api_key_record
 
@@ -210,6 +419,8 @@ def create_api_key(
     db.add(api_key_record)
     db.commit()
     db.refresh(api_key_record)
+    # Drop any cached miss for this hash so the new key works immediately
+    _api_key_cache.invalidate(key_hash=key_hash)
     
     return api_key_record, plain_key
 
@@ -229,6 +440,7 @@ def revoke_api_key(db: Session, api_key_id: str) -> bool:
         "is_active": False
     })
     db.commit()
+    invalidate_api_key_cache(api_key_id)
     
     return result > 0
 
@@ -251,6 +463,7 @@ def delete_api_key(db: Session, api_key_id: str) -> bool:
     
     db.delete(api_key)
     db.commit()
+    invalidate_api_key_cache(api_key_id)
     
     return True
 
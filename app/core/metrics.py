@@ -0,0 +1,349 @@
+"""
+In-process metrics and tracing spans.
+
+Counters and histograms are kept in a small thread-safe registry and rendered
+in the Prometheus text exposition format by ``GET /metrics``. Pipeline code
+wraps each stage in ``trace_stage``, which records the stage latency, rows
+handled and throughput, and (when ``OTEL_TRACING_ENABLED`` is set and the
+``opentelemetry`` package is installed) opens an OpenTelemetry span so the
+same stages show up in whatever exporter the OpenTelemetry SDK is configured
+with.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.core import profiling
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers sub-millisecond SQL through multi-minute LLM analyses
+DEFAULT_LATENCY_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0,
+)
+THROUGHPUT_BUCKETS = (100, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000, 500000, 1000000)
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape_label_value(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _label_key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._render_samples())
+        return lines
+
+    def _render_samples(self) -> List[str]:  # pragma: no cover - overridden
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(self._label_key(labels), 0.0)
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram per label set."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._label_key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = [0.0] * (len(self.buckets) + 2)
+                self._values[key] = state
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def snapshot(self, **labels: Any) -> Tuple[int, float]:
+        """Return (count, sum) for one label set."""
+        with self._lock:
+            state = self._values.get(self._label_key(labels))
+            return (int(state[-1]), state[-2]) if state else (0, 0.0)
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        lines: List[str] = []
+        for key, state in items:
+            for bound, count in zip(self.buckets, state):
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {_format_value(count)}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', '+Inf'))} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {_format_value(state[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named collection of metrics; registering an existing name returns the original."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            existing = self._metrics.get(name)
+            if existing is not None:
+                if not isinstance(existing, cls):
+                    raise ValueError(f"Metric '{name}' is already registered as a {existing.kind}")
+                return existing
+            metric = cls(name, *args, **kwargs)
+            self._metrics[name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_DURATION = REGISTRY.histogram(
+    "content_atlas_stage_duration_seconds",
+    "Latency of instrumented pipeline stages (one observation per span, e.g. per chunk).",
+    ("stage",),
+)
+STAGE_ROWS = REGISTRY.counter(
+    "content_atlas_stage_rows_total",
+    "Rows handled by instrumented pipeline stages.",
+    ("stage",),
+)
+STAGE_THROUGHPUT = REGISTRY.histogram(
+    "content_atlas_stage_rows_per_second",
+    "Per-span throughput of pipeline stages that report a row count.",
+    ("stage",),
+    buckets=THROUGHPUT_BUCKETS,
+)
+STAGE_ERRORS = REGISTRY.counter(
+    "content_atlas_stage_errors_total",
+    "Instrumented stages that raised an exception.",
+    ("stage",),
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    "content_atlas_cache_requests_total",
+    "Cache lookups by cache name and result (hit or miss).",
+    ("cache", "result"),
+)
+DB_QUERY_DURATION = REGISTRY.histogram(
+    "content_atlas_db_query_duration_seconds",
+    "Database statement execution time by leading SQL keyword.",
+    ("statement",),
+)
+DB_POOL_WAIT = REGISTRY.histogram(
+    "content_atlas_db_pool_wait_seconds",
+    "Time spent waiting to check a connection out of the SQLAlchemy pool.",
+)
+DB_READ_ROUTES = REGISTRY.counter(
+    "content_atlas_db_read_routes_total",
+    "Read-only queries by the engine they were routed to (replica or primary) and why.",
+    ("target", "reason"),
+)
+
+TABLE_LOCK_WAIT = REGISTRY.histogram(
+    "content_atlas_table_lock_wait_seconds",
+    "Time spent waiting for a table lock (TableLockManager), including waits that timed out.",
+    ("table",),
+)
+TABLE_LOCK_TIMEOUTS = REGISTRY.counter(
+    "content_atlas_table_lock_timeouts_total",
+    "Table lock waits that gave up after TABLE_LOCK_TIMEOUT_SECONDS.",
+    ("table",),
+)
+TABLE_LOCK_HELD = REGISTRY.counter(
+    "content_atlas_table_lock_held_seconds_total",
+    "Total time table locks taken with TableLockManager.acquire were held.",
+    ("table",),
+)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def _get_tracer():
+    """Return an OpenTelemetry tracer when tracing is enabled and the package is installed."""
+    global _tracer
+    if not settings.otel_tracing_enabled:
+        return None
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                try:
+                    from opentelemetry import trace
+                except ImportError:
+                    logger.warning("OTEL_TRACING_ENABLED is set but opentelemetry is not installed; spans are metrics-only")
+                    _tracer = False
+                else:
+                    _tracer = trace.get_tracer("content_atlas")
+    return _tracer or None
+
+
+class Span:
+    """Handle yielded by ``trace_stage``; set ``rows`` once the row count is known."""
+
+    def __init__(self, stage: str, rows: Optional[int], otel_span: Any = None):
+        self.stage = stage
+        self.rows = rows
+        self.duration: Optional[float] = None
+        self._otel_span = otel_span
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if self._otel_span is not None:
+            self._otel_span.set_attribute(key, value)
+
+
+@contextmanager
+def trace_stage(stage: str, *, rows: Optional[int] = None, **attributes: Any) -> Iterator[Span]:
+    """
+    Time a block as one pipeline stage.
+
+    Records ``content_atlas_stage_duration_seconds``, the row counter and the
+    rows/sec histogram (when ``rows`` is known), and an error counter when the
+    block raises. The span's wall and CPU time also go to the current import
+    profile, if any; a ``chunk`` keyword files it under that chunk number.
+    Extra keyword arguments become OpenTelemetry span attributes.
+    """
+    tracer = _get_tracer()
+    otel_context = None
+    otel_span = None
+    if tracer is not None:
+        otel_context = tracer.start_as_current_span(f"content_atlas.{stage}")
+        otel_span = otel_context.__enter__()
+        for key, value in attributes.items():
+            if value is not None:
+                otel_span.set_attribute(key, value)
+
+    span = Span(stage, rows, otel_span)
+    start = time.perf_counter()
+    cpu_start = time.thread_time()
+    error: Optional[BaseException] = None
+    try:
+        yield span
+    except BaseException as exc:
+        error = exc
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        span.duration = time.perf_counter() - start
+        STAGE_DURATION.observe(span.duration, stage=stage)
+        profiling.record_span(
+            stage, span.duration, time.thread_time() - cpu_start, span.rows, attributes.get("chunk")
+        )
+        if span.rows is not None:
+            STAGE_ROWS.inc(span.rows, stage=stage)
+            if span.rows and span.duration > 0:
+                STAGE_THROUGHPUT.observe(span.rows / span.duration, stage=stage)
+        if otel_context is not None:
+            if span.rows is not None:
+                otel_span.set_attribute("rows", span.rows)
+            if error is not None:
+                otel_context.__exit__(type(error), error, error.__traceback__)
+            else:
+                otel_context.__exit__(None, None, None)
+
+
+def statement_label(statement: str) -> str:
+    """Leading SQL keyword, used to keep the query histogram's label set small."""
+    keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return keyword if keyword.isalpha() and len(keyword) <= 16 else "OTHER"
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
@@ -0,0 +1,215 @@
+"""
+Per-import performance profiles.
+
+``start_import_profile`` makes a profile current for the running import (a
+context variable, so concurrent imports in other threads or tasks stay
+separate). While it is current, every ``trace_stage`` span adds its wall and
+CPU time to the profile and every database statement counts as a round trip.
+``complete_import_tracking`` finishes the profile and stores it in
+``import_history.metadata["performance_profile"]``.
+
+Worker threads do not inherit context variables, so pipeline code submits
+chunk work with ``submit_in_context`` to keep it attributed to the import.
+"""
+from __future__ import annotations
+
+import contextvars
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+from concurrent.futures import Executor, Future
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import settings
+
+PROFILE_VERSION = 1
+# Chunk timings kept per profile; later chunks only count toward stage totals
+MAX_PROFILE_CHUNKS = 500
+# Profiles left behind by imports that never completed are dropped past this
+MAX_ACTIVE_PROFILES = 1000
+
+_current_profile: contextvars.ContextVar[Optional["ImportProfile"]] = contextvars.ContextVar(
+    "import_profile", default=None
+)
+_active_profiles: "OrderedDict[str, ImportProfile]" = OrderedDict()
+_active_lock = threading.Lock()
+_tracemalloc_users = 0
+_tracemalloc_lock = threading.Lock()
+
+
+def _peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _to_mb(value: Optional[float]) -> Optional[float]:
+    return round(value / (1024 * 1024), 2) if value is not None else None
+
+
+class ImportProfile:
+    """Accumulates stage timings, chunk timings and counters for one import."""
+
+    def __init__(self, import_id: str, bytes_read: Optional[int] = None):
+        self.import_id = import_id
+        self.bytes_read = bytes_read
+        self.db_round_trips = 0
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, float]] = {}
+        self._chunks: List[Dict[str, Any]] = []
+        self._chunks_dropped = 0
+        self._started_at = datetime.now(timezone.utc)
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        self._peak_rss_start = _peak_rss_bytes()
+        self._uses_tracemalloc = settings.import_profile_tracemalloc and _acquire_tracemalloc()
+        self.finished: Optional[Dict[str, Any]] = None
+
+    def record_span(
+        self,
+        stage: str,
+        wall_seconds: float,
+        cpu_seconds: float,
+        rows: Optional[int] = None,
+        chunk: Optional[int] = None,
+    ) -> None:
+        with self._lock:
+            totals = self._stages.setdefault(
+                stage, {"calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0, "rows": 0, "max_wall_seconds": 0.0}
+            )
+            totals["calls"] += 1
+            totals["wall_seconds"] += wall_seconds
+            totals["cpu_seconds"] += cpu_seconds
+            totals["rows"] += rows or 0
+            totals["max_wall_seconds"] = max(totals["max_wall_seconds"], wall_seconds)
+            if chunk is None:
+                return
+            if len(self._chunks) >= MAX_PROFILE_CHUNKS:
+                self._chunks_dropped += 1
+                return
+            self._chunks.append(
+                {
+                    "stage": stage,
+                    "chunk": chunk,
+                    "wall_seconds": round(wall_seconds, 4),
+                    "cpu_seconds": round(cpu_seconds, 4),
+                    "rows": rows,
+                }
+            )
+
+    def record_db_round_trip(self) -> None:
+        with self._lock:
+            self.db_round_trips += 1
+
+    def finish(self) -> Dict[str, Any]:
+        """Freeze the profile into a JSON-serializable dict (idempotent)."""
+        if self.finished is not None:
+            return self.finished
+
+        wall = time.perf_counter() - self._wall_start
+        tracemalloc_peak = None
+        if self._uses_tracemalloc:
+            tracemalloc_peak = tracemalloc.get_traced_memory()[1]
+            _release_tracemalloc()
+
+        with self._lock:
+            stages = {}
+            for stage, totals in self._stages.items():
+                stage_wall = totals["wall_seconds"]
+                stages[stage] = {
+                    "calls": int(totals["calls"]),
+                    "wall_seconds": round(stage_wall, 4),
+                    "cpu_seconds": round(totals["cpu_seconds"], 4),
+                    "max_wall_seconds": round(totals["max_wall_seconds"], 4),
+                    "rows": int(totals["rows"]),
+                    "rows_per_second": round(totals["rows"] / stage_wall, 1) if totals["rows"] and stage_wall > 0 else None,
+                }
+            chunks = sorted(self._chunks, key=lambda entry: (entry["stage"], entry["chunk"]))
+            profile = {
+                "version": PROFILE_VERSION,
+                "started_at": self._started_at.isoformat(),
+                "wall_seconds": round(wall, 4),
+                "process_cpu_seconds": round(time.process_time() - self._cpu_start, 4),
+                "bytes_read": self.bytes_read,
+                "db_round_trips": self.db_round_trips,
+                "peak_rss_mb": _to_mb(_peak_rss_bytes()),
+                "peak_rss_growth_mb": _to_mb(max(0, _peak_rss_bytes() - self._peak_rss_start)),
+                "tracemalloc_peak_mb": _to_mb(tracemalloc_peak),
+                "stages": stages,
+                "chunks": chunks,
+                "chunks_truncated": self._chunks_dropped,
+            }
+        self.finished = profile
+        return profile
+
+
+def _acquire_tracemalloc() -> bool:
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0:
+            if tracemalloc.is_tracing():
+                # Someone else is tracing; share it without taking ownership
+                tracemalloc.reset_peak()
+                return False
+            tracemalloc.start()
+        _tracemalloc_users += 1
+        return True
+
+
+def _release_tracemalloc() -> None:
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        _tracemalloc_users = max(0, _tracemalloc_users - 1)
+        if _tracemalloc_users == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def start_import_profile(import_id: str, bytes_read: Optional[int] = None) -> Optional[ImportProfile]:
+    """Create a profile for ``import_id`` and make it current for this context."""
+    if not settings.import_profile_enabled or not import_id:
+        return None
+    profile = ImportProfile(import_id, bytes_read=bytes_read)
+    with _active_lock:
+        _active_profiles[import_id] = profile
+        while len(_active_profiles) > MAX_ACTIVE_PROFILES:
+            _, stale = _active_profiles.popitem(last=False)
+            stale.finish()
+    _current_profile.set(profile)
+    return profile
+
+
+def current_profile() -> Optional[ImportProfile]:
+    return _current_profile.get()
+
+
+def finish_import_profile(import_id: str) -> Optional[Dict[str, Any]]:
+    """Finish and forget the profile for ``import_id``; returns its dict or None."""
+    with _active_lock:
+        profile = _active_profiles.pop(import_id, None)
+    if profile is None:
+        return None
+    if _current_profile.get() is profile:
+        _current_profile.set(None)
+    return profile.finish()
+
+
+def record_span(stage: str, wall_seconds: float, cpu_seconds: float, rows: Optional[int], chunk: Optional[int]) -> None:
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.record_span(stage, wall_seconds, cpu_seconds, rows=rows, chunk=chunk)
+
+
+def record_db_round_trip() -> None:
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.record_db_round_trip()
+
+
+def submit_in_context(executor: Executor, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+    """``executor.submit`` that runs ``fn`` in a copy of the caller's context."""
+    context = contextvars.copy_context()
+    return executor.submit(context.run, fn, *args, **kwargs)
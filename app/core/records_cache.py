@@ -0,0 +1,380 @@
+"""
+Bounded cache of parsed file records shared by ``/detect-mapping`` and ``/map-data``.
+
+Entries are keyed by file hash and evicted least-recently-used first once the
+in-memory byte budget (``RECORDS_CACHE_MAX_MEMORY_MB``) is exceeded, or when
+unused for ``RECORDS_CACHE_TTL_SECONDS``. A daemon thread sweeps expired
+entries so idle processes release memory too.
+
+Entries of at least ``RECORDS_CACHE_SPILL_MIN_MB`` are written to a spill file
+instead of being kept in memory, within their own budget
+(``RECORDS_CACHE_MAX_DISK_MB``). Uniformly typed records are stored as Arrow
+IPC and memory-mapped on reload when ``pyarrow`` is installed; anything else
+is pickled.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+# Records measured to estimate the size of a record list
+SIZE_SAMPLE_RECORDS = 200
+
+
+def estimate_records_bytes(records: List[Any]) -> int:
+    """Approximate memory held by a list of record dicts, from an evenly spaced sample."""
+    if not records:
+        return sys.getsizeof(records)
+    step = max(1, len(records) // SIZE_SAMPLE_RECORDS)
+    sample = records[::step][:SIZE_SAMPLE_RECORDS]
+    sampled = 0
+    for record in sample:
+        sampled += sys.getsizeof(record)
+        if isinstance(record, dict):
+            # Keys are shared between records, so only values are counted
+            sampled += sum(sys.getsizeof(value) for value in record.values())
+    return sys.getsizeof(records) + int(sampled / len(sample) * len(records))
+
+
+def _arrow_column_types(records: List[Any]) -> Optional[Dict[str, type]]:
+    """
+    Column -> Python type when the records round-trip through Arrow unchanged.
+
+    That requires every record to be a dict with the same string keys in the
+    same order, and each column to hold a single scalar type (or None).
+    """
+    if not records or not isinstance(records[0], dict):
+        return None
+    keys = tuple(records[0])
+    if not all(isinstance(key, str) for key in keys):
+        return None
+    types: Dict[str, type] = {key: type(None) for key in keys}
+    for record in records:
+        if not isinstance(record, dict) or tuple(record) != keys:
+            return None
+        for key, value in record.items():
+            if value is None:
+                continue
+            value_type = type(value)
+            if value_type not in (str, int, float, bool):
+                return None
+            if types[key] is type(None):
+                types[key] = value_type
+            elif types[key] is not value_type:
+                return None
+    return types
+
+
+def _write_arrow(path: str, records: List[Dict[str, Any]], types: Dict[str, type]) -> None:
+    import pyarrow as pa
+
+    arrow_types = {str: pa.string(), int: pa.int64(), float: pa.float64(), bool: pa.bool_(), type(None): pa.null()}
+    table = pa.table({
+        key: pa.array([record[key] for record in records], type=arrow_types[value_type])
+        for key, value_type in types.items()
+    })
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def _read_arrow(path: str) -> List[Dict[str, Any]]:
+    import pyarrow as pa
+
+    with pa.memory_map(path, "r") as source:
+        return pa.ipc.open_file(source).read_all().to_pylist()
+
+
+def _arrow_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class _Entry:
+    __slots__ = ("records", "spill_path", "spill_format", "nbytes", "file_name", "last_used")
+
+    def __init__(
+        self,
+        records: Optional[List[Any]],
+        nbytes: int,
+        file_name: Optional[str],
+        spill_path: Optional[str] = None,
+        spill_format: Optional[str] = None,
+    ):
+        self.records = records
+        self.nbytes = nbytes
+        self.file_name = file_name
+        self.spill_path = spill_path
+        self.spill_format = spill_format
+        self.last_used = time.monotonic()
+
+
+class RecordsCache:
+    """
+    Parsed-records cache with a byte budget, LRU + TTL eviction and disk spill.
+
+    Budgets and the TTL are read from settings on each call, so they can be
+    changed at runtime (and in tests).
+    """
+
+    def __init__(self) -> None:
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self._spill_dir: Optional[str] = None
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def __contains__(self, file_hash: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(file_hash)
+            return entry is not None and not self._is_expired(entry)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    @staticmethod
+    def _is_expired(entry: _Entry) -> bool:
+        return time.monotonic() - entry.last_used > settings.records_cache_ttl_seconds
+
+    def put(self, file_hash: str, records: List[Any], file_name: Optional[str] = None) -> bool:
+        """
+        Cache ``records`` for ``file_hash``, replacing any previous entry.
+
+        Returns False when the records were not cached (caching disabled, or
+        larger than every budget).
+        """
+        max_memory = settings.records_cache_max_memory_mb * MB
+        max_disk = settings.records_cache_max_disk_mb * MB
+        if settings.records_cache_ttl_seconds <= 0 or (max_memory <= 0 and max_disk <= 0):
+            return False
+
+        nbytes = estimate_records_bytes(records)
+        spill_min = settings.records_cache_spill_min_mb * MB
+        entry: Optional[_Entry] = None
+        if max_disk > 0 and (nbytes >= spill_min or nbytes > max_memory):
+            entry = self._spill(records, nbytes, file_name)
+            if entry is not None and entry.nbytes > max_disk:
+                self._remove_file(entry.spill_path)
+                entry = None
+        elif nbytes <= max_memory:
+            entry = _Entry(records, nbytes, file_name)
+
+        if entry is None:
+            logger.info(
+                "Not caching %d records (~%.1f MB) for file hash %s...: over budget or spill failed",
+                len(records), nbytes / MB, file_hash[:8],
+            )
+            self.discard(file_hash)
+            return False
+
+        with self._lock:
+            removed = [self._pop_locked(file_hash)]
+            self._entries[file_hash] = entry
+            if entry.spill_path:
+                self._disk_bytes += entry.nbytes
+            else:
+                self._memory_bytes += entry.nbytes
+            while self._memory_bytes > max_memory:
+                victim = self._oldest_locked(spilled=False, keep=file_hash)
+                if victim is None:
+                    break
+                removed.append(self._pop_locked(victim))
+            while self._disk_bytes > max_disk:
+                victim = self._oldest_locked(spilled=True, keep=file_hash)
+                if victim is None:
+                    break
+                removed.append(self._pop_locked(victim))
+        self._release(removed)
+        self._ensure_sweeper()
+        return True
+
+    def get(self, file_hash: str) -> Optional[List[Any]]:
+        """Return the cached records (refreshing their TTL), or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(file_hash)
+            if entry is None:
+                return None
+            if self._is_expired(entry):
+                removed = self._pop_locked(file_hash)
+                entry = None
+            else:
+                entry.last_used = time.monotonic()
+                self._entries.move_to_end(file_hash)
+                records, spill_path, spill_format = entry.records, entry.spill_path, entry.spill_format
+        if entry is None:
+            self._release([removed])
+            logger.info("Records cache entry expired for file hash %s...", file_hash[:8])
+            return None
+        if records is not None:
+            return records
+
+        try:
+            return _read_arrow(spill_path) if spill_format == "arrow" else self._read_pickle(spill_path)
+        except Exception as e:
+            # The entry may have been evicted (and its file removed) since the lookup
+            logger.warning("Failed to reload spilled records for file hash %s...: %s", file_hash[:8], e)
+            return None
+
+    def touch(self, file_hash: str) -> None:
+        """Mark an entry as used without reading it."""
+        with self._lock:
+            entry = self._entries.get(file_hash)
+            if entry is not None:
+                entry.last_used = time.monotonic()
+                self._entries.move_to_end(file_hash)
+
+    def discard(self, file_hash: str) -> None:
+        with self._lock:
+            removed = self._pop_locked(file_hash)
+        self._release([removed])
+
+    def sweep(self) -> int:
+        """Drop expired entries; returns how many were removed."""
+        with self._lock:
+            expired = [key for key, entry in self._entries.items() if self._is_expired(entry)]
+            removed = [self._pop_locked(key) for key in expired]
+        self._release(removed)
+        if expired:
+            logger.debug("Records cache sweep removed %d expired entries", len(expired))
+        return len(expired)
+
+    def clear(self) -> None:
+        with self._lock:
+            removed = [self._pop_locked(key) for key in list(self._entries)]
+        self._release(removed)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            spilled = sum(1 for entry in self._entries.values() if entry.spill_path)
+            return {
+                "entries": len(self._entries),
+                "spilled_entries": spilled,
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._disk_bytes,
+            }
+
+    def close(self) -> None:
+        """Stop the sweeper, drop every entry and remove the spill directory."""
+        self._stop.set()
+        self.clear()
+        with self._lock:
+            spill_dir, self._spill_dir = self._spill_dir, None
+            self._sweeper = None
+        if spill_dir:
+            shutil.rmtree(spill_dir, ignore_errors=True)
+        self._stop = threading.Event()
+
+    def _oldest_locked(self, spilled: bool, keep: str) -> Optional[str]:
+        """Least recently used key held in memory (or on disk), other than ``keep``."""
+        for key, entry in self._entries.items():
+            if key != keep and bool(entry.spill_path) == spilled:
+                return key
+        return None
+
+    def _pop_locked(self, file_hash: str) -> Optional[_Entry]:
+        entry = self._entries.pop(file_hash, None)
+        if entry is not None:
+            if entry.spill_path:
+                self._disk_bytes -= entry.nbytes
+            else:
+                self._memory_bytes -= entry.nbytes
+        return entry
+
+    def _release(self, entries: List[Optional[_Entry]]) -> None:
+        for entry in entries:
+            if entry is not None and entry.spill_path:
+                self._remove_file(entry.spill_path)
+
+    @staticmethod
+    def _remove_file(path: Optional[str]) -> None:
+        if not path:
+            return
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("Failed to remove records cache spill file %s: %s", path, e)
+
+    def _get_spill_dir(self) -> str:
+        with self._lock:
+            if self._spill_dir is None or not os.path.isdir(self._spill_dir):
+                base_dir = settings.records_cache_spill_dir or None
+                if base_dir:
+                    os.makedirs(base_dir, exist_ok=True)
+                self._spill_dir = tempfile.mkdtemp(prefix="records-cache-", dir=base_dir)
+            return self._spill_dir
+
+    def _spill(self, records: List[Any], nbytes: int, file_name: Optional[str]) -> Optional[_Entry]:
+        """Write records to a spill file outside the lock; returns the disk entry or None."""
+        path = os.path.join(self._get_spill_dir(), uuid.uuid4().hex)
+        spill_format = "pickle"
+        try:
+            types = _arrow_column_types(records) if _arrow_available() else None
+            if types is not None:
+                try:
+                    _write_arrow(path + ".arrow", records, types)
+                    path, spill_format = path + ".arrow", "arrow"
+                except Exception as e:
+                    logger.debug("Arrow spill failed, falling back to pickle: %s", e)
+                    self._remove_file(path + ".arrow")
+            if spill_format == "pickle":
+                path = path + ".pkl"
+                with open(path, "wb") as handle:
+                    pickle.dump(records, handle, protocol=pickle.HIGHEST_PROTOCOL)
+            disk_bytes = os.path.getsize(path)
+        except Exception as e:
+            logger.warning("Failed to spill %d records to disk: %s", len(records), e)
+            self._remove_file(path)
+            return None
+
+        logger.info(
+            "Spilled %d records (~%.1f MB in memory, %.1f MB on disk) to %s",
+            len(records), nbytes / MB, disk_bytes / MB, path,
+        )
+        return _Entry(None, disk_bytes, file_name, spill_path=path, spill_format=spill_format)
+
+    @staticmethod
+    def _read_pickle(path: str) -> List[Any]:
+        with open(path, "rb") as handle:
+            return pickle.load(handle)
+
+    def _ensure_sweeper(self) -> None:
+        interval = settings.records_cache_sweep_interval_seconds
+        if interval <= 0:
+            return
+        with self._lock:
+            if self._sweeper is not None and self._sweeper.is_alive():
+                return
+            stop = self._stop
+            self._sweeper = threading.Thread(
+                target=self._sweep_loop, args=(stop, interval), name="records-cache-sweeper", daemon=True
+            )
+            self._sweeper.start()
+
+    def _sweep_loop(self, stop: threading.Event, interval: float) -> None:
+        while not stop.wait(interval):
+            try:
+                self.sweep()
+            except Exception as e:  # pragma: no cover - defensive
+                logger.warning("Records cache sweep failed: %s", e)
@@ -0,0 +1,307 @@
+"""
+Bounded stores for API session state (async task status, file analyses, and
+interactive import sessions).
+
+Each store behaves like a dict keyed by session id. Entries unused for
+``SESSION_STORE_TTL_SECONDS`` expire, and reading an entry extends its
+lifetime. Two backends are available, chosen by ``SESSION_STORE_BACKEND``:
+
+- ``memory`` (default): entries live in this process, least recently used
+  first out once a store holds ``SESSION_STORE_MAX_ENTRIES`` entries or its
+  values exceed ``SESSION_STORE_MAX_MEMORY_MB`` (a sampled size estimate).
+- ``postgres``: entries are pickled into the ``api_sessions`` table, so any
+  API worker can serve any session. Values returned by a lookup are copies;
+  callers that change a session must store it again.
+"""
+from __future__ import annotations
+
+import logging
+import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, Tuple
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.records_cache import estimate_records_bytes
+from app.db.session import get_engine
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+_MISSING = object()
+
+_table_initialized = False
+_table_init_lock = threading.Lock()
+
+
+def ensure_session_store_table() -> None:
+    """Create the api_sessions table on-demand."""
+    global _table_initialized
+    if _table_initialized:
+        return
+
+    with _table_init_lock:
+        if _table_initialized:
+            return
+        create_sql = """
+        CREATE TABLE IF NOT EXISTS api_sessions (
+            namespace VARCHAR(64) NOT NULL,
+            session_key VARCHAR(255) NOT NULL,
+            value BYTEA NOT NULL,
+            size_bytes INTEGER NOT NULL,
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            expires_at TIMESTAMPTZ NOT NULL,
+            PRIMARY KEY (namespace, session_key)
+        );
+        CREATE INDEX IF NOT EXISTS idx_api_sessions_expires ON api_sessions(expires_at);
+        """
+        with get_engine().begin() as conn:
+            conn.execute(text(create_sql))
+        _table_initialized = True
+
+
+def _value_size(value: Any, depth: int = 0) -> int:
+    """
+    Cheap estimate of the memory a value holds, without serializing it.
+
+    Lists (usually records) are sampled; dicts and plain objects are walked
+    two levels deep, and anything below that counts its shallow size.
+    """
+    if isinstance(value, list):
+        return estimate_records_bytes(value)
+    fields = value if isinstance(value, dict) else getattr(value, "__dict__", None)
+    if depth >= 2 or not isinstance(fields, dict):
+        return sys.getsizeof(value)
+    return sys.getsizeof(value) + sum(_value_size(field, depth + 1) for field in fields.values())
+
+
+class SessionStore(MutableMapping):
+    """Dict-like session store for one namespace, bounded by TTL and size."""
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        # key -> (value, size in bytes, expires at); oldest use first
+        self._entries: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._last_purge = 0.0
+
+    @staticmethod
+    def _persistent() -> bool:
+        return settings.session_store_backend.lower() == "postgres"
+
+    @staticmethod
+    def _ttl() -> int:
+        return max(1, settings.session_store_ttl_seconds)
+
+    # ------------------------------------------------------------------
+    # Memory backend
+    # ------------------------------------------------------------------
+
+    def _drop_locked(self, key: str) -> Any:
+        value, size, _ = self._entries.pop(key)
+        self._memory_bytes -= size
+        return value
+
+    def _expire_locked(self, now: float) -> None:
+        # Every read or write moves its key to the end with the same TTL, so
+        # expired entries are always at the front.
+        while self._entries:
+            key, (_, _, expires_at) = next(iter(self._entries.items()))
+            if expires_at > now:
+                break
+            self._drop_locked(key)
+
+    def _memory_set(self, key: str, value: Any) -> None:
+        size = _value_size(value)
+        max_entries = max(1, settings.session_store_max_entries)
+        max_bytes = max(0, settings.session_store_max_memory_mb) * MB
+        now = time.monotonic()
+        with self._lock:
+            if key in self._entries:
+                self._drop_locked(key)
+            self._entries[key] = (value, size, now + self._ttl())
+            self._memory_bytes += size
+            self._expire_locked(now)
+            # The newest entry is always kept, even when it alone exceeds the budget
+            evicted = 0
+            while len(self._entries) > 1 and (
+                len(self._entries) > max_entries or self._memory_bytes > max_bytes
+            ):
+                self._drop_locked(next(iter(self._entries)))
+                evicted += 1
+        if evicted:
+            logger.info("Session store '%s' evicted %d least recently used entries", self.namespace, evicted)
+
+    def _memory_get(self, key: str) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            value, size, expires_at = entry
+            if expires_at <= now:
+                self._drop_locked(key)
+                return _MISSING
+            self._entries[key] = (value, size, now + self._ttl())
+            self._entries.move_to_end(key)
+            return value
+
+    def _memory_pop(self, key: str) -> Any:
+        with self._lock:
+            if key not in self._entries:
+                return _MISSING
+            expired = self._entries[key][2] <= time.monotonic()
+            value = self._drop_locked(key)
+        return _MISSING if expired else value
+
+    def _memory_keys(self) -> list:
+        with self._lock:
+            self._expire_locked(time.monotonic())
+            return list(self._entries)
+
+    # ------------------------------------------------------------------
+    # Postgres backend
+    # ------------------------------------------------------------------
+
+    def _purge_expired(self) -> None:
+        """Delete expired rows of this namespace, at most once per TTL."""
+        now = time.monotonic()
+        if now - self._last_purge < self._ttl():
+            return
+        self._last_purge = now
+        try:
+            with get_engine().begin() as conn:
+                conn.execute(
+                    text("DELETE FROM api_sessions WHERE namespace = :namespace AND expires_at <= NOW()"),
+                    {"namespace": self.namespace},
+                )
+        except Exception as exc:
+            logger.warning("Failed to purge expired '%s' sessions: %s", self.namespace, exc)
+
+    def _postgres_set(self, key: str, value: Any) -> None:
+        ensure_session_store_table()
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with get_engine().begin() as conn:
+            conn.execute(
+                text("""
+                    INSERT INTO api_sessions (namespace, session_key, value, size_bytes, updated_at, expires_at)
+                    VALUES (:namespace, :key, :value, :size, NOW(), NOW() + make_interval(secs => :ttl))
+                    ON CONFLICT (namespace, session_key) DO UPDATE SET
+                        value = EXCLUDED.value,
+                        size_bytes = EXCLUDED.size_bytes,
+                        updated_at = EXCLUDED.updated_at,
+                        expires_at = EXCLUDED.expires_at
+                """),
+                {"namespace": self.namespace, "key": key, "value": payload, "size": len(payload), "ttl": self._ttl()},
+            )
+        self._purge_expired()
+
+    def _postgres_get(self, key: str) -> Any:
+        ensure_session_store_table()
+        with get_engine().begin() as conn:
+            payload = conn.execute(
+                text("""
+                    UPDATE api_sessions
+                    SET expires_at = NOW() + make_interval(secs => :ttl)
+                    WHERE namespace = :namespace AND session_key = :key AND expires_at > NOW()
+                    RETURNING value
+                """),
+                {"namespace": self.namespace, "key": key, "ttl": self._ttl()},
+            ).scalar()
+        return _MISSING if payload is None else pickle.loads(payload)
+
+    def _postgres_pop(self, key: str) -> Any:
+        ensure_session_store_table()
+        with get_engine().begin() as conn:
+            row = conn.execute(
+                text("""
+                    DELETE FROM api_sessions
+                    WHERE namespace = :namespace AND session_key = :key
+                    RETURNING value, expires_at > NOW() AS live
+                """),
+                {"namespace": self.namespace, "key": key},
+            ).first()
+        if row is None or not row.live:
+            return _MISSING
+        return pickle.loads(row.value)
+
+    def _postgres_keys(self) -> list:
+        ensure_session_store_table()
+        with get_engine().connect() as conn:
+            return list(conn.execute(
+                text("""
+                    SELECT session_key FROM api_sessions
+                    WHERE namespace = :namespace AND expires_at > NOW()
+                    ORDER BY updated_at
+                """),
+                {"namespace": self.namespace},
+            ).scalars())
+
+    # ------------------------------------------------------------------
+    # Mapping interface
+    # ------------------------------------------------------------------
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if self._persistent():
+            self._postgres_set(key, value)
+        else:
+            self._memory_set(key, value)
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._postgres_get(key) if self._persistent() else self._memory_get(key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __delitem__(self, key: str) -> None:
+        if self.pop(key, _MISSING) is _MISSING:
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._postgres_keys() if self._persistent() else self._memory_keys())
+
+    def __len__(self) -> int:
+        return len(self._postgres_keys() if self._persistent() else self._memory_keys())
+
+    def pop(self, key: str, default: Any = _MISSING) -> Any:
+        value = self._postgres_pop(key) if self._persistent() else self._memory_pop(key)
+        if value is _MISSING:
+            if default is _MISSING:
+                raise KeyError(key)
+            return default
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._memory_bytes = 0
+        if self._persistent():
+            ensure_session_store_table()
+            with get_engine().begin() as conn:
+                conn.execute(
+                    text("DELETE FROM api_sessions WHERE namespace = :namespace"),
+                    {"namespace": self.namespace},
+                )
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count and pickled bytes held, for diagnostics."""
+        if self._persistent():
+            ensure_session_store_table()
+            with get_engine().connect() as conn:
+                row = conn.execute(
+                    text("""
+                        SELECT COUNT(*) AS entries, COALESCE(SUM(size_bytes), 0) AS bytes
+                        FROM api_sessions WHERE namespace = :namespace AND expires_at > NOW()
+                    """),
+                    {"namespace": self.namespace},
+                ).first()
+            return {"backend": "postgres", "entries": int(row.entries), "bytes": int(row.bytes)}
+        with self._lock:
+            self._expire_locked(time.monotonic())
+            return {"backend": "memory", "entries": len(self._entries), "bytes": self._memory_bytes}
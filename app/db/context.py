@@ -1,10 +1,26 @@
 from typing import Dict, List, Any, Optional
 import json
 from sqlalchemy import text
-from sqlalchemy.engine import Engine
+from sqlalchemy.engine import Connection, Engine
 from .session import get_engine
 from .metadata import get_all_table_metadata
 from .models import SYSTEM_COLUMNS
+from .system_tables import POSTGIS_TABLES, SYSTEM_TABLES
+
+
+def list_user_table_names(conn: Connection) -> List[str]:
+    """Names of user data tables, excluding system tables and import partitions."""
+    result = conn.execute(text(r"""
+        SELECT table_name
+        FROM information_schema.tables
+        WHERE table_schema = 'public'
+        AND table_name <> ALL(:excluded_tables)
+        AND table_name NOT LIKE 'pg_%'
+        AND table_name NOT LIKE 'test!_%' ESCAPE '!'
+        AND table_name NOT IN (SELECT relname FROM pg_class WHERE relispartition)
+        ORDER BY table_name
+    """), {"excluded_tables": sorted(SYSTEM_TABLES | POSTGIS_TABLES)})
+    return [row[0] for row in result]
 
 
 def get_table_names() -> List[Dict[str, Any]]:
@@ -15,20 +31,7 @@ def get_table_names() -> List[Dict[str, Any]]:
     engine = get_engine()
     
     with engine.connect() as conn:
-        # Get all user tables (same exclusion logic as get_database_schema)
-        tables_result = conn.execute(text(r"""
-            SELECT table_name
-            FROM information_schema.tables
-            WHERE table_schema = 'public'
-            AND table_name NOT IN ('spatial_ref_sys', 'geography_columns', 'geometry_columns',
-                                 'raster_columns', 'raster_overviews',
-                                 'file_imports', 'table_metadata', 'import_history', 'uploaded_files', 'users', 'mapping_errors', 'import_jobs', 'import_duplicates', 'mapping_chunk_status', 'api_keys', 'query_messages', 'query_threads', 'llm_instructions', 'table_fingerprints')
-            AND table_name NOT LIKE 'pg_%'
-            AND table_name NOT LIKE 'test!_%' ESCAPE '!'
-            ORDER BY table_name
-        """))
-        
-        tables = [row[0] for row in tables_result]
+        tables = list_user_table_names(conn)
         
         # Get basic metadata (purposes)
         all_metadata = {}
@@ -82,20 +85,7 @@ def get_database_schema(table_names: Optional[List[str]] = None) -> Dict[str, An
     engine = get_engine()
 
     with engine.connect() as conn:
-        # Get all user tables (excluding system tables)
-        tables_result = conn.execute(text(r"""
-            SELECT table_name
-            FROM information_schema.tables
-            WHERE table_schema = 'public'
-            AND table_name NOT IN ('spatial_ref_sys', 'geography_columns', 'geometry_columns',
-                                 'raster_columns', 'raster_overviews',
-                                 'file_imports', 'table_metadata', 'import_history', 'uploaded_files', 'users', 'mapping_errors', 'import_jobs', 'import_duplicates', 'mapping_chunk_status', 'api_keys', 'query_messages', 'query_threads', 'llm_instructions', 'table_fingerprints')
-            AND table_name NOT LIKE 'pg_%'
-            AND table_name NOT LIKE 'test!_%' ESCAPE '!'
-            ORDER BY table_name
-        """))
-
-        all_tables = [row[0] for row in tables_result]
+        all_tables = list_user_table_names(conn)
         
         # Filter if specific tables requested
         if table_names:
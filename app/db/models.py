@@ -1,18 +1,29 @@
 import hashlib
 import json
 import re
+import threading
+import uuid
+from collections import OrderedDict
 from sqlalchemy import text, MetaData
 from sqlalchemy.exc import DataError
 from sqlalchemy.engine import Engine
-from typing import List, Dict, Any, Tuple, Optional
+from typing import List, Dict, Any, Tuple, Optional, Callable
 from decimal import Decimal, InvalidOperation
 import math
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import logging
 from difflib import get_close_matches
 from app.api.schemas.shared import MappingConfig
+from app.core.config import settings
+from app.core.metrics import trace_stage
+from app.core.profiling import submit_in_context
 from app.db.session import get_engine
-from app.utils.serialization import _make_json_safe
+from app.domain.imports.audit_writer import (
+    DUPLICATES_TABLE,
+    duplicate_row,
+    get_active_audit_writer,
+    write_audit_rows,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -156,7 +167,6 @@ def _get_active_import_id(engine: Engine, table_name: str) -> Tuple[str, bool]:
     if import_id:
         return import_id, True
 
-    import uuid
     temp_import_id = str(uuid.uuid4())
     logger.warning(
         "No active import tracking record found for table '%s'. "
@@ -167,8 +177,178 @@ def _get_active_import_id(engine: Engine, table_name: str) -> Tuple[str, bool]:
     return temp_import_id, False
 
 
-def create_table_if_not_exists(engine: Engine, config: MappingConfig):
-    """Create table based on schema if it doesn't exist, or recreate if schema doesn't match."""
+def import_partition_name(table_name: str, import_id: str) -> str:
+    """
+    Name of the partition holding one import's rows in a partitioned table.
+
+    Kept under Postgres' 63-character identifier limit: a truncated, sanitized
+    table prefix plus the import UUID's hex digits.
+    """
+    return f"{_safe_identifier(table_name)[:26]}_p{str(import_id).replace('-', '')}"
+
+
+def is_partitioned_table(conn, table_name: str) -> bool:
+    """True when ``table_name`` is a declaratively partitioned (parent) table."""
+    result = conn.execute(text("""
+        SELECT c.relkind = 'p'
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = 'public' AND c.relname = :table_name
+    """), {"table_name": table_name}).scalar()
+    return bool(result)
+
+
+# (table, import id) pairs already handled by ensure_import_partition in this
+# process, so chunked imports check the catalog once rather than per chunk
+_ensured_partitions: "OrderedDict[Tuple[str, str], Optional[str]]" = OrderedDict()
+_ensured_partitions_lock = threading.Lock()
+_ENSURED_PARTITIONS_MAX = 1024
+
+
+def ensure_import_partition(engine: Engine, table_name: str, import_id: str) -> Optional[str]:
+    """
+    Create the partition for ``import_id`` if ``table_name`` is partitioned by import.
+
+    Runs in its own short transaction (creating a partition briefly locks the
+    parent) before any rows are written. Returns the partition name, or None
+    for ordinary tables. The result is remembered per import, so later chunks
+    of the same import skip the catalog check.
+    """
+    key = (table_name, str(import_id))
+    with _ensured_partitions_lock:
+        if key in _ensured_partitions:
+            return _ensured_partitions[key]
+
+    partition_name = None
+    with engine.begin() as conn:
+        if is_partitioned_table(conn, table_name):
+            partition_name = import_partition_name(table_name, import_id)
+            conn.execute(text(f"""
+                CREATE TABLE IF NOT EXISTS "{partition_name}"
+                PARTITION OF "{table_name}" FOR VALUES IN ('{uuid.UUID(str(import_id))}')
+            """))
+
+    with _ensured_partitions_lock:
+        _ensured_partitions[key] = partition_name
+        while len(_ensured_partitions) > _ENSURED_PARTITIONS_MAX:
+            _ensured_partitions.popitem(last=False)
+    return partition_name
+
+
+def forget_import_partitions(table_name: str) -> None:
+    """Drop remembered ensure_import_partition results for a table that was dropped or changed."""
+    with _ensured_partitions_lock:
+        for key in [key for key in _ensured_partitions if key[0] == table_name]:
+            del _ensured_partitions[key]
+
+
+def drop_import_partition(conn, table_name: str, import_id: str) -> Optional[int]:
+    """
+    Remove an import's rows by dropping its partition instead of deleting them.
+
+    Returns the number of rows that were in the partition, or None when the
+    table is not partitioned or has no partition for this import, in which case
+    the caller should fall back to ``DELETE ... WHERE _import_id = ...``.
+    """
+    if not is_partitioned_table(conn, table_name):
+        return None
+    partition_name = import_partition_name(table_name, import_id)
+    is_child = conn.execute(text("""
+        SELECT EXISTS (
+            SELECT 1 FROM pg_inherits i
+            JOIN pg_class child ON child.oid = i.inhrelid
+            JOIN pg_class parent ON parent.oid = i.inhparent
+            JOIN pg_namespace n ON n.oid = parent.relnamespace
+            WHERE n.nspname = 'public' AND parent.relname = :table_name AND child.relname = :partition_name
+        )
+    """), {"table_name": table_name, "partition_name": partition_name}).scalar()
+    if not is_child:
+        return None
+    row_count = conn.execute(text(f'SELECT COUNT(*) FROM "{partition_name}"')).scalar() or 0
+    conn.execute(text(f'DROP TABLE "{partition_name}"'))
+    forget_import_partitions(table_name)
+    logger.info("Dropped partition %s (%d rows) of table '%s'", partition_name, row_count, table_name)
+    return int(row_count)
+
+
+def _import_id_index_name(table_name: str) -> str:
+    return f"idx_{_safe_identifier(table_name)}_import_id"
+
+
+def ensure_import_id_index(conn, table_name: str) -> bool:
+    """Create the ``_import_id`` index if it is missing; returns True when created."""
+    index_name = _import_id_index_name(table_name)
+    if conn.execute(text("SELECT to_regclass(:index_name)"), {"index_name": f"public.{index_name}"}).scalar():
+        return False
+    has_import_id = conn.execute(text("""
+        SELECT EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = :table_name AND column_name = '_import_id'
+        )
+    """), {"table_name": table_name}).scalar()
+    if not has_import_id:
+        return False
+    conn.execute(text(f'CREATE INDEX IF NOT EXISTS {index_name} ON "{table_name}"(_import_id)'))
+    return True
+
+
+def finalize_bulk_load(engine: Engine, table_name: str, rows_loaded: int) -> Optional[Dict[str, Any]]:
+    """
+    Bring a table's indexes and planner statistics up to date after a bulk load.
+
+    Builds the ``_import_id`` index when it is missing, either skipped by
+    ``create_table_if_not_exists(defer_indexes=True)`` or left out by a failed
+    deferred load. When at least ``BULK_LOAD_FINALIZE_MIN_ROWS`` rows were
+    loaded it also runs ANALYZE, so the first queries against the new data get
+    sensible plans instead of waiting for autovacuum. Timed as the
+    ``finalize`` stage of the import profile. Returns a summary, or None when
+    there was nothing to do.
+    """
+    threshold = settings.bulk_load_finalize_min_rows
+    analyze = threshold > 0 and rows_loaded >= threshold
+    index_name = _import_id_index_name(table_name)
+
+    try:
+        with engine.connect() as conn:
+            index_missing = conn.execute(
+                text("SELECT to_regclass(:index_name) IS NULL"), {"index_name": f"public.{index_name}"}
+            ).scalar()
+        if not analyze and not index_missing:
+            return None
+
+        indexes_created: List[str] = []
+        with trace_stage("finalize", rows=rows_loaded) as span:
+            with engine.begin() as conn:
+                if index_missing and ensure_import_id_index(conn, table_name):
+                    indexes_created.append(index_name)
+                if analyze:
+                    conn.execute(text(f'ANALYZE "{table_name}"'))
+    except Exception as e:
+        # The rows are already committed; a missing index is retried after the next import
+        logger.warning("Bulk load finalization failed for table '%s': %s", table_name, str(e))
+        return None
+
+    summary = {
+        "analyzed": analyze,
+        "indexes_created": indexes_created,
+        "seconds": round(span.duration, 3),
+    }
+    logger.info("Finalized bulk load of %d row(s) into '%s': %s", rows_loaded, table_name, summary)
+    return summary
+
+
+def create_table_if_not_exists(engine: Engine, config: MappingConfig, defer_indexes: bool = False):
+    """
+    Create table based on schema if it doesn't exist, or recreate if schema doesn't match.
+
+    With ``IMPORT_PARTITIONING_ENABLED`` new tables are LIST-partitioned by
+    ``_import_id`` so that undoing an import drops a partition; see
+    ``ensure_import_partition`` and ``drop_import_partition``.
+
+    ``defer_indexes`` skips the ``_import_id`` index on a newly created table
+    so a large first load does not maintain it row by row; the caller builds
+    it afterwards with ``finalize_bulk_load``.
+    """
     table_name = config.table_name
 
     with engine.begin() as conn:
@@ -240,6 +420,7 @@ def create_table_if_not_exists(engine: Engine, config: MappingConfig):
             if current_schema_normalized != expected_schema:
                 print(f"DEBUG: create_table_if_not_exists: Schema mismatch, dropping and recreating table")
                 conn.execute(text(f'DROP TABLE "{table_name}" CASCADE'))
+                forget_import_partitions(table_name)
                 table_exists = False
             else:
                 print(f"DEBUG: create_table_if_not_exists: Schema matches, keeping existing table")
@@ -262,22 +443,26 @@ def create_table_if_not_exists(engine: Engine, config: MappingConfig):
 
             # Add metadata columns for import tracking
             # These columns enable undo/rollback and change review functionality
-            index_name = f"idx_{_safe_identifier(table_name)}_import_id"
+            partitioned = settings.import_partitioning_enabled
+            # Primary keys on partitioned tables must include the partition key
+            primary_key = "(_row_id, _import_id)" if partitioned else "(_row_id)"
+            partition_clause = " PARTITION BY LIST (_import_id)" if partitioned else ""
             create_sql = f"""
             CREATE TABLE "{table_name}" (
-                _row_id SERIAL PRIMARY KEY,
+                _row_id SERIAL,
                 {columns_sql},
                 _import_id UUID NOT NULL REFERENCES import_history(import_id) ON DELETE CASCADE,
                 _imported_at TIMESTAMP DEFAULT NOW(),
                 _source_row_number INTEGER,
-                _corrections_applied JSONB
-            );
-            
-            -- Create index on import_id for efficient queries
-            CREATE INDEX {index_name} ON "{table_name}"(_import_id);
+                _corrections_applied JSONB,
+                PRIMARY KEY {primary_key}
+            ){partition_clause};
             """
 
             conn.execute(text(create_sql))
+            if not defer_indexes:
+                # Index on import_id for efficient queries
+                ensure_import_id_index(conn, table_name)
             print(f"DEBUG: create_table_if_not_exists: Table '{table_name}' created successfully with metadata columns")
 
 
@@ -318,33 +503,23 @@ def record_file_import(engine: Engine, file_hash: str, file_name: str, table_nam
 def record_duplicate_rows(import_id: str, duplicates: List[Dict[str, Any]]) -> None:
     """
     Persist duplicate records detected during an import so they can be reviewed later.
+
+    Rows are buffered through the import's audit writer when one is open,
+    otherwise written immediately with COPY.
     """
     if not duplicates:
         return
 
-    engine = get_engine()
-    payload = []
-
-    for entry in duplicates:
-        record_number = entry.get("record_number")
-        record = entry.get("record", {})
-        safe_record = _make_json_safe(record)
-        # Store as JSON string to avoid DB adapter issues
-        safe_record_json = json.dumps(safe_record)
-        payload.append({
-            "import_id": import_id,
-            "record_number": record_number,
-            "record_data": safe_record_json
-        })
-
-    insert_sql = text("""
-        INSERT INTO import_duplicates (import_id, record_number, record_data)
-        VALUES (:import_id, :record_number, :record_data)
-    """)
+    writer = get_active_audit_writer(import_id)
+    if writer is not None:
+        writer.add_duplicates(duplicates)
+        return
 
     try:
-        with engine.begin() as conn:
-            conn.execute(insert_sql, payload)
+        write_audit_rows(
+            DUPLICATES_TABLE,
+            [duplicate_row(import_id, entry) for entry in duplicates],
+        )
     except Exception as e:
         logger.error(f"Error recording duplicate rows for import {import_id}: {str(e)}")
         raise
@@ -360,6 +535,30 @@ def create_table_fingerprints_table_if_not_exists(engine: Engine):
         updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     );
     CREATE INDEX IF NOT EXISTS idx_fingerprint_hash ON table_fingerprints(fingerprint_hash);
+
+    -- Bumped once per changed row at commit, so the in-memory fingerprint
+    -- index can check for changes with a single-row read
+    CREATE SEQUENCE IF NOT EXISTS table_fingerprints_version;
+    CREATE OR REPLACE FUNCTION bump_table_fingerprints_version() RETURNS trigger AS $$
+    BEGIN
+        PERFORM nextval('table_fingerprints_version');
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_trigger
+            WHERE tgname = 'table_fingerprints_version_bump'
+              AND tgrelid = 'table_fingerprints'::regclass
+        ) THEN
+            CREATE CONSTRAINT TRIGGER table_fingerprints_version_bump
+            AFTER INSERT OR UPDATE OR DELETE ON table_fingerprints
+            DEFERRABLE INITIALLY DEFERRED
+            FOR EACH ROW EXECUTE FUNCTION bump_table_fingerprints_version();
+        END IF;
+    END;
+    $$;
     """
     with engine.begin() as conn:
         conn.execute(text(create_sql))
@@ -775,12 +974,16 @@ def insert_records(
     pre_mapped: bool = False,
     import_id: Optional[str] = None,
     has_active_import: Optional[bool] = None,
+    on_inserted: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
 ) -> Tuple[int, int]:
     """
     Insert records into the table with enhanced duplicate checking.
     
     For large datasets (>10,000 records), uses chunked processing to optimize memory usage
     and improve performance for duplicate checking and insertion.
+
+    ``on_inserted`` is called once with the records that were actually
+    written (duplicates removed) after the insert commits.
     
     Returns:
         Tuple of (records_inserted, duplicates_skipped)
@@ -813,6 +1016,8 @@ def insert_records(
     else:
         active_import_id, active_import_tracking = _get_active_import_id(engine, table_name)
 
+    ensure_import_partition(engine, table_name, active_import_id)
+
     # Determine if we should use chunked processing
     CHUNK_SIZE = 20000
     use_chunked_processing = len(records) > CHUNK_SIZE
@@ -829,7 +1034,8 @@ def insert_records(
             CHUNK_SIZE,
             active_import_id,
             active_import_tracking,
-            pre_mapped=pre_mapped
+            pre_mapped=pre_mapped,
+            on_inserted=on_inserted,
         )
         return inserted, duplicates
     
@@ -855,7 +1061,8 @@ def insert_records(
             # Use a separate connection to see committed data
             with engine.connect() as check_conn:
                 # Use database-side duplicate checking for better performance
-                duplicate_indices, duplicates_found = _check_for_duplicates_db_side(check_conn, table_name, records, config)
+                with trace_stage("duplicate_check", rows=len(records)):
+                    duplicate_indices, duplicates_found = _check_for_duplicates_db_side(check_conn, table_name, records, config)
                 
                 if duplicates_found > 0:
                     print(f"DEBUG: Found {duplicates_found} duplicates, will skip them and insert only non-duplicates")
@@ -1014,6 +1221,8 @@ def insert_records(
                 ) from exc
             raise
 
+    if on_inserted:
+        on_inserted(records)
     return len(records), duplicates_found
 
 
@@ -1138,6 +1347,12 @@ def _check_chunk_for_duplicates(
     return (chunk_num, total_duplicates)
 
 
+def _run_traced_chunk(stage: str, worker, chunk_num: int, chunk_start: int, chunk_records: List[Dict[str, Any]]):
+    """Run a chunk worker inside a per-chunk span so chunk latencies land in metrics and the import profile."""
+    with trace_stage(stage, rows=len(chunk_records), chunk=chunk_num):
+        return worker(chunk_num, chunk_start, chunk_records)
+
+
 def _check_chunks_parallel(
     engine: Engine,
     table_name: str,
@@ -1360,7 +1575,10 @@ def _check_chunks_parallel(
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
         # Submit all chunk checks
         future_to_chunk = {
-            executor.submit(check_chunk_db_side, chunk_index + 1, chunk_start, chunk_records): chunk_index
+            submit_in_context(
+                executor, _run_traced_chunk, "duplicate_check_chunk", check_chunk_db_side,
+                chunk_index + 1, chunk_start, chunk_records,
+            ): chunk_index
             for chunk_index, (chunk_start, chunk_records) in enumerate(chunks)
         }
         
@@ -1398,7 +1616,8 @@ def _insert_records_chunked(
     chunk_size: int,
     import_id: str,
     has_active_import: bool,
-    pre_mapped: bool = False
+    pre_mapped: bool = False,
+    on_inserted: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
 ):
     """
     Insert records in chunks for better performance with large datasets.
@@ -1417,6 +1636,7 @@ def _insert_records_chunked(
         import_id: Active import tracking identifier
         has_active_import: Whether an import_history row exists for import_id
         pre_mapped: If True, records are already mapped and type-coerced
+        on_inserted: Called with the non-duplicate records once every chunk is inserted
     
     This provides significant speedup while maintaining data integrity.
     """
@@ -1455,13 +1675,14 @@ def _insert_records_chunked(
             max_workers = min(4, os.cpu_count() or 2)
             logger.info(f"Using {max_workers} parallel workers for duplicate checking")
             
-            total_duplicates, duplicate_entries = _check_chunks_parallel(
-                engine,
-                table_name,
-                chunks,
-                config,
-                max_workers
-            )
+            with trace_stage("duplicate_check", rows=total_records):
+                total_duplicates, duplicate_entries = _check_chunks_parallel(
+                    engine,
+                    table_name,
+                    chunks,
+                    config,
+                    max_workers
+                )
             if total_duplicates > 0:
                 duplicates_skipped = total_duplicates
                 if duplicate_entries and has_active_import:
@@ -1576,7 +1797,10 @@ def _insert_records_chunked(
 
     with ThreadPoolExecutor(max_workers=insert_workers) as executor:
         future_to_chunk = {
-            executor.submit(insert_chunk, chunk_index, chunk_start, chunk_records): chunk_index
+            submit_in_context(
+                executor, _run_traced_chunk, "insert_chunk", insert_chunk,
+                chunk_index, chunk_start, chunk_records,
+            ): chunk_index
             for chunk_index, (chunk_start, chunk_records) in enumerate(chunks, start=1)
         }
         
@@ -1611,5 +1835,7 @@ def _insert_records_chunked(
                 "record_count": total_inserted
             })
     
+    if on_inserted:
+        on_inserted(records)
     print(f"DEBUG: _insert_records_chunked: Completed - {total_inserted} records inserted")
     return total_inserted, duplicates_skipped  # Return tuple: (records_inserted, duplicates_skipped)
@@ -14,6 +14,7 @@ from typing import List, Dict, Any
 import logging
 
 from ..session import get_engine
+from ..system_tables import POSTGIS_TABLES
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -61,13 +62,10 @@ def get_user_created_tables(engine: Engine) -> List[str]:
             SELECT table_name
             FROM information_schema.tables
             WHERE table_schema = 'public'
-            AND table_name NOT IN (
-                'spatial_ref_sys', 'geography_columns', 'geometry_columns', 
-                'raster_columns', 'raster_overviews'
-            )
+            AND table_name <> ALL(:postgis_tables)
             AND table_name NOT LIKE 'pg_%'
             ORDER BY table_name
-        """))
+        """), {"postgis_tables": sorted(POSTGIS_TABLES)})
         
         return [row[0] for row in result]
 
@@ -1,14 +1,35 @@
+import logging
 import os
+import re
 import socket
+import time
 from contextlib import closing
+from typing import FrozenSet, Iterable, Optional, Tuple
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.engine.url import make_url
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import QueuePool
 
 from app.core.config import settings
+from app.core.metrics import DB_POOL_WAIT, DB_QUERY_DURATION, DB_READ_ROUTES, statement_label
+from app.core.profiling import record_db_round_trip
+
+logger = logging.getLogger(__name__)
 
 _engine = None
+_lock_engine = None
+_read_engine = None
+_read_engine_failed_at: Optional[float] = None
+_replica_lag = (0.0, float("-inf"))  # (lag seconds, monotonic time checked)
+_recent_imports: Tuple[FrozenSet[str], float] = (frozenset(), float("-inf"))  # (tables, monotonic time checked)
+# Idle connections the table lock engine keeps; it opens more on demand
+_LOCK_POOL_SIZE = 2
+# Seconds before retrying an unreachable replica, and between replication lag
+# and recent import checks
+_REPLICA_RETRY_SECONDS = 30
+_REPLICA_LAG_CHECK_SECONDS = 5
+_RECENT_IMPORTS_CHECK_SECONDS = 5
 
 
 def _report_connection_failure(exc: Exception) -> None:
@@ -46,21 +67,196 @@ def _report_connection_failure(exc: Exception) -> None:
     print("    • If running inside WSL/containers, confirm the hostname resolves correctly.")
 
 
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each connection checkout waited."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - start)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    record_db_round_trip()
+    if context is not None:
+        context._query_start_time = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_query_start_time", None)
+    if start is not None:
+        DB_QUERY_DURATION.observe(time.perf_counter() - start, statement=statement_label(statement))
+
+
+def _create_instrumented_engine(database_url: Optional[str] = None, read_only: bool = False):
+    """Create the engine with pool wait and statement latency metrics attached."""
+    database_url = database_url or settings.database_url
+    engine_kwargs = {}
+    try:
+        backend = make_url(database_url).get_backend_name()
+        if backend != "sqlite":
+            engine_kwargs["poolclass"] = InstrumentedQueuePool
+        if read_only and backend == "postgresql":
+            engine_kwargs["connect_args"] = {"options": "-c default_transaction_read_only=on"}
+    except Exception:
+        pass
+    engine = create_engine(database_url, **engine_kwargs)
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    return engine
+
+
 def get_engine():
     global _engine
     if _engine is None:
         try:
-            _engine = create_engine(settings.database_url)
+            _engine = _create_instrumented_engine()
             # Test connection eagerly so failures surface immediately.
             with _engine.connect() as conn:
                 conn.execute(text("SELECT 1"))
         except Exception as e:
             _report_connection_failure(e)
             # Create the engine anyway so callers can proceed (may still fail later).
-            _engine = create_engine(settings.database_url)
+            _engine = _create_instrumented_engine()
     return _engine
 
 
+def get_lock_engine():
+    """
+    Return the engine that holds table advisory locks (app.utils.locks).
+
+    It has its own pool with no overflow limit, so a lock held for a whole
+    import never takes a connection the import needs from the main pool.
+    """
+    global _lock_engine
+    if _lock_engine is None:
+        try:
+            backend = make_url(settings.database_url).get_backend_name()
+        except Exception:
+            backend = None
+        if backend != "postgresql":
+            return get_engine()
+        _lock_engine = create_engine(
+            settings.database_url, pool_size=_LOCK_POOL_SIZE, max_overflow=-1, pool_pre_ping=True
+        )
+    return _lock_engine
+
+
+def get_replica_engine():
+    """Return the read replica engine, or None when none is configured or it is unreachable."""
+    global _read_engine, _read_engine_failed_at
+    if not settings.read_database_url:
+        return None
+    if _read_engine is None:
+        if _read_engine_failed_at is not None and time.monotonic() - _read_engine_failed_at < _REPLICA_RETRY_SECONDS:
+            return None
+        try:
+            engine = _create_instrumented_engine(settings.read_database_url, read_only=True)
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        except Exception as exc:
+            logger.warning("Read replica unavailable, reading from the primary: %s", exc)
+            _read_engine_failed_at = time.monotonic()
+            return None
+        _read_engine = engine
+        _read_engine_failed_at = None
+    return _read_engine
+
+
+def _replica_lag_seconds(engine) -> float:
+    """Seconds the replica is behind the primary (0 when caught up), checked at most every few seconds."""
+    global _replica_lag
+    lag, checked_at = _replica_lag
+    if time.monotonic() - checked_at < _REPLICA_LAG_CHECK_SECONDS:
+        return lag
+    with engine.connect() as conn:
+        lag = conn.execute(text("""
+            SELECT CASE
+                WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                ELSE COALESCE(EXTRACT(EPOCH FROM NOW() - pg_last_xact_replay_timestamp()), 0)
+            END
+        """)).scalar()
+    _replica_lag = (float(lag or 0), time.monotonic())
+    return _replica_lag[0]
+
+
+def _recently_imported_tables() -> FrozenSet[str]:
+    """
+    Tables whose import history changed within the freshness window, read from
+    the primary at most every few seconds.
+
+    Imports in this process add their table right away through
+    ``note_table_imported``, so only other workers' imports wait for the next check.
+    """
+    global _recent_imports
+    tables, checked_at = _recent_imports
+    if time.monotonic() - checked_at < _RECENT_IMPORTS_CHECK_SECONDS:
+        return tables
+    with get_engine().connect() as conn:
+        rows = conn.execute(text("""
+            SELECT DISTINCT table_name FROM import_history
+            WHERE import_timestamp > NOW() - make_interval(secs => :window)
+               OR updated_at > NOW() - make_interval(secs => :window)
+        """), {"window": settings.read_replica_freshness_seconds})
+        tables = frozenset(row[0] for row in rows)
+    _recent_imports = (tables, time.monotonic())
+    return tables
+
+
+def note_table_imported(table_name: Optional[str]) -> None:
+    """Route reads of a table this process just imported into to the primary without waiting for the next check."""
+    global _recent_imports
+    if not table_name:
+        return
+    tables, checked_at = _recent_imports
+    _recent_imports = (tables | {table_name}, checked_at)
+
+
+def _route_read(tables: Optional[Iterable[str]], sql: Optional[str]) -> str:
+    """Return the reason the primary must serve this read, or "" when the replica may."""
+    if _replica_lag_seconds(_read_engine) > settings.read_replica_freshness_seconds:
+        return "replica_lag"
+    recent = _recently_imported_tables()
+    if not recent:
+        return ""
+    if tables is not None:
+        return "recent_import" if recent.intersection(tables) else ""
+    if sql is not None:
+        for table_name in recent:
+            if re.search(rf"(?<![\w-]){re.escape(table_name)}(?![\w-])", sql, re.IGNORECASE):
+                return "recent_import"
+        return ""
+    return "recent_import"
+
+
+def get_read_engine(tables: Optional[Iterable[str]] = None, sql: Optional[str] = None):
+    """
+    Return the engine for a read-only query.
+
+    When READ_DATABASE_URL is set this is a read-only engine on the replica,
+    unless the replica lags more than READ_REPLICA_FRESHNESS_SECONDS or a table
+    being read was imported within that window, in which case the primary
+    serves the read so it sees the new rows. Pass ``tables`` when the tables are
+    known, or ``sql`` to look for recently imported table names in a query.
+    With neither, any recent import routes to the primary.
+    """
+    replica = get_replica_engine()
+    if replica is None:
+        return get_engine()
+    try:
+        reason = _route_read(tables, sql)
+    except Exception as exc:
+        logger.warning("Could not check read replica freshness, reading from the primary: %s", exc)
+        reason = "freshness_check_failed"
+    if reason:
+        DB_READ_ROUTES.inc(target="primary", reason=reason)
+        return get_engine()
+    DB_READ_ROUTES.inc(target="replica", reason="fresh")
+    return replica
+
+
 # Don't create engine at import time
 SessionLocal = None
 
@@ -0,0 +1,45 @@
+"""
+Names of the application's own tables.
+
+This is the single list used to hide internal tables from table listings
+(``app.db.context.list_user_table_names``), block them in user SQL (query
+agent, SQL generator, export), and stop imports from writing to them. Add any
+new internal table here.
+"""
+
+SYSTEM_TABLES = frozenset({
+    # Import + mapping infrastructure
+    "file_imports",
+    "table_metadata",
+    "import_history",
+    "mapping_errors",
+    "uploaded_files",
+    "import_duplicates",
+    "import_validation_failures",
+    "import_jobs",
+    "mapping_chunk_status",
+    "column_profiles",
+    "table_fingerprints",
+    "llm_decision_cache",
+    # Query + conversation storage
+    "query_threads",
+    "query_messages",
+    "query_checkpoints",
+    "query_checkpoint_blobs",
+    "query_checkpoint_writes",
+    "schema_digests",
+    "api_sessions",
+    # Core platform tables
+    "users",
+    "api_keys",
+    "llm_instructions",
+})
+
+# Catalog tables the PostGIS extension adds to the public schema
+POSTGIS_TABLES = frozenset({
+    "spatial_ref_sys",
+    "geography_columns",
+    "geometry_columns",
+    "raster_columns",
+    "raster_overviews",
+})
@@ -0,0 +1,144 @@
+"""
+Concurrent reads of ZIP archive members from an archive spooled to disk.
+
+``zipfile.ZipFile`` objects are not safe to share between threads, so the
+archive auto-process job used to wrap the whole upload in ``io.BytesIO`` and
+serialize every member read behind one lock. ``ArchiveReader`` writes the
+archive to a temporary file once and gives each worker thread its own
+``ZipFile`` handle, so members decompress in parallel and the upload bytes do
+not have to stay in memory for the life of the job.
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+from collections import defaultdict
+from typing import IO, Dict, Iterable, List, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Block size used when streaming member contents through a hash
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+class ArchiveReader:
+    """Thread-safe reader over a ZIP file on disk; one ZipFile handle per thread."""
+
+    def __init__(self, path: str, *, owns_file: bool = False):
+        self.path = path
+        self._owns_file = owns_file
+        self._local = threading.local()
+        self._handles: List[zipfile.ZipFile] = []
+        self._handles_lock = threading.Lock()
+        self._closed = False
+
+    @classmethod
+    def from_bytes(cls, archive_bytes: bytes) -> "ArchiveReader":
+        """Spool archive bytes to a temp file. Raises zipfile.BadZipFile if invalid."""
+        return cls.from_stream(io.BytesIO(archive_bytes))
+
+    @classmethod
+    def from_stream(cls, stream: IO[bytes]) -> "ArchiveReader":
+        """Spool a readable binary stream to a temp file. Raises zipfile.BadZipFile if invalid."""
+        spool_dir = settings.archive_spool_dir or None
+        fd, path = tempfile.mkstemp(prefix="archive_", suffix=".zip", dir=spool_dir)
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                shutil.copyfileobj(stream, handle, HASH_BLOCK_SIZE)
+            # Validate the central directory up front so callers can report corruption
+            zipfile.ZipFile(path).close()
+        except BaseException:
+            os.remove(path)
+            raise
+        return cls(path, owns_file=True)
+
+    def _zip_file(self) -> zipfile.ZipFile:
+        if self._closed:
+            raise ValueError("ArchiveReader is closed")
+        handle = getattr(self._local, "zip_file", None)
+        if handle is None:
+            handle = zipfile.ZipFile(self.path)
+            self._local.zip_file = handle
+            with self._handles_lock:
+                self._handles.append(handle)
+        return handle
+
+    def infolist(self) -> List[zipfile.ZipInfo]:
+        return self._zip_file().infolist()
+
+    def open(self, member: str) -> IO[bytes]:
+        """Open a member for streaming reads. Raises KeyError if it is missing."""
+        return self._zip_file().open(member)
+
+    def read(self, member: str) -> bytes:
+        """Read a whole member. Raises KeyError if it is missing."""
+        return self._zip_file().read(member)
+
+    def member_sha256(self, member: str) -> str:
+        """Hash a member's decompressed contents without holding them in memory."""
+        digest = hashlib.sha256()
+        with self.open(member) as handle:
+            for block in iter(lambda: handle.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def find_identical_members(self, members: Iterable[str]) -> Dict[str, str]:
+        """
+        Map each member whose bytes repeat an earlier member to that first member.
+
+        Members are grouped by the CRC-32 and size recorded in the central
+        directory; only groups with more than one member are decompressed and
+        hashed to confirm they are byte-identical.
+        """
+        infos = {info.filename: info for info in self.infolist()}
+        groups: Dict[Tuple[int, int], List[str]] = defaultdict(list)
+        for member in members:
+            info = infos.get(member)
+            if info is not None:
+                groups[(info.CRC, info.file_size)].append(member)
+
+        duplicates: Dict[str, str] = {}
+        for candidates in groups.values():
+            if len(candidates) < 2:
+                continue
+            first_by_hash: Dict[str, str] = {}
+            for member in candidates:
+                digest = self.member_sha256(member)
+                original = first_by_hash.setdefault(digest, member)
+                if original != member:
+                    duplicates[member] = original
+        return duplicates
+
+    def close(self) -> None:
+        """Close every thread's handle and delete the spooled file if we created it."""
+        self._closed = True
+        with self._handles_lock:
+            handles, self._handles = self._handles, []
+        for handle in handles:
+            try:
+                handle.close()
+            except Exception as exc:  # pragma: no cover - defensive
+                logger.debug("Failed to close archive handle for %s: %s", self.path, exc)
+        if self._owns_file:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            except OSError as exc:
+                logger.warning("Failed to remove spooled archive %s: %s", self.path, exc)
+            self._owns_file = False
+
+    def __enter__(self) -> "ArchiveReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
@@ -0,0 +1,379 @@
+"""
+Bulk writer for import audit rows.
+
+Mapping errors, validation failures, and duplicate rows are buffered per
+import and flushed with COPY instead of one INSERT per row. Each import can
+cap and sample how many rows it keeps per audit table. When rows are dropped,
+the per-table counts are stored under ``import_history.metadata["audit_summary"]``
+and mapping_errors gets one ``audit_cap_exceeded`` row. Duplicate and
+validation failure tables only ever hold real records, since those rows are
+listed and resolved individually.
+"""
+
+import io
+import json
+import logging
+import random
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.session import get_engine
+from app.utils.serialization import _make_json_safe
+
+logger = logging.getLogger(__name__)
+
+MAPPING_ERRORS_TABLE = "mapping_errors"
+VALIDATION_FAILURES_TABLE = "import_validation_failures"
+DUPLICATES_TABLE = "import_duplicates"
+
+AUDIT_COLUMNS: Dict[str, List[str]] = {
+    MAPPING_ERRORS_TABLE: [
+        "import_id", "record_number", "error_type", "error_message",
+        "source_field", "target_field", "source_value", "chunk_number",
+    ],
+    VALIDATION_FAILURES_TABLE: [
+        "import_id", "record_number", "record_data", "validation_errors",
+    ],
+    DUPLICATES_TABLE: [
+        "import_id", "record_number", "record_data",
+    ],
+}
+
+AUDIT_CAP_ERROR_TYPE = "audit_cap_exceeded"
+SOURCE_VALUE_MAX_LENGTH = 500
+
+_active_writers: Dict[str, "ImportAuditWriter"] = {}
+_active_writers_lock = threading.Lock()
+
+
+def mapping_error_row(import_id: str, error: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize a mapping error dict into a mapping_errors row."""
+    # Truncate source_value if too long (keep first 500 chars)
+    source_value = error.get("source_value")
+    if source_value is not None:
+        source_value = str(source_value)
+        if len(source_value) > SOURCE_VALUE_MAX_LENGTH:
+            source_value = source_value[:SOURCE_VALUE_MAX_LENGTH - 3] + "..."
+
+    return {
+        "import_id": import_id,
+        "record_number": error.get("record_number"),
+        "error_type": error.get("error_type") or "mapping_error",
+        "error_message": str(error.get("error_message") or ""),
+        "source_field": error.get("source_field"),
+        "target_field": error.get("target_field"),
+        "source_value": source_value,
+        "chunk_number": error.get("chunk_number"),
+    }
+
+
+def validation_failure_row(import_id: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize a validation failure dict into an import_validation_failures row."""
+    return {
+        "import_id": import_id,
+        "record_number": entry.get("record_number"),
+        "record_data": json.dumps(_make_json_safe(entry.get("record", {}))),
+        "validation_errors": json.dumps(_make_json_safe(entry.get("validation_errors", []))),
+    }
+
+
+def duplicate_row(import_id: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize a duplicate entry into an import_duplicates row."""
+    return {
+        "import_id": import_id,
+        "record_number": entry.get("record_number"),
+        # Store as JSON string to avoid DB adapter issues
+        "record_data": json.dumps(_make_json_safe(entry.get("record", {}))),
+    }
+
+
+def _copy_text_value(value: Any) -> str:
+    """Encode a value for COPY ... FROM STDIN in text format."""
+    if value is None:
+        return "\\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def write_audit_rows(table_name: str, rows: Sequence[Dict[str, Any]]) -> int:
+    """
+    Write normalized audit rows to an audit table in a single COPY.
+
+    Falls back to an executemany INSERT when the DBAPI connection does not
+    support COPY (e.g. non-psycopg2 drivers).
+
+    Returns:
+        Number of rows written
+    """
+    if not rows:
+        return 0
+
+    columns = AUDIT_COLUMNS[table_name]
+    engine = get_engine()
+    raw_conn = engine.raw_connection()
+    try:
+        cursor = raw_conn.cursor()
+        try:
+            if hasattr(cursor, "copy_expert"):
+                buffer = io.StringIO()
+                for row in rows:
+                    buffer.write("\t".join(_copy_text_value(row.get(col)) for col in columns))
+                    buffer.write("\n")
+                buffer.seek(0)
+                columns_sql = ", ".join(columns)
+                cursor.copy_expert(
+                    f"COPY {table_name} ({columns_sql}) FROM STDIN WITH (FORMAT text)",
+                    buffer,
+                )
+                raw_conn.commit()
+                return len(rows)
+        finally:
+            cursor.close()
+    except Exception:
+        raw_conn.rollback()
+        raise
+    finally:
+        raw_conn.close()
+
+    columns_sql = ", ".join(columns)
+    placeholders = ", ".join(f":{col}" for col in columns)
+    with engine.begin() as conn:
+        conn.execute(
+            text(f"INSERT INTO {table_name} ({columns_sql}) VALUES ({placeholders})"),
+            [{col: row.get(col) for col in columns} for row in rows],
+        )
+    return len(rows)
+
+
+class _AuditTableState:
+    """Per-table counters and pending rows for one import."""
+
+    def __init__(self) -> None:
+        self.pending: List[Dict[str, Any]] = []
+        self.seen = 0
+        self.kept = 0
+        self.suppressed = 0
+
+
+class ImportAuditWriter:
+    """
+    Buffers audit rows for a single import and flushes them via COPY.
+
+    Rows beyond ``max_rows`` per table (or dropped by ``sample_rate``) are
+    counted but not stored; ``close()`` records the counts in the import's
+    metadata.
+    """
+
+    def __init__(
+        self,
+        import_id: str,
+        max_rows: Optional[int] = None,
+        sample_rate: Optional[float] = None,
+        flush_rows: Optional[int] = None,
+    ):
+        self.import_id = import_id
+        self.max_rows = settings.import_audit_max_rows if max_rows is None else max_rows
+        rate = settings.import_audit_sample_rate if sample_rate is None else sample_rate
+        self.sample_rate = min(1.0, max(0.0, rate))
+        self.flush_rows = max(1, settings.import_audit_flush_rows if flush_rows is None else flush_rows)
+        # Seed from the import id so sampling is reproducible for a given import
+        self._random = random.Random(import_id)
+        self._lock = threading.Lock()
+        self._tables: Dict[str, _AuditTableState] = {
+            table_name: _AuditTableState() for table_name in AUDIT_COLUMNS
+        }
+        self._closed = False
+
+    def add_mapping_errors(self, errors: List[Dict[str, Any]]) -> None:
+        self._add(MAPPING_ERRORS_TABLE, errors, mapping_error_row)
+
+    def add_validation_failures(self, failures: List[Dict[str, Any]]) -> None:
+        self._add(VALIDATION_FAILURES_TABLE, failures, validation_failure_row)
+
+    def add_duplicates(self, duplicates: List[Dict[str, Any]]) -> None:
+        self._add(DUPLICATES_TABLE, duplicates, duplicate_row)
+
+    def _add(
+        self,
+        table_name: str,
+        entries: List[Dict[str, Any]],
+        to_row: Callable[[str, Dict[str, Any]], Dict[str, Any]],
+    ) -> None:
+        if not entries:
+            return
+        with self._lock:
+            state = self._tables[table_name]
+            for entry in entries:
+                state.seen += 1
+                if self.sample_rate < 1.0 and self._random.random() >= self.sample_rate:
+                    state.suppressed += 1
+                    continue
+                if self.max_rows and state.kept >= self.max_rows:
+                    state.suppressed += 1
+                    continue
+                # Only serialize rows that will actually be written
+                state.kept += 1
+                state.pending.append(to_row(self.import_id, entry))
+            should_flush = len(state.pending) >= self.flush_rows
+        if should_flush:
+            self.flush(table_name)
+
+    def flush(self, table_name: Optional[str] = None) -> int:
+        """
+        Write buffered rows for one table (or all tables) and return the row count.
+
+        Flushes run mid-import from ``_add``, so a failed write is logged and
+        its rows are dropped (counted as suppressed) instead of aborting the
+        import, matching how audit writes were handled before buffering.
+        """
+        table_names = [table_name] if table_name else list(self._tables)
+        written = 0
+        for name in table_names:
+            with self._lock:
+                state = self._tables[name]
+                rows, state.pending = state.pending, []
+            if not rows:
+                continue
+            try:
+                written += write_audit_rows(name, rows)
+            except Exception as exc:
+                logger.warning(
+                    "Dropping %d %s rows for import %s after a failed write: %s",
+                    len(rows), name, self.import_id, exc,
+                )
+                with self._lock:
+                    state.kept -= len(rows)
+                    state.suppressed += len(rows)
+                continue
+            logger.debug("Flushed %d %s rows for import %s", len(rows), name, self.import_id)
+        return written
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        """Return seen/kept/suppressed counters per audit table."""
+        with self._lock:
+            return {
+                name: {"seen": state.seen, "recorded": state.kept, "suppressed": state.suppressed}
+                for name, state in self._tables.items()
+                if state.seen
+            }
+
+    def close(self) -> None:
+        """Flush pending rows and record counts for tables that dropped rows."""
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        dropped = {name: counts for name, counts in self.summary().items() if counts["suppressed"]}
+        if not dropped:
+            return
+        for name, counts in dropped.items():
+            logger.info(
+                "Import %s: recorded %d of %d %s rows (%d suppressed by cap=%s, sample_rate=%s)",
+                self.import_id,
+                counts["recorded"],
+                counts["seen"],
+                name,
+                counts["suppressed"],
+                self.max_rows or "unlimited",
+                self.sample_rate,
+            )
+        if MAPPING_ERRORS_TABLE in dropped:
+            write_audit_rows(MAPPING_ERRORS_TABLE, [self._mapping_error_summary_row(dropped[MAPPING_ERRORS_TABLE])])
+        self._store_summary_metadata(dropped)
+
+    def _mapping_error_summary_row(self, counts: Dict[str, int]) -> Dict[str, Any]:
+        return mapping_error_row(self.import_id, {
+            "error_type": AUDIT_CAP_ERROR_TYPE,
+            "error_message": (
+                f"{counts['suppressed']} additional {MAPPING_ERRORS_TABLE} rows were not recorded "
+                f"({counts['recorded']} of {counts['seen']} kept; cap={self.max_rows or 'unlimited'}, "
+                f"sample_rate={self.sample_rate})."
+            ),
+        })
+
+    def _store_summary_metadata(self, dropped: Dict[str, Dict[str, int]]) -> None:
+        # Merged into whatever complete_import_tracking stored, which runs first
+        audit_summary = {
+            name: {**counts, "max_rows": self.max_rows, "sample_rate": self.sample_rate}
+            for name, counts in dropped.items()
+        }
+        with get_engine().begin() as conn:
+            conn.execute(
+                text("""
+                    UPDATE import_history
+                    SET metadata = COALESCE(metadata, '{}'::jsonb)
+                        || jsonb_build_object('audit_summary', CAST(:summary AS JSONB))
+                    WHERE import_id = :import_id
+                """),
+                {"summary": json.dumps(audit_summary), "import_id": self.import_id},
+            )
+
+
+def open_import_audit_writer(import_id: str, **kwargs: Any) -> ImportAuditWriter:
+    """Register a buffering writer so record_* helpers route rows for this import to it."""
+    key = str(import_id)
+    with _active_writers_lock:
+        writer = _active_writers.get(key)
+        if writer is None:
+            writer = ImportAuditWriter(key, **kwargs)
+            _active_writers[key] = writer
+        return writer
+
+
+def get_active_audit_writer(import_id: Optional[str]) -> Optional[ImportAuditWriter]:
+    """Return the registered writer for an import, if any."""
+    if not import_id:
+        return None
+    with _active_writers_lock:
+        return _active_writers.get(str(import_id))
+
+
+def flush_import_audit_rows(import_id: Optional[str]) -> None:
+    """Flush buffered rows for an import so they are visible to readers."""
+    writer = get_active_audit_writer(import_id)
+    if writer is None:
+        return
+    try:
+        writer.flush()
+    except Exception as exc:
+        logger.error("Failed to flush audit rows for import %s: %s", import_id, exc)
+
+
+def close_import_audit_writer(import_id: Optional[str]) -> Optional[Dict[str, Dict[str, int]]]:
+    """
+    Unregister and close the writer for an import.
+
+    Returns the per-table counters, or None when no writer was active.
+    Persistence failures are logged rather than raised, matching how audit
+    writes were handled before buffering.
+    """
+    if not import_id:
+        return None
+    with _active_writers_lock:
+        writer = _active_writers.pop(str(import_id), None)
+    if writer is None:
+        return None
+    try:
+        writer.close()
+    except Exception as exc:
+        logger.error("Failed to persist audit rows for import %s: %s", import_id, exc)
+    return writer.summary()
+
+
+@contextmanager
+def import_audit_writer(import_id: str, **kwargs: Any) -> Iterator[ImportAuditWriter]:
+    """Context manager wrapping open/close of an import's audit writer."""
+    writer = open_import_audit_writer(import_id, **kwargs)
+    try:
+        yield writer
+    finally:
+        close_import_audit_writer(import_id)
@@ -0,0 +1,415 @@
+"""
+Per-column profiles computed while rows are imported.
+
+``execute_data_import`` feeds every batch of mapped records it inserts to a
+``TableProfiler``. Each column accumulates mergeable sketches:
+
+- null and value counts
+- a HyperLogLog distinct-count estimate
+- min and max (numeric when every value is a number, otherwise text order)
+- approximate top-k values (the most frequent values of each batch)
+- a numeric histogram with one bucket per leading digit and power of ten,
+  e.g. [200, 300)
+
+Profiles are stored per import in ``column_profiles``, plus a merged profile
+per table (``import_id = '*'``) that each new import is folded into. Undoing
+an import rebuilds the merged profile from the remaining imports. Profiles
+describe the rows each import mapped, including rows later skipped as
+duplicates, so counts are estimates.
+"""
+from __future__ import annotations
+
+import base64
+import json
+import logging
+import math
+import threading
+import zlib
+from collections import Counter
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.core.config import settings
+from app.core.metrics import trace_stage
+from app.db.session import get_engine
+
+logger = logging.getLogger(__name__)
+
+MERGED_PROFILE_KEY = "*"
+# HyperLogLog precision: 2**11 registers, about 2.3% standard error
+HLL_PRECISION = 11
+# Frequent values kept per column
+TOP_K_CAPACITY = 32
+TOP_VALUE_MAX_CHARS = 100
+# Records profiled at a time, bounding the per-batch value counters
+PROFILE_BATCH_SIZE = 20000
+# Value types profiled as numbers (bool is excluded on purpose)
+_NUMBER_TYPES = {int, float, Decimal, np.int32, np.int64, np.float32, np.float64}
+
+_table_initialized = False
+_table_init_lock = threading.Lock()
+
+
+def ensure_column_profiles_table() -> None:
+    """Create the column_profiles table on-demand."""
+    global _table_initialized
+    if _table_initialized:
+        return
+
+    with _table_init_lock:
+        if _table_initialized:
+            return
+        create_sql = """
+        CREATE TABLE IF NOT EXISTS column_profiles (
+            table_name VARCHAR(255) NOT NULL,
+            import_id VARCHAR(64) NOT NULL,
+            rows_profiled BIGINT NOT NULL,
+            profile JSONB NOT NULL,
+            updated_at TIMESTAMP DEFAULT NOW(),
+            PRIMARY KEY (table_name, import_id)
+        );
+        """
+        with get_engine().begin() as conn:
+            conn.execute(text(create_sql))
+        _table_initialized = True
+
+
+class HyperLogLog:
+    """Distinct-count sketch; merging two sketches keeps the larger register."""
+
+    def __init__(self, registers: Optional[bytearray] = None):
+        self.registers = registers if registers is not None else bytearray(1 << HLL_PRECISION)
+
+    def add_many(self, values: List[str]) -> None:
+        if not values:
+            return
+        # pandas hashes with a fixed key, so sketches merge across processes
+        hashes = pd.util.hash_array(np.asarray(values, dtype=object))
+        index = (hashes >> np.uint64(64 - HLL_PRECISION)).astype(np.intp)
+        remainder = hashes & np.uint64((1 << (64 - HLL_PRECISION)) - 1)
+        # frexp's exponent is the remainder's bit length (0 for 0)
+        _, bit_length = np.frexp(remainder.astype(np.float64))
+        rank = ((64 - HLL_PRECISION) - bit_length + 1).astype(np.uint8)
+        registers = np.frombuffer(bytes(self.registers), dtype=np.uint8).copy()
+        np.maximum.at(registers, index, rank)
+        self.registers = bytearray(registers.tobytes())
+
+    def merge(self, other: "HyperLogLog") -> None:
+        merged = np.maximum(
+            np.frombuffer(bytes(self.registers), dtype=np.uint8),
+            np.frombuffer(bytes(other.registers), dtype=np.uint8),
+        )
+        self.registers = bytearray(merged.tobytes())
+
+    def estimate(self) -> int:
+        registers = np.frombuffer(bytes(self.registers), dtype=np.uint8)
+        size = len(registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        raw = alpha * size * size / float(np.sum(np.power(2.0, -registers.astype(np.float64))))
+        zeros = int(np.count_nonzero(registers == 0))
+        if raw <= 2.5 * size and zeros:
+            # Linear counting is more accurate for small cardinalities
+            return round(size * math.log(size / zeros))
+        return round(raw)
+
+    def dumps(self) -> str:
+        return base64.b64encode(zlib.compress(bytes(self.registers))).decode("ascii")
+
+    @classmethod
+    def loads(cls, payload: str) -> "HyperLogLog":
+        return cls(bytearray(zlib.decompress(base64.b64decode(payload))))
+
+
+def histogram_buckets(numbers: List[float]) -> Dict[str, int]:
+    """
+    Count values per bucket: the leading digit times the power of ten, e.g.
+    250 -> "2e2" covering [200, 300). Zero has its own bucket "0".
+    """
+    values = np.asarray(numbers, dtype=np.float64)
+    nonzero = values[values != 0]
+    buckets: Dict[str, int] = {}
+    if len(nonzero) < len(values):
+        buckets["0"] = len(values) - len(nonzero)
+    if not len(nonzero):
+        return buckets
+    magnitude = np.abs(nonzero)
+    exponent = np.floor(np.log10(magnitude)).astype(np.int64)
+    digit = np.floor(magnitude / np.power(10.0, exponent)).astype(np.int64)
+    # Float rounding at decade boundaries (e.g. 999.99999 -> 10) carries into the next power
+    carry = digit >= 10
+    digit[carry] = 1
+    exponent[carry] += 1
+    digit = np.maximum(digit, 1)
+    # Pack sign, exponent and digit into one integer so np.unique stays one-dimensional
+    codes = np.where(nonzero < 0, -1, 1) * ((exponent + 1000) * 10 + digit)
+    keys, counts = np.unique(codes, return_counts=True)
+    for key, count in zip(keys.tolist(), counts.tolist()):
+        key_exponent, key_digit = divmod(abs(key), 10)
+        buckets[f"{'-' if key < 0 else ''}{key_digit}e{key_exponent - 1000}"] = count
+    return buckets
+
+
+def _bucket_bounds(key: str) -> tuple:
+    if key == "0":
+        return 0.0, 0.0
+    negative = key.startswith("-")
+    digit, exponent = key.lstrip("-").split("e")
+    lower = int(digit) * 10.0 ** int(exponent)
+    upper = (int(digit) + 1) * 10.0 ** int(exponent)
+    return (-upper, -lower) if negative else (lower, upper)
+
+
+class ColumnProfile:
+    """Mergeable statistics for one column."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.nulls = 0
+        self.numeric_count = 0
+        self.numeric_min: Optional[float] = None
+        self.numeric_max: Optional[float] = None
+        self.text_min: Optional[str] = None
+        self.text_max: Optional[str] = None
+        self.hll = HyperLogLog()
+        self.top_values: Dict[str, int] = {}
+        self.histogram: Dict[str, int] = {}
+
+    def update(self, values: List[Any]) -> None:
+        present = [value for value in values if value is not None and value != ""]
+        self.nulls += len(values) - len(present)
+        if not present:
+            return
+        self.count += len(present)
+
+        counts = Counter(map(str, present))
+        self.hll.add_many(list(counts))
+        batch_min, batch_max = min(counts), max(counts)
+        self.text_min = batch_min if self.text_min is None else min(self.text_min, batch_min)
+        self.text_max = batch_max if self.text_max is None else max(self.text_max, batch_max)
+        self._merge_top_values(counts.most_common(TOP_K_CAPACITY))
+
+        numbers = [float(value) for value in present if type(value) in _NUMBER_TYPES]
+        numbers = [number for number in numbers if math.isfinite(number)]
+        if numbers:
+            self.numeric_count += len(numbers)
+            batch_min_number, batch_max_number = min(numbers), max(numbers)
+            self.numeric_min = batch_min_number if self.numeric_min is None else min(self.numeric_min, batch_min_number)
+            self.numeric_max = batch_max_number if self.numeric_max is None else max(self.numeric_max, batch_max_number)
+            for key, count in histogram_buckets(numbers).items():
+                self.histogram[key] = self.histogram.get(key, 0) + count
+
+    def _merge_top_values(self, items: Iterable) -> None:
+        for value, count in items:
+            key = value[:TOP_VALUE_MAX_CHARS]
+            self.top_values[key] = self.top_values.get(key, 0) + count
+        if len(self.top_values) > TOP_K_CAPACITY:
+            kept = sorted(self.top_values.items(), key=lambda item: -item[1])[:TOP_K_CAPACITY]
+            self.top_values = dict(kept)
+
+    def merge(self, other: "ColumnProfile") -> None:
+        self.count += other.count
+        self.nulls += other.nulls
+        self.numeric_count += other.numeric_count
+        for attr, pick in (("numeric_min", min), ("numeric_max", max), ("text_min", min), ("text_max", max)):
+            mine, theirs = getattr(self, attr), getattr(other, attr)
+            setattr(self, attr, theirs if mine is None else mine if theirs is None else pick(mine, theirs))
+        self.hll.merge(other.hll)
+        self._merge_top_values(other.top_values.items())
+        for key, count in other.histogram.items():
+            self.histogram[key] = self.histogram.get(key, 0) + count
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "nulls": self.nulls,
+            "numeric_count": self.numeric_count,
+            "numeric_min": self.numeric_min,
+            "numeric_max": self.numeric_max,
+            "text_min": self.text_min,
+            "text_max": self.text_max,
+            "hll": self.hll.dumps(),
+            "top_values": self.top_values,
+            "histogram": self.histogram,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ColumnProfile":
+        profile = cls()
+        for attr in ("count", "nulls", "numeric_count", "numeric_min", "numeric_max", "text_min", "text_max"):
+            setattr(profile, attr, data.get(attr, getattr(profile, attr)))
+        if data.get("hll"):
+            profile.hll = HyperLogLog.loads(data["hll"])
+        profile.top_values = dict(data.get("top_values") or {})
+        profile.histogram = dict(data.get("histogram") or {})
+        return profile
+
+    def summary(self) -> Dict[str, Any]:
+        """Readable statistics for API responses and prompts."""
+        total = self.count + self.nulls
+        numeric = self.count > 0 and self.numeric_count == self.count
+        histogram = []
+        if numeric:
+            for key, count in sorted(self.histogram.items(), key=lambda item: _bucket_bounds(item[0])):
+                lower, upper = _bucket_bounds(key)
+                histogram.append({"lower": lower, "upper": upper, "count": count})
+        return {
+            "non_null_count": self.count,
+            "null_count": self.nulls,
+            "null_fraction": round(self.nulls / total, 4) if total else 0.0,
+            "distinct_estimate": min(self.hll.estimate(), self.count),
+            "min": self.numeric_min if numeric else self.text_min,
+            "max": self.numeric_max if numeric else self.text_max,
+            "top_values": [
+                {"value": value, "count": count}
+                for value, count in sorted(self.top_values.items(), key=lambda item: -item[1])[:10]
+            ],
+            "histogram": histogram,
+        }
+
+
+class TableProfiler:
+    """Accumulates column profiles over the batches of one import."""
+
+    def __init__(self) -> None:
+        self.rows = 0
+        self.columns: Dict[str, ColumnProfile] = {}
+
+    def update(self, records: List[Dict[str, Any]]) -> None:
+        if not records or not settings.import_column_profiles_enabled:
+            return
+        with trace_stage("profile", rows=len(records)):
+            for start in range(0, len(records), PROFILE_BATCH_SIZE):
+                batch = records[start:start + PROFILE_BATCH_SIZE]
+                names = {name for record in batch[:100] for name in record}
+                for name in names:
+                    # Underscore-prefixed columns are import metadata
+                    if name.startswith("_"):
+                        continue
+                    self.columns.setdefault(name, ColumnProfile()).update([record.get(name) for record in batch])
+                self.rows += len(batch)
+
+    def merge(self, other: "TableProfiler") -> None:
+        self.rows += other.rows
+        for name, column in other.columns.items():
+            if name in self.columns:
+                self.columns[name].merge(column)
+            else:
+                self.columns[name] = column
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: column.to_dict() for name, column in self.columns.items()}
+
+    @classmethod
+    def from_row(cls, rows_profiled: int, profile: Dict[str, Any]) -> "TableProfiler":
+        profiler = cls()
+        profiler.rows = rows_profiled
+        profiler.columns = {name: ColumnProfile.from_dict(data) for name, data in profile.items()}
+        return profiler
+
+
+def _upsert(conn: Connection, table_name: str, import_id: str, profiler: TableProfiler) -> None:
+    conn.execute(text("""
+        INSERT INTO column_profiles (table_name, import_id, rows_profiled, profile, updated_at)
+        VALUES (:table_name, :import_id, :rows, CAST(:profile AS JSONB), NOW())
+        ON CONFLICT (table_name, import_id) DO UPDATE SET
+            rows_profiled = EXCLUDED.rows_profiled,
+            profile = EXCLUDED.profile,
+            updated_at = EXCLUDED.updated_at
+    """), {
+        "table_name": table_name,
+        "import_id": import_id,
+        "rows": profiler.rows,
+        "profile": json.dumps(profiler.to_dict()),
+    })
+
+
+def save_import_profile(table_name: str, import_id: Optional[str], profiler: TableProfiler) -> None:
+    """Store one import's profile and fold it into the table's merged profile. Failures are logged."""
+    if not import_id or not profiler.rows:
+        return
+    try:
+        ensure_column_profiles_table()
+        with get_engine().begin() as conn:
+            # Serialize concurrent imports into the same table on the merged row
+            conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('column_profiles:' || :table_name))"),
+                         {"table_name": table_name})
+            _upsert(conn, table_name, str(import_id), profiler)
+            row = conn.execute(text("""
+                SELECT rows_profiled, profile FROM column_profiles
+                WHERE table_name = :table_name AND import_id = :merged
+            """), {"table_name": table_name, "merged": MERGED_PROFILE_KEY}).first()
+            merged = TableProfiler.from_row(row.rows_profiled, row.profile) if row else TableProfiler()
+            merged.merge(TableProfiler.from_row(profiler.rows, profiler.to_dict()))
+            _upsert(conn, table_name, MERGED_PROFILE_KEY, merged)
+    except Exception as e:
+        logger.warning("Failed to save column profile for table '%s': %s", table_name, str(e))
+
+
+def remove_import_profiles(conn: Connection, table_name: str, import_ids: List[str]) -> None:
+    """
+    Drop the profiles of undone imports and rebuild the table's merged profile.
+
+    Runs in a savepoint of the caller's transaction; failures are logged.
+    """
+    try:
+        ensure_column_profiles_table()
+        with conn.begin_nested():
+            conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('column_profiles:' || :table_name))"),
+                         {"table_name": table_name})
+            conn.execute(text("""
+                DELETE FROM column_profiles
+                WHERE table_name = :table_name AND import_id = ANY(:import_ids)
+            """), {"table_name": table_name, "import_ids": [str(import_id) for import_id in import_ids]})
+            merged = TableProfiler()
+            rows = conn.execute(text("""
+                SELECT rows_profiled, profile FROM column_profiles
+                WHERE table_name = :table_name AND import_id != :merged
+            """), {"table_name": table_name, "merged": MERGED_PROFILE_KEY})
+            for row in rows:
+                merged.merge(TableProfiler.from_row(row.rows_profiled, row.profile))
+            if merged.rows:
+                _upsert(conn, table_name, MERGED_PROFILE_KEY, merged)
+            else:
+                conn.execute(text("DELETE FROM column_profiles WHERE table_name = :table_name"),
+                             {"table_name": table_name})
+    except Exception as e:
+        logger.warning("Failed to remove column profiles for table '%s': %s", table_name, str(e))
+
+
+def delete_table_profiles(conn: Connection, table_name: str) -> None:
+    """Remove every profile of a dropped table, in a savepoint of the caller's transaction."""
+    try:
+        ensure_column_profiles_table()
+        with conn.begin_nested():
+            conn.execute(text("DELETE FROM column_profiles WHERE table_name = :table_name"),
+                         {"table_name": table_name})
+    except Exception as e:
+        logger.warning("Failed to delete column profiles for table '%s': %s", table_name, str(e))
+
+
+def get_table_profile(table_name: str) -> Optional[Dict[str, Any]]:
+    """Merged profile summary of a table, or None when it has not been profiled."""
+    if not settings.import_column_profiles_enabled:
+        return None
+    try:
+        ensure_column_profiles_table()
+        with get_engine().connect() as conn:
+            row = conn.execute(text("""
+                SELECT rows_profiled, profile FROM column_profiles
+                WHERE table_name = :table_name AND import_id = :merged
+            """), {"table_name": table_name, "merged": MERGED_PROFILE_KEY}).first()
+    except Exception as e:
+        logger.warning("Failed to load column profile for table '%s': %s", table_name, str(e))
+        return None
+    if row is None:
+        return None
+    profiler = TableProfiler.from_row(row.rows_profiled, row.profile)
+    return {
+        "rows_profiled": profiler.rows,
+        "columns": {name: column.summary() for name, column in profiler.columns.items()},
+    }
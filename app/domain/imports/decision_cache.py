@@ -0,0 +1,305 @@
+"""
+Persistent cache of LLM import decisions.
+
+Files that share a column structure and are imported under the same
+instruction usually get the same decision from the analyzer agent. Decisions
+recorded by ``make_import_decision`` are stored in ``llm_decision_cache`` keyed
+by the structure fingerprint, the ``llm_instruction`` hash, and any forced
+target table, so later files can skip the agent entirely.
+
+Each entry also records a version hash of the target table's columns at the
+time the decision was made. A lookup recomputes that version and drops the
+entry when it no longer matches, so a decision is never replayed against a
+table whose schema has since changed (including the table being created or
+dropped).
+
+Decisions carry their cache key under ``decision_cache_key``. When executing
+a decision fails, ``discard_cached_decision`` removes the entry so the same
+failing mapping is not replayed for the rest of its TTL, and dropping a table
+removes every entry that targets it.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.core.config import settings
+from app.core.metrics import record_cache_lookup
+from app.db.session import get_engine
+
+logger = logging.getLogger(__name__)
+
+# Schema version recorded for target tables that do not exist yet
+ABSENT_SCHEMA_VERSION = "absent"
+
+_table_initialized = False
+_table_init_lock = threading.Lock()
+
+
+def ensure_decision_cache_table() -> None:
+    """Create the llm_decision_cache table on-demand."""
+    global _table_initialized
+    if _table_initialized:
+        return
+
+    with _table_init_lock:
+        if _table_initialized:
+            return
+        create_sql = """
+        CREATE TABLE IF NOT EXISTS llm_decision_cache (
+            cache_key VARCHAR(64) PRIMARY KEY,
+            structure_fingerprint VARCHAR(64) NOT NULL,
+            instruction_hash VARCHAR(64) NOT NULL,
+            target_table VARCHAR(255),
+            schema_version VARCHAR(64) NOT NULL,
+            decision JSONB NOT NULL,
+            hit_count INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT NOW(),
+            last_hit_at TIMESTAMP,
+            expires_at TIMESTAMP
+        );
+        CREATE INDEX IF NOT EXISTS idx_llm_decision_cache_target ON llm_decision_cache(target_table);
+        CREATE INDEX IF NOT EXISTS idx_llm_decision_cache_expires ON llm_decision_cache(expires_at);
+        """
+        with get_engine().begin() as conn:
+            conn.execute(text(create_sql))
+        _table_initialized = True
+
+
+def _sha256(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+def build_structure_fingerprint(columns: List[str], file_metadata: Dict[str, Any]) -> str:
+    """
+    Fingerprint the shape of a file sample.
+
+    Column names are kept exactly and in order because cached column mappings
+    are keyed by the source header text.
+    """
+    payload = {
+        "file_type": file_metadata.get("file_type"),
+        "columns": [str(column) for column in columns],
+    }
+    return _sha256(json.dumps(payload, sort_keys=True))
+
+
+def hash_instruction(llm_instruction: Optional[str]) -> str:
+    return _sha256((llm_instruction or "").strip())
+
+
+def _cache_key(structure_fingerprint: str, instruction_hash: str, file_metadata: Dict[str, Any]) -> str:
+    forced_table = file_metadata.get("forced_target_table") or ""
+    forced_mode = file_metadata.get("forced_target_table_mode") or ""
+    return _sha256(f"{structure_fingerprint}:{instruction_hash}:{forced_table}:{forced_mode}")
+
+
+def decision_cache_key(
+    columns: List[str],
+    file_metadata: Dict[str, Any],
+    llm_instruction: Optional[str],
+) -> str:
+    """Cache key for a file structure, instruction, and forced target."""
+    structure_fingerprint = build_structure_fingerprint(columns, file_metadata)
+    return _cache_key(structure_fingerprint, hash_instruction(llm_instruction), file_metadata)
+
+
+def get_table_schema_version(conn: Connection, table_name: Optional[str]) -> str:
+    """Hash the target table's column names and types, or ABSENT_SCHEMA_VERSION."""
+    if not table_name:
+        return ABSENT_SCHEMA_VERSION
+    rows = conn.execute(
+        text(
+            """
+            SELECT column_name, data_type
+            FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = :table_name
+            ORDER BY ordinal_position
+            """
+        ),
+        {"table_name": table_name},
+    ).fetchall()
+    if not rows:
+        return ABSENT_SCHEMA_VERSION
+    return _sha256("|".join(f"{row[0]}:{row[1]}" for row in rows))
+
+
+def lookup_cached_decision(
+    columns: List[str],
+    file_metadata: Dict[str, Any],
+    llm_instruction: Optional[str],
+) -> Optional[Dict[str, Any]]:
+    """
+    Return a cached decision for this structure/instruction, or None.
+
+    Expired entries and entries whose target table schema has changed are
+    deleted on the way out. Failures are logged and treated as a miss.
+    """
+    if not settings.llm_decision_cache_enabled or not columns:
+        return None
+
+    try:
+        ensure_decision_cache_table()
+        structure_fingerprint = build_structure_fingerprint(columns, file_metadata)
+        cache_key = _cache_key(structure_fingerprint, hash_instruction(llm_instruction), file_metadata)
+
+        with get_engine().begin() as conn:
+            row = conn.execute(
+                text(
+                    """
+                    SELECT target_table, schema_version, decision,
+                           expires_at IS NOT NULL AND expires_at <= NOW() AS expired
+                    FROM llm_decision_cache
+                    WHERE cache_key = :cache_key
+                    FOR UPDATE
+                    """
+                ),
+                {"cache_key": cache_key},
+            ).mappings().first()
+            if row is None:
+                record_cache_lookup("llm_decision", False)
+                return None
+
+            if row["expired"]:
+                reason = "expired"
+            elif get_table_schema_version(conn, row["target_table"]) != row["schema_version"]:
+                reason = "target schema changed"
+            else:
+                reason = None
+
+            if reason:
+                conn.execute(
+                    text("DELETE FROM llm_decision_cache WHERE cache_key = :cache_key"),
+                    {"cache_key": cache_key},
+                )
+                logger.info(
+                    "Dropped cached import decision for table '%s': %s",
+                    row["target_table"],
+                    reason,
+                )
+                record_cache_lookup("llm_decision", False)
+                return None
+
+            conn.execute(
+                text(
+                    """
+                    UPDATE llm_decision_cache
+                    SET hit_count = hit_count + 1, last_hit_at = NOW()
+                    WHERE cache_key = :cache_key
+                    """
+                ),
+                {"cache_key": cache_key},
+            )
+
+        record_cache_lookup("llm_decision", True)
+        decision = row["decision"]
+        if isinstance(decision, str):
+            decision = json.loads(decision)
+        return decision
+    except Exception as e:
+        logger.warning(f"Failed to read LLM decision cache: {e}")
+        return None
+
+
+def store_cached_decision(
+    columns: List[str],
+    file_metadata: Dict[str, Any],
+    llm_instruction: Optional[str],
+    decision: Dict[str, Any],
+) -> None:
+    """Persist a decision made by the analyzer agent. Failures are logged only."""
+    if not settings.llm_decision_cache_enabled or not columns or not decision:
+        return
+
+    try:
+        ensure_decision_cache_table()
+        structure_fingerprint = build_structure_fingerprint(columns, file_metadata)
+        instruction_hash = hash_instruction(llm_instruction)
+        cache_key = _cache_key(structure_fingerprint, instruction_hash, file_metadata)
+        target_table = decision.get("target_table")
+        ttl_seconds = settings.llm_decision_cache_ttl_seconds
+
+        with get_engine().begin() as conn:
+            conn.execute(
+                text(
+                    """
+                    INSERT INTO llm_decision_cache (
+                        cache_key, structure_fingerprint, instruction_hash, target_table,
+                        schema_version, decision, expires_at
+                    )
+                    VALUES (
+                        :cache_key, :structure_fingerprint, :instruction_hash, :target_table,
+                        :schema_version, CAST(:decision AS JSONB),
+                        CASE WHEN :ttl_seconds > 0
+                             THEN NOW() + make_interval(secs => :ttl_seconds)
+                        END
+                    )
+                    ON CONFLICT (cache_key) DO UPDATE
+                    SET target_table = EXCLUDED.target_table,
+                        schema_version = EXCLUDED.schema_version,
+                        decision = EXCLUDED.decision,
+                        hit_count = 0,
+                        created_at = NOW(),
+                        last_hit_at = NULL,
+                        expires_at = EXCLUDED.expires_at
+                    """
+                ),
+                {
+                    "cache_key": cache_key,
+                    "structure_fingerprint": structure_fingerprint,
+                    "instruction_hash": instruction_hash,
+                    "target_table": target_table,
+                    "schema_version": get_table_schema_version(conn, target_table),
+                    "decision": json.dumps(decision, default=str),
+                    "ttl_seconds": ttl_seconds,
+                },
+            )
+            conn.execute(text("DELETE FROM llm_decision_cache WHERE expires_at <= NOW()"))
+        logger.info(f"Cached import decision for table '{target_table}'")
+    except Exception as e:
+        logger.warning(f"Failed to store LLM decision cache entry: {e}")
+
+
+def invalidate_cached_decisions(target_table: Optional[str] = None) -> int:
+    """
+    Delete cached decisions for one target table, or all of them.
+
+    Returns rows removed. Failures are logged and reported as 0.
+    """
+    try:
+        ensure_decision_cache_table()
+        with get_engine().begin() as conn:
+            if target_table is None:
+                result = conn.execute(text("DELETE FROM llm_decision_cache"))
+            else:
+                result = conn.execute(
+                    text("DELETE FROM llm_decision_cache WHERE target_table = :target_table"),
+                    {"target_table": target_table},
+                )
+        return result.rowcount or 0
+    except Exception as e:
+        logger.warning(f"Failed to invalidate LLM decision cache entries: {e}")
+        return 0
+
+
+def discard_cached_decision(cache_key: Optional[str]) -> None:
+    """Delete one cached decision, e.g. after executing it failed. Failures are logged only."""
+    if not cache_key:
+        return
+    try:
+        ensure_decision_cache_table()
+        with get_engine().begin() as conn:
+            result = conn.execute(
+                text("DELETE FROM llm_decision_cache WHERE cache_key = :cache_key"),
+                {"cache_key": cache_key},
+            )
+        if result.rowcount:
+            logger.info("Discarded cached import decision %s after a failed import", cache_key[:12])
+    except Exception as e:
+        logger.warning(f"Failed to discard LLM decision cache entry: {e}")
@@ -2,13 +2,28 @@
 import hashlib
 import json
 import logging
+import random
 import re
-from typing import List, Optional, Tuple, Dict, Any
+import threading
+import time
+from typing import List, Optional, Tuple, Dict, Any, Set
 from sqlalchemy import text
 from sqlalchemy.engine import Engine
 
 logger = logging.getLogger(__name__)
 
+# MinHash/LSH parameters: 16 bands x 4 rows puts the LSH threshold around
+# Jaccard 0.5, so candidates at the 0.9 merge threshold are missed with
+# probability ~1e-7 while unrelated schemas rarely share a bucket.
+MINHASH_NUM_PERM = 64
+LSH_BANDS = 16
+LSH_ROWS = MINHASH_NUM_PERM // LSH_BANDS
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# Rebuild the in-memory index at least this often, even if the table looks unchanged
+INDEX_MAX_AGE_SECONDS = 600
+
 def normalize_column_name(name: str) -> str:
     """Normalize column name: lowercase, alphanumeric only."""
     if not name:
@@ -56,6 +71,7 @@ def store_table_fingerprint(engine: Engine, table_name: str, columns: List[str])
                 "column_names": json.dumps(normalized_columns),
                 "fingerprint_hash": fingerprint_hash
             })
+        _index_stored_fingerprint(engine, table_name, normalized_columns, fingerprint_hash)
             
         logger.info(f"Stored fingerprint for table '{table_name}' (hash: {fingerprint_hash[:8]})")
         
@@ -74,6 +90,176 @@ def calculate_jaccard_similarity(set1: set, set2: set) -> float:
     
     return intersection / union if union > 0 else 0.0
 
+def _token_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+
+_rng = random.Random(1952539243)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(MINHASH_NUM_PERM)
+]
+
+def minhash_signature(tokens: Set[str]) -> Tuple[int, ...]:
+    """Compute a MinHash signature for a set of normalized column names."""
+    if not tokens:
+        return tuple([_MAX_HASH] * MINHASH_NUM_PERM)
+    hashes = [_token_hash(token) for token in tokens]
+    return tuple(
+        min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+class FingerprintIndex:
+    """
+    In-memory MinHash + LSH index over table column sets.
+
+    LSH buckets only narrow down candidates; similarity scores are exact
+    Jaccard values computed against the stored column sets.
+    """
+
+    def __init__(self) -> None:
+        self._columns: Dict[str, Set[str]] = {}
+        self._hashes: Dict[str, str] = {}
+        self._tables_by_hash: Dict[str, Set[str]] = {}
+        self._band_keys: Dict[str, List[Tuple[int, ...]]] = {}
+        self._buckets: List[Dict[Tuple[int, ...], Set[str]]] = [{} for _ in range(LSH_BANDS)]
+
+    def __len__(self) -> int:
+        return len(self._columns)
+
+    @staticmethod
+    def _bands(signature: Tuple[int, ...]) -> List[Tuple[int, ...]]:
+        return [signature[i * LSH_ROWS:(i + 1) * LSH_ROWS] for i in range(LSH_BANDS)]
+
+    def add(self, table_name: str, normalized_columns: List[str], fingerprint_hash: str) -> None:
+        self.remove(table_name)
+        column_set = set(normalized_columns)
+        band_keys = self._bands(minhash_signature(column_set))
+        self._columns[table_name] = column_set
+        self._hashes[table_name] = fingerprint_hash
+        self._tables_by_hash.setdefault(fingerprint_hash, set()).add(table_name)
+        self._band_keys[table_name] = band_keys
+        for bucket, key in zip(self._buckets, band_keys):
+            bucket.setdefault(key, set()).add(table_name)
+
+    def remove(self, table_name: str) -> None:
+        band_keys = self._band_keys.pop(table_name, None)
+        self._columns.pop(table_name, None)
+        stored_hash = self._hashes.pop(table_name, None)
+        if stored_hash is not None:
+            same_hash = self._tables_by_hash.get(stored_hash)
+            if same_hash:
+                same_hash.discard(table_name)
+                if not same_hash:
+                    del self._tables_by_hash[stored_hash]
+        if not band_keys:
+            return
+        for bucket, key in zip(self._buckets, band_keys):
+            members = bucket.get(key)
+            if members:
+                members.discard(table_name)
+                if not members:
+                    del bucket[key]
+
+    def exact(self, fingerprint_hash: str) -> Optional[str]:
+        tables = self._tables_by_hash.get(fingerprint_hash)
+        return min(tables) if tables else None
+
+    def query(self, normalized_columns: List[str], k: int = 5) -> List[Tuple[str, float]]:
+        """Return up to ``k`` (table_name, jaccard) pairs, best first."""
+        column_set = set(normalized_columns)
+        candidates: Set[str] = set()
+        for bucket, key in zip(self._buckets, self._bands(minhash_signature(column_set))):
+            candidates.update(bucket.get(key, ()))
+        scored = [
+            (table_name, calculate_jaccard_similarity(column_set, self._columns[table_name]))
+            for table_name in candidates
+        ]
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:k]
+
+_index = FingerprintIndex()
+_index_version: Optional[Tuple[Any, ...]] = None
+_index_built_at = 0.0
+_index_lock = threading.Lock()
+
+# Advanced by a trigger once per changed table_fingerprints row, at commit
+_VERSION_SQL = "SELECT last_value, is_called FROM table_fingerprints_version"
+
+def _read_index_version(conn) -> Tuple[Any, ...]:
+    return tuple(conn.execute(text(_VERSION_SQL)).fetchone())
+
+def _get_fingerprint_index(engine: Engine) -> FingerprintIndex:
+    """Return the shared index, rebuilding it when table_fingerprints changed."""
+    global _index, _index_version, _index_built_at
+    # Database work happens outside the lock so lookups never queue behind a query
+    with engine.connect() as conn:
+        version = _read_index_version(conn)
+        with _index_lock:
+            if version == _index_version and time.monotonic() - _index_built_at < INDEX_MAX_AGE_SECONDS:
+                return _index
+
+        index = FingerprintIndex()
+        result = conn.execute(text("SELECT table_name, column_names, fingerprint_hash FROM table_fingerprints"))
+        for row in result:
+            stored_columns = json.loads(row[1]) if isinstance(row[1], str) else row[1]
+            index.add(row[0], stored_columns or [], row[2])
+
+    with _index_lock:
+        _index, _index_version, _index_built_at = index, version, time.monotonic()
+    logger.debug(f"Rebuilt fingerprint index with {len(index)} table(s)")
+    return index
+
+def _index_stored_fingerprint(engine: Engine, table_name: str, normalized_columns: List[str], fingerprint_hash: str) -> None:
+    """Apply a fingerprint we just stored to the index without a full rebuild."""
+    global _index_version
+    with engine.connect() as conn:
+        version = _read_index_version(conn)
+    with _index_lock:
+        if _index_version is None:
+            return  # Not built yet; the first lookup loads everything
+        _index.add(table_name, normalized_columns, fingerprint_hash)
+        # Only our own upsert moved the version; anything else forces a rebuild
+        if _index_version[1] and version[1] and version[0] == _index_version[0] + 1:
+            _index_version = version
+
+def reset_fingerprint_index() -> None:
+    """Drop the in-memory index so the next lookup reloads it."""
+    global _index, _index_version
+    with _index_lock:
+        _index = FingerprintIndex()
+        _index_version = None
+
+def find_fingerprint_candidates(
+    engine: Engine,
+    columns: List[str],
+    k: int = 5,
+    min_similarity: float = 0.0,
+) -> List[Dict[str, Any]]:
+    """
+    Return the top-``k`` tables whose column sets resemble ``columns``.
+
+    Each candidate is a dict with 'table_name', 'similarity', and
+    'match_type' ('exact' or 'loose'), ordered by similarity.
+    """
+    if not columns:
+        return []
+
+    target_hash, target_normalized = calculate_fingerprint(columns)
+    index = _get_fingerprint_index(engine)
+
+    candidates: List[Dict[str, Any]] = []
+    exact_table = index.exact(target_hash)
+    if exact_table:
+        candidates.append({"table_name": exact_table, "similarity": 1.0, "match_type": "exact"})
+
+    for table_name, similarity in index.query(target_normalized, k=k):
+        if table_name == exact_table or similarity < min_similarity:
+            continue
+        candidates.append({"table_name": table_name, "similarity": similarity, "match_type": "loose"})
+
+    return candidates[:k]
+
 def find_matching_fingerprint(engine: Engine, columns: List[str], threshold: float = 0.9) -> Optional[Dict[str, Any]]:
     """
     Find an existing table with a matching schema fingerprint.
@@ -88,53 +274,11 @@ def find_matching_fingerprint(engine: Engine, columns: List[str], threshold: flo
     """
     if not columns:
         return None
-        
-    target_hash, target_normalized = calculate_fingerprint(columns)
-    target_set = set(target_normalized)
-    
+
     try:
-        with engine.connect() as conn:
-            # 1. Try exact match
-            result = conn.execute(text("""
-                SELECT table_name, column_names 
-                FROM table_fingerprints 
-                WHERE fingerprint_hash = :hash
-            """), {"hash": target_hash})
-            
-            exact_match = result.fetchone()
-            if exact_match:
-                return {
-                    "table_name": exact_match[0],
-                    "similarity": 1.0,
-                    "match_type": "exact"
-                }
-            
-            # 2. Scan for loose match
-            # If we didn't find exact match, we need to compare against all fingerprints
-            # Since number of tables is usually small (<1000), this linear scan is acceptable
-            result = conn.execute(text("SELECT table_name, column_names FROM table_fingerprints"))
-            
-            best_match = None
-            best_score = 0.0
-            
-            for row in result:
-                table_name = row[0]
-                stored_columns = json.loads(row[1]) if isinstance(row[1], str) else row[1]
-                stored_set = set(stored_columns)
-                
-                similarity = calculate_jaccard_similarity(target_set, stored_set)
-                
-                if similarity > best_score:
-                    best_score = similarity
-                    best_match = table_name
-            
-            if best_match and best_score >= threshold:
-                return {
-                    "table_name": best_match,
-                    "similarity": best_score,
-                    "match_type": "loose"
-                }
-                
+        candidates = find_fingerprint_candidates(engine, columns, k=1, min_similarity=threshold)
+        if candidates:
+            return candidates[0]
     except Exception as e:
         logger.warning(f"Error finding matching fingerprint: {e}")
         
@@ -12,7 +12,16 @@ from datetime import datetime, timezone
 import uuid
 import json
 from app.db.models import insert_records, record_duplicate_rows
-from app.db.session import get_engine
+from app.core.profiling import finish_import_profile
+from app.db.session import get_engine, note_table_imported
+from app.domain.imports.audit_writer import (
+    MAPPING_ERRORS_TABLE,
+    VALIDATION_FAILURES_TABLE,
+    get_active_audit_writer,
+    mapping_error_row,
+    validation_failure_row,
+    write_audit_rows,
+)
 from app.api.schemas.shared import MappingConfig
 from app.utils.serialization import _make_json_safe
 from decimal import Decimal
@@ -309,6 +318,7 @@ def start_import_tracking(
                 "task_id": task_id,
                 "import_strategy": import_strategy
             })
+        note_table_imported(table_name)
         
         logger.info(f"Started import tracking: {import_id}")
         return import_id
@@ -512,12 +522,77 @@ def summarize_chunk_status(import_id: str) -> Dict[str, int]:
     return summary
 
 
+def get_import_profile(import_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Assemble the performance profile for an import.
+
+    Combines the timing columns on import_history, the profile stored in
+    ``metadata["performance_profile"]`` (None for imports that predate
+    profiling), and per-chunk mapping timings from mapping_chunk_status.
+    Returns None when the import does not exist.
+    """
+    engine = get_engine()
+    with engine.connect() as conn:
+        row = conn.execute(text("""
+            SELECT import_id, status, file_size_bytes, rows_processed,
+                   duration_seconds, parsing_time_seconds, duplicate_check_time_seconds,
+                   insert_time_seconds, mapping_duration_seconds,
+                   metadata -> 'performance_profile' AS performance_profile
+            FROM import_history
+            WHERE import_id = :import_id
+        """), {"import_id": import_id}).mappings().first()
+        if row is None:
+            return None
+
+        chunk_rows = conn.execute(text("""
+            SELECT chunk_number, status, errors_count, started_at, completed_at,
+                   EXTRACT(EPOCH FROM (completed_at - started_at)) AS duration_seconds
+            FROM mapping_chunk_status
+            WHERE import_id = :import_id
+            ORDER BY chunk_number
+        """), {"import_id": import_id}).mappings().all()
+
+    def _as_float(value: Any) -> Optional[float]:
+        return float(value) if value is not None else None
+
+    profile = row["performance_profile"]
+    if isinstance(profile, str):
+        profile = json.loads(profile)
+
+    return {
+        "import_id": str(row["import_id"]),
+        "status": row["status"],
+        "timings": {
+            "duration_seconds": _as_float(row["duration_seconds"]),
+            "parsing_time_seconds": _as_float(row["parsing_time_seconds"]),
+            "mapping_duration_seconds": _as_float(row["mapping_duration_seconds"]),
+            "duplicate_check_time_seconds": _as_float(row["duplicate_check_time_seconds"]),
+            "insert_time_seconds": _as_float(row["insert_time_seconds"]),
+        },
+        "profile": profile,
+        "mapping_chunks": [
+            {
+                "chunk_number": chunk["chunk_number"],
+                "status": chunk["status"],
+                "errors_count": chunk["errors_count"] or 0,
+                "started_at": chunk["started_at"],
+                "completed_at": chunk["completed_at"],
+                "duration_seconds": _as_float(chunk["duration_seconds"]),
+            }
+            for chunk in chunk_rows
+        ],
+    }
+
+
 def record_mapping_errors_batch(
     import_id: str,
     errors: List[Dict[str, Any]]
 ):
     """
     Batch insert mapping errors for efficiency.
+
+    When an audit writer is open for the import the errors are buffered (and
+    subject to its cap/sampling); otherwise they are written immediately with COPY.
     
     Args:
         import_id: UUID of the import
@@ -532,44 +607,17 @@ def record_mapping_errors_batch(
     """
     if not errors:
         return
-    
-    engine = get_engine()
-    
+
+    writer = get_active_audit_writer(import_id)
+    if writer is not None:
+        writer.add_mapping_errors(errors)
+        return
+
     try:
-        with engine.begin() as conn:
-            insert_sql = """
-            INSERT INTO mapping_errors (
-                import_id, record_number, error_type, error_message,
-                source_field, target_field, source_value, chunk_number
-            ) VALUES (
-                :import_id, :record_number, :error_type, :error_message,
-                :source_field, :target_field, :source_value, :chunk_number
-            )
-            """
-            
-            # Prepare batch insert data
-            batch_data = []
-            for error in errors:
-                # Truncate source_value if too long (keep first 500 chars)
-                source_value = error.get("source_value")
-                if source_value and len(str(source_value)) > 500:
-                    source_value = str(source_value)[:497] + "..."
-                
-                batch_data.append({
-                    "import_id": import_id,
-                    "record_number": error.get("record_number"),
-                    "error_type": error.get("error_type", "mapping_error"),
-                    "error_message": error.get("error_message"),
-                    "source_field": error.get("source_field"),
-                    "target_field": error.get("target_field"),
-                    "source_value": source_value,
-                    "chunk_number": error.get("chunk_number")
-                })
-            
-            # Execute batch insert
-            for data in batch_data:
-                conn.execute(text(insert_sql), data)
-        
+        write_audit_rows(
+            MAPPING_ERRORS_TABLE,
+            [mapping_error_row(import_id, error) for error in errors],
+        )
         logger.info(f"Recorded {len(errors)} mapping errors for import {import_id}")
         
     except Exception as e:
@@ -679,8 +727,15 @@ def complete_import_tracking(
         error_message: Error message if failed
         warnings: List of warning messages
         metadata: Additional metadata to store
+
+    The import's performance profile, if one was started, is finished here and
+    stored under ``metadata["performance_profile"]``.
     """
     engine = get_engine()
+
+    profile = finish_import_profile(import_id)
+    if profile:
+        metadata = {**(metadata or {}), "performance_profile": profile}
     
     try:
         with engine.begin() as conn:
@@ -702,9 +757,10 @@ def complete_import_tracking(
                 metadata = :metadata,
                 updated_at = NOW()
             WHERE import_id = :import_id
+            RETURNING table_name
             """
             
-            conn.execute(text(update_sql), {
+            table_name = conn.execute(text(update_sql), {
                 "import_id": import_id,
                 "status": status,
                 "total_rows_in_file": total_rows_in_file,
@@ -720,7 +776,8 @@ def complete_import_tracking(
                 "error_message": error_message,
                 "warnings": warnings,
                 "metadata": json.dumps(metadata) if metadata else None
-            })
+            }).scalar()
+        note_table_imported(table_name)
         
         logger.info(f"Completed import tracking: {import_id} with status {status}")
         
@@ -1386,6 +1443,9 @@ def record_validation_failures(
 ) -> None:
     """
     Store validation failures for later review.
+
+    Buffered through the import's audit writer when one is open, otherwise
+    written immediately with COPY.
     
     Args:
         import_id: UUID of the import
@@ -1397,37 +1457,16 @@ def record_validation_failures(
     if not failures:
         return
 
-    engine = get_engine()
-    payload = []
-
-    for entry in failures:
-        record_number = entry.get("record_number")
-        record = entry.get("record", {})
-        validation_errors = entry.get("validation_errors", [])
-        
-        # Make record JSON-safe
-        safe_record = _make_json_safe(record)
-        safe_record_json = json.dumps(safe_record)
-        
-        # Make validation_errors JSON-safe
-        safe_errors = _make_json_safe(validation_errors)
-        safe_errors_json = json.dumps(safe_errors)
-        
-        payload.append({
-            "import_id": import_id,
-            "record_number": record_number,
-            "record_data": safe_record_json,
-            "validation_errors": safe_errors_json
-        })
-
-    insert_sql = text("""
-        INSERT INTO import_validation_failures (import_id, record_number, record_data, validation_errors)
-        VALUES (:import_id, :record_number, :record_data, :validation_errors)
-    """)
+    writer = get_active_audit_writer(import_id)
+    if writer is not None:
+        writer.add_validation_failures(failures)
+        return
 
     try:
-        with engine.begin() as conn:
-            conn.execute(insert_sql, payload)
+        write_audit_rows(
+            VALIDATION_FAILURES_TABLE,
+            [validation_failure_row(import_id, entry) for entry in failures],
+        )
         logger.info(f"Recorded {len(failures)} validation failures for import {import_id}")
     except Exception as e:
         logger.error(f"Error recording validation failures for import {import_id}: {str(e)}")
@@ -0,0 +1,360 @@
+"""
+Durable job queue on top of the import_jobs table.
+
+Jobs are enqueued with a ``job_type`` and a JSON ``payload`` and claimed by
+worker processes (``python -m app.worker``) using ``FOR UPDATE SKIP LOCKED``
+so any number of workers can poll the same table without double-claiming.
+A claimed job holds a lease (``locked_until``) that the worker extends with
+heartbeats; if the worker dies the lease expires and another worker picks the
+job up again until ``max_attempts`` claims (counted in ``attempts``) are
+used up. Handlers that are not safe to re-run register with
+``max_attempts=1`` so a reclaimed job fails instead of repeating its work.
+
+Rows created by ``create_import_job`` have no ``job_type`` and are never
+claimed, so in-process jobs keep working unchanged.
+"""
+from __future__ import annotations
+
+import logging
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.session import get_engine
+from app.domain.imports.jobs import (
+    _json_payload,
+    _row_to_job,
+    _run_with_table_retry,
+    ensure_import_jobs_table,
+    fail_active_job,
+    update_import_job,
+)
+from app.domain.uploads.uploaded_files import assign_active_job_state
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Dict[str, Any]], None]
+
+JOB_HANDLERS: Dict[str, JobHandler] = {}
+# Per job type cap on claims, overriding JOB_MAX_ATTEMPTS
+JOB_TYPE_MAX_ATTEMPTS: Dict[str, int] = {}
+
+
+def register_job_handler(
+    job_type: str,
+    *,
+    max_attempts: Optional[int] = None,
+) -> Callable[[JobHandler], JobHandler]:
+    """
+    Decorator registering the function that executes jobs of ``job_type``.
+
+    Pass ``max_attempts=1`` for handlers that are not idempotent, so a job
+    whose worker died is failed rather than run a second time.
+    """
+    def decorator(func: JobHandler) -> JobHandler:
+        JOB_HANDLERS[job_type] = func
+        if max_attempts is not None:
+            JOB_TYPE_MAX_ATTEMPTS[job_type] = max(1, max_attempts)
+        return func
+    return decorator
+
+
+def get_job_handler(job_type: Optional[str]) -> Optional[JobHandler]:
+    return JOB_HANDLERS.get(job_type) if job_type else None
+
+
+def _queue_row_to_job(row: Any) -> Dict[str, Any]:
+    job = _row_to_job(row)
+    job.update(
+        {
+            "payload": row["payload"] or {},
+            "attempts": row["attempts"],
+            "max_attempts": row["max_attempts"],
+            "run_after": row["run_after"],
+            "locked_by": row["locked_by"],
+            "locked_until": row["locked_until"],
+            "heartbeat_at": row["heartbeat_at"],
+        }
+    )
+    return job
+
+
+def enqueue_import_job(
+    *,
+    job_type: str,
+    payload: Dict[str, Any],
+    trigger_source: str,
+    file_id: Optional[str] = None,
+    job_id: Optional[str] = None,
+    analysis_mode: Optional[str] = None,
+    conflict_mode: Optional[str] = None,
+    stage: str = "queued",
+    metadata: Optional[Dict[str, Any]] = None,
+    max_attempts: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Persist a queued job for a worker to claim and attach it to the file (if any).
+
+    ``max_attempts`` defaults to the job type's registered cap, then JOB_MAX_ATTEMPTS.
+    """
+    ensure_import_jobs_table()
+    engine = get_engine()
+    job_id = job_id or str(uuid.uuid4())
+
+    insert_sql = """
+    INSERT INTO import_jobs (
+        id, file_id, status, stage, progress, retry_attempt, error_message,
+        trigger_source, analysis_mode, conflict_mode, metadata,
+        job_type, payload, max_attempts, run_after
+    )
+    VALUES (
+        :id, :file_id, 'queued', :stage, 0, 1, NULL,
+        :trigger_source, :analysis_mode, :conflict_mode, CAST(:metadata AS jsonb),
+        :job_type, CAST(:payload AS jsonb), :max_attempts, NOW()
+    )
+    RETURNING *
+    """
+    params = {
+        "id": job_id,
+        "file_id": file_id,
+        "stage": stage,
+        "trigger_source": trigger_source,
+        "analysis_mode": analysis_mode,
+        "conflict_mode": conflict_mode,
+        "metadata": _json_payload(metadata),
+        "job_type": job_type,
+        "payload": _json_payload(payload),
+        "max_attempts": max(1, max_attempts or JOB_TYPE_MAX_ATTEMPTS.get(job_type) or settings.job_max_attempts),
+    }
+
+    def _insert() -> Dict[str, Any]:
+        with engine.connect() as conn:
+            result = conn.execute(text(insert_sql), params)
+            conn.commit()
+            row = result.mappings().first()
+            if not row:
+                raise RuntimeError("Failed to enqueue import job")
+            return _queue_row_to_job(row)
+
+    job = _run_with_table_retry(_insert)
+    if file_id:
+        assign_active_job_state(file_id, job_id, job["status"], job["stage"])
+    return job
+
+
+def claim_next_job(
+    worker_id: str,
+    *,
+    job_types: Optional[List[str]] = None,
+    visibility_timeout_seconds: Optional[int] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Claim the oldest runnable job for ``worker_id``.
+
+    Runnable means queued and due, or running with an expired lease (the
+    previous worker stopped heartbeating). Claiming increments ``attempts``
+    (and mirrors it into the displayed ``retry_attempt``) so a job that keeps
+    killing workers eventually stops being picked up.
+    """
+    ensure_import_jobs_table()
+    engine = get_engine()
+    visibility = visibility_timeout_seconds or settings.job_visibility_timeout_seconds
+
+    type_filter = "AND job_type = ANY(:job_types)" if job_types else ""
+    claim_sql = f"""
+    WITH next_job AS (
+        SELECT id
+        FROM import_jobs
+        WHERE job_type IS NOT NULL
+          {type_filter}
+          AND attempts < max_attempts
+          AND (
+              (status = 'queued' AND run_after <= NOW())
+              OR (status = 'running' AND locked_until < NOW())
+          )
+        ORDER BY created_at
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+    )
+    UPDATE import_jobs AS j
+    SET status = 'running',
+        locked_by = :worker_id,
+        locked_until = NOW() + make_interval(secs => :visibility),
+        heartbeat_at = NOW(),
+        attempts = j.attempts + 1,
+        retry_attempt = j.attempts + 1,
+        updated_at = NOW()
+    FROM next_job
+    WHERE j.id = next_job.id
+    RETURNING j.*
+    """
+    params: Dict[str, Any] = {"worker_id": worker_id, "visibility": visibility}
+    if job_types:
+        params["job_types"] = list(job_types)
+
+    def _claim() -> Optional[Dict[str, Any]]:
+        with engine.connect() as conn:
+            result = conn.execute(text(claim_sql), params)
+            conn.commit()
+            row = result.mappings().first()
+            return _queue_row_to_job(row) if row else None
+
+    return _run_with_table_retry(_claim)
+
+
+def heartbeat_jobs(
+    worker_id: str,
+    job_ids: List[str],
+    *,
+    visibility_timeout_seconds: Optional[int] = None,
+) -> int:
+    """Extend the lease on jobs still owned by ``worker_id``; returns rows touched."""
+    if not job_ids:
+        return 0
+    ensure_import_jobs_table()
+    engine = get_engine()
+    visibility = visibility_timeout_seconds or settings.job_visibility_timeout_seconds
+
+    heartbeat_sql = """
+    UPDATE import_jobs
+    SET locked_until = NOW() + make_interval(secs => :visibility),
+        heartbeat_at = NOW()
+    WHERE id = ANY(CAST(:job_ids AS uuid[]))
+      AND locked_by = :worker_id
+      AND status = 'running'
+    """
+
+    def _heartbeat() -> int:
+        with engine.connect() as conn:
+            result = conn.execute(
+                text(heartbeat_sql),
+                {"job_ids": list(job_ids), "worker_id": worker_id, "visibility": visibility},
+            )
+            conn.commit()
+            return result.rowcount or 0
+
+    return _run_with_table_retry(_heartbeat)
+
+
+def finish_claimed_job(job_id: str, worker_id: str) -> None:
+    """
+    Release a job after its handler returned.
+
+    Handlers usually complete the job themselves (``complete_import_job``);
+    a job still marked running afterwards is marked succeeded here.
+    """
+    engine = get_engine()
+    finish_sql = """
+    UPDATE import_jobs
+    SET status = CASE WHEN status = 'running' THEN 'succeeded' ELSE status END,
+        stage = CASE WHEN status = 'running' THEN 'completed' ELSE stage END,
+        progress = CASE WHEN status = 'running' THEN 100 ELSE progress END,
+        completed_at = CASE
+            WHEN status = 'running' THEN COALESCE(completed_at, NOW())
+            ELSE completed_at
+        END,
+        locked_by = NULL,
+        locked_until = NULL,
+        updated_at = NOW()
+    WHERE id = :job_id AND locked_by = :worker_id
+    """
+    with engine.connect() as conn:
+        conn.execute(text(finish_sql), {"job_id": job_id, "worker_id": worker_id})
+        conn.commit()
+
+
+def release_job_for_retry(
+    job: Dict[str, Any],
+    worker_id: str,
+    error_message: str,
+    *,
+    backoff_seconds: Optional[int] = None,
+) -> bool:
+    """
+    Requeue a job whose handler raised, or fail it once attempts are exhausted.
+
+    Returns True when the job was requeued.
+    """
+    attempt = job.get("attempts") or 1
+    max_attempts = job.get("max_attempts") or 1
+    if attempt >= max_attempts:
+        _fail_queue_job(job, f"{error_message} (after {attempt} attempt(s))")
+        return False
+
+    engine = get_engine()
+    backoff = (settings.job_retry_backoff_seconds if backoff_seconds is None else backoff_seconds) * attempt
+    requeue_sql = """
+    UPDATE import_jobs
+    SET status = 'queued',
+        stage = 'queued',
+        error_message = :error_message,
+        run_after = NOW() + make_interval(secs => :backoff),
+        locked_by = NULL,
+        locked_until = NULL,
+        updated_at = NOW()
+    WHERE id = :job_id AND locked_by = :worker_id
+    """
+    with engine.connect() as conn:
+        conn.execute(
+            text(requeue_sql),
+            {
+                "job_id": job["id"],
+                "worker_id": worker_id,
+                "error_message": error_message,
+                "backoff": backoff,
+            },
+        )
+        conn.commit()
+    logger.warning(
+        "Job %s (%s) failed attempt %d/%d, retrying in %ss: %s",
+        job["id"], job.get("job_type"), attempt, max_attempts, backoff, error_message,
+    )
+    return True
+
+
+def reap_expired_jobs() -> int:
+    """Fail running jobs whose lease expired after their final attempt."""
+    ensure_import_jobs_table()
+    engine = get_engine()
+    select_sql = """
+    SELECT *
+    FROM import_jobs
+    WHERE job_type IS NOT NULL
+      AND status = 'running'
+      AND locked_until < NOW()
+      AND attempts >= max_attempts
+    """
+
+    def _select() -> List[Dict[str, Any]]:
+        with engine.connect() as conn:
+            rows = conn.execute(text(select_sql)).mappings().all()
+            conn.commit()
+            return [_queue_row_to_job(row) for row in rows]
+
+    expired = _run_with_table_retry(_select)
+    for job in expired:
+        _fail_queue_job(job, "Worker stopped responding (visibility timeout expired)")
+    return len(expired)
+
+
+def _fail_queue_job(job: Dict[str, Any], error_message: str) -> None:
+    if job.get("file_id"):
+        fail_active_job(job["file_id"], job["id"], error_message)
+    else:
+        update_import_job(
+            job["id"],
+            status="failed",
+            stage="completed",
+            error_message=error_message,
+            completed=True,
+        )
+    engine = get_engine()
+    with engine.connect() as conn:
+        conn.execute(
+            text("UPDATE import_jobs SET locked_by = NULL, locked_until = NULL WHERE id = :job_id"),
+            {"job_id": job["id"]},
+        )
+        conn.commit()
+    logger.error("Job %s (%s) failed permanently: %s", job["id"], job.get("job_type"), error_message)
@@ -80,6 +80,32 @@ def _create_import_jobs_table() -> None:
     );
     CREATE INDEX IF NOT EXISTS idx_import_jobs_file ON import_jobs(file_id);
     CREATE INDEX IF NOT EXISTS idx_import_jobs_status ON import_jobs(status);
+
+    -- Durable queue columns (see app.domain.imports.job_queue)
+    ALTER TABLE import_jobs ALTER COLUMN file_id DROP NOT NULL;
+    ALTER TABLE import_jobs ADD COLUMN IF NOT EXISTS job_type VARCHAR(100);
+    ALTER TABLE import_jobs ADD COLUMN IF NOT EXISTS payload JSONB;
+    ALTER TABLE import_jobs ADD COLUMN IF NOT EXISTS max_attempts INTEGER DEFAULT 1;
+    ALTER TABLE import_jobs ADD COLUMN IF NOT EXISTS run_after TIMESTAMP DEFAULT NOW();
+    ALTER TABLE import_jobs ADD COLUMN IF NOT EXISTS locked_by VARCHAR(255);
+    ALTER TABLE import_jobs ADD COLUMN IF NOT EXISTS locked_until TIMESTAMP;
+    ALTER TABLE import_jobs ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMP;
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = current_schema()
+              AND table_name = 'import_jobs'
+              AND column_name = 'attempts'
+        ) THEN
+            ALTER TABLE import_jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0;
+            -- Queue claims used to be counted in retry_attempt
+            UPDATE import_jobs SET attempts = COALESCE(retry_attempt, 0) WHERE job_type IS NOT NULL;
+        END IF;
+    END $$;
+    CREATE INDEX IF NOT EXISTS idx_import_jobs_queue
+        ON import_jobs(status, run_after)
+        WHERE job_type IS NOT NULL;
     """
 
     with engine.begin() as conn:
@@ -93,7 +119,8 @@ def _json_payload(value: Optional[Dict[str, Any]]) -> str:
 def _row_to_job(row: Any) -> Dict[str, Any]:
     return {
         "id": str(row["id"]),
-        "file_id": str(row["file_id"]),
+        "file_id": str(row["file_id"]) if row["file_id"] else None,
+        "job_type": row.get("job_type"),
         "status": row["status"],
         "stage": row["stage"],
         "progress": row["progress"],
@@ -216,7 +243,7 @@ def update_import_job(
             return _row_to_job(row) if row else None
 
     job = _run_with_table_retry(_update)
-    if job:
+    if job and job["file_id"]:
         update_active_job_state(
             job["file_id"],
             job["id"],
@@ -254,6 +281,9 @@ def complete_import_job(
         return None
 
     file_id = job["file_id"]
+    if not file_id:
+        # Queue jobs without an uploaded file (e.g. map-b2-data-async) have no file state to sync
+        return job
     if success:
         update_file_status(
             file_id,
@@ -35,6 +35,7 @@ from .preprocessor import apply_row_transformations
 from app.db.models import (
     create_file_imports_table_if_not_exists,
     create_table_if_not_exists,
+    finalize_bulk_load,
     insert_records,
     calculate_file_hash,
     DuplicateDataException,
@@ -43,6 +44,8 @@ from app.db.models import (
     record_duplicate_rows,
 )
 from app.db.session import get_engine
+from app.domain.queries.schema_digest import refresh_schema_digest
+from app.domain.imports.column_profiles import TableProfiler, save_import_profile
 from app.domain.imports.jobs import (
     update_import_job,
     get_import_job,
@@ -63,9 +66,16 @@ from .history import (
     list_duplicate_rows,
     record_validation_failures
 )
+from .audit_writer import (
+    open_import_audit_writer,
+    flush_import_audit_rows,
+    close_import_audit_writer,
+)
 from app.db.metadata import store_table_metadata, enrich_table_metadata
 from .schema_mapper import analyze_schema_compatibility, transform_record
 from app.core.config import settings
+from app.core.metrics import trace_stage
+from app.core.profiling import start_import_profile, submit_in_context
 from app.utils.locks import TableLockManager
 
 logger = logging.getLogger(__name__)
@@ -958,6 +968,7 @@ def _execute_streaming_csv_import(
     update_mapping_status(import_id, "in_progress")
     engine = get_engine()
     type_mismatch_summary: List[Dict[str, Any]] = []
+    profiler = TableProfiler()
 
     # Maintain cross-chunk dedupe fingerprints when requested
     seen_fingerprints: set = set()
@@ -991,11 +1002,12 @@ def _execute_streaming_csv_import(
 
             preprocess_errors: List[Dict[str, Any]] = []
             # Apply pandas-backed row transforms before dedupe/mapping (e.g., explode email columns)
-            chunk_records, preprocess_errors, chunk_transformation_stats = apply_row_transformations(
-                chunk_records,
-                mapping_config,
-                row_offset=chunk_start_row - 1,
-            )
+            with trace_stage("transform", rows=len(chunk_records), chunk=chunk_num):
+                chunk_records, preprocess_errors, chunk_transformation_stats = apply_row_transformations(
+                    chunk_records,
+                    mapping_config,
+                    row_offset=chunk_start_row - 1,
+                )
             
             # Log transformation warnings if rows produced no output
             if chunk_transformation_stats and chunk_transformation_stats.rows_with_no_expansion > 0:
@@ -1005,12 +1017,13 @@ def _execute_streaming_csv_import(
                 )
 
             # Optional in-file dedupe across the entire stream (after preprocessing)
-            chunk_records, intra_chunk_skipped = _dedupe_records_streaming_chunk(
-                chunk_records,
-                mapping_config,
-                seen_fingerprints,
-                import_id=import_id,
-            )
+            with trace_stage("dedupe", rows=len(chunk_records), chunk=chunk_num):
+                chunk_records, intra_chunk_skipped = _dedupe_records_streaming_chunk(
+                    chunk_records,
+                    mapping_config,
+                    seen_fingerprints,
+                    import_id=import_id,
+                )
             intra_file_duplicates_skipped += intra_chunk_skipped
             parse_time_total += time.time() - chunk_start
 
@@ -1022,10 +1035,11 @@ def _execute_streaming_csv_import(
 
             try:
                 map_start = time.time()
-                mapped_records, mapping_errors, chunk_validation_failures = map_data(
+                mapped_records, mapping_errors, chunk_validation_failures = _map_data_traced(
                     chunk_records,
                     mapping_config,
                     row_offset=chunk_start_row - 1,
+                    chunk=chunk_num,
                 )
                 combined_errors = preprocess_errors + mapping_errors
                 map_time_total += time.time() - map_start
@@ -1093,16 +1107,18 @@ def _execute_streaming_csv_import(
                 insert_start = time.time()
                 chunk_file_content = file_content if first_chunk else None
                 with TableLockManager.acquire(mapping_config.table_name):
-                    inserted, chunk_duplicates = insert_records(
-                        engine,
-                        mapping_config.table_name,
-                        mapped_records,
-                        config=mapping_config,
-                        file_content=chunk_file_content,
-                        file_name=file_name,
-                        pre_mapped=True,
-                        import_id=import_id,
-                    )
+                    with trace_stage("insert", rows=len(mapped_records), chunk=chunk_num):
+                        inserted, chunk_duplicates = insert_records(
+                            engine,
+                            mapping_config.table_name,
+                            mapped_records,
+                            config=mapping_config,
+                            file_content=chunk_file_content,
+                            file_name=file_name,
+                            pre_mapped=True,
+                            import_id=import_id,
+                            on_inserted=profiler.update,
+                        )
                 insert_time_total += time.time() - insert_start
                 first_chunk = False
             except Exception as exc:
@@ -1184,9 +1200,14 @@ def _execute_streaming_csv_import(
                 new_entities=metadata_info.get("key_entities"),
             )
 
+    save_import_profile(mapping_config.table_name, import_id, profiler)
+    bulk_load_summary = finalize_bulk_load(engine, mapping_config.table_name, records_inserted_total)
+    refresh_schema_digest(mapping_config.table_name)
+
     duration = parse_time_total + map_time_total + insert_time_total
 
     if duplicates_skipped_total > 0:
+        flush_import_audit_rows(import_id)
         try:
             duplicate_rows = list_duplicate_rows(
                 import_id,
@@ -1213,6 +1234,8 @@ def _execute_streaming_csv_import(
         metadata_payload["intra_file_duplicates_skipped"] = intra_file_duplicates_skipped
     if chunk_status_summary:
         metadata_payload["mapping_chunk_status"] = chunk_status_summary
+    if bulk_load_summary:
+        metadata_payload["bulk_load_finalization"] = bulk_load_summary
 
     final_progress_metadata: Dict[str, Any] = {
         "chunks_completed": chunk_num if 'chunk_num' in locals() else 0,
@@ -1284,6 +1307,18 @@ def _execute_streaming_csv_import(
     }
 
 
+def _map_data_traced(
+    records: List[Dict[str, Any]],
+    config: MappingConfig,
+    *,
+    row_offset: int = 0,
+    chunk: Optional[int] = None,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """map_data wrapped in a "map" span so every chunk is timed the same way."""
+    with trace_stage("map", rows=len(records), chunk=chunk):
+        return map_data(records, config, row_offset=row_offset)
+
+
 def _map_chunk(
     chunk_records: List[Dict[str, Any]],
     config: MappingConfig,
@@ -1311,10 +1346,11 @@ def _map_chunk(
         mark_chunk_in_progress(import_id, chunk_num)
     
     try:
-        mapped_records, errors, validation_failures = map_data(
+        mapped_records, errors, validation_failures = _map_data_traced(
             chunk_records,
             config,
             row_offset=row_offset,
+            chunk=chunk_num,
         )
         for error in errors:
             if isinstance(error, dict):
@@ -1390,7 +1426,8 @@ def _map_chunks_parallel(
         future_to_chunk = {}
         running_offset = 0
         for chunk_num, chunk_records in enumerate(raw_chunks):
-            future = executor.submit(
+            future = submit_in_context(
+                executor,
                 _map_chunk,
                 chunk_records,
                 config,
@@ -1749,6 +1786,10 @@ def execute_data_import(
             mapping_config=mapping_config,
             import_strategy=import_strategy
         )
+        # Stage spans from here on are collected into this import's performance profile
+        start_import_profile(import_id, bytes_read=file_size)
+        # Buffer mapping errors, validation failures, and duplicates across chunks
+        open_import_audit_writer(import_id)
         
         logger.info(f"Starting import: {file_name} → {mapping_config.table_name} (strategy: {import_strategy})")
         
@@ -1797,7 +1838,9 @@ def execute_data_import(
             )
         else:
             # Parse file normally
-            records = process_file_content(file_content, file_type, has_header=csv_has_header)
+            with trace_stage("parse", file_type=file_type) as parse_span:
+                records = process_file_content(file_content, file_type, has_header=csv_has_header)
+                parse_span.rows = len(records)
             parse_time = time.time() - parse_start
             logger.info(f"Parsed {len(records)} records in {parse_time:.2f}s")
 
@@ -1926,11 +1969,12 @@ def execute_data_import(
         preprocess_errors: List[Dict[str, Any]] = []
         transformation_stats = None
         if not pre_mapped:
-            records, preprocess_errors, transformation_stats = apply_row_transformations(
-                records,
-                mapping_config,
-                row_offset=0,
-            )
+            with trace_stage("transform", rows=len(records)):
+                records, preprocess_errors, transformation_stats = apply_row_transformations(
+                    records,
+                    mapping_config,
+                    row_offset=0,
+                )
             
             # Log transformation warnings if rows produced no output
             if transformation_stats and transformation_stats.rows_with_no_expansion > 0:
@@ -1941,11 +1985,12 @@ def execute_data_import(
                 )
 
         # Optional quick in-file dedupe before mapping
-        records, intra_file_duplicates_skipped = _dedupe_records_in_memory(
-            records,
-            mapping_config,
-            import_id=import_id
-        )
+        with trace_stage("dedupe", rows=len(records)):
+            records, intra_file_duplicates_skipped = _dedupe_records_in_memory(
+                records,
+                mapping_config,
+                import_id=import_id
+            )
         total_rows = len(records)
         if expected_data_rows is not None and raw_total_rows != expected_data_rows and row_count_warning:
             handled_rows = total_rows + intra_file_duplicates_skipped
@@ -2035,7 +2080,7 @@ def execute_data_import(
                 if timeout_seconds:
                     logger.info("Enforcing mapping timeout of %d seconds for sequential mapping", timeout_seconds)
                 with ThreadPoolExecutor(max_workers=1) as executor:
-                    future = executor.submit(map_data, records, mapping_config, row_offset=0)
+                    future = submit_in_context(executor, _map_data_traced, records, mapping_config, row_offset=0)
                     try:
                         if timeout_seconds is None:
                             mapped_records, mapping_errors, validation_failures = future.result()
@@ -2184,7 +2229,10 @@ def execute_data_import(
             table_exists = inspector.has_table(mapping_config.table_name)
 
             if not table_exists or import_strategy == "NEW_TABLE":
-                create_table_if_not_exists(engine, mapping_config)
+                # Large first loads build the _import_id index once, after inserting
+                finalize_threshold = settings.bulk_load_finalize_min_rows
+                defer_indexes = finalize_threshold > 0 and len(mapped_records) >= finalize_threshold
+                create_table_if_not_exists(engine, mapping_config, defer_indexes=defer_indexes)
                 logger.info(f"Created table: {mapping_config.table_name}")
 
             # Re-validate uniqueness columns against the live schema right before insertion
@@ -2225,18 +2273,21 @@ def execute_data_import(
                         uniqueness_adjustments,
                     )
             
-            # Insert records
+            # Insert records, profiling only the rows that were not skipped as duplicates
+            profiler = TableProfiler()
             try:
-                records_inserted, duplicates_skipped = insert_records(
-                    engine,
-                    mapping_config.table_name,
-                    mapped_records,
-                    config=mapping_config,
-                    file_content=file_content,
-                    file_name=file_name,
-                    pre_mapped=True,
-                    import_id=import_id,
-                )
+                with trace_stage("insert", rows=len(mapped_records)):
+                    records_inserted, duplicates_skipped = insert_records(
+                        engine,
+                        mapping_config.table_name,
+                        mapped_records,
+                        config=mapping_config,
+                        file_content=file_content,
+                        file_name=file_name,
+                        pre_mapped=True,
+                        import_id=import_id,
+                        on_inserted=profiler.update,
+                    )
             except ValueError as exc:
                 error_text = str(exc)
                 if "Uniqueness columns" in error_text:
@@ -2363,10 +2414,16 @@ def execute_data_import(
                     
         insert_time = time.time() - insert_start
         logger.info(f"Inserted {records_inserted} records in {insert_time:.2f}s (skipped {duplicates_skipped} duplicates)")
+
+        save_import_profile(mapping_config.table_name, import_id, profiler)
+        bulk_load_summary = finalize_bulk_load(engine, mapping_config.table_name, records_inserted)
+        refresh_schema_digest(mapping_config.table_name)
         
         # Complete import tracking with structured metadata
         duration = time.time() - start_time
         metadata_payload: Dict[str, Any] = {}
+        if bulk_load_summary:
+            metadata_payload["bulk_load_finalization"] = bulk_load_summary
         if type_mismatch_summary:
             metadata_payload["type_mismatch_summary"] = type_mismatch_summary
         if intra_file_duplicates_skipped:
@@ -2385,6 +2442,7 @@ def execute_data_import(
         duplicate_rows: List[Dict[str, Any]] = []
         duplicate_total = duplicates_skipped
         if duplicates_skipped > 0:
+            flush_import_audit_rows(import_id)
             try:
                 duplicate_rows = list_duplicate_rows(
                     import_id,
@@ -2499,3 +2557,6 @@ def execute_data_import(
             logger.error(f"Import failed: {str(e)}")
             
         raise
+
+    finally:
+        close_import_audit_writer(import_id)
@@ -202,13 +202,13 @@ def load_csv_sample(file_content: bytes, sample_rows: int = 1000) -> List[Dict[s
     return records
 
 
-def stream_csv_records(
+def iter_csv_frames(
     file_content: bytes,
     *,
     has_header: Optional[bool] = None,
     chunk_size: int = 50000,
 ):
-    """Yield CSV rows in chunks to avoid loading the full file in memory."""
+    """Yield CSV DataFrame chunks with the same column naming as `process_csv`."""
     if has_header is None:
         has_header = detect_csv_header(file_content)
 
@@ -227,7 +227,17 @@ def stream_csv_records(
         else:
             # Strip whitespace from column names for consistency
             df.columns = df.columns.str.strip()
+        yield df
+
 
+def stream_csv_records(
+    file_content: bytes,
+    *,
+    has_header: Optional[bool] = None,
+    chunk_size: int = 50000,
+):
+    """Yield CSV rows in chunks to avoid loading the full file in memory."""
+    for df in iter_csv_frames(file_content, has_header=has_header, chunk_size=chunk_size):
         records = df.to_dict("records")
         for record in records:
             for key, value in record.items():
@@ -328,6 +338,66 @@ def process_large_excel(file_content: bytes, chunk_size: int = 20000, sheet_name
         return process_excel(file_content, sheet_name=sheet_name)
 
 
+def _excel_header_names(header_row: Tuple[Any, ...]) -> List[str]:
+    """Name header cells the way pandas does (blank -> "Unnamed: N", duplicates -> "name.1")."""
+    names: List[str] = []
+    seen: Dict[str, int] = {}
+    for idx, value in enumerate(header_row):
+        name = f"Unnamed: {idx}" if value is None or str(value).strip() == "" else str(value).strip()
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        seen.setdefault(name, 0)
+        names.append(name)
+    return names
+
+
+def iter_excel_records(file_content: bytes, sheet_name: Optional[str] = None):
+    """
+    Yield records from one worksheet without building a DataFrame.
+
+    Uses openpyxl's read-only row iterator so rows are parsed one at a time.
+    Column names follow `process_excel`; fully blank trailing rows are
+    dropped, matching pandas.
+    """
+    from openpyxl import load_workbook
+
+    try:
+        workbook = load_workbook(io.BytesIO(file_content), read_only=True, data_only=True)
+    except Exception as e:
+        raise ValueError(f"Could not read Excel file: {str(e)}")
+
+    try:
+        if sheet_name is None:
+            worksheet = workbook.worksheets[0]
+        elif sheet_name in workbook.sheetnames:
+            worksheet = workbook[sheet_name]
+        else:
+            raise ValueError(f"Worksheet named '{sheet_name}' not found")
+
+        rows = worksheet.iter_rows(values_only=True)
+        header_row = next(rows, None)
+        if header_row is None:
+            return
+        columns = _excel_header_names(header_row)
+        width = len(columns)
+
+        pending_blank = 0
+        for row in rows:
+            values = list(row[:width]) + [None] * (width - len(row))
+            values = [None if isinstance(v, str) and v == "" else v for v in values]
+            if all(v is None for v in values):
+                # Only emit blank rows that are followed by data
+                pending_blank += 1
+                continue
+            for _ in range(pending_blank):
+                yield dict.fromkeys(columns)
+            pending_blank = 0
+            yield dict(zip(columns, values))
+    finally:
+        workbook.close()
+
+
 def extract_excel_sheets_to_csv(file_content: bytes, rows: int = 100) -> Dict[str, str]:
     """
     Extract top N rows from each sheet in Excel file and return as CSV strings.
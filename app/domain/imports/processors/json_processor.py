@@ -1,5 +1,5 @@
 import json
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
 
 
 def process_json(file_content: bytes) -> List[Dict[str, Any]]:
@@ -12,3 +12,51 @@ def process_json(file_content: bytes) -> List[Dict[str, Any]]:
         return [data]
     else:
         raise ValueError("JSON must contain an object or array of objects")
+
+
+def iter_json_records(file_content: bytes) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the records `process_json` would return, one array element at a time.
+
+    Top-level arrays are decoded element by element, so callers that only keep
+    a few records never hold the whole array as Python objects. Anything else
+    is handed to `process_json`.
+    """
+    text = file_content.decode('utf-8')
+    decoder = json.JSONDecoder()
+    length = len(text)
+    pos = _skip_whitespace(text, 0)
+
+    if pos >= length or text[pos] != '[':
+        yield from process_json(file_content)
+        return
+
+    pos = _skip_whitespace(text, pos + 1)
+    if pos < length and text[pos] == ']':
+        return
+
+    while True:
+        try:
+            element, pos = decoder.raw_decode(text, pos)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"Invalid JSON array element: {exc}") from exc
+        yield element
+
+        pos = _skip_whitespace(text, pos)
+        if pos >= length:
+            raise ValueError("Invalid JSON: unterminated array")
+        if text[pos] == ']':
+            break
+        if text[pos] != ',':
+            raise ValueError(f"Invalid JSON: expected ',' or ']' at position {pos}")
+        pos = _skip_whitespace(text, pos + 1)
+
+    if _skip_whitespace(text, pos + 1) < length:
+        raise ValueError("Invalid JSON: extra data after top-level array")
+
+
+def _skip_whitespace(text: str, pos: int) -> int:
+    length = len(text)
+    while pos < length and text[pos] in ' \t\n\r':
+        pos += 1
+    return pos
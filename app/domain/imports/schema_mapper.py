@@ -8,10 +8,23 @@ enabling merging of semantically similar data with different column structures.
 from typing import Dict, List, Any, Optional, Tuple
 import re
 from difflib import SequenceMatcher
+from functools import lru_cache
 import logging
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
+_SEPARATORS_RE = re.compile(r'[\s\-_]+')
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9]')
+
+# Normalized names only contain these characters
+_ALPHABET = "abcdefghijklmnopqrstuvwxyz0123456789"
+_ALPHABET_INDEX = {ch: i for i, ch in enumerate(_ALPHABET)}
+
+# Per-index memo of fuzzy lookups (source name, threshold) -> best match
+FUZZY_CACHE_MAX_ENTRIES = 10000
+
 
 def normalize_column_name(name: str) -> str:
     """
@@ -26,12 +39,17 @@ def normalize_column_name(name: str) -> str:
         "contact_full_name" -> "contactfullname"
         "Contact-Full-Name" -> "contactfullname"
     """
+    return _normalize_column_name_cached(name)
+
+
+@lru_cache(maxsize=65536)
+def _normalize_column_name_cached(name: str) -> str:
     # Convert to lowercase
     normalized = name.lower()
     # Remove spaces, hyphens, underscores
-    normalized = re.sub(r'[\s\-_]+', '', normalized)
+    normalized = _SEPARATORS_RE.sub('', normalized)
     # Remove special characters
-    normalized = re.sub(r'[^a-z0-9]', '', normalized)
+    normalized = _NON_ALNUM_RE.sub('', normalized)
     return normalized
 
 
@@ -40,6 +58,172 @@ def calculate_similarity(str1: str, str2: str) -> float:
     return SequenceMatcher(None, str1, str2).ratio()
 
 
+# Common semantic equivalents
+SEMANTIC_PATTERNS: Dict[str, List[str]] = {
+    # Name variations
+    'name': ['fullname', 'contactname', 'personname', 'contactfullname'],
+    'fullname': ['name', 'contactname', 'personname', 'contactfullname'],
+    'firstname': ['fname', 'givenname'],
+    'lastname': ['lname', 'surname', 'familyname'],
+    'middlename': ['mname', 'middleinitial'],
+
+    # Title/Position variations
+    'title': ['jobtitle', 'position', 'role'],
+    'jobtitle': ['title', 'position', 'role'],
+    'position': ['title', 'jobtitle', 'role'],
+
+    # Company variations
+    'company': ['companyname', 'organization', 'org', 'business'],
+    'companyname': ['company', 'organization', 'org', 'business'],
+    'organization': ['company', 'companyname', 'org', 'business'],
+
+    # Email variations
+    'email': ['emailaddress', 'primaryemail', 'email1', 'contactemail'],
+    'emailaddress': ['email', 'primaryemail', 'email1', 'contactemail'],
+    'primaryemail': ['email', 'emailaddress', 'email1'],
+
+    # Phone variations
+    'phone': ['phonenumber', 'telephone', 'mobile', 'cell'],
+    'phonenumber': ['phone', 'telephone', 'mobile'],
+
+    # LinkedIn variations
+    'linkedin': ['linkedinurl', 'linkedinprofile', 'contactliprofileurl'],
+    'linkedinprofile': ['linkedin', 'linkedinurl', 'contactliprofileurl'],
+
+    # Location variations
+    'location': ['address', 'city', 'region', 'area'],
+    'city': ['location', 'locality'],
+
+    # Industry variations
+    'industry': ['industrysector', 'sector', 'vertical'],
+    'industrysector': ['industry', 'sector'],
+}
+
+
+def _char_vector(normalized: str) -> "np.ndarray":
+    """Character-count vector of a normalized column name."""
+    vector = np.zeros(len(_ALPHABET), dtype=np.int32)
+    for ch in normalized:
+        vector[_ALPHABET_INDEX[ch]] += 1
+    return vector
+
+
+@lru_cache(maxsize=4096)
+def _semantic_candidates(source_normalized: str) -> Tuple[str, ...]:
+    """
+    Normalized target names that semantically match a source column, in the
+    order the pattern table is consulted (first present target wins).
+    """
+    candidates: List[str] = []
+    for pattern, equivalents in SEMANTIC_PATTERNS.items():
+        if source_normalized == pattern:
+            candidates.extend(equivalents)
+        elif source_normalized in equivalents:
+            candidates.append(pattern)
+    return tuple(candidates)
+
+
+class ColumnMatchIndex:
+    """
+    Precomputed match data for one target schema.
+
+    Holds normalized names and a character-count matrix for every target
+    column. Fuzzy queries first bound each target's SequenceMatcher ratio from
+    the vectors (2 * shared characters / total length, which the real ratio
+    can never exceed) and only run SequenceMatcher on targets whose bound can
+    still beat the current best, so results match a full pairwise scan.
+    """
+
+    def __init__(self, target_columns: Tuple[str, ...]):
+        self.target_columns = target_columns
+        self.normalized = [normalize_column_name(col) for col in target_columns]
+        self.char_matrix = (
+            np.vstack([_char_vector(norm) for norm in self.normalized])
+            if self.normalized
+            else np.zeros((0, len(_ALPHABET)), dtype=np.int32)
+        )
+        self.lengths = np.array([len(norm) for norm in self.normalized], dtype=np.int32)
+        # Last target wins when several normalize to the same name
+        self.by_normalized: Dict[str, str] = dict(zip(self.normalized, target_columns))
+        self._fuzzy_cache: Dict[Tuple[str, float], Optional[Tuple[str, float]]] = {}
+
+    def _upper_bounds(self, source_normalized: str) -> List[Tuple[float, int]]:
+        """(bound, position) for every target, highest bound first."""
+        if not self.target_columns:
+            return []
+        source_vector = _char_vector(source_normalized)
+        shared = np.minimum(self.char_matrix, source_vector).sum(axis=1)
+        totals = self.lengths + len(source_normalized)
+        bounds = np.divide(2.0 * shared, totals, out=np.ones(len(totals)), where=totals > 0)
+        # Stable sort keeps target order among equal bounds
+        order = np.argsort(-bounds, kind="stable")
+        return [(float(bounds[position]), int(position)) for position in order]
+
+    def scored_candidates(
+        self,
+        source_column: str,
+        k: int = 5,
+        threshold: float = 0.0,
+    ) -> List[Tuple[str, float]]:
+        """Return up to ``k`` (target_column, similarity) pairs, best first."""
+        source_normalized = normalize_column_name(source_column)
+        bounds = self._upper_bounds(source_normalized)
+        scored: List[Tuple[float, int]] = []
+        for bound, position in bounds:
+            if bound < threshold:
+                break
+            if len(scored) >= k and bound < scored[-1][0]:
+                break
+            score = calculate_similarity(source_normalized, self.normalized[position])
+            if score >= threshold:
+                scored.append((score, position))
+                scored.sort(key=lambda item: (-item[0], item[1]))
+                del scored[k:]
+        return [(self.target_columns[position], score) for score, position in scored]
+
+    def best_fuzzy_match(self, source_normalized: str, threshold: float) -> Tuple[Optional[str], float]:
+        """
+        Best fuzzy target for an already-normalized source name.
+
+        Mirrors a left-to-right scan keeping the first target with the highest
+        score at or above ``threshold``.
+        """
+        key = (source_normalized, threshold)
+        if key in self._fuzzy_cache:
+            cached = self._fuzzy_cache[key]
+            return cached if cached else (None, 0.0)
+
+        best_position: Optional[int] = None
+        best_score = 0.0
+        bounds = self._upper_bounds(source_normalized)
+        for bound, position in bounds:
+            if bound < threshold or bound < best_score:
+                break
+            score = calculate_similarity(source_normalized, self.normalized[position])
+            if score < threshold:
+                continue
+            if score > best_score or (score == best_score and best_position is not None and position < best_position):
+                best_score = score
+                best_position = position
+
+        result = (self.target_columns[best_position], best_score) if best_position is not None else None
+        if len(self._fuzzy_cache) >= FUZZY_CACHE_MAX_ENTRIES:
+            self._fuzzy_cache.clear()
+        self._fuzzy_cache[key] = result
+        return result if result else (None, 0.0)
+
+
+@lru_cache(maxsize=256)
+def get_column_match_index(target_columns: Tuple[str, ...]) -> ColumnMatchIndex:
+    """
+    Return the cached match index for a target schema.
+
+    The column tuple acts as the schema version: any added, renamed, or
+    reordered column produces a new index.
+    """
+    return ColumnMatchIndex(target_columns)
+
+
 def find_column_mapping(
     source_columns: List[str],
     target_columns: List[str],
@@ -65,49 +249,9 @@ def find_column_mapping(
     """
     mapping = {}
     
-    # Normalize all target columns for comparison
-    normalized_targets = {normalize_column_name(col): col for col in target_columns}
-    
-    # Common semantic equivalents
-    semantic_patterns = {
-        # Name variations
-        'name': ['fullname', 'contactname', 'personname', 'contactfullname'],
-        'fullname': ['name', 'contactname', 'personname', 'contactfullname'],
-        'firstname': ['fname', 'givenname'],
-        'lastname': ['lname', 'surname', 'familyname'],
-        'middlename': ['mname', 'middleinitial'],
-        
-        # Title/Position variations
-        'title': ['jobtitle', 'position', 'role'],
-        'jobtitle': ['title', 'position', 'role'],
-        'position': ['title', 'jobtitle', 'role'],
-        
-        # Company variations
-        'company': ['companyname', 'organization', 'org', 'business'],
-        'companyname': ['company', 'organization', 'org', 'business'],
-        'organization': ['company', 'companyname', 'org', 'business'],
-        
-        # Email variations
-        'email': ['emailaddress', 'primaryemail', 'email1', 'contactemail'],
-        'emailaddress': ['email', 'primaryemail', 'email1', 'contactemail'],
-        'primaryemail': ['email', 'emailaddress', 'email1'],
-        
-        # Phone variations
-        'phone': ['phonenumber', 'telephone', 'mobile', 'cell'],
-        'phonenumber': ['phone', 'telephone', 'mobile'],
-        
-        # LinkedIn variations
-        'linkedin': ['linkedinurl', 'linkedinprofile', 'contactliprofileurl'],
-        'linkedinprofile': ['linkedin', 'linkedinurl', 'contactliprofileurl'],
-        
-        # Location variations
-        'location': ['address', 'city', 'region', 'area'],
-        'city': ['location', 'locality'],
-        
-        # Industry variations
-        'industry': ['industrysector', 'sector', 'vertical'],
-        'industrysector': ['industry', 'sector'],
-    }
+    # Normalized names and character vectors are cached per target schema
+    index = get_column_match_index(tuple(target_columns))
+    normalized_targets = index.by_normalized
     
     for source_col in source_columns:
         source_normalized = normalize_column_name(source_col)
@@ -122,34 +266,16 @@ def find_column_mapping(
         
         # Strategy 2: Semantic pattern matching
         if not best_match:
-            for pattern, equivalents in semantic_patterns.items():
-                if source_normalized == pattern:
-                    # Check if any equivalent exists in target
-                    for equiv in equivalents:
-                        if equiv in normalized_targets:
-                            best_match = normalized_targets[equiv]
-                            best_score = 0.95
-                            logger.debug(f"Semantic match: '{source_col}' -> '{best_match}' (via pattern '{pattern}')")
-                            break
-                    if best_match:
-                        break
-                elif source_normalized in equivalents:
-                    # Check if the pattern exists in target
-                    if pattern in normalized_targets:
-                        best_match = normalized_targets[pattern]
-                        best_score = 0.95
-                        logger.debug(f"Semantic match: '{source_col}' -> '{best_match}' (via pattern '{pattern}')")
-                        break
+            for equiv in _semantic_candidates(source_normalized):
+                if equiv in normalized_targets:
+                    best_match = normalized_targets[equiv]
+                    best_score = 0.95
+                    logger.debug(f"Semantic match: '{source_col}' -> '{best_match}'")
+                    break
         
         # Strategy 3: Fuzzy string matching
         if not best_match:
-            for target_col in target_columns:
-                target_normalized = normalize_column_name(target_col)
-                similarity = calculate_similarity(source_normalized, target_normalized)
-                
-                if similarity > best_score and similarity >= similarity_threshold:
-                    best_match = target_col
-                    best_score = similarity
+            best_match, best_score = index.best_fuzzy_match(source_normalized, similarity_threshold)
             
             if best_match:
                 logger.debug(f"Fuzzy match: '{source_col}' -> '{best_match}' (score: {best_score:.2f})")
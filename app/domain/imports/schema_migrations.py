@@ -4,16 +4,27 @@ Schema migration helpers invoked by LLM-driven import flows.
 Currently supports column replacement, addition, rename, and drop operations
 requested by the assistant to resolve schema mismatches discovered during
 imports.
+
+On large Postgres tables, migrations that copy data (``replace_column`` and
+``add_column`` with ``copy_data``) run online: the new column is added in a
+short transaction, backfilled in ``_row_id`` batches outside the table lock,
+and the final renames happen in a second short transaction. A trigger keeps
+the new column in step with rows written while the backfill runs.
 """
 
 from __future__ import annotations
 
-from typing import Any, Dict, List
+import hashlib
+import time
+from typing import Any, Callable, Dict, List, Optional
 
 import logging
 from sqlalchemy import text, inspect
 from sqlalchemy.engine import Engine
 
+from app.core.config import settings
+from app.utils.locks import TableLockManager
+
 logger = logging.getLogger(__name__)
 
 
@@ -541,10 +552,333 @@ def _apply_drop_column(
     return result
 
 
+def _apply_migration(
+    conn,
+    table_name: str,
+    migration: Dict[str, Any],
+) -> Dict[str, Any]:
+    action = (migration or {}).get("action")
+    if action == "replace_column":
+        return _apply_replace_column(conn, table_name, migration)
+    if action == "add_column":
+        return _apply_add_column(conn, table_name, migration)
+    if action == "rename_column":
+        return _apply_rename_column(conn, table_name, migration)
+    if action == "drop_column":
+        return _apply_drop_column(conn, table_name, migration)
+    raise SchemaMigrationError(
+        f"Unsupported schema migration action: {action}"
+    )
+
+
+def _online_backfill_plan(
+    conn,
+    table_name: str,
+    migration: Dict[str, Any],
+) -> Optional[Dict[str, str]]:
+    """
+    Describe the column an online migration adds and backfills.
+
+    Returns ``{"column", "type", "expression"}``, or None when the migration
+    copies no data, has already been applied, or is invalid. Those cases go
+    through the regular single-transaction path, which reports them.
+    """
+    action = (migration or {}).get("action")
+    existing_columns = {
+        col["name"] for col in inspect(conn).get_columns(table_name)
+    }
+    dialect_name = conn.engine.dialect.name
+
+    if action == "add_column":
+        spec = migration.get("new_column") or {}
+        column_name = spec.get("name")
+        column_type = spec.get("type")
+        copy_from = spec.get("copy_from")
+        using_expression = spec.get("using_expression")
+        copy_data = spec.get("copy_data", bool(copy_from) or bool(using_expression))
+        if (
+            not column_name
+            or not column_type
+            or not copy_data
+            or not (copy_from or using_expression)
+            or column_name in existing_columns
+        ):
+            return None
+        # NOT NULL or defaulted columns cannot be added empty and filled later
+        if not spec.get("nullable", True) or spec.get("default") is not None:
+            return None
+        return {
+            "column": column_name,
+            "type": column_type,
+            "expression": using_expression
+            or _default_using_expression(copy_from, column_type, dialect_name),
+        }
+
+    if action == "replace_column":
+        normalized = _normalize_replace_column_payload(migration)
+        old_column = normalized.get("old_column")
+        spec = normalized.get("new_column") or {}
+        temp_column = spec.get("name")
+        column_type = spec.get("type")
+        if (
+            not old_column
+            or not temp_column
+            or not column_type
+            or not spec.get("copy_data", True)
+            or old_column not in existing_columns
+        ):
+            return None
+        final_column = spec.get("final_name") or temp_column
+        legacy_column = spec.get("rename_old_column_to", f"{old_column}_legacy")
+        if (
+            temp_column in existing_columns or final_column in existing_columns
+        ) and legacy_column in existing_columns:
+            return None
+        return {
+            "column": temp_column,
+            "type": column_type,
+            "expression": spec.get("using_expression")
+            or _default_using_expression(old_column, column_type, dialect_name),
+        }
+
+    return None
+
+
+def _estimated_row_count(conn, table_name: str) -> int:
+    """Planner row estimate for a table, summed over partitions if it has any."""
+    return int(
+        conn.execute(
+            text("""
+                SELECT COALESCE(SUM(GREATEST(c.reltuples, 0)), 0)
+                FROM pg_class c
+                WHERE c.oid = to_regclass(:qualified)
+                   OR c.oid IN (
+                       SELECT inhrelid FROM pg_inherits
+                       WHERE inhparent = to_regclass(:qualified)
+                   )
+            """),
+            {"qualified": f'public.{_quote(table_name)}'},
+        ).scalar()
+        or 0
+    )
+
+
+def _use_online_mode(engine: Engine, table_name: str, online: Optional[bool]) -> bool:
+    if engine.dialect.name != "postgresql" or online is False:
+        return False
+    with engine.connect() as conn:
+        inspector = inspect(conn)
+        if not inspector.has_table(table_name):
+            return False
+        columns = {col["name"] for col in inspector.get_columns(table_name)}
+        if "_row_id" not in columns:
+            return False
+        if online:
+            return True
+        threshold = settings.schema_migration_online_min_rows
+        return threshold > 0 and _estimated_row_count(conn, table_name) >= threshold
+
+
+def _backfill_column(
+    engine: Engine,
+    table_name: str,
+    plan: Dict[str, str],
+    max_row_id: int,
+    progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> int:
+    """
+    Populate ``plan["column"]`` for rows up to ``max_row_id`` in ``_row_id`` batches.
+
+    Each batch commits on its own and takes no table lock, so reads and
+    imports continue in between; ``SCHEMA_MIGRATION_BATCH_SLEEP_SECONDS``
+    throttles the loop. Returns the number of rows updated.
+    """
+    column = _quote(plan["column"])
+    quoted_table = _quote(table_name)
+    batch_size = max(1, settings.schema_migration_batch_size)
+    pause = max(0.0, settings.schema_migration_batch_sleep_seconds)
+    next_bound_sql = text(
+        f"SELECT MAX(_row_id) FROM ("
+        f"SELECT _row_id FROM {quoted_table} "
+        f"WHERE _row_id > :lower AND _row_id <= :max_row_id "
+        f"ORDER BY _row_id LIMIT :batch_size) AS batch"
+    )
+    update_sql = text(
+        f"UPDATE {quoted_table} SET {column} = {plan['expression']} "
+        f"WHERE _row_id > :lower AND _row_id <= :upper AND {column} IS NULL"
+    )
+
+    started = time.monotonic()
+    lower = 0
+    rows_updated = 0
+    batches = 0
+    while lower < max_row_id:
+        with engine.begin() as conn:
+            upper = conn.execute(
+                next_bound_sql,
+                {"lower": lower, "max_row_id": max_row_id, "batch_size": batch_size},
+            ).scalar()
+            if upper is None:
+                break
+            rows_updated += conn.execute(
+                update_sql, {"lower": lower, "upper": upper}
+            ).rowcount or 0
+        lower = upper
+        batches += 1
+
+        progress = {
+            "table": table_name,
+            "column": plan["column"],
+            "batches": batches,
+            "rows_updated": rows_updated,
+            "last_row_id": lower,
+            "max_row_id": max_row_id,
+            "elapsed_seconds": round(time.monotonic() - started, 2),
+        }
+        if batches % 10 == 0:
+            logger.info(
+                "Schema migration: backfilled %d row(s) of %s.%s (row id %d of %d)",
+                rows_updated,
+                table_name,
+                plan["column"],
+                lower,
+                max_row_id,
+            )
+        if progress_callback:
+            try:
+                progress_callback(progress)
+            except Exception as exc:  # pragma: no cover - callbacks must not break the migration
+                logger.warning("Schema migration progress callback failed: %s", exc)
+        if pause:
+            time.sleep(pause)
+
+    logger.info(
+        "Schema migration: backfilled %d row(s) of %s.%s in %d batch(es)",
+        rows_updated,
+        table_name,
+        plan["column"],
+        batches,
+    )
+    return rows_updated
+
+
+def _sync_trigger_name(table_name: str, column: str) -> str:
+    digest = hashlib.sha1(f"{table_name}.{column}".encode("utf-8")).hexdigest()[:12]
+    return f"schema_migration_sync_{digest}"
+
+
+def _create_sync_trigger(conn, table_name: str, plan: Dict[str, str]) -> None:
+    """
+    Keep ``plan["column"]`` computed for every row inserted or updated until
+    ``_drop_sync_trigger`` runs.
+
+    Updates that set the column themselves (the backfill) are left alone.
+    """
+    name = _sync_trigger_name(table_name, plan["column"])
+    column = _quote(plan["column"])
+    conn.execute(text(f"""
+        CREATE OR REPLACE FUNCTION {_quote(name)}() RETURNS trigger AS $sync$
+        BEGIN
+            IF TG_OP = 'UPDATE' AND NEW.{column} IS DISTINCT FROM OLD.{column} THEN
+                RETURN NEW;
+            END IF;
+            SELECT {plan["expression"]} INTO NEW.{column} FROM (SELECT NEW.*) AS {_quote(table_name)};
+            RETURN NEW;
+        END;
+        $sync$ LANGUAGE plpgsql
+    """))
+    conn.execute(text(f"DROP TRIGGER IF EXISTS {_quote(name)} ON {_quote(table_name)}"))
+    conn.execute(text(
+        f"CREATE TRIGGER {_quote(name)} BEFORE INSERT OR UPDATE ON {_quote(table_name)} "
+        f"FOR EACH ROW EXECUTE FUNCTION {_quote(name)}()"
+    ))
+
+
+def _drop_sync_trigger(conn, table_name: str, plan: Dict[str, str]) -> None:
+    name = _sync_trigger_name(table_name, plan["column"])
+    conn.execute(text(f"DROP TRIGGER IF EXISTS {_quote(name)} ON {_quote(table_name)}"))
+    conn.execute(text(f"DROP FUNCTION IF EXISTS {_quote(name)}()"))
+
+
+def _apply_migration_online(
+    engine: Engine,
+    table_name: str,
+    migration: Dict[str, Any],
+    progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Apply one migration without holding the table lock for the data copy.
+
+    1. Under the table lock, add the new column (a catalog-only change), note
+       the highest ``_row_id``, and install a trigger that computes the new
+       column for every row inserted or updated from then on.
+    2. Backfill rows up to that id in batches with no lock held. Rows written
+       meanwhile already have their value from the trigger, so the copy
+       never leaves a stale value behind.
+    3. Under the table lock again, drop the trigger and run the migration's
+       renames/drops, now with the copy already done.
+    """
+    with engine.begin() as conn:
+        TableLockManager.lock_in_transaction(conn, table_name)
+        plan = _online_backfill_plan(conn, table_name, migration)
+        if plan is None:
+            return _apply_migration(conn, table_name, migration)
+
+        existing_columns = {
+            col["name"] for col in inspect(conn).get_columns(table_name)
+        }
+        if plan["column"] not in existing_columns:
+            logger.info(
+                "Schema migration: adding column %s to %s as %s (online)",
+                plan["column"],
+                table_name,
+                plan["type"],
+            )
+            conn.execute(text(
+                f'ALTER TABLE {_quote(table_name)} '
+                f'ADD COLUMN {_quote(plan["column"])} {plan["type"]}'
+            ))
+        _create_sync_trigger(conn, table_name, plan)
+        max_row_id = conn.execute(
+            text(f'SELECT COALESCE(MAX(_row_id), 0) FROM {_quote(table_name)}')
+        ).scalar()
+
+    try:
+        rows_backfilled = _backfill_column(
+            engine, table_name, plan, int(max_row_id), progress_callback
+        )
+    except Exception:
+        # Writers should not keep paying for a migration that will not finish
+        with engine.begin() as conn:
+            _drop_sync_trigger(conn, table_name, plan)
+        raise
+
+    with engine.begin() as conn:
+        TableLockManager.lock_in_transaction(conn, table_name)
+        _drop_sync_trigger(conn, table_name, plan)
+
+        if migration.get("action") == "replace_column":
+            finalize = _normalize_replace_column_payload(migration)
+            finalize["new_column"] = {**finalize["new_column"], "copy_data": False}
+            result = _apply_replace_column(conn, table_name, finalize)
+        else:
+            result = {
+                "action": "add_column",
+                "new_column": plan["column"],
+                "status": "applied",
+            }
+
+    result["mode"] = "online"
+    result["rows_backfilled"] = rows_backfilled
+    return result
+
+
 def apply_schema_migrations(
     engine: Engine,
     table_name: str,
     migrations: List[Dict[str, Any]],
+    online: Optional[bool] = None,
+    progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
 ) -> List[Dict[str, Any]]:
     """
     Apply a sequence of schema migrations against the specified table.
@@ -553,6 +887,18 @@ def apply_schema_migrations(
     and ``drop_column`` actions. The function is designed to be idempotent –
     rerunning the same migration list should not raise errors once the desired
     state has been achieved.
+
+    ``online`` selects the migration mode. ``True`` forces online backfills,
+    ``False`` runs everything in one transaction, and ``None`` (the default)
+    goes online for Postgres tables with a ``_row_id`` column and at least
+    ``SCHEMA_MIGRATION_ONLINE_MIN_ROWS`` estimated rows. ``progress_callback``
+    receives a dict after every backfill batch.
+
+    In online mode each migration commits on its own, in order, because a
+    later migration can depend on the columns an earlier one produced. If
+    one fails, the migrations before it stay applied and a
+    ``SchemaMigrationError`` names them; rerunning the list skips them as
+    ``already_applied``.
     """
     if not migrations:
         return []
@@ -563,8 +909,28 @@ def apply_schema_migrations(
         table_name,
     )
 
+    if _use_online_mode(engine, table_name, online):
+        logger.info("Schema migration: using online mode for table '%s'", table_name)
+        results: List[Dict[str, Any]] = []
+        for position, migration in enumerate(migrations, start=1):
+            try:
+                results.append(
+                    _apply_migration_online(engine, table_name, migration, progress_callback)
+                )
+            except Exception as exc:
+                if not results:
+                    raise
+                applied = ", ".join(str(result.get("action")) for result in results)
+                raise SchemaMigrationError(
+                    f"Schema migration {position} of {len(migrations)} on '{table_name}' failed "
+                    f"after {len(results)} earlier migration(s) were committed ({applied}): {exc}"
+                ) from exc
+        return results
+
     results: List[Dict[str, Any]] = []
     with engine.begin() as conn:
+        # Wait for in-flight imports/readers of this table on any worker before altering it
+        TableLockManager.lock_in_transaction(conn, table_name)
         inspector = inspect(conn)
         if not inspector.has_table(table_name):
             raise SchemaMigrationError(
@@ -572,22 +938,6 @@ def apply_schema_migrations(
             )
 
         for migration in migrations:
-            action = (migration or {}).get("action")
-            if action == "replace_column":
-                result = _apply_replace_column(conn, table_name, migration)
-                results.append(result)
-            elif action == "add_column":
-                result = _apply_add_column(conn, table_name, migration)
-                results.append(result)
-            elif action == "rename_column":
-                result = _apply_rename_column(conn, table_name, migration)
-                results.append(result)
-            elif action == "drop_column":
-                result = _apply_drop_column(conn, table_name, migration)
-                results.append(result)
-            else:
-                raise SchemaMigrationError(
-                    f"Unsupported schema migration action: {action}"
-                )
+            results.append(_apply_migration(conn, table_name, migration))
 
     return results
@@ -13,11 +13,10 @@ from langchain_anthropic import ChatAnthropic
 from langchain.agents import create_agent, AgentState
 from langchain.agents.middleware import SummarizationMiddleware, HumanInTheLoopMiddleware, before_model
 from langchain.agents.structured_output import ToolStrategy
-from langgraph.checkpoint.memory import InMemorySaver
 from langgraph.graph.message import REMOVE_ALL_MESSAGES
 from langgraph.runtime import Runtime
 from langchain_core.runnables import RunnableConfig
-from app.db.session import get_engine
+from app.db.session import get_engine, get_read_engine
 from app.db.context import (
     get_database_schema, 
     format_schema_for_prompt, 
@@ -25,8 +24,14 @@ from app.db.context import (
     get_table_names,
     format_table_list_for_prompt
 )
+from app.db.system_tables import SYSTEM_TABLES
 from app.core.config import settings
+from app.core.metrics import trace_stage
 from app.domain.queries.charting import build_chart_suggestion
+from app.domain.queries.checkpointer import PostgresCheckpointSaver
+from app.domain.queries.cost_guard import QueryCostExceeded, cost_guard_recovery, guard_query_cost
+from app.domain.queries.running import track_query
+from app.domain.queries.schema_digest import build_schema_digest_prompt
 
 
 # System tables that should not be accessible via natural language queries.
@@ -43,14 +48,8 @@ PROTECTED_SYSTEM_TABLES = {
     'table_fingerprints',
 }
 
-# Extended list used for strict SQL validation inside the agent; covers additional
-# operational tables that should remain hidden from end users.
-_EXTENDED_PROTECTED_TABLES = PROTECTED_SYSTEM_TABLES | {
-    'api_keys',
-    'import_duplicates',
-    'query_messages',
-    'query_threads',
-}
+# Every system table is blocked; only the core ones above are named in errors
+_EXTENDED_PROTECTED_TABLES = SYSTEM_TABLES
 
 
 SQL_REQUEST_KEYWORDS = {
@@ -715,7 +714,7 @@ def validate_sql_against_schema(sql_query: str) -> tuple[bool, Optional[str]]:
 
 
 @tool
-def execute_sql_query(sql_query: str) -> str:
+def execute_sql_query(sql_query: str, config: RunnableConfig) -> str:
     """
     Execute a SELECT SQL query safely and return results as CSV.
 
@@ -764,7 +763,7 @@ def execute_sql_query(sql_query: str) -> str:
             if re.search(pattern, sql_query, re.IGNORECASE | re.MULTILINE):
                 return "ERROR: Query contains forbidden operations."
 
-        engine = get_engine()
+        engine = get_read_engine(sql=sql_query)
 
         start_time = time.time()
         with engine.connect() as conn:
@@ -772,11 +771,19 @@ def execute_sql_query(sql_query: str) -> str:
             timeout_ms = settings.query_timeout_seconds * 1000
             conn.execute(text(f"SET statement_timeout = '{timeout_ms}'"))
 
-            result = conn.execute(text(sql_query))
-            columns = result.keys()
-
-            # Limit rows based on configuration
-            rows = result.fetchmany(settings.query_row_limit)
+            try:
+                sql_to_run = guard_query_cost(conn, sql_query, settings.query_row_limit)
+            except QueryCostExceeded as cost_error:
+                return str(cost_error)
+
+            thread_id = ((config or {}).get("configurable") or {}).get("thread_id")
+            with track_query(conn, sql_to_run, "agent", thread_id=thread_id), trace_stage("sql_query") as query_span:
+                result = conn.execute(text(sql_to_run))
+                columns = result.keys()
+
+                # Limit rows based on configuration
+                rows = result.fetchmany(settings.query_row_limit)
+                query_span.rows = len(rows)
             execution_time = time.time() - start_time
 
             if not rows:
@@ -800,8 +807,8 @@ CSV Data:
         return f"ERROR executing query: {str(e)}"
 
 
-# Global checkpointer instance for conversation memory
-_checkpointer = InMemorySaver()
+# Global checkpointer instance for conversation memory (Postgres with an in-memory hot tier)
+_checkpointer = PostgresCheckpointSaver()
 
 
 def create_query_agent(system_prompt: str):
@@ -856,6 +863,9 @@ def query_database_with_agent(user_prompt: str, thread_id: Optional[str] = None)
         
         force_sql = _prompt_requires_sql(user_prompt)
         system_prompt = BASE_SYSTEM_PROMPT + (FORCE_SQL_PROMPT_APPEND if force_sql else "")
+        schema_digest = build_schema_digest_prompt(user_prompt)
+        if schema_digest:
+            system_prompt += "\n\n" + schema_digest
         agent = create_query_agent(system_prompt)
 
         # Prepare messages (just the user message since system prompt is now in agent)
@@ -876,7 +886,8 @@ def query_database_with_agent(user_prompt: str, thread_id: Optional[str] = None)
         for attempt in range(max_attempts):
             # Run the agent with the config to enable memory
             try:
-                result = agent.invoke({"messages": messages}, config)
+                with trace_stage("llm.query_agent"):
+                    result = agent.invoke({"messages": messages}, config)
             except Exception as agent_error:
                 return {
                     "success": True,
@@ -1027,7 +1038,12 @@ def _detect_postgresql_error(error_message: str) -> Optional[str]:
             "Please regenerate the query with zero-division protection."
         )
     
-    # Pattern 6: Syntax errors
+    # Pattern 6: Rejected by the planner cost guard
+    cost_recovery = cost_guard_recovery(error_message)
+    if cost_recovery:
+        return cost_recovery
+
+    # Pattern 7: Syntax errors
     if "syntax error" in error_lower:
         return (
             "The query has a SQL syntax error.\n"
@@ -1150,8 +1166,8 @@ def _attempt_fallback_response(user_prompt: str) -> Optional[tuple[Optional[str]
                 WHERE table_schema = 'public'
                   AND table_name NOT LIKE 'pg_%'
                   AND table_name NOT LIKE 'test\\_%' ESCAPE '\\'
-                  AND table_name NOT IN ('file_imports', 'table_metadata', 'import_history', 'mapping_errors', 'mapping_chunk_status', 'uploaded_files', 'users', 'import_jobs', 'import_duplicates', 'api_keys', 'query_messages', 'query_threads')
-            """))
+                  AND table_name <> ALL(:system_tables)
+            """), {"system_tables": sorted(SYSTEM_TABLES)})
 
             table_columns: Dict[str, List[tuple[str, str]]] = {}
             for table_name, column_name, data_type in schema_rows:
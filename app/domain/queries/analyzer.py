@@ -5,12 +5,15 @@ This module uses LangChain agents with Claude Haiku to analyze uploaded files
 and determine the optimal import strategy by comparing with existing database tables.
 """
 
-from typing import List, Dict, Any, Optional, Tuple, Annotated
+from typing import List, Dict, Any, Iterable, Optional, Tuple, Annotated
 from typing_extensions import NotRequired
 from enum import Enum
 import json
+import random
 import re
+import sys
 import numpy as np
+import pandas as pd
 from dataclasses import dataclass
 from uuid import uuid4
 from langchain.tools import tool, ToolRuntime
@@ -20,14 +23,19 @@ from langchain.agents.middleware import before_model
 from langchain_anthropic import ChatAnthropic
 from langchain_core.messages import RemoveMessage
 from langchain_core.runnables import RunnableConfig
-from langgraph.checkpoint.memory import InMemorySaver
 from langgraph.graph.message import REMOVE_ALL_MESSAGES
 from langgraph.runtime import Runtime
 from app.api.schemas.shared import AnalysisMode, ConflictResolutionMode, ensure_safe_table_name
 from app.core.config import settings
+from app.core.metrics import trace_stage
 from app.db.context import get_database_schema, format_schema_for_prompt
 from app.utils.date import detect_date_column, infer_date_format
 from app.domain.imports.fingerprinting import find_matching_fingerprint
+from app.domain.imports.decision_cache import decision_cache_key, lookup_cached_decision, store_cached_decision
+from app.domain.queries.checkpointer import PostgresCheckpointSaver
+from app.domain.imports.processors.csv_processor import iter_csv_frames, iter_excel_records
+from app.domain.imports.processors.json_processor import iter_json_records
+from app.domain.imports.processors.xml_processor import process_xml
 from app.db.session import get_engine
 import logging
 import time
@@ -97,6 +105,10 @@ class SchemaConflict:
     reasoning: str
 
 
+# Rows always taken from the start of a file for header context
+HEAD_SAMPLE_ROWS = 15
+
+
 def calculate_sample_size(total_rows: int) -> int:
     """
     Calculate optimal sample size based on total rows.
@@ -161,7 +173,7 @@ def sample_file_data(
     # Split sample budget: Prioritize random sampling after first 15 rows
     # Always include first 15 rows for header context (if available)
     # Then fill the rest of the budget with random samples
-    head_size = min(15, target_sample_size)
+    head_size = min(HEAD_SAMPLE_ROWS, target_sample_size)
     if total_rows <= target_sample_size:
         head_size = total_rows
         random_size = 0
@@ -186,6 +198,143 @@ def sample_file_data(
     return head_sample + random_sample, total_rows
 
 
+class StreamingSampler:
+    """
+    One-pass counterpart to `sample_file_data` for record streams.
+
+    Keeps the first HEAD_SAMPLE_ROWS rows plus a uniform reservoir (Algorithm R)
+    over the rest, sized for the largest sample `calculate_sample_size` could
+    ask for. The final sample size depends on the total row count, so it is
+    only settled in `result()`, which draws a uniform subset of the reservoir.
+    Memory is bounded by the reservoir, not the file.
+    """
+
+    def __init__(
+        self,
+        target_sample_size: Optional[int] = None,
+        max_sample_size: Optional[int] = None,
+        seed: Optional[int] = 0,
+    ):
+        self.target_sample_size = target_sample_size
+        self.max_sample_size = max_sample_size
+        if target_sample_size is not None:
+            capacity = target_sample_size
+        else:
+            # Largest size calculate_sample_size returns for any row count
+            capacity = calculate_sample_size(sys.maxsize)
+        if max_sample_size is not None:
+            capacity = min(capacity, max_sample_size)
+        self.head_size = min(HEAD_SAMPLE_ROWS, capacity)
+        self.reservoir_size = capacity - self.head_size
+        self.total_rows = 0
+        # (position, record) pairs: head slots first, then reservoir slots
+        self._slots: List[Tuple[int, Dict[str, Any]]] = []
+        self._rng = random.Random(seed)
+
+    def _claim_slot(self) -> Optional[int]:
+        """Count one row and return the slot it should occupy, or None to drop it."""
+        position = self.total_rows
+        self.total_rows += 1
+        seen = position - self.head_size
+        if seen < self.reservoir_size:
+            return position
+        replace = self._rng.randrange(seen + 1)
+        if replace < self.reservoir_size:
+            return self.head_size + replace
+        return None
+
+    def _store(self, slot: int, position: int, record: Dict[str, Any]) -> None:
+        if slot == len(self._slots):
+            self._slots.append((position, record))
+        else:
+            self._slots[slot] = (position, record)
+
+    def add(self, record: Dict[str, Any]) -> None:
+        slot = self._claim_slot()
+        if slot is not None:
+            self._store(slot, self.total_rows - 1, record)
+
+    def add_many(self, records: Iterable[Dict[str, Any]]) -> None:
+        for record in records:
+            self.add(record)
+
+    def add_frame(self, df: pd.DataFrame) -> None:
+        """Sample a DataFrame chunk, converting only the rows that are kept."""
+        start = self.total_rows
+        chosen: Dict[int, int] = {}
+        for offset in range(len(df)):
+            slot = self._claim_slot()
+            if slot is not None:
+                # A later row in the same chunk may evict an earlier pick
+                chosen[slot] = offset
+        if not chosen:
+            return
+        offsets = sorted(set(chosen.values()))
+        records = df.iloc[offsets].to_dict("records")
+        for record in records:
+            for key, value in record.items():
+                if pd.isna(value):
+                    record[key] = None
+        by_offset = dict(zip(offsets, records))
+        for slot in sorted(chosen):
+            offset = chosen[slot]
+            self._store(slot, start + offset, by_offset[offset])
+
+    def result(self) -> Tuple[List[Dict[str, Any]], int]:
+        """Return `(sampled_records, total_row_count)` like `sample_file_data`."""
+        total_rows = self.total_rows
+        target_sample_size = self.target_sample_size
+        if target_sample_size is None:
+            target_sample_size = calculate_sample_size(total_rows)
+        if self.max_sample_size is not None:
+            target_sample_size = min(target_sample_size, self.max_sample_size)
+
+        if total_rows <= target_sample_size:
+            logger.info(f"File has {total_rows} rows, using all data")
+            return [record for _, record in self._slots], total_rows
+
+        head_size = min(self.head_size, target_sample_size)
+        random_size = target_sample_size - head_size
+        logger.info(f"Sampling {target_sample_size} rows from {total_rows} total "
+                    f"({head_size} from start, {random_size} random, streamed)")
+
+        # Reservoir members are a uniform sample of rows after the head, so any
+        # uniform subset of them is too
+        pool = self._slots[head_size:]
+        picked = self._rng.sample(pool, min(random_size, len(pool)))
+        picked.sort(key=lambda item: item[0])
+        return [record for _, record in self._slots[:head_size]] + [record for _, record in picked], total_rows
+
+
+def sample_file_stream(
+    file_content: bytes,
+    file_type: str,
+    target_sample_size: Optional[int] = None,
+    max_sample_size: Optional[int] = None,
+    sheet_name: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Sample a raw CSV/Excel/JSON file in one streaming pass.
+
+    Produces the same `(sampled_records, total_row_count)` as parsing the file
+    and calling `sample_file_data`, without building the full record list.
+    XML has no streaming reader and is parsed in full.
+    """
+    sampler = StreamingSampler(target_sample_size, max_sample_size)
+    if file_type == "csv":
+        for df in iter_csv_frames(file_content):
+            sampler.add_frame(df)
+    elif file_type == "excel":
+        sampler.add_many(iter_excel_records(file_content, sheet_name=sheet_name))
+    elif file_type == "json":
+        sampler.add_many(iter_json_records(file_content))
+    elif file_type == "xml":
+        sampler.add_many(process_xml(file_content))
+    else:
+        raise ValueError(f"Unsupported file type for sampling: {file_type}")
+    return sampler.result()
+
+
 # Tools for the agent
 
 @tool
@@ -1672,8 +1821,14 @@ def make_import_decision(
     }
 
 
-# Global checkpointer instance for conversation memory
-_file_analyzer_checkpointer = InMemorySaver()
+# Conversation memory for interactive analysis sessions, shared by all API workers
+# through Postgres (see app.domain.queries.checkpointer). One-shot analyses keep none.
+_file_analyzer_checkpointer = PostgresCheckpointSaver()
+
+
+def discard_file_analysis_thread(thread_id: str) -> None:
+    """Delete the stored conversation of a finished interactive analysis session."""
+    _file_analyzer_checkpointer.delete_thread(thread_id)
 
 
 # Constants for loop prevention
@@ -1888,7 +2043,7 @@ INTERACTIVE MODE COLLABORATION RULES:
         tools=tools,
         system_prompt=system_prompt,
         state_schema=FileAnalysisState,
-        checkpointer=_file_analyzer_checkpointer,
+        checkpointer=_file_analyzer_checkpointer if interactive_mode else None,
         middleware=[track_analysis_attempts]
     )
     
@@ -1944,6 +2099,30 @@ def analyze_file_for_import(
         bool(llm_instruction)
     )
     
+    # Decisions are only reusable for one-shot analyses; conversational turns depend on the thread
+    use_decision_cache = messages is None and not interactive_mode
+    sample_columns = list(file_sample[0].keys()) if file_sample else []
+    if use_decision_cache:
+        cached_decision = lookup_cached_decision(sample_columns, file_metadata, llm_instruction)
+        if cached_decision:
+            logger.info(
+                "LLM-ANALYSIS-CACHE-HIT: file='%s', strategy=%s, target_table=%s",
+                file_metadata.get('name', 'unknown'),
+                cached_decision.get('strategy'),
+                cached_decision.get('target_table')
+            )
+            return {
+                "success": True,
+                "response": (
+                    f"Reused cached import decision: {cached_decision.get('strategy')} "
+                    f"into table '{cached_decision.get('target_table')}'"
+                ),
+                "iterations_used": 0,
+                "max_iterations": max_iterations,
+                "llm_decision": cached_decision,
+                "decision_cache_hit": True
+            }
+    
     try:
         # Get existing database schema
         schema_info = get_database_schema()
@@ -1973,9 +2152,7 @@ def analyze_file_for_import(
             # Check for fingerprint match
             fingerprint_match_info = ""
             try:
-                # Extract columns from sample
-                if file_sample and len(file_sample) > 0:
-                    sample_columns = list(file_sample[0].keys())
+                if sample_columns:
                     engine = get_engine()
                     match = find_matching_fingerprint(engine, sample_columns)
                     if match:
@@ -2024,11 +2201,12 @@ Please analyze the file structure, compare it with existing tables, and recommen
             len(messages_to_send)
         )
         
-        result = agent.invoke(
-            {"messages": messages_to_send},
-            context=context,
-            config=config
-        )
+        with trace_stage("llm.import_analysis"):
+            result = agent.invoke(
+                {"messages": messages_to_send},
+                context=context,
+                config=config
+            )
         
         # Extract the agent's response
         final_message = result["messages"][-1]
@@ -2050,6 +2228,11 @@ Please analyze the file structure, compare it with existing tables, and recommen
             llm_decision.get('target_table') if llm_decision else 'NONE'
         )
         
+        if use_decision_cache and llm_decision:
+            # Lets execute_llm_import_decision discard the entry if the import fails
+            llm_decision["decision_cache_key"] = decision_cache_key(sample_columns, file_metadata, llm_instruction)
+            store_cached_decision(sample_columns, file_metadata, llm_instruction, llm_decision)
+        
         return {
             "success": True,
             "response": response_text,
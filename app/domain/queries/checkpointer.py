@@ -0,0 +1,546 @@
+"""
+Postgres-backed LangGraph checkpointer for query agent conversations.
+
+The agent only ever resumes a thread from its latest checkpoint, so this
+saver is *shallow*: each thread keeps one checkpoint row, the current blob of
+each channel, and the pending writes of that checkpoint. Values are
+serialized with the graph's serializer (msgpack) and zlib-compressed when
+large.
+
+Recently used threads are also held, serialized, in an in-process LRU hot
+tier bounded by thread count (``QUERY_CHECKPOINT_HOT_MAX_THREADS``), a
+per-thread size cap (``QUERY_CHECKPOINT_HOT_MAX_THREAD_KB``, larger threads
+are read from Postgres) and idle time (``QUERY_CHECKPOINT_HOT_IDLE_SECONDS``).
+A hot entry is only used while its checkpoint id still matches Postgres, so
+API processes sharing a thread never resume from stale state.
+
+Postgres failures are logged and the hot tier keeps the conversation going in
+this process.
+"""
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.session import get_engine
+
+logger = logging.getLogger(__name__)
+
+# Serialized values at least this large are zlib-compressed before storage
+COMPRESS_MIN_BYTES = 1024
+_COMPRESSED_PREFIX = "zlib:"
+
+Typed = Tuple[str, bytes]
+
+
+def _compress(typed: Typed) -> Typed:
+    type_, data = typed
+    if len(data) >= COMPRESS_MIN_BYTES:
+        return _COMPRESSED_PREFIX + type_, zlib.compress(data)
+    return type_, data
+
+
+def _decompress(type_: str, data: bytes) -> Typed:
+    if type_.startswith(_COMPRESSED_PREFIX):
+        return type_[len(_COMPRESSED_PREFIX):], zlib.decompress(data)
+    return type_, bytes(data)
+
+
+class _ThreadState:
+    """Serialized latest checkpoint of one (thread, namespace)."""
+
+    __slots__ = ("checkpoint_id", "parent_id", "checkpoint", "metadata", "blobs", "writes", "last_used", "unsaved")
+
+    def __init__(self, checkpoint_id: str, parent_id: Optional[str], checkpoint: Typed, metadata: Typed):
+        self.checkpoint_id = checkpoint_id
+        self.parent_id = parent_id
+        self.checkpoint = checkpoint
+        self.metadata = metadata
+        # channel -> (version, stored value)
+        self.blobs: Dict[str, Tuple[str, Typed]] = {}
+        # (task_id, idx) -> (task_id, channel, stored value, task_path)
+        self.writes: Dict[Tuple[str, int], Tuple[str, str, Typed, str]] = {}
+        self.last_used = time.monotonic()
+        # Set when Postgres could not be written; this copy is then the newest
+        self.unsaved = False
+
+    @property
+    def nbytes(self) -> int:
+        size = len(self.checkpoint[1]) + len(self.metadata[1])
+        size += sum(len(value[1]) for _, value in self.blobs.values())
+        size += sum(len(write[2][1]) for write in self.writes.values())
+        return size
+
+
+class PostgresCheckpointSaver(BaseCheckpointSaver[str]):
+    """Shallow checkpoint saver persisted to Postgres with an in-memory LRU hot tier."""
+
+    def __init__(self, *, serde=None, persist: Optional[bool] = None) -> None:
+        super().__init__(serde=serde)
+        self._persist = settings.query_checkpoints_persist if persist is None else persist
+        self._hot: "OrderedDict[Tuple[str, str], _ThreadState]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._tables_ready = False
+
+    # -- storage helpers -------------------------------------------------
+
+    def _ensure_tables(self) -> None:
+        if not self._tables_ready:
+            from app.domain.queries.history import ensure_query_history_tables_exist
+
+            ensure_query_history_tables_exist()
+            self._tables_ready = True
+
+    def _dumps(self, value: Any) -> Typed:
+        return _compress(self.serde.dumps_typed(value))
+
+    def _loads(self, stored: Typed) -> Any:
+        return self.serde.loads_typed(_decompress(*stored))
+
+    def _hot_get(self, key: Tuple[str, str]) -> Optional[_ThreadState]:
+        with self._lock:
+            self._evict_idle_locked()
+            state = self._hot.get(key)
+            if state is not None:
+                state.last_used = time.monotonic()
+                self._hot.move_to_end(key)
+            return state
+
+    def _hot_put(self, key: Tuple[str, str], state: _ThreadState) -> None:
+        with self._lock:
+            state.last_used = time.monotonic()
+            self._hot[key] = state
+            self._hot.move_to_end(key)
+            # Without persistence the hot tier is the only copy, so only the LRU bound applies
+            if self._persist and state.nbytes > settings.query_checkpoint_hot_max_thread_kb * 1024:
+                del self._hot[key]
+            self._evict_idle_locked()
+            while len(self._hot) > max(1, settings.query_checkpoint_hot_max_threads):
+                self._hot.popitem(last=False)
+
+    def _hot_discard(self, key: Tuple[str, str]) -> None:
+        with self._lock:
+            self._hot.pop(key, None)
+
+    def _evict_idle_locked(self) -> None:
+        idle = settings.query_checkpoint_hot_idle_seconds
+        if idle <= 0:
+            return
+        cutoff = time.monotonic() - idle
+        while self._hot:
+            key, state = next(iter(self._hot.items()))
+            if state.last_used >= cutoff:
+                break
+            del self._hot[key]
+
+    def hot_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"threads": len(self._hot), "bytes": sum(state.nbytes for state in self._hot.values())}
+
+    def _stored_checkpoint_id(self, thread_id: str, checkpoint_ns: str) -> Optional[str]:
+        with get_engine().connect() as conn:
+            return conn.execute(
+                text("""
+                    SELECT checkpoint_id FROM query_checkpoints
+                    WHERE thread_id = :thread_id AND checkpoint_ns = :checkpoint_ns
+                """),
+                {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns},
+            ).scalar()
+
+    def _load_state(self, thread_id: str, checkpoint_ns: str) -> Optional[_ThreadState]:
+        params = {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns}
+        with get_engine().connect() as conn:
+            row = conn.execute(
+                text("""
+                    SELECT checkpoint_id, parent_checkpoint_id, checkpoint_type, checkpoint,
+                           metadata_type, metadata
+                    FROM query_checkpoints
+                    WHERE thread_id = :thread_id AND checkpoint_ns = :checkpoint_ns
+                """),
+                params,
+            ).fetchone()
+            if row is None:
+                return None
+            state = _ThreadState(row[0], row[1], (row[2], bytes(row[3])), (row[4], bytes(row[5])))
+            for channel, version, value_type, value in conn.execute(
+                text("""
+                    SELECT channel, version, value_type, value FROM query_checkpoint_blobs
+                    WHERE thread_id = :thread_id AND checkpoint_ns = :checkpoint_ns
+                """),
+                params,
+            ):
+                state.blobs[channel] = (version, (value_type, bytes(value)))
+            for task_id, idx, channel, value_type, value, task_path in conn.execute(
+                text("""
+                    SELECT task_id, idx, channel, value_type, value, task_path
+                    FROM query_checkpoint_writes
+                    WHERE thread_id = :thread_id AND checkpoint_ns = :checkpoint_ns
+                      AND checkpoint_id = :checkpoint_id
+                """),
+                {**params, "checkpoint_id": state.checkpoint_id},
+            ):
+                state.writes[(task_id, idx)] = (task_id, channel, (value_type, bytes(value)), task_path)
+        return state
+
+    def _get_state(self, thread_id: str, checkpoint_ns: str) -> Optional[_ThreadState]:
+        key = (thread_id, checkpoint_ns)
+        state = self._hot_get(key)
+        if not self._persist:
+            return state
+        try:
+            self._ensure_tables()
+            if state is not None and (
+                state.unsaved or self._stored_checkpoint_id(thread_id, checkpoint_ns) == state.checkpoint_id
+            ):
+                return state
+            state = self._load_state(thread_id, checkpoint_ns)
+        except Exception as e:
+            logger.warning("Failed to load query checkpoint for thread %s: %s", thread_id, e)
+            return self._hot_get(key)
+        if state is None:
+            self._hot_discard(key)
+        else:
+            self._hot_put(key, state)
+        return state
+
+    def _to_tuple(self, thread_id: str, checkpoint_ns: str, state: _ThreadState) -> CheckpointTuple:
+        checkpoint: Checkpoint = self._loads(state.checkpoint)
+        channel_values = {}
+        for channel, version in checkpoint["channel_versions"].items():
+            stored = state.blobs.get(channel)
+            if stored is None or str(stored[0]) != str(version) or stored[1][0] == "empty":
+                continue
+            channel_values[channel] = self._loads(stored[1])
+        # writes_sort_key order: (task_path, task_id, idx)
+        writes = [
+            write for _, write in sorted(state.writes.items(), key=lambda item: (item[1][3], item[0][0], item[0][1]))
+        ]
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": state.checkpoint_id,
+                }
+            },
+            checkpoint={**checkpoint, "channel_values": channel_values},
+            metadata=self._loads(state.metadata),
+            pending_writes=[(task_id, channel, self._loads(value)) for task_id, channel, value, _ in writes],
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": state.parent_id,
+                    }
+                }
+                if state.parent_id
+                else None
+            ),
+        )
+
+    # -- BaseCheckpointSaver API ------------------------------------------
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        state = self._get_state(thread_id, checkpoint_ns)
+        if state is None:
+            return None
+        checkpoint_id = get_checkpoint_id(config)
+        if checkpoint_id and checkpoint_id != state.checkpoint_id:
+            # Only the latest checkpoint is kept
+            return None
+        return self._to_tuple(thread_id, checkpoint_ns, state)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        if config is None:
+            # Listing every thread is not supported by this saver
+            return
+        if limit is not None and limit <= 0:
+            return
+        checkpoint_tuple = self.get_tuple(config)
+        if checkpoint_tuple is None:
+            return
+        checkpoint_id = checkpoint_tuple.config["configurable"]["checkpoint_id"]
+        before_id = get_checkpoint_id(before) if before else None
+        if before_id and checkpoint_id >= before_id:
+            return
+        if filter and not all(checkpoint_tuple.metadata.get(key) == value for key, value in filter.items()):
+            return
+        yield checkpoint_tuple
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        key = (thread_id, checkpoint_ns)
+        stripped = checkpoint.copy()
+        values: Dict[str, Any] = stripped.pop("channel_values")  # type: ignore[misc]
+
+        parent_id = config["configurable"].get("checkpoint_id")
+        previous = self._hot_get(key)
+        state = _ThreadState(
+            checkpoint["id"],
+            parent_id,
+            self._dumps(stripped),
+            self._dumps(get_checkpoint_metadata(config, metadata)),
+        )
+        # Unchanged channels are carried over from the parent; without it in the
+        # hot tier they only exist in Postgres, so this state is not cached
+        complete = previous is not None and previous.checkpoint_id == parent_id
+        if complete:
+            state.blobs.update(previous.blobs)
+        changed: Dict[str, Tuple[str, Typed]] = {}
+        for channel, version in new_versions.items():
+            stored = self._dumps(values[channel]) if channel in values else ("empty", b"")
+            changed[channel] = (str(version), stored)
+        state.blobs.update(changed)
+        current_channels = set(checkpoint["channel_versions"])
+        state.blobs = {channel: blob for channel, blob in state.blobs.items() if channel in current_channels}
+
+        if self._persist:
+            try:
+                self._ensure_tables()
+                self._write_checkpoint(thread_id, checkpoint_ns, state, changed, current_channels)
+            except Exception as e:
+                logger.warning("Failed to persist query checkpoint for thread %s: %s", thread_id, e)
+                state.unsaved = True
+        if complete or parent_id is None or not self._persist:
+            self._hot_put(key, state)
+        else:
+            self._hot_discard(key)
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def _write_checkpoint(
+        self,
+        thread_id: str,
+        checkpoint_ns: str,
+        state: _ThreadState,
+        changed: Dict[str, Tuple[str, Typed]],
+        current_channels: set,
+    ) -> None:
+        params = {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns}
+        with get_engine().begin() as conn:
+            conn.execute(
+                text("""
+                    INSERT INTO query_checkpoints (
+                        thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id,
+                        checkpoint_type, checkpoint, metadata_type, metadata, size_bytes, updated_at
+                    ) VALUES (
+                        :thread_id, :checkpoint_ns, :checkpoint_id, :parent_checkpoint_id,
+                        :checkpoint_type, :checkpoint, :metadata_type, :metadata, :size_bytes, NOW()
+                    )
+                    ON CONFLICT (thread_id, checkpoint_ns) DO UPDATE SET
+                        checkpoint_id = EXCLUDED.checkpoint_id,
+                        parent_checkpoint_id = EXCLUDED.parent_checkpoint_id,
+                        checkpoint_type = EXCLUDED.checkpoint_type,
+                        checkpoint = EXCLUDED.checkpoint,
+                        metadata_type = EXCLUDED.metadata_type,
+                        metadata = EXCLUDED.metadata,
+                        size_bytes = EXCLUDED.size_bytes,
+                        updated_at = NOW()
+                """),
+                {
+                    **params,
+                    "checkpoint_id": state.checkpoint_id,
+                    "parent_checkpoint_id": state.parent_id,
+                    "checkpoint_type": state.checkpoint[0],
+                    "checkpoint": state.checkpoint[1],
+                    "metadata_type": state.metadata[0],
+                    "metadata": state.metadata[1],
+                    "size_bytes": state.nbytes,
+                },
+            )
+            if changed:
+                conn.execute(
+                    text("""
+                        INSERT INTO query_checkpoint_blobs (
+                            thread_id, checkpoint_ns, channel, version, value_type, value
+                        ) VALUES (
+                            :thread_id, :checkpoint_ns, :channel, :version, :value_type, :value
+                        )
+                        ON CONFLICT (thread_id, checkpoint_ns, channel) DO UPDATE SET
+                            version = EXCLUDED.version,
+                            value_type = EXCLUDED.value_type,
+                            value = EXCLUDED.value
+                    """),
+                    [
+                        {**params, "channel": channel, "version": version, "value_type": value[0], "value": value[1]}
+                        for channel, (version, value) in changed.items()
+                    ],
+                )
+            conn.execute(
+                text("""
+                    DELETE FROM query_checkpoint_blobs
+                    WHERE thread_id = :thread_id AND checkpoint_ns = :checkpoint_ns
+                      AND NOT (channel = ANY(:channels))
+                """),
+                {**params, "channels": sorted(current_channels)},
+            )
+            conn.execute(
+                text("""
+                    DELETE FROM query_checkpoint_writes
+                    WHERE thread_id = :thread_id AND checkpoint_ns = :checkpoint_ns
+                      AND checkpoint_id <> :checkpoint_id
+                """),
+                {**params, "checkpoint_id": state.checkpoint_id},
+            )
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        key = (thread_id, checkpoint_ns)
+        state = self._hot_get(key)
+        if state is not None and state.checkpoint_id != checkpoint_id:
+            state = None
+
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            write_idx = WRITES_IDX_MAP.get(channel, idx)
+            if write_idx >= 0 and state is not None and (task_id, write_idx) in state.writes:
+                continue
+            stored = self._dumps(value)
+            if state is not None:
+                state.writes[(task_id, write_idx)] = (task_id, channel, stored, task_path)
+            rows.append({
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+                "task_id": task_id,
+                "idx": write_idx,
+                "channel": channel,
+                "value_type": stored[0],
+                "value": stored[1],
+                "task_path": task_path,
+            })
+        if state is not None:
+            self._hot_put(key, state)
+        if not rows or not self._persist:
+            return
+
+        try:
+            self._ensure_tables()
+            with get_engine().begin() as conn:
+                conn.execute(
+                    text("""
+                        INSERT INTO query_checkpoint_writes (
+                            thread_id, checkpoint_ns, checkpoint_id, task_id, idx,
+                            channel, value_type, value, task_path
+                        ) VALUES (
+                            :thread_id, :checkpoint_ns, :checkpoint_id, :task_id, :idx,
+                            :channel, :value_type, :value, :task_path
+                        )
+                        ON CONFLICT (thread_id, checkpoint_ns, checkpoint_id, task_id, idx) DO UPDATE SET
+                            channel = EXCLUDED.channel,
+                            value_type = EXCLUDED.value_type,
+                            value = EXCLUDED.value,
+                            task_path = EXCLUDED.task_path
+                        WHERE query_checkpoint_writes.idx < 0
+                    """),
+                    rows,
+                )
+        except Exception as e:
+            logger.warning("Failed to persist query checkpoint writes for thread %s: %s", thread_id, e)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            for key in [key for key in self._hot if key[0] == thread_id]:
+                del self._hot[key]
+        if not self._persist:
+            return
+        try:
+            self._ensure_tables()
+            with get_engine().begin() as conn:
+                for table in ("query_checkpoint_writes", "query_checkpoint_blobs", "query_checkpoints"):
+                    conn.execute(text(f"DELETE FROM {table} WHERE thread_id = :thread_id"), {"thread_id": thread_id})
+        except Exception as e:
+            logger.warning("Failed to delete query checkpoints for thread %s: %s", thread_id, e)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self.get_tuple(config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        for item in self.list(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        self.delete_thread(thread_id)
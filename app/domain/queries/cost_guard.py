@@ -0,0 +1,164 @@
+"""
+Planner cost guard for agent and export SQL.
+
+Before a query runs, ``guard_query_cost`` asks Postgres for its plan with
+``EXPLAIN (FORMAT JSON)``. Queries whose estimated total cost exceeds
+``QUERY_MAX_PLAN_COST``, or where any plan node is expected to produce more
+than ``QUERY_MAX_PLAN_ROWS`` rows, are not executed. A runaway cross join or
+unfiltered sort is then refused in milliseconds instead of holding a
+connection until the statement timeout.
+
+Callers only fetch a bounded number of rows, so an over-budget query without
+a LIMIT is first rewritten to ``SELECT * FROM (...) LIMIT n`` and planned
+again. The planner often finds a fast-start plan for the limited query, in
+which case the rewrite runs instead. Otherwise ``QueryCostExceeded`` is
+raised, and ``cost_guard_recovery`` turns its message into retry
+instructions for the query agent.
+"""
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+COST_GUARD_ERROR_PREFIX = "ERROR: Query rejected by cost guard"
+# Plan nodes at least this large are called out in the rejection message
+_LARGE_NODE_ROWS = 1_000_000
+_TOP_LEVEL_LIMIT = re.compile(r"\bLIMIT\s+\d+\s*(OFFSET\s+\d+\s*)?$|\bFETCH\s+FIRST\b[^)]*$", re.IGNORECASE)
+
+
+@dataclass
+class PlanEstimate:
+    """Planner estimates for one statement."""
+
+    total_cost: float
+    max_rows: float
+    hints: List[str] = field(default_factory=list)
+
+
+class QueryCostExceeded(Exception):
+    """Raised when a query's plan is over the configured cost or row limits."""
+
+    def __init__(self, estimate: PlanEstimate):
+        self.estimate = estimate
+        reasons = []
+        if _over(estimate.total_cost, settings.query_max_plan_cost):
+            reasons.append(
+                f"estimated cost {estimate.total_cost:,.0f} exceeds the limit of {settings.query_max_plan_cost:,.0f}"
+            )
+        if _over(estimate.max_rows, settings.query_max_plan_rows):
+            reasons.append(
+                f"a plan step is estimated to produce {estimate.max_rows:,.0f} rows "
+                f"(limit {settings.query_max_plan_rows:,})"
+            )
+        lines = [f"{COST_GUARD_ERROR_PREFIX}: {'; '.join(reasons)}."]
+        lines.extend(f"- {hint}" for hint in estimate.hints)
+        lines.append(
+            "Fix: narrow the query. Add WHERE filters, make sure every JOIN has an ON condition, "
+            "aggregate with GROUP BY instead of returning raw rows, and add a LIMIT."
+        )
+        super().__init__("\n".join(lines))
+
+
+def _over(value: float, limit: float) -> bool:
+    return bool(limit) and value > limit
+
+
+def _walk(node: Dict[str, Any], hints: List[str], under_limit: bool = False) -> float:
+    """Collect hints and return the largest row estimate of nodes not below a LIMIT."""
+    node_type = node.get("Node Type", "")
+    rows = float(node.get("Plan Rows", 0))
+    children = node.get("Plans", [])
+
+    if node_type == "Nested Loop" and len(children) == 2:
+        outer, inner = (float(child.get("Plan Rows", 0)) for child in children)
+        if rows >= _LARGE_NODE_ROWS and rows >= 0.5 * outer * inner:
+            hints.append(
+                f"A join produces about {rows:,.0f} rows, every row of one side paired with every row "
+                "of the other. Check that each JOIN has an ON condition that matches rows."
+            )
+    elif node_type == "Sort" and rows >= _LARGE_NODE_ROWS:
+        hints.append(f"About {rows:,.0f} rows are sorted. Filter with WHERE or aggregate before ORDER BY.")
+    elif node_type == "Seq Scan" and rows >= _LARGE_NODE_ROWS and "Filter" not in node:
+        hints.append(
+            f'Table "{node.get("Relation Name")}" is read in full (about {rows:,.0f} rows). '
+            "Add a WHERE filter or aggregate with GROUP BY."
+        )
+
+    # A LIMIT stops its input early, so rows below it are not all produced
+    child_under_limit = under_limit or node_type == "Limit"
+    largest = 0.0 if under_limit else rows
+    for child in children:
+        largest = max(largest, _walk(child, hints, child_under_limit))
+    return largest
+
+
+def explain_query(conn: Connection, sql_query: str) -> PlanEstimate:
+    """Return the planner's estimates for ``sql_query`` without running it."""
+    plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql_query}")).scalar()
+    root = plan[0]["Plan"]
+    hints: List[str] = []
+    max_rows = _walk(root, hints)
+    # Each hint once, in plan order
+    return PlanEstimate(float(root.get("Total Cost", 0)), max_rows, list(dict.fromkeys(hints)))
+
+
+def _within_limits(estimate: PlanEstimate) -> bool:
+    return not (
+        _over(estimate.total_cost, settings.query_max_plan_cost)
+        or _over(estimate.max_rows, settings.query_max_plan_rows)
+    )
+
+
+def guard_query_cost(conn: Connection, sql_query: str, row_limit: int) -> str:
+    """
+    Check ``sql_query``'s plan against the configured limits.
+
+    Returns the SQL to execute: the query itself, or a LIMIT-wrapped rewrite
+    when only the rewrite fits. Raises ``QueryCostExceeded`` otherwise.
+    Callers should fetch at most ``row_limit`` rows, so the rewrite returns
+    the same rows they would have read.
+    """
+    if not settings.query_max_plan_cost and not settings.query_max_plan_rows:
+        return sql_query
+
+    statement = sql_query.strip().rstrip(";").strip()
+    estimate = explain_query(conn, statement)
+    if _within_limits(estimate):
+        return sql_query
+
+    if not _TOP_LEVEL_LIMIT.search(statement):
+        limited = f"SELECT * FROM (\n{statement}\n) AS limited_query LIMIT {int(row_limit)}"
+        limited_estimate = explain_query(conn, limited)
+        if _within_limits(limited_estimate):
+            logger.info(
+                "Cost guard added LIMIT %s: estimated cost %.0f -> %.0f",
+                row_limit, estimate.total_cost, limited_estimate.total_cost,
+            )
+            return limited
+
+    logger.warning(
+        "Cost guard rejected query (cost %.0f, max rows %.0f): %s",
+        estimate.total_cost, estimate.max_rows, statement[:200],
+    )
+    raise QueryCostExceeded(estimate)
+
+
+def cost_guard_recovery(error_message: str) -> Optional[str]:
+    """Return retry instructions for a cost guard rejection, or None for other errors."""
+    if COST_GUARD_ERROR_PREFIX not in error_message:
+        return None
+    details = error_message[error_message.index(COST_GUARD_ERROR_PREFIX):]
+    return (
+        "The query was not run because the database planner estimates it is too expensive.\n"
+        f"{details}\n"
+        "Please regenerate a narrower query."
+    )
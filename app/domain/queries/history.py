@@ -68,9 +68,50 @@ def create_query_history_tables() -> None:
         ADD COLUMN IF NOT EXISTS chart_suggestion JSONB;
     """
 
+    # LangGraph agent state, one latest checkpoint per thread (see app.domain.queries.checkpointer)
+    create_checkpoints_sql = """
+    CREATE TABLE IF NOT EXISTS query_checkpoints (
+        thread_id TEXT NOT NULL,
+        checkpoint_ns TEXT NOT NULL DEFAULT '',
+        checkpoint_id TEXT NOT NULL,
+        parent_checkpoint_id TEXT,
+        checkpoint_type TEXT NOT NULL,
+        checkpoint BYTEA NOT NULL,
+        metadata_type TEXT NOT NULL,
+        metadata BYTEA NOT NULL,
+        size_bytes INTEGER NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT NOW(),
+        PRIMARY KEY (thread_id, checkpoint_ns)
+    );
+
+    CREATE TABLE IF NOT EXISTS query_checkpoint_blobs (
+        thread_id TEXT NOT NULL,
+        checkpoint_ns TEXT NOT NULL DEFAULT '',
+        channel TEXT NOT NULL,
+        version TEXT NOT NULL,
+        value_type TEXT NOT NULL,
+        value BYTEA NOT NULL,
+        PRIMARY KEY (thread_id, checkpoint_ns, channel)
+    );
+
+    CREATE TABLE IF NOT EXISTS query_checkpoint_writes (
+        thread_id TEXT NOT NULL,
+        checkpoint_ns TEXT NOT NULL DEFAULT '',
+        checkpoint_id TEXT NOT NULL,
+        task_id TEXT NOT NULL,
+        idx INTEGER NOT NULL,
+        channel TEXT NOT NULL,
+        value_type TEXT NOT NULL,
+        value BYTEA NOT NULL,
+        task_path TEXT NOT NULL DEFAULT '',
+        PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+    );
+    """
+
     with engine.begin() as conn:
         conn.execute(text(create_threads_sql))
         conn.execute(text(create_messages_sql))
+        conn.execute(text(create_checkpoints_sql))
 
 
 def _is_missing_query_table_error(exc: Exception) -> bool:
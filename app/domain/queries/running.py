@@ -0,0 +1,241 @@
+"""
+Registry of in-flight agent and export queries, so they can be listed and
+cancelled before their statement timeout.
+
+Each query is registered with its backend PID (``pg_backend_pid()``), the
+server it runs on (primary or read replica), its source, the conversation
+thread when there is one, its SQL, and its start time. Registering also sets
+the connection's ``application_name`` to the query id for the rest of the
+transaction, so the query can be told apart from whatever a pooled
+connection runs next. Entries live in a ``SessionStore``, so with
+``SESSION_STORE_BACKEND=postgres`` any API worker can list or cancel a query
+started by another.
+
+``cancel_query`` runs ``pg_cancel_backend`` only on a backend whose PID and
+``application_name`` both still match; the query then fails with "canceling
+statement due to user request". Listing drops entries whose backend no
+longer matches, such as those left behind by a crashed worker.
+
+``run_cancelling_on_disconnect`` and ``stream_cancelling_on_disconnect``
+cancel a request's query once its client goes away, so closing the browser
+tab frees the database too.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+from uuid import uuid4
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+from app.core.session_store import SessionStore
+from app.db.session import get_engine, get_replica_engine
+
+logger = logging.getLogger(__name__)
+
+# Seconds between client disconnect checks while a query runs
+DISCONNECT_POLL_SECONDS = 0.5
+SQL_PREVIEW_CHARS = 2000
+
+running_queries = SessionStore("running_queries")
+
+_STREAM_DONE = object()
+
+
+class QueryCancelled(Exception):
+    """Raised when a request's query was cancelled because its client disconnected."""
+
+
+def register_query(
+    conn: Connection,
+    sql: str,
+    source: str,
+    thread_id: Optional[str] = None,
+    query_id: Optional[str] = None,
+) -> str:
+    """Record the query about to run on ``conn`` and return its id."""
+    query_id = query_id or str(uuid4())
+    try:
+        # Transaction-local, so the name is gone once the connection goes back to the pool
+        pid = conn.execute(
+            text("SELECT pg_backend_pid() FROM set_config('application_name', :query_id, true)"),
+            {"query_id": query_id},
+        ).scalar()
+        running_queries[query_id] = {
+            "query_id": query_id,
+            "pid": pid,
+            "target": "primary" if conn.engine is get_engine() else "replica",
+            "source": source,
+            "thread_id": thread_id,
+            "sql": sql[:SQL_PREVIEW_CHARS],
+            "started_at": datetime.now(timezone.utc).isoformat(),
+        }
+    except Exception as exc:
+        logger.warning("Could not register running query %s: %s", query_id, exc)
+    return query_id
+
+
+def unregister_query(query_id: str) -> None:
+    try:
+        running_queries.pop(query_id, None)
+    except Exception as exc:
+        logger.warning("Could not unregister running query %s: %s", query_id, exc)
+
+
+@contextmanager
+def track_query(
+    conn: Connection,
+    sql: str,
+    source: str,
+    thread_id: Optional[str] = None,
+    query_id: Optional[str] = None,
+) -> Iterator[str]:
+    """Register the query for the duration of the block."""
+    query_id = register_query(conn, sql, source, thread_id=thread_id, query_id=query_id)
+    try:
+        yield query_id
+    finally:
+        unregister_query(query_id)
+
+
+def _engine_for(target: str):
+    return get_replica_engine() if target == "replica" else get_engine()
+
+
+def _live_query_ids(target: str, entries: List[Dict[str, Any]]) -> Optional[set]:
+    """Ids of ``entries`` whose backend still runs them, or None when that cannot be checked."""
+    engine = _engine_for(target)
+    if engine is None:
+        return set()
+    try:
+        with engine.connect() as conn:
+            rows = conn.execute(
+                text(
+                    "SELECT pid, application_name FROM pg_stat_activity "
+                    "WHERE application_name = ANY(:query_ids)"
+                ),
+                {"query_ids": [entry["query_id"] for entry in entries]},
+            ).fetchall()
+    except Exception as exc:
+        logger.warning("Could not check running %s queries: %s", target, exc)
+        return None
+    live = {(row[0], row[1]) for row in rows}
+    return {entry["query_id"] for entry in entries if (entry["pid"], entry["query_id"]) in live}
+
+
+def list_running_queries() -> List[Dict[str, Any]]:
+    """
+    Registered queries, oldest first, with how long each has been running.
+
+    Entries whose backend no longer runs the query are unregistered.
+    """
+    now = datetime.now(timezone.utc)
+    entries = [entry for entry in (running_queries.get(key) for key in list(running_queries)) if entry]
+
+    by_target: Dict[str, List[Dict[str, Any]]] = {}
+    for entry in entries:
+        by_target.setdefault(entry["target"], []).append(entry)
+    running = []
+    for target, target_entries in by_target.items():
+        live = _live_query_ids(target, target_entries)
+        for entry in target_entries:
+            if live is None or entry["query_id"] in live:
+                running.append(entry)
+            else:
+                logger.info("Dropping stale running query %s (pid %s)", entry["query_id"], entry["pid"])
+                unregister_query(entry["query_id"])
+
+    for entry in running:
+        entry["elapsed_seconds"] = (now - datetime.fromisoformat(entry["started_at"])).total_seconds()
+    return sorted(running, key=lambda entry: entry["started_at"])
+
+
+def cancel_query(query_id: str) -> Optional[bool]:
+    """
+    Cancel a registered query with ``pg_cancel_backend``.
+
+    Returns None when no such query is running, otherwise whether Postgres
+    accepted the cancel request. The backend is only signalled while its
+    ``application_name`` is still this query's id, so a pooled connection
+    that has moved on to other work is left alone.
+    """
+    entry = running_queries.get(query_id)
+    if not entry:
+        return None
+    engine = _engine_for(entry["target"])
+    if engine is None:
+        return False
+    with engine.connect() as conn:
+        row = conn.execute(
+            text(
+                "SELECT pg_cancel_backend(pid) FROM pg_stat_activity "
+                "WHERE pid = :pid AND application_name = :query_id"
+            ),
+            {"pid": entry["pid"], "query_id": query_id},
+        ).fetchone()
+    if row is None:
+        logger.info("Query %s is no longer running on pid %s; unregistering it", query_id, entry["pid"])
+        unregister_query(query_id)
+        return None
+    cancelled = bool(row[0])
+    logger.info("Cancel requested for %s query %s (pid %s): %s", entry["source"], query_id, entry["pid"], cancelled)
+    return cancelled
+
+
+async def run_cancelling_on_disconnect(request: Request, query_id: str, func: Callable, *args: Any) -> Any:
+    """
+    Run blocking ``func(*args)`` in the threadpool. If the client disconnects
+    first, cancel query ``query_id`` and raise ``QueryCancelled``.
+    """
+    task = asyncio.ensure_future(run_in_threadpool(func, *args))
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+        if done:
+            return task.result()
+        if await request.is_disconnected():
+            break
+
+    logger.info("Client disconnected; cancelling query %s", query_id)
+    try:
+        cancel_query(query_id)
+    except Exception as exc:
+        logger.warning("Could not cancel query %s: %s", query_id, exc)
+    try:
+        await task
+    except Exception:
+        # The cancelled statement's error has no client to go to
+        pass
+    raise QueryCancelled(query_id)
+
+
+async def stream_cancelling_on_disconnect(
+    request: Request, query_id: str, chunks: Iterator[Any]
+) -> AsyncIterator[Any]:
+    """Stream ``chunks``, cancelling query ``query_id`` if the client leaves before the end."""
+    finished = False
+    try:
+        while True:
+            chunk = await run_cancelling_on_disconnect(request, query_id, next, chunks, _STREAM_DONE)
+            if chunk is _STREAM_DONE:
+                finished = True
+                return
+            yield chunk
+    except QueryCancelled:
+        finished = True
+    finally:
+        if not finished and hasattr(chunks, "close"):
+            try:
+                # Closing the generator releases its connection, ending the query
+                chunks.close()
+            except ValueError:
+                # The generator is mid-fetch in the threadpool; cancel the statement instead
+                try:
+                    cancel_query(query_id)
+                except Exception as exc:
+                    logger.warning("Could not cancel query %s: %s", query_id, exc)
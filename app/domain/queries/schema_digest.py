@@ -0,0 +1,419 @@
+"""
+Compact, precomputed schema digests for the natural-language query agent.
+
+Instead of discovering tables through ``list_tables_tool`` and
+``get_table_schema_tool`` (two extra LLM turns), the agent's system prompt
+carries a digest of the tables most relevant to the question. Each table's
+digest holds its row count, purpose, column names and types, and column
+statistics: distinct counts, null fractions, value ranges, and the most common
+values of low-cardinality columns. Statistics come from the column profiles
+collected during import, or from the planner statistics (``pg_stats``) for
+columns without one.
+
+Digests are stored in ``schema_digests`` and refreshed after every import. At
+query time each digest's schema version (a hash of the table's columns) is
+checked, so tables changed by DDL are rebuilt before use. Tables are ranked
+against the question with a BM25 index over names, purposes, columns, and
+common values, then added in order until ``QUERY_SCHEMA_DIGEST_TOKEN_BUDGET``
+is used up.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import math
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.core.config import settings
+from app.core.metrics import trace_stage
+from app.db.context import list_user_table_names
+from app.db.metadata import get_all_table_metadata
+from app.db.models import SYSTEM_COLUMNS
+from app.db.session import get_engine
+from app.domain.imports.column_profiles import get_table_profile
+
+logger = logging.getLogger(__name__)
+
+# Columns with at most this many distinct values list their common values
+LOW_CARDINALITY_MAX_DISTINCT = 20
+TOP_VALUES_LIMIT = 5
+VALUE_MAX_CHARS = 40
+# Tables estimated above this many rows use the planner estimate instead of COUNT(*)
+EXACT_COUNT_MAX_ROWS = 1_000_000
+# Rough characters per token for English text and identifiers
+CHARS_PER_TOKEN = 4
+
+RANGE_TYPES = {
+    "smallint", "integer", "bigint", "numeric", "real", "double precision",
+    "date", "timestamp without time zone", "timestamp with time zone",
+}
+
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "give", "how", "i",
+    "in", "is", "it", "list", "me", "many", "much", "of", "on", "or", "our", "show",
+    "that", "the", "their", "there", "this", "to", "we", "what", "which", "who", "with",
+}
+
+_BM25_K1 = 1.2
+_BM25_B = 0.75
+
+_table_initialized = False
+_table_init_lock = threading.Lock()
+
+
+def ensure_schema_digest_table() -> None:
+    """Create the schema_digests table on-demand."""
+    global _table_initialized
+    if _table_initialized:
+        return
+
+    with _table_init_lock:
+        if _table_initialized:
+            return
+        create_sql = """
+        CREATE TABLE IF NOT EXISTS schema_digests (
+            table_name VARCHAR(255) PRIMARY KEY,
+            schema_version VARCHAR(64) NOT NULL,
+            digest JSONB NOT NULL,
+            updated_at TIMESTAMP DEFAULT NOW()
+        );
+        """
+        with get_engine().begin() as conn:
+            conn.execute(text(create_sql))
+        _table_initialized = True
+
+
+def estimate_tokens(value: str) -> int:
+    return math.ceil(len(value) / CHARS_PER_TOKEN)
+
+
+def _schema_versions(conn: Connection) -> Dict[str, str]:
+    """Hash of each public table's column names and types."""
+    rows = conn.execute(text("""
+        SELECT table_name, string_agg(column_name || ':' || data_type, '|' ORDER BY ordinal_position)
+        FROM information_schema.columns
+        WHERE table_schema = 'public'
+        GROUP BY table_name
+    """))
+    return {row[0]: hashlib.sha256(row[1].encode("utf-8")).hexdigest() for row in rows}
+
+
+def _column_stats(conn: Connection, table_name: str) -> Dict[str, Dict[str, Any]]:
+    rows = conn.execute(text("""
+        SELECT attname, null_frac, n_distinct,
+               array_to_json(most_common_vals::text::text[]) AS top_values,
+               array_to_json(histogram_bounds::text::text[]) AS bounds
+        FROM pg_stats
+        WHERE schemaname = 'public' AND tablename = :table_name
+        ORDER BY inherited DESC
+    """), {"table_name": table_name})
+    stats: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        # Partitioned tables report whole-hierarchy stats first
+        stats.setdefault(row.attname, {
+            "null_frac": row.null_frac,
+            "n_distinct": row.n_distinct,
+            "top_values": row.top_values or [],
+            "bounds": row.bounds or [],
+        })
+    return stats
+
+
+def _row_count(conn: Connection, table_name: str) -> int:
+    estimate = conn.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(format('public.%I', CAST(:table_name AS TEXT)))"),
+        {"table_name": table_name},
+    ).scalar()
+    if estimate is not None and estimate >= EXACT_COUNT_MAX_ROWS:
+        return int(estimate)
+    return conn.execute(text(f'SELECT COUNT(*) FROM "{table_name}"')).scalar() or 0
+
+
+def _shorten(value: str) -> str:
+    return value if len(value) <= VALUE_MAX_CHARS else value[:VALUE_MAX_CHARS - 3] + "..."
+
+
+def _display_value(value: Any) -> str:
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return _shorten(str(value))
+
+
+def _profile_details(profile: Dict[str, Any], data_type: str) -> Dict[str, Any]:
+    details: Dict[str, Any] = {}
+    distinct = profile.get("distinct_estimate") or 0
+    if distinct:
+        details["distinct"] = distinct
+    if profile.get("null_fraction"):
+        details["null_frac"] = round(float(profile["null_fraction"]), 3)
+    if 0 < distinct <= LOW_CARDINALITY_MAX_DISTINCT and profile.get("top_values"):
+        details["top_values"] = [_shorten(entry["value"]) for entry in profile["top_values"][:TOP_VALUES_LIMIT]]
+    if data_type in RANGE_TYPES and profile.get("min") is not None:
+        details["range"] = [_display_value(profile["min"]), _display_value(profile["max"])]
+    return details
+
+
+def _stats_details(column_stats: Dict[str, Any], data_type: str, row_count: int) -> Dict[str, Any]:
+    details: Dict[str, Any] = {}
+    n_distinct = column_stats["n_distinct"] or 0
+    distinct = int(-n_distinct * row_count) if n_distinct < 0 else int(n_distinct)
+    if distinct:
+        details["distinct"] = distinct
+    if column_stats["null_frac"]:
+        details["null_frac"] = round(float(column_stats["null_frac"]), 3)
+    if 0 < distinct <= LOW_CARDINALITY_MAX_DISTINCT and column_stats["top_values"]:
+        details["top_values"] = [_shorten(value) for value in column_stats["top_values"][:TOP_VALUES_LIMIT]]
+    bounds = column_stats["bounds"]
+    if data_type in RANGE_TYPES and bounds:
+        details["range"] = [bounds[0], bounds[-1]]
+    return details
+
+
+def build_table_digest(conn: Connection, table_name: str, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Collect the digest for one table from its column profiles or planner statistics."""
+    column_rows = conn.execute(text("""
+        SELECT column_name, data_type
+        FROM information_schema.columns
+        WHERE table_schema = 'public' AND table_name = :table_name
+        AND column_name != 'id'
+        ORDER BY ordinal_position
+    """), {"table_name": table_name}).fetchall()
+    row_count = _row_count(conn, table_name)
+    column_names = [column_name for column_name, _ in column_rows if column_name not in SYSTEM_COLUMNS]
+
+    # Profiles collected during import are preferred; planner statistics cover the rest
+    profiles = (get_table_profile(table_name) or {}).get("columns", {})
+    stats: Dict[str, Dict[str, Any]] = {}
+    if any(name not in profiles for name in column_names):
+        stats = _column_stats(conn, table_name)
+        if row_count and not stats:
+            # Small tables are not analyzed after import; their stats are cheap to collect
+            conn.execute(text(f'ANALYZE "{table_name}"'))
+            stats = _column_stats(conn, table_name)
+
+    columns = []
+    for column_name, data_type in column_rows:
+        if column_name in SYSTEM_COLUMNS:
+            continue
+        column: Dict[str, Any] = {"name": column_name, "type": data_type}
+        if column_name in profiles:
+            column.update(_profile_details(profiles[column_name], data_type))
+        elif column_name in stats:
+            column.update(_stats_details(stats[column_name], data_type, row_count))
+        columns.append(column)
+
+    metadata = metadata or {}
+    return {
+        "table": table_name,
+        "row_count": row_count,
+        "purpose": metadata.get("purpose_short"),
+        "domain": metadata.get("data_domain"),
+        "entities": list(metadata.get("key_entities") or []),
+        "columns": columns,
+    }
+
+
+def _save_digest(conn: Connection, table_name: str, version: str, digest: Dict[str, Any]) -> None:
+    conn.execute(text("""
+        INSERT INTO schema_digests (table_name, schema_version, digest, updated_at)
+        VALUES (:table_name, :version, CAST(:digest AS JSONB), NOW())
+        ON CONFLICT (table_name) DO UPDATE SET
+            schema_version = EXCLUDED.schema_version,
+            digest = EXCLUDED.digest,
+            updated_at = EXCLUDED.updated_at
+    """), {"table_name": table_name, "version": version, "digest": json.dumps(digest, default=str)})
+
+
+def refresh_schema_digest(table_name: str) -> Optional[Dict[str, Any]]:
+    """Rebuild and store one table's digest (called after imports). Failures are logged."""
+    if not settings.query_schema_digest_enabled:
+        return None
+    try:
+        ensure_schema_digest_table()
+        metadata = get_all_table_metadata().get(table_name)
+        with get_engine().begin() as conn:
+            version = _schema_versions(conn).get(table_name)
+            if version is None:
+                return None
+            digest = build_table_digest(conn, table_name, metadata)
+            _save_digest(conn, table_name, version, digest)
+        return digest
+    except Exception as e:
+        logger.warning("Failed to refresh schema digest for table '%s': %s", table_name, str(e))
+        return None
+
+
+def load_schema_digests() -> Dict[str, Dict[str, Any]]:
+    """Current digests for all user tables, rebuilding any that are missing or stale."""
+    ensure_schema_digest_table()
+    engine = get_engine()
+    with engine.connect() as conn:
+        tables = list_user_table_names(conn)
+        versions = _schema_versions(conn)
+        stored = {
+            row.table_name: (row.schema_version, row.digest)
+            for row in conn.execute(text("SELECT table_name, schema_version, digest FROM schema_digests"))
+        }
+
+    digests: Dict[str, Dict[str, Any]] = {}
+    stale: List[str] = []
+    for table_name in tables:
+        entry = stored.get(table_name)
+        if entry and entry[0] == versions.get(table_name):
+            digests[table_name] = entry[1]
+        else:
+            stale.append(table_name)
+
+    dropped = [table_name for table_name in stored if table_name not in versions]
+    if stale or dropped:
+        metadata = get_all_table_metadata() if stale else {}
+        with engine.begin() as conn:
+            for table_name in stale:
+                digest = build_table_digest(conn, table_name, metadata.get(table_name))
+                _save_digest(conn, table_name, versions[table_name], digest)
+                digests[table_name] = digest
+            if dropped:
+                conn.execute(
+                    text("DELETE FROM schema_digests WHERE table_name = ANY(:tables)"), {"tables": dropped}
+                )
+        logger.info("Rebuilt %d schema digest(s), removed %d", len(stale), len(dropped))
+    return digests
+
+
+def _tokenize(value: str) -> List[str]:
+    tokens = []
+    for token in re.findall(r"[a-z0-9]+", value.lower()):
+        if token in _STOPWORDS:
+            continue
+        # Fold simple plurals so "customers" matches a "customer" column
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def _digest_terms(digest: Dict[str, Any]) -> List[str]:
+    # Table and column names count more than descriptive text
+    terms = _tokenize(digest["table"]) * 3
+    for column in digest.get("columns", []):
+        terms += _tokenize(column["name"]) * 2
+        for value in column.get("top_values", []):
+            terms += _tokenize(value)
+    for field in ("purpose", "domain"):
+        if digest.get(field):
+            terms += _tokenize(digest[field])
+    for entity in digest.get("entities", []):
+        terms += _tokenize(str(entity))
+    return terms
+
+
+def rank_tables(question: str, digests: Dict[str, Dict[str, Any]]) -> List[str]:
+    """Table names ordered by BM25 relevance to the question, then by row count."""
+    documents = {table_name: Counter(_digest_terms(digest)) for table_name, digest in digests.items()}
+    query_terms = set(_tokenize(question))
+    if not documents:
+        return []
+
+    total = len(documents)
+    average_length = sum(sum(terms.values()) for terms in documents.values()) / total or 1.0
+    document_frequency = Counter(term for terms in documents.values() for term in query_terms & terms.keys())
+
+    scores: Dict[str, float] = {}
+    for table_name, terms in documents.items():
+        length = sum(terms.values())
+        score = 0.0
+        for term in query_terms:
+            frequency = terms.get(term)
+            if not frequency:
+                continue
+            idf = math.log(1 + (total - document_frequency[term] + 0.5) / (document_frequency[term] + 0.5))
+            score += idf * frequency * (_BM25_K1 + 1) / (
+                frequency + _BM25_K1 * (1 - _BM25_B + _BM25_B * length / average_length)
+            )
+        scores[table_name] = score
+
+    return sorted(digests, key=lambda name: (-scores[name], -(digests[name].get("row_count") or 0), name))
+
+
+def _format_column(column: Dict[str, Any]) -> str:
+    details = []
+    if column.get("top_values"):
+        details.append("values: " + ", ".join(column["top_values"]))
+    elif column.get("distinct"):
+        details.append(f"~{column['distinct']:,} distinct")
+    if column.get("range"):
+        details.append(f"range {column['range'][0]} .. {column['range'][1]}")
+    if column.get("null_frac", 0) >= 0.01:
+        details.append(f"{column['null_frac']:.0%} null")
+    suffix = f" ({'; '.join(details)})" if details else ""
+    return f"  - {column['name']}: {column['type']}{suffix}"
+
+
+def render_table_digest(digest: Dict[str, Any], compact: bool = False) -> str:
+    """Render a digest for the prompt; ``compact`` lists column names only."""
+    header = f'### "{digest["table"]}" ({digest.get("row_count") or 0:,} rows)'
+    if digest.get("purpose"):
+        header += f" - {digest['purpose']}"
+    if digest.get("domain"):
+        header += f" [{digest['domain']}]"
+    columns = digest.get("columns", [])
+    if compact:
+        return header + "\n  Columns: " + ", ".join(column["name"] for column in columns)
+    return "\n".join([header, *(_format_column(column) for column in columns)])
+
+
+def format_schema_digest(question: str, digests: Dict[str, Dict[str, Any]], token_budget: int) -> str:
+    """Most relevant table digests that fit the budget, in full or column names only."""
+    if not digests:
+        return ""
+    intro = (
+        "## Schema Digest\n"
+        "Tables most relevant to this question, with exact column names and types. "
+        "Write SQL directly from this digest when it covers the question; use get_table_schema_tool "
+        "only for tables listed by name alone or when you need sample rows."
+    )
+    sections = [intro]
+    used = estimate_tokens(intro)
+    omitted: List[str] = []
+    for table_name in rank_tables(question, digests):
+        for compact in (False, True):
+            rendered = render_table_digest(digests[table_name], compact=compact)
+            cost = estimate_tokens(rendered) + 1
+            if used + cost <= token_budget:
+                sections.append(rendered)
+                used += cost
+                break
+        else:
+            omitted.append(table_name)
+
+    if omitted:
+        names = ", ".join(f'"{name}"' for name in omitted)
+        line = f"Other tables: {names}"
+        if used + estimate_tokens(line) > token_budget:
+            line = f"{len(omitted)} more table(s) not shown; use list_tables_tool to see them."
+        sections.append(line)
+    return "\n\n".join(sections)
+
+
+def build_schema_digest_prompt(question: str) -> str:
+    """Schema digest section for the query agent's system prompt, or "" when unavailable."""
+    if not settings.query_schema_digest_enabled:
+        return ""
+    try:
+        with trace_stage("schema_digest") as span:
+            digests = load_schema_digests()
+            prompt = format_schema_digest(question, digests, settings.query_schema_digest_token_budget)
+            span.set_attribute("tables", len(digests))
+            span.set_attribute("tokens", estimate_tokens(prompt))
+        return prompt
+    except Exception as e:
+        # The agent can still discover the schema through its tools
+        logger.warning("Failed to build schema digest: %s", str(e))
+        return ""
@@ -10,16 +10,9 @@ from langchain_anthropic import ChatAnthropic
 from langchain_core.messages import HumanMessage
 
 from app.core.config import settings
+from app.core.metrics import trace_stage
 from app.db.context import get_database_schema, format_schema_for_prompt, get_table_names
-
-
-# Protected system tables (same as agent.py)
-PROTECTED_SYSTEM_TABLES = {
-    'import_history', 'mapping_errors', 'table_metadata', 'uploaded_files',
-    'users', 'file_imports', 'import_jobs', 'llm_instructions',
-    'api_keys', 'import_duplicates',
-    'query_messages', 'query_threads', 'table_fingerprints',
-}
+from app.db.system_tables import SYSTEM_TABLES
 
 
 SQL_GENERATION_SYSTEM_PROMPT = """You are an expert SQL generator. Your job is to convert natural language requests into PostgreSQL SELECT queries.
@@ -121,7 +114,8 @@ Generate the SQL query now."""
         
         # Single LLM call
         message = HumanMessage(content=full_prompt)
-        response = llm.invoke([message])
+        with trace_stage("llm.sql_generation"):
+            response = llm.invoke([message])
         
         # Parse response
         result = _parse_llm_response(response.content)
@@ -223,7 +217,7 @@ def _validate_generated_sql(sql_query: str) -> Dict[str, Any]:
     
     # Check for protected system tables
     sql_upper = sql_query.upper()
-    for table in PROTECTED_SYSTEM_TABLES:
+    for table in SYSTEM_TABLES:
         table_patterns = [
             rf'\bFROM\s+["\']?{table.upper()}["\']?\b',
             rf'\bJOIN\s+["\']?{table.upper()}["\']?\b',
@@ -5,6 +5,8 @@ from sqlalchemy import text
 from sqlalchemy.exc import ProgrammingError
 from typing import Any, List, Dict, Optional, Callable, TypeVar
 from app.db.session import get_engine
+from app.db.models import drop_import_partition
+from app.domain.imports.column_profiles import remove_import_profiles
 from app.domain.imports.history import get_import_history
 import threading
 import uuid
@@ -666,7 +668,8 @@ def delete_imported_rows_for_file(file: Dict[str, Any]) -> Dict[str, Any]:
 
     This removes rows from the mapped table where _import_id matches any
     import_history records for the file (preferring file_hash when present),
-    then cleans up import_history and file_imports entries.
+    then cleans up import_history and file_imports entries. For tables
+    partitioned by import the matching partitions are dropped instead.
     """
     ensure_uploaded_files_table()
     engine = get_engine()
@@ -723,6 +726,11 @@ def delete_imported_rows_for_file(file: Dict[str, Any]) -> Dict[str, Any]:
                 return summary
 
             for import_id in import_ids or []:
+                # Tables partitioned by import drop the partition instead of deleting rows
+                dropped_rows = drop_import_partition(conn, table_name, import_id)
+                if dropped_rows is not None:
+                    summary["rows_removed"] += dropped_rows
+                    continue
                 delete_result = conn.execute(
                     text(f'DELETE FROM "{safe_table_name}" WHERE _import_id = :import_id'),
                     {"import_id": import_id}
@@ -735,6 +743,9 @@ def delete_imported_rows_for_file(file: Dict[str, Any]) -> Dict[str, Any]:
             for import_id in import_ids:
                 conn.execute(text("DELETE FROM import_history WHERE import_id = :import_id"), {"import_id": import_id})
 
+            if import_ids:
+                remove_import_profiles(conn, table_name, import_ids)
+
         summary["data_removed"] = summary["rows_removed"] > 0 or bool(import_ids)
         return summary
     except ProgrammingError as error:
@@ -17,6 +17,7 @@ from app.domain.imports.schema_migrations import (
     SchemaMigrationError,
 )
 from app.domain.imports.history import start_import_tracking, complete_import_tracking
+from app.domain.imports.decision_cache import discard_cached_decision
 from app.domain.imports.fingerprinting import store_table_fingerprint
 from app.utils.date import parse_flexible_date
 import pandas as pd
@@ -1094,6 +1095,7 @@ def execute_llm_import_decision(
                     logger.error(
                         "AUTO-IMPORT: Schema migration failed: %s", exc, exc_info=True
                     )
+                    discard_cached_decision(llm_decision.get("decision_cache_key"))
                     return {
                         "success": False,
                         "error": str(exc),
@@ -1226,6 +1228,8 @@ def execute_llm_import_decision(
         
     except Exception as e:
         logger.error(f"Error executing LLM import decision: {str(e)}", exc_info=True)
+        # Don't replay a decision that just failed for files with the same structure
+        discard_cached_decision(llm_decision.get("decision_cache_key"))
         
         return {
             "success": False,
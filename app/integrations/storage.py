@@ -1,14 +1,21 @@
 """
 S3-compatible storage integration for Backblaze B2, AWS S3, MinIO, etc.
 Uses boto3 for universal S3-compatible storage operations.
+
+One boto3 client (and its connection pool) is shared by every caller; large
+downloads are split into concurrent ranged GETs.
 """
 import logging
-from typing import Dict, Any, Optional
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Tuple, Union
 import boto3
 from botocore.config import Config
 from botocore.exceptions import ClientError, BotoCoreError
 
 from app.core.config import settings
+from app.core.metrics import trace_stage
 
 logger = logging.getLogger(__name__)
 
@@ -33,9 +40,39 @@ class StorageDownloadError(StorageError):
     pass
 
 
+_client = None
+_client_signature: Optional[Tuple[Any, ...]] = None
+_client_lock = threading.Lock()
+
+_CONTENT_RANGE_TOTAL = re.compile(r"/(\d+)$")
+
+
+def _client_settings_signature() -> Tuple[Any, ...]:
+    return (
+        settings.storage_access_key_id,
+        settings.storage_secret_access_key,
+        settings.storage_endpoint_url,
+        settings.storage_region,
+        settings.storage_max_pool_connections,
+    )
+
+
+def reset_storage_client() -> None:
+    """Drop the cached client so the next call builds a new one."""
+    global _client, _client_signature
+    with _client_lock:
+        _client = None
+        _client_signature = None
+
+
 def get_storage_client():
     """
-    Get S3-compatible storage client.
+    Get the shared S3-compatible storage client.
+    
+    The client is built once and reused: boto3 clients are thread-safe, and
+    sharing one keeps a single warm connection pool (``STORAGE_MAX_POOL_CONNECTIONS``)
+    instead of resolving endpoints and opening connections on every call. It
+    is rebuilt when the storage credentials or endpoint settings change.
     
     Works with:
     - Backblaze B2 (S3-compatible API)
@@ -51,16 +88,34 @@ def get_storage_client():
     Raises:
         ValueError: If storage configuration is incomplete
     """
+    global _client, _client_signature
+
     if not all([settings.storage_access_key_id, settings.storage_secret_access_key, settings.storage_bucket_name]):
         raise ValueError(
             "Storage configuration is incomplete. Please set STORAGE_ACCESS_KEY_ID, "
             "STORAGE_SECRET_ACCESS_KEY, and STORAGE_BUCKET_NAME in your environment."
         )
-    
+
+    signature = _client_settings_signature()
+    client = _client
+    if client is not None and _client_signature == signature:
+        return client
+
+    with _client_lock:
+        if _client is not None and _client_signature == signature:
+            return _client
+        client = _create_storage_client()
+        _client = client
+        _client_signature = signature
+        return client
+
+
+def _create_storage_client():
     # Configure boto3 client
     config = Config(
         signature_version='s3v4',
-        retries={'max_attempts': 3, 'mode': 'standard'}
+        retries={'max_attempts': 3, 'mode': 'standard'},
+        max_pool_connections=max(1, settings.storage_max_pool_connections),
     )
     
     client_kwargs = {
@@ -79,7 +134,8 @@ def get_storage_client():
         client_kwargs['region_name'] = settings.storage_region
     
     try:
-        return boto3.client(**client_kwargs)
+        # A private session: the default boto3 session is not thread-safe
+        return boto3.session.Session().client(**client_kwargs)
     except Exception as e:
         logger.error(f"Failed to create storage client: {e}")
         raise StorageConnectionError(f"Failed to connect to storage: {str(e)}")
@@ -133,29 +189,122 @@ def upload_file(file_content: bytes, file_name: str, folder: str = "uploads") ->
         raise StorageUploadError(f"Upload failed: {str(e)}")
 
 
-def download_file(file_path: str) -> bytes:
+def _download_part_size() -> int:
+    return max(1, settings.storage_download_part_size_mb) * 1024 * 1024
+
+
+def _content_range_total(response: Dict[str, Any]) -> Optional[int]:
+    """Total object size from a ranged GET's Content-Range ("bytes 0-99/1234")."""
+    match = _CONTENT_RANGE_TOTAL.search(response.get('ContentRange') or "")
+    return int(match.group(1)) if match else None
+
+
+def _download_remaining_parts(
+    client,
+    file_path: str,
+    first_part: bytes,
+    total_size: int,
+    part_size: int,
+    etag: Optional[str],
+) -> bytearray:
+    """
+    Fetch the rest of an object in concurrent ranged GETs into one buffer.
+
+    The preallocated buffer is returned as-is; converting it to ``bytes``
+    would briefly hold two full copies of the object.
+    """
+    buffer = bytearray(total_size)
+    view = memoryview(buffer)
+    view[:len(first_part)] = first_part
+    ranges = [
+        (start, min(start + part_size, total_size) - 1)
+        for start in range(len(first_part), total_size, part_size)
+    ]
+
+    def _fetch(byte_range: Tuple[int, int]) -> None:
+        start, end = byte_range
+        params = {
+            'Bucket': settings.storage_bucket_name,
+            'Key': file_path,
+            'Range': f"bytes={start}-{end}",
+        }
+        if etag:
+            # Fail instead of stitching together two versions of the object
+            params['IfMatch'] = etag
+        data = client.get_object(**params)['Body'].read()
+        if len(data) != end - start + 1:
+            raise StorageDownloadError(
+                f"Short read for {file_path} bytes {start}-{end}: got {len(data)} bytes"
+            )
+        view[start:end + 1] = data
+
+    workers = max(1, min(settings.storage_download_concurrency, len(ranges)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # list() re-raises the first failed part
+        list(executor.map(_fetch, ranges))
+
+    view.release()
+    return buffer
+
+
+def download_file(file_path: str) -> Union[bytes, bytearray]:
     """
     Download a file from S3-compatible storage.
     
+    The first ``STORAGE_DOWNLOAD_PART_SIZE_MB`` are requested as a ranged GET
+    whose Content-Range reveals the object size; anything beyond that is
+    fetched in parallel ranged GETs (``STORAGE_DOWNLOAD_CONCURRENCY`` at a
+    time) into a preallocated buffer. Small files still take one request.
+    
     Args:
         file_path: The full path of the file in storage (e.g., "uploads/file.csv")
     
     Returns:
-        File content as bytes
+        File content as bytes, or as the ``bytearray`` the parts were
+        downloaded into when the object spans more than one part
     
     Raises:
         StorageDownloadError: If download fails
     """
     try:
         client = get_storage_client()
+        part_size = _download_part_size()
+
+        with trace_stage("storage_download") as span:
+            try:
+                response = client.get_object(
+                    Bucket=settings.storage_bucket_name,
+                    Key=file_path,
+                    Range=f"bytes=0-{part_size - 1}",
+                )
+            except ClientError as e:
+                # Empty objects reject any byte range
+                if e.response.get('Error', {}).get('Code') != 'InvalidRange':
+                    raise
+                response = client.get_object(
+                    Bucket=settings.storage_bucket_name,
+                    Key=file_path
+                )
+
+            first_part = response['Body'].read()
+            total_size = _content_range_total(response)
+            if total_size is None or total_size <= len(first_part):
+                content = first_part
+            else:
+                content = _download_remaining_parts(
+                    client,
+                    file_path,
+                    first_part,
+                    total_size,
+                    part_size,
+                    response.get('ETag'),
+                )
+            span.set_attribute("bytes", len(content))
+
+        return content
         
-        response = client.get_object(
-            Bucket=settings.storage_bucket_name,
-            Key=file_path
-        )
-        
-        return response['Body'].read()
-        
+    except StorageDownloadError:
+        raise
     except ClientError as e:
         error_code = e.response.get('Error', {}).get('Code', 'Unknown')
         if error_code == 'NoSuchKey':
@@ -2,13 +2,16 @@
 Multipart/chunked upload support for S3-compatible storage (B2, AWS S3, etc.)
 Enables parallel chunked uploads for large files (>10MB) for significant speed improvements.
 """
+import hashlib
 import logging
-from typing import Dict, Any, List, Optional
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Any, List, Optional, BinaryIO, Union
 import boto3
 from botocore.config import Config
 from botocore.exceptions import ClientError
 
 from app.core.config import settings
+from app.core.metrics import trace_stage
 from app.integrations.storage import get_storage_client, StorageError, StorageUploadError
 
 logger = logging.getLogger(__name__)
@@ -336,7 +339,100 @@ def get_optimal_part_size(file_size: int) -> int:
     return part_size
 
 
-def download_file(file_path: str) -> bytes:
+def _upload_part(file_path: str, upload_id: str, part_number: int, body: bytes) -> Dict[str, Any]:
+    client = get_storage_client()
+    response = client.upload_part(
+        Bucket=settings.storage_bucket_name,
+        Key=file_path,
+        UploadId=upload_id,
+        PartNumber=part_number,
+        Body=body
+    )
+    return {'PartNumber': part_number, 'ETag': response['ETag']}
+
+
+def upload_stream_multipart(
+    fileobj: BinaryIO,
+    file_name: str,
+    folder: str = "uploads",
+    content_type: Optional[str] = None,
+    part_size: Optional[int] = None,
+    concurrency: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Upload a file-like object through the multipart API without buffering it whole.
+    
+    Parts are read sequentially from ``fileobj`` (hashing as they go) and
+    uploaded by a thread pool. At most ``concurrency`` parts are in flight, so
+    memory stays around ``(concurrency + 1) * part_size`` whatever the file
+    size. The multipart upload is aborted if any part fails.
+    
+    Args:
+        fileobj: Readable binary file object positioned at the start of the data
+        file_name: Name of the file to upload
+        folder: Folder/prefix to store the file in (default: "uploads")
+        content_type: Optional MIME type for the file
+        part_size: Part size in bytes (default: 5MB, the S3 minimum)
+        concurrency: Parts uploaded at once (default: STORAGE_UPLOAD_CONCURRENCY)
+    
+    Returns:
+        Dictionary with the same keys as ``storage.upload_file`` plus:
+        - file_hash: SHA-256 hex digest of the uploaded content
+        - parts: Number of parts uploaded
+    
+    Raises:
+        StorageUploadError: If any part or the completion fails
+    """
+    part_size = max(part_size or 0, 5 * 1024 * 1024)
+    workers = max(1, concurrency or settings.storage_upload_concurrency)
+    session = start_multipart_upload(file_name, folder=folder, content_type=content_type)
+    file_path = session["file_path"]
+    upload_id = session["upload_id"]
+    digest = hashlib.sha256()
+    total_size = 0
+    parts: List[Dict[str, Any]] = []
+
+    try:
+        with trace_stage("storage_upload") as span:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                pending = set()
+                part_number = 1
+                chunk = fileobj.read(part_size)
+                while chunk:
+                    digest.update(chunk)
+                    total_size += len(chunk)
+                    if len(pending) >= workers:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        parts.extend(future.result() for future in done)
+                    pending.add(executor.submit(_upload_part, file_path, upload_id, part_number, chunk))
+                    part_number += 1
+                    chunk = fileobj.read(part_size)
+                parts.extend(future.result() for future in pending)
+
+            if not parts:
+                # S3 rejects a multipart upload with no parts
+                parts.append(_upload_part(file_path, upload_id, 1, b""))
+            result = complete_multipart_upload(file_path, upload_id, parts)
+            span.set_attribute("bytes", total_size)
+    except Exception as e:
+        abort_multipart_upload(file_path, upload_id)
+        if isinstance(e, StorageError):
+            raise
+        logger.error(f"Multipart upload of {file_path} failed: {str(e)}")
+        raise StorageUploadError(f"Upload failed: {str(e)}")
+
+    logger.info(f"Uploaded {file_path} ({total_size} bytes) in {len(parts)} parts")
+    return {
+        "file_id": result["file_id"],
+        "file_name": file_name,
+        "file_path": file_path,
+        "size": total_size,
+        "file_hash": digest.hexdigest(),
+        "parts": len(parts)
+    }
+
+
+def download_file(file_path: str) -> Union[bytes, bytearray]:
     """
     Download a file from S3-compatible storage.
     
@@ -347,7 +443,7 @@ def download_file(file_path: str) -> bytes:
         file_path: The full path of the file in storage (e.g., "uploads/file.csv")
     
     Returns:
-        File content as bytes
+        File content as bytes (``bytearray`` for multi-part downloads)
     
     Raises:
         StorageDownloadError: If download fails
@@ -7,12 +7,14 @@ and registers all API routers.
 import os
 from datetime import datetime
 from pathlib import Path
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from contextlib import asynccontextmanager
 
 from .core.config import settings
 from .core.logging_config import configure_logging
+from .core.metrics import PROMETHEUS_CONTENT_TYPE, render_metrics
 
 # Ensure logging is configured before the application starts serving requests.
 configure_logging(settings.log_level, settings.log_timezone)
@@ -45,6 +47,10 @@ async def lifespan(app: FastAPI):
         from .core.security import init_auth_tables
         from .domain.queries.history import create_query_history_tables
         from .db.llm_instructions import create_llm_instruction_table
+        from .domain.imports.decision_cache import ensure_decision_cache_table
+        from .core.session_store import ensure_session_store_table
+        from .domain.queries.schema_digest import ensure_schema_digest_table
+        from .domain.imports.column_profiles import ensure_column_profiles_table
         from .db.models import create_table_fingerprints_table_if_not_exists, create_file_imports_table_if_not_exists
         from .db.session import get_engine
         
@@ -73,6 +79,18 @@ async def lifespan(app: FastAPI):
         create_llm_instruction_table()
         print("✓ llm_instructions table ready")
 
+        ensure_decision_cache_table()
+        print("✓ llm_decision_cache table ready")
+
+        ensure_session_store_table()
+        print("✓ api_sessions table ready")
+
+        ensure_schema_digest_table()
+        print("✓ schema_digests table ready")
+
+        ensure_column_profiles_table()
+        print("✓ column_profiles table ready")
+
         engine = get_engine()
         create_table_fingerprints_table_if_not_exists(engine)
         print("✓ table_fingerprints table ready")
@@ -96,6 +114,9 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             print(f"Warning: Could not check user bootstrap status: {e}")
 
+        from .core.api_key_auth import start_api_key_usage_flusher
+        start_api_key_usage_flusher()
+
         print("✓ All database tables initialized successfully")
     except Exception as e:
         print(f"ERROR: Failed to initialize database tables: {e}")
@@ -106,8 +127,13 @@ async def lifespan(app: FastAPI):
     
     yield  # Application runs here
     
-    # Shutdown: Add cleanup logic here if needed in future
-    pass
+    # Shutdown: stop the usage flusher and persist buffered API key timestamps
+    from .core.api_key_auth import stop_api_key_usage_flusher
+    stop_api_key_usage_flusher()
+
+    # Release cached parsed records and remove their spill files
+    from .api.dependencies import records_cache
+    records_cache.close()
 
 
 # Read API guide for documentation
@@ -180,3 +206,15 @@ async def health_check():
         "timestamp": datetime.now().isoformat(),
         "service": "data-mapper-api"
     }
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """Prometheus metrics for pipeline stages, caches, LLM calls, table locks and the database pool."""
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    allowed_ips = {ip.strip() for ip in settings.metrics_allowed_ips.split(",") if ip.strip()}
+    client_ip = request.client.host if request.client else None
+    if allowed_ips and client_ip not in allowed_ips:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    return Response(content=render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,37 +1,227 @@
 import threading
-from typing import Dict
+import time
+from typing import Any, Dict, Optional, Set
 from contextlib import contextmanager
 import logging
 
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import settings
+from app.core.metrics import TABLE_LOCK_HELD, TABLE_LOCK_TIMEOUTS, TABLE_LOCK_WAIT
+from app.db.session import get_lock_engine
+
 logger = logging.getLogger(__name__)
 
+# First key of the two-key advisory lock form, so table locks cannot collide
+# with advisory locks taken by other code for unrelated purposes.
+TABLE_LOCK_NAMESPACE = 1952539243
+
+# Waits longer than this are logged as warnings
+SLOW_LOCK_WAIT_SECONDS = 1.0
+
+_LOCK_NOT_AVAILABLE = "55P03"
+
+
+class TableLockTimeoutError(Exception):
+    """Raised when a table lock cannot be acquired within the timeout."""
+
+
 class TableLockManager:
     """
-    Manages thread-safe locks for database tables to ensure sequential insertion.
-    This prevents race conditions during duplicate checking and insertion when
-    processing multiple files in parallel that target the same table.
+    Coordinates access to database tables across threads, processes, and hosts.
+
+    Locks are exclusive Postgres transaction-level advisory locks keyed on
+    ``hashtext(table_name)``. Imports hold one around the duplicate-check/insert
+    window, and schema migrations take one on their own transaction.
+
+    ``acquire`` holds its lock on a connection from the separate lock engine
+    (``get_lock_engine``), so a lock held for a whole import never takes one of
+    the connections ``insert_records`` needs from the main pool. Requests are
+    first serialized on an in-process lock so threads of the same process don't
+    each hold a connection while they wait. Nested acquisitions of the same
+    table on one thread are no-ops.
     """
     _locks: Dict[str, threading.Lock] = {}
     _global_lock = threading.Lock()
+    _held = threading.local()
+    _metrics: Dict[str, Dict[str, float]] = {}
+    _metrics_lock = threading.Lock()
 
     @classmethod
     def get_lock(cls, table_name: str) -> threading.Lock:
-        """Get or create a lock for a specific table."""
+        """Get or create the in-process lock for a specific table."""
         with cls._global_lock:
             if table_name not in cls._locks:
                 cls._locks[table_name] = threading.Lock()
             return cls._locks[table_name]
 
+    @classmethod
+    def _held_tables(cls) -> Set[str]:
+        held = getattr(cls._held, "tables", None)
+        if held is None:
+            held = cls._held.tables = set()
+        return held
+
     @classmethod
     @contextmanager
-    def acquire(cls, table_name: str):
-        """Context manager to acquire and release a table lock."""
+    def acquire(
+        cls,
+        table_name: str,
+        timeout: Optional[float] = None,
+    ):
+        """
+        Context manager to acquire and release a table lock.
+
+        Args:
+            table_name: Table to lock
+            timeout: Seconds to wait before raising TableLockTimeoutError;
+                defaults to ``settings.table_lock_timeout_seconds`` (0 = wait forever)
+        """
+        if table_name in cls._held_tables():
+            yield
+            return
+
+        timeout = settings.table_lock_timeout_seconds if timeout is None else timeout
+        deadline = time.monotonic() + timeout if timeout and timeout > 0 else None
+
         logger.info(f"Attempting to acquire lock for table '{table_name}'")
-        lock = cls.get_lock(table_name)
-        lock.acquire()
-        logger.info(f"Acquired lock for table '{table_name}'")
+        wait_start = time.monotonic()
+        local_lock = cls.get_lock(table_name)
+        acquired = local_lock.acquire(timeout=timeout) if deadline else local_lock.acquire()
+        if not acquired:
+            cls._record_timeout(table_name, time.monotonic() - wait_start)
+            raise TableLockTimeoutError(
+                f"Timed out after {timeout}s waiting for lock on table '{table_name}'"
+            )
+
+        conn: Optional[Connection] = None
         try:
-            yield
+            conn = get_lock_engine().connect()
+            transaction = conn.begin()
+            remaining = max(0.001, deadline - time.monotonic()) if deadline else None
+            try:
+                cls._lock_connection(conn, table_name, remaining)
+            except TableLockTimeoutError:
+                cls._record_timeout(table_name, time.monotonic() - wait_start)
+                raise
+            wait_seconds = time.monotonic() - wait_start
+            cls._record_acquired(table_name, wait_seconds)
+            log = logger.warning if wait_seconds >= SLOW_LOCK_WAIT_SECONDS else logger.info
+            log(f"Acquired lock for table '{table_name}' after {wait_seconds:.3f}s")
+
+            held_start = time.monotonic()
+            cls._held_tables().add(table_name)
+            try:
+                yield
+            finally:
+                cls._held_tables().discard(table_name)
+                cls._record_held(table_name, time.monotonic() - held_start)
+                # Ending the transaction releases the advisory lock
+                transaction.rollback()
+                logger.info(f"Released lock for table '{table_name}'")
         finally:
-            lock.release()
-            logger.info(f"Released lock for table '{table_name}'")
+            if conn is not None:
+                conn.close()
+            local_lock.release()
+
+    @classmethod
+    def lock_in_transaction(
+        cls,
+        conn: Connection,
+        table_name: str,
+        timeout: Optional[float] = None,
+    ) -> None:
+        """
+        Take a table lock on the caller's open transaction.
+
+        The lock is released when that transaction commits or rolls back, so
+        DDL run on ``conn`` is covered without a second connection. Skipped
+        when the current thread already holds the table via ``acquire`` and on
+        non-Postgres connections, which have no advisory locks.
+        """
+        if conn.dialect.name != "postgresql" or table_name in cls._held_tables():
+            return
+        timeout = settings.table_lock_timeout_seconds if timeout is None else timeout
+        wait_start = time.monotonic()
+        try:
+            cls._lock_connection(conn, table_name, timeout if timeout and timeout > 0 else None)
+        except TableLockTimeoutError:
+            cls._record_timeout(table_name, time.monotonic() - wait_start)
+            raise
+        cls._record_acquired(table_name, time.monotonic() - wait_start)
+
+    @staticmethod
+    def _lock_connection(
+        conn: Connection,
+        table_name: str,
+        timeout: Optional[float],
+    ) -> None:
+        if timeout:
+            # lock_timeout also bounds advisory lock waits; SET LOCAL scopes it to this transaction
+            conn.execute(text(f"SET LOCAL lock_timeout = '{max(1, int(timeout * 1000))}ms'"))
+        try:
+            conn.execute(
+                text("SELECT pg_advisory_xact_lock(:namespace, hashtext(:table_name))"),
+                {"namespace": TABLE_LOCK_NAMESPACE, "table_name": table_name},
+            )
+            if timeout:
+                # Don't let the lock wait budget leak into later statements on this transaction
+                conn.execute(text("SET LOCAL lock_timeout TO DEFAULT"))
+        except OperationalError as exc:
+            if getattr(getattr(exc, "orig", None), "pgcode", None) == _LOCK_NOT_AVAILABLE:
+                raise TableLockTimeoutError(
+                    f"Timed out after {timeout}s waiting for lock on table '{table_name}'"
+                ) from exc
+            raise
+
+    @classmethod
+    def _table_metrics(cls, table_name: str) -> Dict[str, float]:
+        metrics = cls._metrics.get(table_name)
+        if metrics is None:
+            metrics = cls._metrics[table_name] = {
+                "acquired": 0,
+                "timeouts": 0,
+                "wait_seconds_total": 0.0,
+                "wait_seconds_max": 0.0,
+                "held_seconds_total": 0.0,
+            }
+        return metrics
+
+    @classmethod
+    def _record_acquired(cls, table_name: str, wait_seconds: float) -> None:
+        with cls._metrics_lock:
+            metrics = cls._table_metrics(table_name)
+            metrics["acquired"] += 1
+            metrics["wait_seconds_total"] += wait_seconds
+            metrics["wait_seconds_max"] = max(metrics["wait_seconds_max"], wait_seconds)
+        TABLE_LOCK_WAIT.observe(wait_seconds, table=table_name)
+
+    @classmethod
+    def _record_timeout(cls, table_name: str, wait_seconds: float) -> None:
+        with cls._metrics_lock:
+            metrics = cls._table_metrics(table_name)
+            metrics["timeouts"] += 1
+            metrics["wait_seconds_total"] += wait_seconds
+            metrics["wait_seconds_max"] = max(metrics["wait_seconds_max"], wait_seconds)
+        TABLE_LOCK_WAIT.observe(wait_seconds, table=table_name)
+        TABLE_LOCK_TIMEOUTS.inc(table=table_name)
+        logger.warning(f"Timed out waiting {wait_seconds:.3f}s for lock on table '{table_name}'")
+
+    @classmethod
+    def _record_held(cls, table_name: str, held_seconds: float) -> None:
+        with cls._metrics_lock:
+            cls._table_metrics(table_name)["held_seconds_total"] += held_seconds
+        TABLE_LOCK_HELD.inc(held_seconds, table=table_name)
+
+    @classmethod
+    def get_metrics(cls) -> Dict[str, Dict[str, Any]]:
+        """Return per-table lock wait metrics for this process."""
+        with cls._metrics_lock:
+            return {name: dict(values) for name, values in cls._metrics.items()}
+
+    @classmethod
+    def reset_metrics(cls) -> None:
+        with cls._metrics_lock:
+            cls._metrics.clear()
@@ -0,0 +1,198 @@
+"""
+Standalone worker for queued import jobs.
+
+Run one or more of these next to the API to move archive/workbook
+auto-processing and async storage imports out of the API process:
+
+    python -m app.worker --concurrency 4
+
+Workers claim jobs from import_jobs (see app.domain.imports.job_queue), so
+they can be scaled horizontally independent of API replicas. Requires
+JOB_QUEUE_ENABLED=true on the API so jobs are enqueued instead of run inline.
+"""
+import argparse
+import importlib
+import logging
+import os
+import signal
+import socket
+import threading
+import uuid
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.logging_config import configure_logging
+from app.domain.imports.job_queue import (
+    JOB_HANDLERS,
+    claim_next_job,
+    finish_claimed_job,
+    get_job_handler,
+    heartbeat_jobs,
+    reap_expired_jobs,
+    release_job_for_retry,
+)
+
+logger = logging.getLogger(__name__)
+
+# Modules that register job handlers on import
+HANDLER_MODULES = [
+    "app.api.routers.analysis.routes",
+    "app.api.routers.tasks",
+]
+
+
+def load_job_handlers() -> None:
+    for module_name in HANDLER_MODULES:
+        importlib.import_module(module_name)
+
+
+class JobWorker:
+    """Claims and executes queued jobs on a fixed pool of threads."""
+
+    def __init__(
+        self,
+        *,
+        concurrency: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        heartbeat_interval: Optional[float] = None,
+        visibility_timeout: Optional[int] = None,
+        job_types: Optional[List[str]] = None,
+        worker_id: Optional[str] = None,
+    ):
+        self.concurrency = max(1, concurrency or settings.job_worker_concurrency)
+        self.poll_interval = (
+            settings.job_worker_poll_interval_seconds if poll_interval is None else poll_interval
+        )
+        self.heartbeat_interval = heartbeat_interval or settings.job_heartbeat_interval_seconds
+        self.visibility_timeout = visibility_timeout or settings.job_visibility_timeout_seconds
+        self.job_types = job_types
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._stop = threading.Event()
+        self._active: Dict[str, str] = {}
+        self._active_lock = threading.Lock()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run(self, *, burst: bool = False) -> None:
+        """
+        Process jobs until stopped.
+
+        With ``burst=True`` each thread exits as soon as no runnable job is
+        left, which is what tests and one-off drains want.
+        """
+        logger.info(
+            "Worker %s starting (concurrency=%d, handlers=%s)",
+            self.worker_id, self.concurrency, sorted(JOB_HANDLERS),
+        )
+        heartbeat_thread = threading.Thread(
+            target=self._heartbeat_loop, name="job-heartbeat", daemon=True
+        )
+        heartbeat_thread.start()
+
+        threads = [
+            threading.Thread(target=self._work_loop, args=(burst,), name=f"job-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self._stop.set()
+        heartbeat_thread.join(timeout=self.heartbeat_interval)
+        logger.info("Worker %s stopped", self.worker_id)
+
+    def run_one(self) -> bool:
+        """Claim and execute a single job; returns False when none was runnable."""
+        job = claim_next_job(
+            self.worker_id,
+            job_types=self.job_types,
+            visibility_timeout_seconds=self.visibility_timeout,
+        )
+        if not job:
+            return False
+
+        job_id = job["id"]
+        with self._active_lock:
+            self._active[job_id] = job.get("job_type") or ""
+        try:
+            handler = get_job_handler(job.get("job_type"))
+            if handler is None:
+                raise RuntimeError(f"No handler registered for job type {job.get('job_type')!r}")
+            logger.info(
+                "Worker %s running job %s (%s), attempt %s/%s",
+                self.worker_id, job_id, job.get("job_type"),
+                job.get("attempts"), job.get("max_attempts"),
+            )
+            handler(job)
+        except Exception as exc:
+            logger.exception("Job %s raised: %s", job_id, exc)
+            try:
+                release_job_for_retry(job, self.worker_id, str(exc))
+            except Exception as release_exc:
+                # The lease will expire and the job will be reclaimed or reaped
+                logger.error("Failed to release job %s: %s", job_id, release_exc)
+        else:
+            finish_claimed_job(job_id, self.worker_id)
+        finally:
+            with self._active_lock:
+                self._active.pop(job_id, None)
+        return True
+
+    def _work_loop(self, burst: bool) -> None:
+        while not self._stop.is_set():
+            try:
+                reap_expired_jobs()
+                if self.run_one():
+                    continue
+            except Exception as exc:
+                logger.error("Worker %s poll failed: %s", self.worker_id, exc)
+            if burst:
+                return
+            self._stop.wait(self.poll_interval)
+
+    def _heartbeat_loop(self) -> None:
+        while not self._stop.wait(self.heartbeat_interval):
+            with self._active_lock:
+                job_ids = list(self._active)
+            if not job_ids:
+                continue
+            try:
+                heartbeat_jobs(
+                    self.worker_id,
+                    job_ids,
+                    visibility_timeout_seconds=self.visibility_timeout,
+                )
+            except Exception as exc:
+                logger.warning("Worker %s heartbeat failed: %s", self.worker_id, exc)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Process queued import jobs.")
+    parser.add_argument("--concurrency", type=int, default=None, help="Parallel jobs per process")
+    parser.add_argument("--poll-interval", type=float, default=None, help="Seconds between polls when idle")
+    parser.add_argument("--job-type", action="append", dest="job_types", help="Only claim these job types")
+    parser.add_argument("--burst", action="store_true", help="Exit once the queue is empty")
+    args = parser.parse_args(argv)
+
+    configure_logging(settings.log_level, settings.log_timezone)
+    load_job_handlers()
+
+    worker = JobWorker(
+        concurrency=args.concurrency,
+        poll_interval=args.poll_interval,
+        job_types=args.job_types,
+    )
+
+    def _handle_signal(signum, _frame):
+        logger.info("Received signal %s, finishing in-flight jobs", signum)
+        worker.stop()
+
+    signal.signal(signal.SIGTERM, _handle_signal)
+    signal.signal(signal.SIGINT, _handle_signal)
+    worker.run(burst=args.burst)
+
+
+if __name__ == "__main__":
+    main()
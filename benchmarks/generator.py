@@ -0,0 +1,214 @@
+"""
+Seeded synthetic datasets for the import pipeline benchmarks.
+
+The same ``DatasetSpec`` always produces the same bytes, so runs on different
+commits measure the same work. Values deliberately look like real uploads:
+mixed date formats, currency strings, phone numbers in several layouts,
+multi-value cells, and a configurable share of exact duplicate rows.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+import random
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List
+from xml.etree import ElementTree
+
+from openpyxl import Workbook
+
+from app.api.schemas.shared import DuplicateCheckConfig, MappingConfig
+
+SHAPES = ("narrow", "wide")
+FORMATS = ("csv", "xlsx", "json", "xml")
+# File type names used by the import pipeline for each format
+PIPELINE_FILE_TYPES = {"csv": "csv", "xlsx": "excel", "json": "json", "xml": "xml"}
+
+# Extra filler columns added to the "wide" shape
+WIDE_EXTRA_COLUMNS = 40
+
+_FIRST_NAMES = ["Ada", "Grace", "Linus", "Margaret", "Ken", "Barbara", "Dennis", "Frances", "Edsger", "Radia"]
+_LAST_NAMES = ["Lovelace", "Hopper", "Torvalds", "Hamilton", "Thompson", "Liskov", "Ritchie", "Allen", "Dijkstra", "Perlman"]
+_CITIES = ["Austin", "Boston", "Chicago", "Denver", "Lisbon", "London", "Oakland", "Portland", "Seattle", "Toronto"]
+_TAGS = ["vip", "newsletter", "trial", "churned", "partner", "enterprise", "smb", "referral"]
+_MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    """Parameters that fully determine a generated dataset."""
+
+    rows: int = 10000
+    shape: str = "narrow"
+    duplicate_ratio: float = 0.1
+    seed: int = 42
+
+    def __post_init__(self):
+        if self.shape not in SHAPES:
+            raise ValueError(f"shape must be one of {SHAPES}, got '{self.shape}'")
+        if not 0 <= self.duplicate_ratio < 1:
+            raise ValueError("duplicate_ratio must be in [0, 1)")
+        if self.rows < 1:
+            raise ValueError("rows must be positive")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _random_date(rng: random.Random) -> str:
+    year, month, day = rng.randint(2015, 2024), rng.randint(1, 12), rng.randint(1, 28)
+    style = rng.random()
+    if style < 0.5:
+        return f"{year:04d}-{month:02d}-{day:02d}"
+    if style < 0.8:
+        return f"{month:02d}/{day:02d}/{year:04d}"
+    return f"{_MONTHS[month - 1]} {day}, {year}"
+
+
+def _random_currency(rng: random.Random) -> str:
+    amount = rng.uniform(-500, 25000)
+    style = rng.random()
+    if style < 0.6:
+        return f"${amount:,.2f}" if amount >= 0 else f"(${-amount:,.2f})"
+    if style < 0.9:
+        return f"{amount:.2f}"
+    return f"{amount:,.0f}"
+
+
+def _random_phone(rng: random.Random) -> str:
+    area, prefix, line = rng.randint(201, 989), rng.randint(200, 999), rng.randint(0, 9999)
+    style = rng.random()
+    if style < 0.4:
+        return f"({area}) {prefix}-{line:04d}"
+    if style < 0.7:
+        return f"{area}.{prefix}.{line:04d}"
+    if style < 0.9:
+        return f"+1 {area} {prefix} {line:04d}"
+    return f"{area}{prefix}{line:04d}"
+
+
+def _random_tags(rng: random.Random) -> str:
+    return "; ".join(rng.sample(_TAGS, rng.randint(1, 3)))
+
+
+def _wide_column_names() -> List[str]:
+    return [f"metric_{index:02d}" for index in range(1, WIDE_EXTRA_COLUMNS + 1)]
+
+
+def generate_records(spec: DatasetSpec) -> List[Dict[str, str]]:
+    """Build the dataset as a list of string-valued records."""
+    rng = random.Random(spec.seed)
+    wide_columns = _wide_column_names() if spec.shape == "wide" else []
+    records: List[Dict[str, str]] = []
+
+    for index in range(spec.rows):
+        if records and rng.random() < spec.duplicate_ratio:
+            records.append(dict(rng.choice(records)))
+            continue
+
+        first, last = rng.choice(_FIRST_NAMES), rng.choice(_LAST_NAMES)
+        record = {
+            "record_key": f"R{index:08d}",
+            "full_name": f"{first} {last}",
+            "email": f"{first}.{last}.{index}@example.com".lower(),
+            "phone": _random_phone(rng),
+            "signup_date": _random_date(rng),
+            "amount": _random_currency(rng),
+            "tags": _random_tags(rng),
+            "city": rng.choice(_CITIES),
+        }
+        for position, column in enumerate(wide_columns):
+            # Alternate integer-like and free-text filler columns
+            record[column] = str(rng.randint(0, 100000)) if position % 2 == 0 else f"note {rng.randint(0, 999)}"
+        records.append(record)
+
+    return records
+
+
+def render(records: List[Dict[str, str]], file_format: str) -> bytes:
+    """Serialize records in one of FORMATS."""
+    if not records:
+        raise ValueError("cannot render an empty dataset")
+    columns = list(records[0].keys())
+
+    if file_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=columns, lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(records)
+        return buffer.getvalue().encode("utf-8")
+
+    if file_format == "xlsx":
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("data")
+        sheet.append(columns)
+        for record in records:
+            sheet.append([record[column] for column in columns])
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        return buffer.getvalue()
+
+    if file_format == "json":
+        return json.dumps(records).encode("utf-8")
+
+    if file_format == "xml":
+        root = ElementTree.Element("records")
+        for record in records:
+            element = ElementTree.SubElement(root, "record")
+            for column in columns:
+                ElementTree.SubElement(element, column).text = record[column]
+        return ElementTree.tostring(root, encoding="utf-8", xml_declaration=True)
+
+    raise ValueError(f"format must be one of {FORMATS}, got '{file_format}'")
+
+
+def build_mapping_config(spec: DatasetSpec, table_name: str, **duplicate_check: Any) -> MappingConfig:
+    """
+    Mapping config exercising the usual transformations for this dataset.
+
+    Phones go through a row-level ``standardize_phone``, tags are split into
+    two columns, and dates/currency are typed so ``map_data`` converts them.
+    Keyword arguments override ``DuplicateCheckConfig`` fields.
+    """
+    db_schema = {
+        "record_key": "TEXT",
+        "full_name": "TEXT",
+        "email": "TEXT",
+        "phone": "TEXT",
+        "signup_date": "DATE",
+        "amount": "DECIMAL",
+        "primary_tag": "TEXT",
+        "secondary_tag": "TEXT",
+        "city": "TEXT",
+    }
+    mappings = {column: column for column in db_schema}
+    if spec.shape == "wide":
+        for position, column in enumerate(_wide_column_names()):
+            db_schema[column] = "INTEGER" if position % 2 == 0 else "TEXT"
+            mappings[column] = column
+
+    rules = {
+        "row_transformations": [
+            {"type": "standardize_phone", "source_column": "phone", "default_country_code": "1"},
+        ],
+        "column_transformations": [
+            {
+                "type": "split_multi_value_column",
+                "source_column": "tags",
+                "delimiter": ";",
+                "outputs": [
+                    {"name": "primary_tag", "index": 0},
+                    {"name": "secondary_tag", "index": 1},
+                ],
+            },
+        ],
+    }
+    check = {"uniqueness_columns": ["record_key"], **duplicate_check}
+    return MappingConfig(
+        table_name=table_name,
+        db_schema=db_schema,
+        mappings=mappings,
+        rules=rules,
+        duplicate_check=DuplicateCheckConfig(**check),
+    )
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Benchmark the import pipeline on seeded synthetic data.
+
+Each stage of the pipeline is timed on its own (parsing, row transformations,
+mapping, in-file dedupe, insert, and the parallel duplicate check), followed by
+an end-to-end ``execute_data_import`` per file format against the configured
+Postgres database. Results are written as a JSON report that can be compared
+with a report from another commit.
+
+Usage:
+    python -m benchmarks.run --rows 20000 --shape wide --output benchmarks/results/head.json
+    python -m benchmarks.run --skip-db --formats csv json
+    python -m benchmarks.run --compare benchmarks/results/base.json --fail-on-regression 15
+
+Outputs:
+    - A summary table on stdout
+    - The JSON report (when --output is given)
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import text
+
+from app.db.models import _check_chunks_parallel, create_table_if_not_exists, insert_records
+from app.db.session import get_engine
+from app.domain.imports.history import start_import_tracking
+from app.domain.imports.mapper import map_data
+from app.domain.imports.orchestrator import (
+    _dedupe_records_in_memory,
+    execute_data_import,
+    process_file_content,
+)
+from app.domain.imports.preprocessor import apply_row_transformations
+from benchmarks.generator import (
+    FORMATS,
+    PIPELINE_FILE_TYPES,
+    SHAPES,
+    DatasetSpec,
+    build_mapping_config,
+    generate_records,
+    render,
+)
+
+REPORT_VERSION = 1
+TABLE_PREFIX = "bench_import"
+# Records per chunk handed to _check_chunks_parallel, matching insert_records
+DUPLICATE_CHECK_CHUNK_SIZE = 20000
+
+
+def _reset_peak_rss() -> None:
+    """Reset the kernel's high-water mark so the next reading is per-stage, where Linux allows it."""
+    try:
+        with open("/proc/self/clear_refs", "w") as handle:
+            handle.write("5")
+    except OSError:
+        pass
+
+
+def _peak_rss_bytes() -> int:
+    try:
+        with open("/proc/self/status") as handle:
+            for line in handle:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _git_revision() -> Dict[str, Any]:
+    def _git(*args: str) -> Optional[str]:
+        try:
+            return subprocess.run(
+                ["git", *args], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    status = _git("status", "--porcelain", "--untracked-files=no")
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "subject": _git("log", "-1", "--format=%s"),
+        "dirty": bool(status) if status is not None else None,
+    }
+
+
+class BenchmarkRunner:
+    """Times pipeline stages and collects one result dict per measurement."""
+
+    def __init__(self, repeat: int = 1, verbose: bool = False):
+        self.repeat = max(1, repeat)
+        self.verbose = verbose
+        self.results: List[Dict[str, Any]] = []
+
+    def measure(
+        self,
+        stage: str,
+        file_format: str,
+        rows: int,
+        fn: Callable[[], Any],
+        setup: Optional[Callable[[], None]] = None,
+    ) -> Any:
+        """Run ``fn`` ``repeat`` times and keep the fastest run; returns the last result."""
+        timings: List[float] = []
+        peak_rss = 0
+        result = None
+        for _ in range(self.repeat):
+            if setup:
+                setup()
+            gc.collect()
+            _reset_peak_rss()
+            # insert_records and friends print debug output; keep it off the report
+            with contextlib.ExitStack() as stack:
+                if not self.verbose:
+                    devnull = stack.enter_context(open(os.devnull, "w"))
+                    stack.enter_context(contextlib.redirect_stdout(devnull))
+                start = time.perf_counter()
+                result = fn()
+                timings.append(time.perf_counter() - start)
+            peak_rss = max(peak_rss, _peak_rss_bytes())
+
+        seconds = min(timings)
+        entry = {
+            "stage": stage,
+            "format": file_format,
+            "rows": rows,
+            "seconds": round(seconds, 6),
+            "rows_per_sec": round(rows / seconds, 1) if seconds > 0 else None,
+            "peak_rss_mb": round(peak_rss / (1024 * 1024), 1),
+            "runs": [round(value, 6) for value in timings],
+        }
+        self.results.append(entry)
+        print(
+            f"  {stage:<26} {file_format:<5} {rows:>9} rows  {seconds:>9.3f}s  "
+            f"{entry['rows_per_sec'] or 0:>12,.0f} rows/s  {entry['peak_rss_mb']:>8.1f} MB",
+            flush=True,
+        )
+        return result
+
+
+def _drop_table(table_name: str) -> None:
+    with get_engine().begin() as conn:
+        conn.execute(text(f'DROP TABLE IF EXISTS "{table_name}" CASCADE'))
+
+
+def _cleanup_tables(table_names: List[str]) -> None:
+    """Drop benchmark tables and the tracking rows the imports left behind."""
+    engine = get_engine()
+    for table_name in table_names:
+        _drop_table(table_name)
+        for tracking_table in ("file_imports", "import_history"):
+            try:
+                with engine.begin() as conn:
+                    conn.execute(
+                        text(f"DELETE FROM {tracking_table} WHERE table_name = :table_name"),
+                        {"table_name": table_name},
+                    )
+            except Exception as exc:
+                print(f"  warning: could not clean {tracking_table} for {table_name}: {exc}", file=sys.stderr)
+
+
+def run_benchmarks(
+    spec: DatasetSpec,
+    formats: List[str],
+    *,
+    skip_db: bool = False,
+    repeat: int = 1,
+    verbose: bool = False,
+) -> Dict[str, Any]:
+    """Run every stage for ``spec`` and return the report dict."""
+    runner = BenchmarkRunner(repeat=repeat, verbose=verbose)
+    records = generate_records(spec)
+    payloads = {file_format: render(records, file_format) for file_format in formats}
+    table_name = f"{TABLE_PREFIX}_{spec.shape}"
+    created_tables: List[str] = []
+
+    print(f"Dataset: {spec.rows} rows, shape={spec.shape}, duplicate_ratio={spec.duplicate_ratio}, seed={spec.seed}")
+
+    parsed: Dict[str, List[Dict[str, Any]]] = {}
+    for file_format in formats:
+        parsed[file_format] = runner.measure(
+            "parse",
+            file_format,
+            spec.rows,
+            lambda f=file_format: process_file_content(payloads[f], PIPELINE_FILE_TYPES[f]),
+        )
+
+    # The per-stage benchmarks below run on the first format's parsed records
+    stage_format = formats[0]
+    source_records = parsed[stage_format]
+    config = build_mapping_config(spec, table_name)
+    dedupe_config = build_mapping_config(spec, table_name, dedupe_within_file=True)
+
+    transformed, _, _ = runner.measure(
+        "apply_row_transformations",
+        stage_format,
+        len(source_records),
+        lambda: apply_row_transformations([dict(record) for record in source_records], config),
+    )
+    deduped, _ = runner.measure(
+        "dedupe_in_memory",
+        stage_format,
+        len(transformed),
+        lambda: _dedupe_records_in_memory(transformed, dedupe_config),
+    )
+    mapped, _, _ = runner.measure(
+        "map_data",
+        stage_format,
+        len(deduped),
+        lambda: map_data(deduped, config),
+    )
+
+    if not skip_db:
+        engine = get_engine()
+        insert_config = build_mapping_config(spec, table_name, allow_duplicates=True, check_file_level=False)
+        created_tables.append(table_name)
+
+        import_ids: List[str] = []
+
+        def _fresh_table() -> None:
+            # Rows reference import_history through _import_id, so each run needs a tracked import
+            _cleanup_tables([table_name])
+            create_table_if_not_exists(engine, insert_config)
+            import_ids.append(
+                start_import_tracking(
+                    source_type="local_upload",
+                    file_name=f"benchmark.{stage_format}",
+                    table_name=table_name,
+                    mapping_config=insert_config,
+                )
+            )
+
+        try:
+            runner.measure(
+                "insert_records",
+                stage_format,
+                len(mapped),
+                lambda: insert_records(
+                    engine,
+                    table_name,
+                    [dict(record) for record in mapped],
+                    config=insert_config,
+                    import_id=import_ids[-1],
+                ),
+                setup=_fresh_table,
+            )
+            # Every incoming row already exists, which is the worst case for the check
+            chunks = [
+                (offset, mapped[offset:offset + DUPLICATE_CHECK_CHUNK_SIZE])
+                for offset in range(0, len(mapped), DUPLICATE_CHECK_CHUNK_SIZE)
+            ]
+            runner.measure(
+                "check_chunks_parallel",
+                stage_format,
+                len(mapped),
+                lambda: _check_chunks_parallel(engine, table_name, chunks, config, min(4, os.cpu_count() or 2)),
+            )
+
+            for file_format in formats:
+                e2e_table = f"{TABLE_PREFIX}_{spec.shape}_{file_format}_e2e"
+                created_tables.append(e2e_table)
+                e2e_config = build_mapping_config(spec, e2e_table, dedupe_within_file=True, check_file_level=False)
+                runner.measure(
+                    "execute_data_import",
+                    file_format,
+                    spec.rows,
+                    lambda f=file_format, c=e2e_config: execute_data_import(
+                        file_content=payloads[f],
+                        file_name=f"benchmark.{f}",
+                        mapping_config=c,
+                        source_type="local_upload",
+                        import_strategy="NEW_TABLE",
+                    ),
+                    setup=lambda t=e2e_table: _cleanup_tables([t]),
+                )
+        finally:
+            _cleanup_tables(created_tables)
+
+    return {
+        "report_version": REPORT_VERSION,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "git": _git_revision(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "dataset": {**spec.to_dict(), "formats": formats, "bytes": {f: len(p) for f, p in payloads.items()}},
+        "repeat": runner.repeat,
+        "results": runner.results,
+    }
+
+
+def compare_reports(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Pair up stage results by (stage, format) and compute the throughput change."""
+    baseline_index = {(r["stage"], r["format"]): r for r in baseline.get("results", [])}
+    rows = []
+    for result in current.get("results", []):
+        base = baseline_index.get((result["stage"], result["format"]))
+        if not base or not base.get("rows_per_sec") or not result.get("rows_per_sec"):
+            continue
+        change = (result["rows_per_sec"] - base["rows_per_sec"]) / base["rows_per_sec"] * 100
+        rows.append(
+            {
+                "stage": result["stage"],
+                "format": result["format"],
+                "baseline_rows_per_sec": base["rows_per_sec"],
+                "rows_per_sec": result["rows_per_sec"],
+                "change_pct": round(change, 1),
+                "baseline_peak_rss_mb": base.get("peak_rss_mb"),
+                "peak_rss_mb": result.get("peak_rss_mb"),
+            }
+        )
+    return rows
+
+
+def _print_comparison(comparison: List[Dict[str, Any]], baseline: Dict[str, Any]) -> None:
+    base_commit = (baseline.get("git") or {}).get("commit") or "unknown"
+    print(f"\nCompared with {base_commit[:12]}:")
+    for row in comparison:
+        print(
+            f"  {row['stage']:<26} {row['format']:<5} "
+            f"{row['baseline_rows_per_sec']:>12,.0f} -> {row['rows_per_sec']:>12,.0f} rows/s "
+            f"({row['change_pct']:+6.1f}%)  RSS {row['baseline_peak_rss_mb']} -> {row['peak_rss_mb']} MB"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="Rows per generated file")
+    parser.add_argument("--shape", choices=SHAPES, default="narrow", help="narrow (~8 columns) or wide (~48)")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.1, help="Share of rows that repeat an earlier row")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per stage; the fastest is reported")
+    parser.add_argument("--skip-db", action="store_true", help="Only run stages that do not touch Postgres")
+    parser.add_argument("--output", type=Path, help="Write the JSON report here")
+    parser.add_argument("--compare", type=Path, help="Baseline JSON report to compare against")
+    parser.add_argument(
+        "--fail-on-regression",
+        type=float,
+        metavar="PCT",
+        help="With --compare, exit 1 if any stage's rows/sec dropped by more than PCT percent",
+    )
+    parser.add_argument("--verbose", action="store_true", help="Keep pipeline debug output")
+    args = parser.parse_args(argv)
+
+    spec = DatasetSpec(rows=args.rows, shape=args.shape, duplicate_ratio=args.duplicate_ratio, seed=args.seed)
+    report = run_benchmarks(spec, args.formats, skip_db=args.skip_db, repeat=args.repeat, verbose=args.verbose)
+
+    exit_code = 0
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        if baseline.get("dataset", {}).get("rows") != spec.rows or baseline.get("dataset", {}).get("shape") != spec.shape:
+            print("\nwarning: baseline was generated with a different dataset; rows/sec may not be comparable")
+        comparison = compare_reports(report, baseline)
+        report["comparison"] = {"baseline_commit": (baseline.get("git") or {}).get("commit"), "stages": comparison}
+        _print_comparison(comparison, baseline)
+        if args.fail_on_regression is not None and any(
+            row["change_pct"] < -args.fail_on_regression for row in comparison
+        ):
+            exit_code = 1
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"\nReport written to {args.output}")
+
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
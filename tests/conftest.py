@@ -9,6 +9,8 @@ import os
 
 # Force database bootstrap unless the user explicitly exports SKIP_DB_INIT=1.
 os.environ.setdefault("SKIP_DB_INIT", "0")
+# Live-LLM tests exercise the agent itself, so don't replay cached import decisions.
+os.environ.setdefault("LLM_DECISION_CACHE_ENABLED", "0")
 
 import pytest
 from sqlalchemy.exc import OperationalError
@@ -64,3 +64,121 @@ def test_verify_api_key_rejects_naive_expired_key():
 
     db = _FakeSession(record)
     assert verify_api_key(db, plain_key) is None
+
+
+class _CountingSession(_FakeSession):
+    def __init__(self, record):
+        super().__init__(record)
+        self.queries = 0
+
+    def query(self, *_):
+        self.queries += 1
+        return _FakeQuery(self.record)
+
+
+def test_cached_verification_skips_repeat_lookups():
+    from app.core.api_key_auth import invalidate_api_key_cache, verify_api_key_cached
+
+    plain_key = "atlas_live_sk_test_cached"
+    record = ApiKey(
+        id="test-cached",
+        key_hash=hash_api_key(plain_key),
+        app_name="test-app",
+        is_active=True,
+    )
+    db = _CountingSession(record)
+
+    first = verify_api_key_cached(db, plain_key)
+    second = verify_api_key_cached(db, plain_key)
+    assert first.id == second.id == "test-cached"
+    assert db.queries == 1
+
+    invalidate_api_key_cache("test-cached")
+    verify_api_key_cached(db, plain_key)
+    assert db.queries == 2
+    invalidate_api_key_cache()
+
+
+def test_cached_verification_remembers_invalid_keys():
+    from app.core.api_key_auth import invalidate_api_key_cache, verify_api_key_cached
+
+    db = _CountingSession(None)
+    assert verify_api_key_cached(db, "atlas_live_sk_unknown") is None
+    assert verify_api_key_cached(db, "atlas_live_sk_unknown") is None
+    assert db.queries == 1
+    invalidate_api_key_cache()
+
+
+def test_last_used_updates_are_flushed_in_batches(monkeypatch):
+    from sqlalchemy import text
+
+    from app.core.api_key_auth import (
+        create_api_key,
+        delete_api_key,
+        flush_api_key_last_used,
+        init_api_key_tables,
+        record_api_key_use,
+    )
+    from app.db.session import get_db
+
+    monkeypatch.setattr("app.core.api_key_auth.settings.api_key_last_used_flush_seconds", 3600)
+    init_api_key_tables()
+    db = next(get_db())
+    try:
+        api_key_record, _ = create_api_key(db=db, app_name="test-last-used-batch")
+        key_id = api_key_record.id
+
+        for _ in range(5):
+            record_api_key_use(key_id)
+        assert db.execute(
+            text("SELECT last_used_at FROM api_keys WHERE id = :id"), {"id": key_id}
+        ).scalar() is None
+
+        assert flush_api_key_last_used() == 1
+        db.rollback()
+        assert db.execute(
+            text("SELECT last_used_at FROM api_keys WHERE id = :id"), {"id": key_id}
+        ).scalar() is not None
+    finally:
+        delete_api_key(db, key_id)
+        db.close()
+
+
+def test_last_used_updates_are_flushed_by_the_background_thread(monkeypatch):
+    import time
+
+    from sqlalchemy import text
+
+    from app.core.api_key_auth import (
+        create_api_key,
+        delete_api_key,
+        init_api_key_tables,
+        record_api_key_use,
+        start_api_key_usage_flusher,
+        stop_api_key_usage_flusher,
+    )
+    from app.db.session import get_db
+
+    monkeypatch.setattr("app.core.api_key_auth.settings.api_key_last_used_flush_seconds", 1)
+    init_api_key_tables()
+    db = next(get_db())
+    start_api_key_usage_flusher()
+    try:
+        api_key_record, _ = create_api_key(db=db, app_name="test-last-used-flusher")
+        key_id = api_key_record.id
+
+        # The request path only buffers; the flusher thread does the write
+        record_api_key_use(key_id)
+        last_used_at = None
+        deadline = time.monotonic() + 5
+        while last_used_at is None and time.monotonic() < deadline:
+            time.sleep(0.2)
+            db.rollback()
+            last_used_at = db.execute(
+                text("SELECT last_used_at FROM api_keys WHERE id = :id"), {"id": key_id}
+            ).scalar()
+        assert last_used_at is not None
+    finally:
+        stop_api_key_usage_flusher()
+        delete_api_key(db, key_id)
+        db.close()
@@ -303,7 +303,8 @@ def test_auto_process_archive_reuses_cached_decision(monkeypatch, fake_storage_s
     buffer = io.BytesIO()
     with zipfile.ZipFile(buffer, "w") as zf:
         zf.writestr("first.csv", csv_bytes)
-        zf.writestr("second.csv", csv_bytes)
+        # Same structure, different rows: byte-identical members are skipped
+        zf.writestr("second.csv", b"name\ngamma\ndelta\n")
 
     archive_id = _upload_zip(buffer.getvalue(), filename="cached.zip")
     response = client.post(
@@ -444,7 +445,8 @@ def test_auto_process_archive_resume_failed_entries(monkeypatch, fake_storage_st
     buffer = io.BytesIO()
     with zipfile.ZipFile(buffer, "w") as zf:
         zf.writestr("first.csv", csv_bytes)
-        zf.writestr("second.csv", csv_bytes)
+        # Same structure, different rows: byte-identical members are skipped
+        zf.writestr("second.csv", b"name\ngamma\ndelta\n")
 
     archive_id = _upload_zip(buffer.getvalue(), filename="resume.zip")
     response = client.post(
@@ -542,7 +544,8 @@ def test_auto_process_archive_resume_all(monkeypatch, fake_storage_storage):
     buffer = io.BytesIO()
     with zipfile.ZipFile(buffer, "w") as zf:
         zf.writestr("first.csv", csv_bytes)
-        zf.writestr("second.csv", csv_bytes)
+        # Same structure, different rows: byte-identical members are skipped
+        zf.writestr("second.csv", b"name\ngamma\ndelta\n")
 
     archive_id = _upload_zip(buffer.getvalue(), filename="resume-all.zip")
     response = client.post(
@@ -586,3 +589,67 @@ def test_auto_process_archive_resume_all(monkeypatch, fake_storage_storage):
     assert len(resumed_metadata["results"]) == 2
     assert all(result["status"] == "processed" for result in resumed_metadata["results"])
     assert execution_calls["count"] == 4  # two executions on first run, two on full reprocess
+
+
+def test_auto_process_archive_skips_identical_members(monkeypatch, fake_storage_storage):
+    def fake_analyze(**_kwargs):
+        return {
+            "success": True,
+            "response": "ok",
+            "iterations_used": 1,
+            "llm_decision": {
+                "strategy": "NEW_TABLE",
+                "target_table": "archive_identical_members",
+                "column_mapping": {"name": "name"},
+                "has_header": True,
+            },
+        }
+
+    monkeypatch.setattr("app.api.routers.analysis.routes._get_analyze_file_for_import", lambda: fake_analyze)
+
+    executed_files = []
+
+    def fake_execute(file_content, file_name, all_records, llm_decision, **_kwargs):
+        executed_files.append(file_name)
+        return {
+            "success": True,
+            "strategy_executed": llm_decision["strategy"],
+            "table_name": llm_decision["target_table"],
+            "records_processed": len(all_records),
+            "duplicates_skipped": 0,
+        }
+
+    monkeypatch.setattr("app.api.routers.analysis.routes._get_execute_llm_import_decision", lambda: fake_execute)
+    monkeypatch.setattr(
+        "app.core.config.settings.enable_auto_retry_failed_imports",
+        False,
+        raising=False,
+    )
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("a.csv", b"name\nalpha\nbeta\n")
+        zf.writestr("copies/a.csv", b"name\nalpha\nbeta\n")
+        zf.writestr("b.csv", b"name\ngamma\n")
+    archive_id = _upload_zip(buffer.getvalue(), filename="identical.zip")
+
+    response = client.post(
+        "/auto-process-archive",
+        data={
+            "file_id": archive_id,
+            "analysis_mode": "auto_always",
+            "conflict_resolution": "llm_decide",
+            "max_iterations": "5",
+        },
+    )
+    assert response.status_code == 200, response.text
+
+    job = _wait_for_job(response.json()["job_id"])
+    assert job["status"] == "succeeded"
+    metadata = job["result_metadata"]
+    assert metadata["processed_files"] == 2
+    assert metadata["skipped_files"] == 1
+    skipped = [res for res in metadata["results"] if res["status"] == "skipped"]
+    assert skipped[0]["archive_path"] == "copies/a.csv"
+    assert skipped[0]["message"] == "Identical to 'a.csv'"
+    assert len(executed_files) == 2
@@ -0,0 +1,57 @@
+"""
+Tests for the spooled, thread-safe ZIP archive reader.
+"""
+
+import io
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.domain.imports.archive_reader import ArchiveReader
+
+
+def _zip_bytes(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, content in members.items():
+            zf.writestr(name, content)
+    return buffer.getvalue()
+
+
+def test_concurrent_reads_use_separate_handles():
+    members = {f"file_{i}.csv": f"id\n{i}\n".encode() * 2000 for i in range(16)}
+    reader = ArchiveReader.from_bytes(_zip_bytes(members))
+    path = reader.path
+    assert os.path.exists(path)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        contents = dict(zip(members, executor.map(reader.read, members)))
+
+    assert contents == members
+    assert 1 < len(reader._handles) <= 5
+    with pytest.raises(KeyError):
+        reader.read("missing.csv")
+
+    reader.close()
+    assert not os.path.exists(path)
+
+
+def test_find_identical_members_confirms_with_hash():
+    reader = ArchiveReader.from_bytes(_zip_bytes({
+        "a.csv": b"name\nalpha\n",
+        "b.csv": b"name\nbeta\n",
+        "dir/a.csv": b"name\nalpha\n",
+        "dir/again.csv": b"name\nalpha\n",
+    }))
+    with reader:
+        duplicates = reader.find_identical_members(["a.csv", "b.csv", "dir/a.csv", "dir/again.csv"])
+    assert duplicates == {"dir/a.csv": "a.csv", "dir/again.csv": "a.csv"}
+
+
+def test_corrupt_archive_is_rejected_without_leaving_a_spool_file(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.domain.imports.archive_reader.settings.archive_spool_dir", str(tmp_path))
+    with pytest.raises(zipfile.BadZipFile):
+        ArchiveReader.from_bytes(b"not a zip")
+    assert list(tmp_path.iterdir()) == []
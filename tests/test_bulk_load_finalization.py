@@ -0,0 +1,98 @@
+"""
+Tests for post-import index building and ANALYZE (finalize_bulk_load).
+"""
+
+import io
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.db.session import get_engine
+from app.main import app
+
+client = TestClient(app)
+
+TABLE_NAME = "test_bulk_load_finalize"
+INDEX_NAME = f"idx_{TABLE_NAME}_import_id"
+
+
+@pytest.fixture
+def cleanup_finalize_table():
+    engine = get_engine()
+
+    def _cleanup():
+        with engine.begin() as conn:
+            conn.execute(text(f'DROP TABLE IF EXISTS "{TABLE_NAME}" CASCADE'))
+            conn.execute(text("DELETE FROM import_history WHERE table_name = :t"), {"t": TABLE_NAME})
+            conn.execute(text("DELETE FROM file_imports WHERE table_name = :t"), {"t": TABLE_NAME})
+
+    _cleanup()
+    yield
+    _cleanup()
+
+
+def _import(rows: str):
+    files = {"file": ("finalize.csv", io.BytesIO(f"name,age\n{rows}".encode()), "text/csv")}
+    data = {
+        "mapping_json": json.dumps({
+            "table_name": TABLE_NAME,
+            "db_schema": {"name": "VARCHAR(255)", "age": "INTEGER"},
+            "mappings": {"name": "name", "age": "age"},
+            "duplicate_check": {"enabled": False},
+        })
+    }
+    response = client.post("/map-data", files=files, data=data)
+    assert response.status_code == 200, response.text
+
+
+def _latest_metadata(conn):
+    return conn.execute(
+        text("""
+            SELECT metadata FROM import_history
+            WHERE table_name = :t ORDER BY import_timestamp DESC LIMIT 1
+        """),
+        {"t": TABLE_NAME},
+    ).scalar()
+
+
+def test_large_first_load_builds_index_after_insert_and_analyzes(cleanup_finalize_table, monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.bulk_load_finalize_min_rows", 3)
+
+    _import("Ann,30\nBen,40\nCat,50\n")
+
+    engine = get_engine()
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT to_regclass(:i)"), {"i": INDEX_NAME}).scalar() is not None
+        assert conn.execute(
+            text("SELECT reltuples FROM pg_class WHERE relname = :t"), {"t": TABLE_NAME}
+        ).scalar() == 3
+        metadata = _latest_metadata(conn)
+
+    finalization = metadata["bulk_load_finalization"]
+    assert finalization["analyzed"] is True
+    assert finalization["indexes_created"] == [INDEX_NAME]
+    assert "finalize" in metadata["performance_profile"]["stages"]
+
+
+def test_small_load_only_restores_a_missing_index(cleanup_finalize_table, monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.bulk_load_finalize_min_rows", 3)
+    _import("Ann,30\nBen,40\nCat,50\n")
+
+    # A table left without its index (e.g. a failed deferred load) gets it back
+    with get_engine().begin() as conn:
+        conn.execute(text(f"DROP INDEX {INDEX_NAME}"))
+
+    _import("Dan,60\n")
+
+    with get_engine().connect() as conn:
+        assert conn.execute(text("SELECT to_regclass(:i)"), {"i": INDEX_NAME}).scalar() is not None
+        metadata = _latest_metadata(conn)
+    assert metadata["bulk_load_finalization"]["analyzed"] is False
+    assert metadata["bulk_load_finalization"]["indexes_created"] == [INDEX_NAME]
+
+    _import("Eve,70\n")
+
+    with get_engine().connect() as conn:
+        assert "bulk_load_finalization" not in (_latest_metadata(conn) or {})
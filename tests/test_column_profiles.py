@@ -0,0 +1,136 @@
+"""
+Tests for import-time column profiles (app.domain.imports.column_profiles).
+"""
+
+import io
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.db.session import get_engine
+from app.domain.imports import column_profiles
+from app.domain.imports.column_profiles import (
+    ColumnProfile,
+    HyperLogLog,
+    TableProfiler,
+    remove_import_profiles,
+)
+from app.main import app
+
+client = TestClient(app)
+
+TABLE_NAME = "test_column_profiles"
+
+
+def test_hyperloglog_estimates_and_merges_distinct_counts():
+    first, second = HyperLogLog(), HyperLogLog()
+    first.add_many([f"value-{value}" for value in range(20000)])
+    second.add_many([f"value-{value}" for value in range(10000, 30000)])
+
+    assert abs(first.estimate() - 20000) / 20000 < 0.06
+    restored = HyperLogLog.loads(first.dumps())
+    restored.merge(second)
+    assert abs(restored.estimate() - 30000) / 30000 < 0.06
+
+
+def test_column_profile_summarizes_and_merges_batches():
+    first = ColumnProfile()
+    first.update([1, 5, 250, None, 5, ""])
+    second = ColumnProfile.from_dict(ColumnProfile().to_dict())
+    second.update([-30, 5, 9000])
+    first.merge(second)
+
+    summary = first.summary()
+    assert summary["non_null_count"] == 7
+    assert summary["null_count"] == 2
+    assert summary["distinct_estimate"] == 5
+    assert (summary["min"], summary["max"]) == (-30, 9000)
+    assert summary["top_values"][0] == {"value": "5", "count": 3}
+    assert [(bucket["lower"], bucket["upper"], bucket["count"]) for bucket in summary["histogram"]] == [
+        (-40.0, -30.0, 1), (1.0, 2.0, 1), (5.0, 6.0, 3), (200.0, 300.0, 1), (9000.0, 10000.0, 1),
+    ]
+
+    text_profile = ColumnProfile()
+    text_profile.update(["b", "a", 3])
+    assert (text_profile.summary()["min"], text_profile.summary()["max"]) == ("3", "b")
+    assert text_profile.summary()["histogram"] == []
+
+
+def test_table_profiler_skips_metadata_columns():
+    profiler = TableProfiler()
+    profiler.update([{"name": "Ann", "_import_id": "x"}, {"name": None, "_import_id": "x"}])
+
+    assert profiler.rows == 2
+    assert list(profiler.columns) == ["name"]
+
+
+@pytest.fixture
+def cleanup_profile_table(monkeypatch):
+    # Other suites drop every table they do not know about; re-create ours
+    monkeypatch.setattr(column_profiles, "_table_initialized", False)
+    column_profiles.ensure_column_profiles_table()
+
+    def _cleanup():
+        with get_engine().begin() as conn:
+            conn.execute(text(f'DROP TABLE IF EXISTS "{TABLE_NAME}" CASCADE'))
+            conn.execute(text("DELETE FROM import_history WHERE table_name = :t"), {"t": TABLE_NAME})
+            conn.execute(text("DELETE FROM file_imports WHERE table_name = :t"), {"t": TABLE_NAME})
+            conn.execute(text("DELETE FROM column_profiles WHERE table_name = :t"), {"t": TABLE_NAME})
+
+    _cleanup()
+    yield
+    _cleanup()
+
+
+def _import(rows: str, duplicate_check=None):
+    files = {"file": ("profiles.csv", io.BytesIO(f"name,status,amount\n{rows}".encode()), "text/csv")}
+    data = {
+        "mapping_json": json.dumps({
+            "table_name": TABLE_NAME,
+            "db_schema": {"name": "VARCHAR(255)", "status": "VARCHAR(50)", "amount": "INTEGER"},
+            "mappings": {"name": "name", "status": "status", "amount": "amount"},
+            "duplicate_check": duplicate_check or {"enabled": False},
+        })
+    }
+    response = client.post("/map-data", files=files, data=data)
+    assert response.status_code == 200, response.text
+
+
+def test_stats_endpoint_serves_profiles_merged_across_imports(cleanup_profile_table):
+    _import("Ann,paid,10\nBen,pending,20\nCat,paid,\n")
+    _import("Dan,paid,300\n")
+
+    response = client.get(f"/tables/{TABLE_NAME}/stats")
+    assert response.status_code == 200, response.text
+    stats = response.json()
+    assert stats["profiled_rows"] == 4
+    status = stats["column_profiles"]["status"]
+    assert status["top_values"][0] == {"value": "paid", "count": 3}
+    assert status["distinct_estimate"] == 2
+    amount = stats["column_profiles"]["amount"]
+    assert (amount["null_count"], amount["min"], amount["max"]) == (1, 10, 300)
+
+    with get_engine().begin() as conn:
+        first_import = conn.execute(text("""
+            SELECT import_id FROM import_history WHERE table_name = :t ORDER BY import_timestamp LIMIT 1
+        """), {"t": TABLE_NAME}).scalar()
+        remove_import_profiles(conn, TABLE_NAME, [first_import])
+    assert client.get(f"/tables/{TABLE_NAME}/stats").json()["profiled_rows"] == 1
+
+    assert client.delete(f"/tables/{TABLE_NAME}").status_code == 200
+    with get_engine().connect() as conn:
+        assert conn.execute(
+            text("SELECT COUNT(*) FROM column_profiles WHERE table_name = :t"), {"t": TABLE_NAME}
+        ).scalar() == 0
+
+
+def test_profiles_skip_rows_rejected_as_duplicates(cleanup_profile_table):
+    duplicate_check = {"enabled": True}
+    _import("Ann,paid,10\nBen,pending,20\n", duplicate_check)
+    _import("Ann,paid,10\nDan,paid,300\n", duplicate_check)
+
+    stats = client.get(f"/tables/{TABLE_NAME}/stats").json()
+    assert stats["profiled_rows"] == 3
+    assert stats["column_profiles"]["status"]["top_values"][0] == {"value": "paid", "count": 2}
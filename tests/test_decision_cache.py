@@ -0,0 +1,146 @@
+"""
+Tests for the persistent LLM import decision cache.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.db.session import get_engine
+from app.domain.imports.decision_cache import invalidate_cached_decisions
+from app.domain.queries import analyzer
+from app.integrations.auto_import import execute_llm_import_decision
+from app.main import app
+
+TARGET_TABLE = "test_decision_cache_target"
+SAMPLE = [{"Email": "a@example.com", "Name": "Ada"}]
+METADATA = {"name": "contacts.csv", "total_rows": 1, "file_type": "csv"}
+
+
+class _FakeAgent:
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, inputs, context, config):
+        self.calls += 1
+        context.file_metadata["llm_decision"] = {
+            "strategy": "NEW_TABLE",
+            "target_table": TARGET_TABLE,
+            "column_mapping": {"Email": "email", "Name": "name"},
+            "llm_instruction": context.llm_instruction,
+        }
+        return {"messages": [SimpleNamespace(content="Decision recorded", tool_calls=None)]}
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    fake = _FakeAgent()
+    monkeypatch.setattr(analyzer, "create_file_analyzer_agent", lambda **kwargs: fake)
+    monkeypatch.setattr(analyzer, "get_database_schema", lambda: {})
+    monkeypatch.setattr(analyzer, "find_matching_fingerprint", lambda engine, columns: None)
+    monkeypatch.setattr("app.domain.imports.decision_cache.settings.llm_decision_cache_enabled", True)
+    invalidate_cached_decisions(TARGET_TABLE)
+    yield fake
+    invalidate_cached_decisions(TARGET_TABLE)
+    with get_engine().begin() as conn:
+        conn.execute(text(f'DROP TABLE IF EXISTS "{TARGET_TABLE}"'))
+
+
+def _cached_entries() -> int:
+    with get_engine().connect() as conn:
+        return conn.execute(
+            text("SELECT COUNT(*) FROM llm_decision_cache WHERE target_table = :t"),
+            {"t": TARGET_TABLE},
+        ).scalar()
+
+
+def _analyze(**kwargs):
+    return analyzer.analyze_file_for_import(file_sample=SAMPLE, file_metadata=METADATA, **kwargs)
+
+
+def test_second_analysis_reuses_cached_decision(agent):
+    first = _analyze(llm_instruction="keep emails lowercase")
+    second = _analyze(llm_instruction="keep emails lowercase")
+
+    assert agent.calls == 1
+    assert second["decision_cache_hit"] is True
+    assert second["iterations_used"] == 0
+    assert second["llm_decision"] == first["llm_decision"]
+
+    with get_engine().connect() as conn:
+        hits = conn.execute(
+            text("SELECT hit_count FROM llm_decision_cache WHERE target_table = :t"),
+            {"t": TARGET_TABLE},
+        ).scalar()
+    assert hits == 1
+
+    # A different instruction or structure is a different cache entry
+    _analyze(llm_instruction="something else")
+    analyzer.analyze_file_for_import(
+        file_sample=[{"Email": "a@example.com", "Full Name": "Ada"}],
+        file_metadata=METADATA,
+        llm_instruction="keep emails lowercase",
+    )
+    assert agent.calls == 3
+
+
+def test_target_schema_change_and_expiry_invalidate_entry(agent):
+    _analyze()
+    _analyze()
+    assert agent.calls == 1
+
+    # Creating the target table changes its schema version
+    with get_engine().begin() as conn:
+        conn.execute(text(f'CREATE TABLE "{TARGET_TABLE}" (email TEXT, name TEXT)'))
+    _analyze()
+    assert agent.calls == 2
+    _analyze()
+    assert agent.calls == 2
+
+    with get_engine().begin() as conn:
+        conn.execute(text(f'ALTER TABLE "{TARGET_TABLE}" ADD COLUMN phone TEXT'))
+    _analyze()
+    assert agent.calls == 3
+
+    with get_engine().begin() as conn:
+        conn.execute(
+            text("UPDATE llm_decision_cache SET expires_at = NOW() - INTERVAL '1 second' WHERE target_table = :t"),
+            {"t": TARGET_TABLE},
+        )
+    _analyze()
+    assert agent.calls == 4
+
+
+def test_interactive_turns_bypass_cache(agent):
+    _analyze()
+    _analyze(messages=[{"role": "user", "content": "analyze"}], interactive_mode=True)
+    assert agent.calls == 2
+
+
+def test_failed_import_discards_cached_decision(agent, monkeypatch):
+    decision = _analyze()["llm_decision"]
+    assert decision["decision_cache_key"]
+    assert _cached_entries() == 1
+
+    def fail_import(**kwargs):
+        raise RuntimeError("mapping failed")
+
+    monkeypatch.setattr("app.domain.imports.orchestrator.execute_data_import", fail_import)
+    result = execute_llm_import_decision(b"", "contacts.csv", SAMPLE, decision)
+    assert result["success"] is False
+    assert _cached_entries() == 0
+
+    _analyze()
+    assert agent.calls == 2
+
+
+def test_dropping_the_target_table_invalidates_its_decisions(agent):
+    with get_engine().begin() as conn:
+        conn.execute(text(f'CREATE TABLE "{TARGET_TABLE}" (email TEXT, name TEXT)'))
+    _analyze()
+    assert _cached_entries() == 1
+
+    assert TestClient(app).delete(f"/tables/{TARGET_TABLE}").status_code == 200
+    assert _cached_entries() == 0
@@ -0,0 +1,86 @@
+"""
+Tests for the in-memory MinHash/LSH fingerprint index.
+"""
+
+import pytest
+from sqlalchemy import text
+
+from app.domain.imports.fingerprinting import (
+    FingerprintIndex,
+    _get_fingerprint_index,
+    calculate_fingerprint,
+    find_fingerprint_candidates,
+    find_matching_fingerprint,
+    reset_fingerprint_index,
+    store_table_fingerprint,
+)
+from tests.utils.system_tables import ensure_system_tables_ready
+
+BASE_COLUMNS = [f"Column {i}" for i in range(20)]
+
+
+def test_index_ranks_similar_column_sets_first():
+    index = FingerprintIndex()
+    for i in range(200):
+        columns = [f"other_{i}_{j}" for j in range(15)]
+        index.add(f"unrelated_{i}", *reversed(calculate_fingerprint(columns)))
+    fingerprint_hash, normalized = calculate_fingerprint(BASE_COLUMNS)
+    index.add("contacts", normalized, fingerprint_hash)
+
+    _, query = calculate_fingerprint(BASE_COLUMNS[:-1] + ["Extra"])
+    results = index.query(query, k=3)
+
+    assert results[0][0] == "contacts"
+    assert results[0][1] == pytest.approx(19 / 21)
+    assert index.exact(fingerprint_hash) == "contacts"
+
+    index.remove("contacts")
+    assert index.exact(fingerprint_hash) is None
+    assert all(table != "contacts" for table, _ in index.query(query))
+
+
+@pytest.fixture
+def engine():
+    engine = ensure_system_tables_ready()
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM table_fingerprints"))
+    reset_fingerprint_index()
+    yield engine
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM table_fingerprints"))
+    reset_fingerprint_index()
+
+
+def test_lookup_sees_stored_and_externally_changed_fingerprints(engine):
+    assert find_matching_fingerprint(engine, BASE_COLUMNS) is None
+
+    store_table_fingerprint(engine, "contacts", BASE_COLUMNS)
+    assert find_matching_fingerprint(engine, BASE_COLUMNS) == {
+        "table_name": "contacts",
+        "similarity": 1.0,
+        "match_type": "exact",
+    }
+
+    loose = find_matching_fingerprint(engine, BASE_COLUMNS + ["Extra"])
+    assert loose["table_name"] == "contacts"
+    assert loose["match_type"] == "loose"
+
+    # Another process removing the fingerprint invalidates the cached index
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM table_fingerprints WHERE table_name = 'contacts'"))
+    assert find_fingerprint_candidates(engine, BASE_COLUMNS) == []
+
+
+def test_index_is_reused_until_another_writer_changes_fingerprints(engine):
+    store_table_fingerprint(engine, "contacts", BASE_COLUMNS)
+    index = _get_fingerprint_index(engine)
+    assert _get_fingerprint_index(engine) is index
+
+    # Our own store is applied in place without a rebuild
+    store_table_fingerprint(engine, "leads", ["Email", "Stage"])
+    assert _get_fingerprint_index(engine) is index
+    assert index.exact(calculate_fingerprint(["Email", "Stage"])[0]) == "leads"
+
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE table_fingerprints SET updated_at = NOW() WHERE table_name = 'leads'"))
+    assert _get_fingerprint_index(engine) is not index
@@ -0,0 +1,209 @@
+"""
+Tests for the buffered COPY writer behind mapping_errors, import_validation_failures,
+and import_duplicates.
+"""
+
+import json
+
+import pytest
+from sqlalchemy import text
+
+from app.db.models import record_duplicate_rows
+from app.db.session import get_engine
+from app.domain.imports.audit_writer import (
+    AUDIT_CAP_ERROR_TYPE,
+    get_active_audit_writer,
+    import_audit_writer,
+)
+from app.domain.imports.history import (
+    create_import_history_table,
+    list_duplicate_rows,
+    record_mapping_errors_batch,
+    record_validation_failures,
+    resolve_duplicate_row,
+    start_import_tracking,
+)
+
+
+@pytest.fixture
+def import_id():
+    create_import_history_table()
+    new_import_id = start_import_tracking(
+        source_type="test",
+        file_name="audit.csv",
+        table_name="test_audit_writer",
+    )
+    yield new_import_id
+    with get_engine().begin() as conn:
+        conn.execute(text("DELETE FROM import_history WHERE import_id = :id"), {"id": new_import_id})
+
+
+def _count(table_name: str, import_id: str) -> int:
+    with get_engine().connect() as conn:
+        return conn.execute(
+            text(f"SELECT COUNT(*) FROM {table_name} WHERE import_id = :id"),
+            {"id": import_id},
+        ).scalar()
+
+
+def test_direct_writes_use_copy_and_preserve_special_characters(import_id):
+    record_mapping_errors_batch(import_id, [
+        {
+            "record_number": 1,
+            "error_type": "type_mismatch",
+            "error_message": "bad value\twith tab",
+            "source_field": "amount",
+            "source_value": "C:\\path\nnext line",
+            "chunk_number": 1,
+        },
+        {"record_number": 2, "error_message": "no value"},
+    ])
+
+    with get_engine().connect() as conn:
+        rows = conn.execute(
+            text("""
+                SELECT record_number, error_type, error_message, source_value
+                FROM mapping_errors WHERE import_id = :id ORDER BY record_number
+            """),
+            {"id": import_id},
+        ).fetchall()
+
+    assert rows[0] == (1, "type_mismatch", "bad value\twith tab", "C:\\path\nnext line")
+    assert rows[1] == (2, "mapping_error", "no value", None)
+
+
+def test_writer_buffers_until_close(import_id):
+    with import_audit_writer(import_id) as writer:
+        assert get_active_audit_writer(import_id) is writer
+        record_duplicate_rows(import_id, [{"record_number": 3, "record": {"email": "a@example.com"}}])
+        record_validation_failures(import_id, [{
+            "record_number": 4,
+            "record": {"email": "bad"},
+            "validation_errors": [{"column": "email", "message": "Invalid email"}],
+        }])
+        assert _count("import_duplicates", import_id) == 0
+        assert _count("import_validation_failures", import_id) == 0
+
+    assert get_active_audit_writer(import_id) is None
+    assert _count("import_duplicates", import_id) == 1
+    assert _count("import_validation_failures", import_id) == 1
+
+
+def test_writer_caps_rows_and_writes_summary(import_id):
+    errors = [{"record_number": i, "error_message": f"error {i}"} for i in range(1, 26)]
+
+    with import_audit_writer(import_id, max_rows=10, flush_rows=4) as writer:
+        record_mapping_errors_batch(import_id, errors[:15])
+        record_mapping_errors_batch(import_id, errors[15:])
+        summary = writer.summary()
+
+    assert summary["mapping_errors"] == {"seen": 25, "recorded": 10, "suppressed": 15}
+
+    with get_engine().connect() as conn:
+        rows = conn.execute(
+            text("SELECT record_number, error_type, error_message FROM mapping_errors WHERE import_id = :id"),
+            {"id": import_id},
+        ).fetchall()
+
+    assert len(rows) == 11
+    summary_rows = [row for row in rows if row[1] == AUDIT_CAP_ERROR_TYPE]
+    assert len(summary_rows) == 1
+    assert summary_rows[0][0] is None
+    assert "15 additional" in summary_rows[0][2]
+    assert _audit_summary(import_id)["mapping_errors"]["suppressed"] == 15
+
+
+def test_failed_mid_import_flush_is_logged_not_raised(import_id, monkeypatch):
+    from app.domain.imports import audit_writer
+
+    real_write = audit_writer.write_audit_rows
+    calls = []
+
+    def _fail_first_write(table_name, rows):
+        calls.append(len(rows))
+        if len(calls) == 1:
+            raise RuntimeError("COPY failed")
+        return real_write(table_name, rows)
+
+    monkeypatch.setattr(audit_writer, "write_audit_rows", _fail_first_write)
+    failures = [
+        {"record_number": i, "record": {"email": "bad"}, "validation_errors": []}
+        for i in range(1, 5)
+    ]
+
+    with import_audit_writer(import_id, flush_rows=2) as writer:
+        # The first auto-flush fails; the import keeps going
+        record_validation_failures(import_id, failures[:2])
+        record_validation_failures(import_id, failures[2:])
+        summary = writer.summary()
+
+    assert summary["import_validation_failures"] == {"seen": 4, "recorded": 2, "suppressed": 2}
+    assert _count("import_validation_failures", import_id) == 2
+    assert _audit_summary(import_id)["import_validation_failures"]["suppressed"] == 2
+
+
+def _audit_summary(import_id: str):
+    with get_engine().connect() as conn:
+        metadata = conn.execute(
+            text("SELECT metadata FROM import_history WHERE import_id = :id"),
+            {"id": import_id},
+        ).scalar()
+    if isinstance(metadata, str):
+        metadata = json.loads(metadata)
+    return (metadata or {}).get("audit_summary")
+
+
+def test_writer_sampling_is_reproducible(import_id):
+    duplicates = [{"record_number": i, "record": {"id": i}} for i in range(200)]
+
+    with import_audit_writer(import_id, sample_rate=0.25) as writer:
+        record_duplicate_rows(import_id, duplicates)
+        summary = writer.summary()["import_duplicates"]
+
+    assert summary["seen"] == 200
+    assert 0 < summary["recorded"] < 200
+    assert summary["recorded"] + summary["suppressed"] == 200
+    # Only real duplicates are stored; what sampling dropped is in the import's metadata
+    assert _count("import_duplicates", import_id) == summary["recorded"]
+    stored = _audit_summary(import_id)["import_duplicates"]
+    assert stored["suppressed"] == summary["suppressed"]
+    assert stored["sample_rate"] == 0.25
+
+
+@pytest.fixture
+def duplicate_table():
+    table_name = "test_audit_cap_duplicates"
+    with get_engine().begin() as conn:
+        conn.execute(text(f'DROP TABLE IF EXISTS "{table_name}"'))
+        conn.execute(text(f'CREATE TABLE "{table_name}" (_row_id SERIAL PRIMARY KEY, email TEXT, name TEXT)'))
+        conn.execute(text(f"INSERT INTO \"{table_name}\" (email, name) VALUES ('a@example.com', 'Ann')"))
+    yield table_name
+    with get_engine().begin() as conn:
+        conn.execute(text(f'DROP TABLE IF EXISTS "{table_name}"'))
+
+
+def test_duplicates_can_be_listed_and_resolved_after_the_cap(import_id, duplicate_table):
+    with get_engine().begin() as conn:
+        conn.execute(
+            text("UPDATE import_history SET table_name = :t, duplicates_found = 5 WHERE import_id = :id"),
+            {"t": duplicate_table, "id": import_id},
+        )
+    duplicates = [
+        {"record_number": i, "record": {"email": "a@example.com", "name": "Ann"}} for i in range(1, 6)
+    ]
+    with import_audit_writer(import_id, max_rows=2):
+        record_duplicate_rows(import_id, duplicates)
+
+    listed = list_duplicate_rows(import_id, include_existing_row=True)
+    assert [row["record_number"] for row in listed] == [1, 2]
+    assert all(row["existing_row"]["record"]["email"] == "a@example.com" for row in listed)
+    assert _audit_summary(import_id)["import_duplicates"]["suppressed"] == 3
+
+    for row in listed:
+        resolve_duplicate_row(import_id, row["id"], {"name": "Ann"}, strategy="merge")
+
+    assert list_duplicate_rows(import_id) == []
+    with get_engine().connect() as conn:
+        assert conn.execute(
+            text("SELECT duplicates_found FROM import_history WHERE import_id = :id"), {"id": import_id}
+        ).scalar() == 0
@@ -0,0 +1,113 @@
+"""
+Tests for tables partitioned by import (IMPORT_PARTITIONING_ENABLED).
+"""
+
+import io
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.db.context import get_table_names
+from app.db import models
+from app.db.models import ensure_import_partition, forget_import_partitions, import_partition_name
+from app.db.session import get_engine
+from app.domain.uploads.uploaded_files import delete_imported_rows_for_file
+from app.main import app
+
+client = TestClient(app)
+
+# Not prefixed with test_ so the table listing filters are exercised
+TABLE_NAME = "partitioned_imports_demo"
+
+
+@pytest.fixture
+def partitioned_table(monkeypatch):
+    monkeypatch.setattr("app.db.models.settings.import_partitioning_enabled", True)
+    engine = get_engine()
+
+    def _cleanup():
+        with engine.begin() as conn:
+            conn.execute(text(f'DROP TABLE IF EXISTS "{TABLE_NAME}" CASCADE'))
+            conn.execute(text("DELETE FROM import_history WHERE table_name = :t"), {"t": TABLE_NAME})
+            conn.execute(text("DELETE FROM file_imports WHERE table_name = :t"), {"t": TABLE_NAME})
+
+    _cleanup()
+    yield
+    _cleanup()
+
+
+def _import_csv(file_name: str, rows: str):
+    files = {"file": (file_name, io.BytesIO(f"name,age\n{rows}".encode()), "text/csv")}
+    data = {
+        "mapping_json": json.dumps({
+            "table_name": TABLE_NAME,
+            "db_schema": {"name": "VARCHAR(255)", "age": "INTEGER"},
+            "mappings": {"name": "name", "age": "age"},
+            "duplicate_check": {"enabled": False},
+        })
+    }
+    response = client.post("/map-data", files=files, data=data)
+    assert response.status_code == 200, response.text
+
+
+def _import_ids_by_file(conn):
+    rows = conn.execute(
+        text("SELECT file_name, import_id FROM import_history WHERE table_name = :t"),
+        {"t": TABLE_NAME},
+    ).fetchall()
+    return {row[0]: str(row[1]) for row in rows}
+
+
+def test_imports_land_in_their_own_partitions_and_undo_drops_one(partitioned_table):
+    _import_csv("first.csv", "Ann,30\nBen,40\n")
+    _import_csv("second.csv", "Cat,50\n")
+
+    engine = get_engine()
+    with engine.connect() as conn:
+        relkind = conn.execute(
+            text("SELECT relkind FROM pg_class WHERE relname = :t"), {"t": TABLE_NAME}
+        ).scalar()
+        assert relkind == "p"
+
+        import_ids = _import_ids_by_file(conn)
+        first_partition = import_partition_name(TABLE_NAME, import_ids["first.csv"])
+        assert conn.execute(text(f'SELECT COUNT(*) FROM "{first_partition}"')).scalar() == 2
+        assert conn.execute(text(f'SELECT COUNT(*) FROM "{TABLE_NAME}"')).scalar() == 3
+
+    listed = [table["name"] for table in get_table_names()]
+    assert TABLE_NAME in listed
+    assert first_partition not in listed
+
+    summary = delete_imported_rows_for_file({"mapped_table_name": TABLE_NAME, "file_name": "first.csv"})
+
+    assert summary["rows_removed"] == 2
+    assert summary["import_ids"] == [import_ids["first.csv"]]
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT to_regclass(:p)"), {"p": f'"{first_partition}"'}).scalar() is None
+        remaining = conn.execute(text(f'SELECT name FROM "{TABLE_NAME}"')).scalars().all()
+        assert remaining == ["Cat"]
+        assert set(_import_ids_by_file(conn)) == {"second.csv"}
+
+
+def test_partition_check_runs_once_per_import(monkeypatch):
+    checks = []
+    real_check = models.is_partitioned_table
+
+    def _counting_check(conn, table_name):
+        checks.append(table_name)
+        return real_check(conn, table_name)
+
+    monkeypatch.setattr(models, "is_partitioned_table", _counting_check)
+    table_name = "partition_memo_demo"
+    import_id = "6f1c1d2e-0000-4000-8000-000000000001"
+
+    for _ in range(3):
+        assert ensure_import_partition(get_engine(), table_name, import_id) is None
+    assert checks == [table_name]
+
+    forget_import_partitions(table_name)
+    ensure_import_partition(get_engine(), table_name, import_id)
+    assert len(checks) == 2
+    forget_import_partitions(table_name)
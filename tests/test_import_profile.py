@@ -0,0 +1,105 @@
+"""
+Tests for per-import performance profiles stored with import history.
+"""
+
+import io
+import json
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.core.metrics import trace_stage
+from app.core.profiling import finish_import_profile, record_db_round_trip, start_import_profile
+from app.db.session import get_engine
+from app.main import app
+
+client = TestClient(app)
+
+TABLE_NAME = "test_import_profile"
+
+
+@pytest.fixture
+def cleanup_profile_table():
+    engine = get_engine()
+
+    def _cleanup():
+        with engine.begin() as conn:
+            conn.execute(text(f'DROP TABLE IF EXISTS "{TABLE_NAME}" CASCADE'))
+            conn.execute(text("DELETE FROM import_history WHERE table_name = :t"), {"t": TABLE_NAME})
+            conn.execute(text("DELETE FROM file_imports WHERE table_name = :t"), {"t": TABLE_NAME})
+
+    _cleanup()
+    yield
+    _cleanup()
+
+
+def test_profile_accumulates_stage_and_chunk_timings():
+    import_id = f"profile-{uuid.uuid4()}"
+    start_import_profile(import_id, bytes_read=1024)
+
+    with trace_stage("map", rows=100, chunk=1):
+        pass
+    with trace_stage("map", rows=50, chunk=2):
+        pass
+    with trace_stage("insert") as span:
+        span.rows = 150
+    record_db_round_trip()
+
+    profile = finish_import_profile(import_id)
+
+    assert profile["bytes_read"] == 1024
+    assert profile["db_round_trips"] == 1
+    assert profile["stages"]["map"]["calls"] == 2
+    assert profile["stages"]["map"]["rows"] == 150
+    assert profile["stages"]["insert"]["rows"] == 150
+    assert [(c["stage"], c["chunk"]) for c in profile["chunks"]] == [("map", 1), ("map", 2)]
+    assert profile["peak_rss_mb"] > 0
+    json.dumps(profile)
+
+    # Finishing twice, or spans after finishing, do nothing
+    assert finish_import_profile(import_id) is None
+    with trace_stage("map", rows=1):
+        pass
+
+
+def test_import_stores_profile_and_endpoint_returns_it(cleanup_profile_table):
+    csv_content = "name,age\nJohn Doe,30\nJane Smith,25\nBob Wilson,35\n"
+    files = {"file": ("profile.csv", io.BytesIO(csv_content.encode()), "text/csv")}
+    data = {
+        "mapping_json": json.dumps({
+            "table_name": TABLE_NAME,
+            "db_schema": {"name": "VARCHAR(255)", "age": "INTEGER"},
+            "mappings": {"name": "name", "age": "age"},
+            "duplicate_check": {"enabled": False},
+        })
+    }
+
+    response = client.post("/map-data", files=files, data=data)
+    assert response.status_code == 200
+
+    with get_engine().connect() as conn:
+        import_id = conn.execute(
+            text(f'SELECT DISTINCT _import_id FROM "{TABLE_NAME}"')
+        ).scalar_one()
+
+    response = client.get(f"/import-history/{import_id}/profile")
+    assert response.status_code == 200
+    body = response.json()
+
+    assert body["success"] is True
+    assert body["status"] == "success"
+    profile = body["profile"]
+    assert profile is not None
+    assert profile["bytes_read"] == len(csv_content.encode())
+    assert profile["db_round_trips"] > 0
+    for stage in ("parse", "map", "insert"):
+        assert stage in profile["stages"], stage
+    assert profile["stages"]["insert"]["rows"] == 3
+    assert "duration_seconds" in body["timings"]
+
+
+def test_profile_endpoint_returns_404_for_unknown_import():
+    response = client.get(f"/import-history/{uuid.uuid4()}/profile")
+    assert response.status_code == 404
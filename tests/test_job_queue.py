@@ -0,0 +1,168 @@
+"""
+Tests for the import_jobs-backed job queue and the standalone worker.
+"""
+
+import pytest
+from sqlalchemy import text
+
+from app.db.session import get_engine
+from app.domain.imports.job_queue import (
+    claim_next_job,
+    enqueue_import_job,
+    reap_expired_jobs,
+    register_job_handler,
+)
+from app.domain.imports.jobs import get_import_job
+from app.worker import JobWorker
+
+TEST_JOB_TYPE = "test_queue_job"
+SINGLE_ATTEMPT_JOB_TYPE = "test_single_attempt_job"
+
+handled_payloads = []
+
+
+@register_job_handler(TEST_JOB_TYPE)
+def _handle_test_job(job):
+    handled_payloads.append(job["payload"])
+    if job["payload"].get("fail"):
+        raise RuntimeError("boom")
+
+
+@register_job_handler(SINGLE_ATTEMPT_JOB_TYPE, max_attempts=1)
+def _handle_single_attempt_job(job):
+    handled_payloads.append(job["payload"])
+
+
+@pytest.fixture(autouse=True)
+def clean_queue():
+    handled_payloads.clear()
+    yield
+    with get_engine().begin() as conn:
+        conn.execute(
+            text("DELETE FROM import_jobs WHERE job_type IN (:job_type, :single)"),
+            {"job_type": TEST_JOB_TYPE, "single": SINGLE_ATTEMPT_JOB_TYPE},
+        )
+
+
+def _attempts(job_id):
+    with get_engine().connect() as conn:
+        return conn.execute(text("SELECT attempts FROM import_jobs WHERE id = :id"), {"id": job_id}).scalar()
+
+
+def _worker(**kwargs):
+    return JobWorker(concurrency=1, job_types=[TEST_JOB_TYPE], worker_id="test-worker", **kwargs)
+
+
+def test_worker_runs_queued_job():
+    job = enqueue_import_job(job_type=TEST_JOB_TYPE, trigger_source="test", payload={"value": 1})
+    assert job["status"] == "queued"
+    assert job["file_id"] is None
+    assert job["attempts"] == 0
+
+    _worker().run(burst=True)
+
+    assert handled_payloads == [{"value": 1}]
+    stored = get_import_job(job["id"])
+    assert stored["status"] == "succeeded"
+    assert stored["retry_attempt"] == 1
+    assert _attempts(job["id"]) == 1
+    assert stored["completed_at"] is not None
+
+
+def test_failed_job_is_retried_then_failed():
+    job = enqueue_import_job(
+        job_type=TEST_JOB_TYPE,
+        trigger_source="test",
+        payload={"fail": True},
+        max_attempts=2,
+    )
+    worker = _worker()
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("app.domain.imports.job_queue.settings.job_retry_backoff_seconds", 0)
+        assert worker.run_one() is True
+        assert get_import_job(job["id"])["status"] == "queued"
+        assert worker.run_one() is True
+
+    stored = get_import_job(job["id"])
+    assert stored["status"] == "failed"
+    assert stored["retry_attempt"] == 2
+    assert "boom" in stored["error_message"]
+    assert len(handled_payloads) == 2
+    assert worker.run_one() is False
+
+
+def test_concurrent_claims_get_different_jobs():
+    first = enqueue_import_job(job_type=TEST_JOB_TYPE, trigger_source="test", payload={"n": 1})
+    second = enqueue_import_job(job_type=TEST_JOB_TYPE, trigger_source="test", payload={"n": 2})
+
+    claim_a = claim_next_job("worker-a", job_types=[TEST_JOB_TYPE])
+    claim_b = claim_next_job("worker-b", job_types=[TEST_JOB_TYPE])
+
+    assert {claim_a["id"], claim_b["id"]} == {first["id"], second["id"]}
+    assert claim_next_job("worker-c", job_types=[TEST_JOB_TYPE]) is None
+
+
+def test_expired_lease_is_reclaimed():
+    job = enqueue_import_job(job_type=TEST_JOB_TYPE, trigger_source="test", payload={"n": 1})
+    claimed = claim_next_job("dead-worker", job_types=[TEST_JOB_TYPE])
+    assert claimed["id"] == job["id"]
+
+    # Simulate a worker that died without heartbeating
+    with get_engine().begin() as conn:
+        conn.execute(
+            text("UPDATE import_jobs SET locked_until = NOW() - INTERVAL '1 second' WHERE id = :id"),
+            {"id": job["id"]},
+        )
+
+    assert _worker().run_one() is True
+    stored = get_import_job(job["id"])
+    assert stored["status"] == "succeeded"
+    assert stored["retry_attempt"] == 2
+    assert _attempts(job["id"]) == 2
+
+
+def test_single_attempt_job_types_are_not_reclaimed():
+    job = enqueue_import_job(job_type=SINGLE_ATTEMPT_JOB_TYPE, trigger_source="test", payload={"n": 1})
+    assert job["max_attempts"] == 1
+    assert claim_next_job("dead-worker", job_types=[SINGLE_ATTEMPT_JOB_TYPE])["id"] == job["id"]
+
+    with get_engine().begin() as conn:
+        conn.execute(
+            text("UPDATE import_jobs SET locked_until = NOW() - INTERVAL '1 second' WHERE id = :id"),
+            {"id": job["id"]},
+        )
+
+    # The expired job is failed rather than handed to another worker
+    assert claim_next_job("other-worker", job_types=[SINGLE_ATTEMPT_JOB_TYPE]) is None
+    assert reap_expired_jobs() >= 1
+    assert get_import_job(job["id"])["status"] == "failed"
+    assert handled_payloads == []
+
+
+def test_map_b2_data_async_enqueues_when_queue_enabled(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app.api.routers.tasks import MAP_B2_DATA_JOB_TYPE
+    from app.main import app
+
+    monkeypatch.setattr("app.api.routers.tasks.settings.job_queue_enabled", True)
+    client = TestClient(app)
+    response = client.post("/map-b2-data-async", json={
+        "file_name": "queued.csv",
+        "mapping": {"table_name": "queued_table", "db_schema": {"id": "INTEGER"}, "mappings": {}},
+    })
+    assert response.status_code == 200
+    task_id = response.json()["task_id"]
+
+    try:
+        stored = get_import_job(task_id)
+        assert stored["job_type"] == MAP_B2_DATA_JOB_TYPE
+        assert stored["status"] == "queued"
+
+        status_response = client.get(f"/tasks/{task_id}")
+        assert status_response.status_code == 200
+        assert status_response.json()["status"] == "pending"
+    finally:
+        with get_engine().begin() as conn:
+            conn.execute(text("DELETE FROM import_jobs WHERE id = :id"), {"id": task_id})
@@ -0,0 +1,122 @@
+"""
+Tests for stage spans and the Prometheus /metrics endpoint.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.core.metrics import (
+    CACHE_REQUESTS,
+    DB_POOL_WAIT,
+    DB_QUERY_DURATION,
+    STAGE_DURATION,
+    STAGE_ERRORS,
+    STAGE_ROWS,
+    MetricsRegistry,
+    record_cache_lookup,
+    trace_stage,
+)
+from app.db.session import get_engine
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_registry_renders_prometheus_text_format():
+    registry = MetricsRegistry()
+    counter = registry.counter("demo_requests_total", "Requests.", ("route",))
+    histogram = registry.histogram("demo_latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    counter.inc(route='/a"b')
+    counter.inc(2, route='/a"b')
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5)
+
+    assert registry.counter("demo_requests_total", "Requests.", ("route",)) is counter
+    with pytest.raises(ValueError):
+        counter.inc(route="/a", method="GET")
+
+    lines = registry.render().splitlines()
+    assert lines[:2] == ["# HELP demo_latency_seconds Latency.", "# TYPE demo_latency_seconds histogram"]
+    assert 'demo_latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'demo_latency_seconds_bucket{le="1"} 2' in lines
+    assert 'demo_latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert "demo_latency_seconds_sum 5.55" in lines
+    assert "demo_latency_seconds_count 3" in lines
+    assert "# TYPE demo_requests_total counter" in lines
+    assert 'demo_requests_total{route="/a\\"b"} 3' in lines
+
+
+def test_trace_stage_records_latency_rows_and_errors():
+    count_before, _ = STAGE_DURATION.snapshot(stage="test_stage")
+    rows_before = STAGE_ROWS.value(stage="test_stage")
+    errors_before = STAGE_ERRORS.value(stage="test_stage")
+
+    with trace_stage("test_stage") as span:
+        span.rows = 250
+    assert span.duration is not None and span.duration >= 0
+
+    with pytest.raises(RuntimeError):
+        with trace_stage("test_stage", rows=10):
+            raise RuntimeError("boom")
+
+    count_after, _ = STAGE_DURATION.snapshot(stage="test_stage")
+    assert count_after == count_before + 2
+    assert STAGE_ROWS.value(stage="test_stage") == rows_before + 260
+    assert STAGE_ERRORS.value(stage="test_stage") == errors_before + 1
+
+
+def test_metrics_endpoint_exposes_stage_cache_and_database_metrics(monkeypatch):
+    monkeypatch.setattr("app.main.settings.metrics_enabled", True)
+    with get_engine().connect() as conn:
+        conn.execute(text("SELECT 1"))
+    record_cache_lookup("test_cache", True)
+    record_cache_lookup("test_cache", False)
+    with trace_stage("parse", rows=3):
+        pass
+
+    assert DB_POOL_WAIT.snapshot()[0] > 0
+    assert DB_QUERY_DURATION.snapshot(statement="SELECT")[0] > 0
+    assert CACHE_REQUESTS.value(cache="test_cache", result="hit") >= 1
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'content_atlas_stage_duration_seconds_count{stage="parse"}' in body
+    assert 'content_atlas_stage_rows_total{stage="parse"}' in body
+    assert 'content_atlas_cache_requests_total{cache="test_cache",result="miss"}' in body
+    assert 'content_atlas_db_query_duration_seconds_bucket{statement="SELECT",le="+Inf"}' in body
+    assert "content_atlas_db_pool_wait_seconds_count" in body
+
+
+def test_metrics_endpoint_can_be_disabled(monkeypatch):
+    monkeypatch.setattr("app.main.settings.metrics_enabled", False)
+    assert client.get("/metrics").status_code == 404
+
+
+def test_metrics_endpoint_is_off_by_default_and_honours_the_allowlist(monkeypatch):
+    from app.core.config import Settings
+
+    assert Settings.model_fields["metrics_enabled"].default is False
+    monkeypatch.setattr("app.main.settings.metrics_enabled", True)
+    monkeypatch.setattr("app.main.settings.metrics_allowed_ips", "10.0.0.5")
+    assert client.get("/metrics").status_code == 403
+
+    # TestClient requests come from the "testclient" host
+    monkeypatch.setattr("app.main.settings.metrics_allowed_ips", "10.0.0.5, testclient")
+    assert client.get("/metrics").status_code == 200
+
+
+def test_metrics_endpoint_exports_table_lock_waits(monkeypatch):
+    from app.utils.locks import TableLockManager
+
+    monkeypatch.setattr("app.main.settings.metrics_enabled", True)
+    with TableLockManager.acquire("test_metrics_lock_table"):
+        pass
+
+    body = client.get("/metrics").text
+    assert 'content_atlas_table_lock_wait_seconds_count{table="test_metrics_lock_table"}' in body
+    assert 'content_atlas_table_lock_held_seconds_total{table="test_metrics_lock_table"}' in body
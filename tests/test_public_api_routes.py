@@ -75,3 +75,23 @@ def test_public_query_succeeds_with_stubbed_dependencies(monkeypatch):
     assert data["response"] == fake_result["response"]
     assert data["executed_sql"] == fake_result["executed_sql"]
     assert data["rows_returned"] == fake_result["rows_returned"]
+
+
+def test_public_and_internal_table_listings_hide_the_same_system_tables():
+    from app.db.system_tables import SYSTEM_TABLES
+    from app.domain.imports.history import create_import_history_table
+
+    create_import_history_table()
+    app.dependency_overrides[get_api_key_from_header] = lambda: SimpleNamespace(
+        id="stub-api-key", app_name="test-client"
+    )
+
+    public_response = client.get("/api/v1/tables")
+    internal_response = client.get("/tables")
+    assert public_response.status_code == 200, public_response.text
+    assert internal_response.status_code == 200, internal_response.text
+
+    public_tables = {table["table_name"] for table in public_response.json()["tables"]}
+    internal_tables = {table["table_name"] for table in internal_response.json()["tables"]}
+    assert public_tables == internal_tables
+    assert not public_tables & SYSTEM_TABLES
@@ -0,0 +1,115 @@
+"""
+Tests for the Postgres-backed query agent checkpointer.
+"""
+
+import secrets
+import uuid
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import END, START, MessagesState, StateGraph
+from sqlalchemy import text
+
+from app.db.session import get_engine
+from app.domain.queries import history
+from app.domain.queries.checkpointer import PostgresCheckpointSaver
+
+
+def _echo_graph(checkpointer):
+    def respond(state: MessagesState):
+        return {"messages": [AIMessage(content=f"turn {len(state['messages'])}: {state['messages'][-1].content}")]}
+
+    builder = StateGraph(MessagesState)
+    builder.add_node("respond", respond)
+    builder.add_edge(START, "respond")
+    builder.add_edge("respond", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+@pytest.fixture(autouse=True)
+def checkpoint_tables(monkeypatch):
+    # Other suites drop every table they do not know about; re-create ours
+    monkeypatch.setattr(history, "_query_history_tables_initialized", False)
+    history.ensure_query_history_tables_exist()
+
+
+@pytest.fixture
+def thread_id():
+    thread = f"test-checkpoint-{uuid.uuid4()}"
+    yield thread
+    PostgresCheckpointSaver().delete_thread(thread)
+
+
+def _config(thread: str):
+    return {"configurable": {"thread_id": thread}}
+
+
+def test_conversation_survives_a_new_saver_instance(thread_id):
+    graph = _echo_graph(PostgresCheckpointSaver())
+    graph.invoke({"messages": [HumanMessage(content="hello")]}, _config(thread_id))
+    graph.invoke({"messages": [HumanMessage(content="again")]}, _config(thread_id))
+
+    # A fresh saver (e.g. after a restart) has an empty hot tier and reads Postgres
+    restarted = _echo_graph(PostgresCheckpointSaver())
+    result = restarted.invoke({"messages": [HumanMessage(content="third")]}, _config(thread_id))
+
+    contents = [message.content for message in result["messages"]]
+    assert contents == ["hello", "turn 1: hello", "again", "turn 3: again", "third", "turn 5: third"]
+
+    with get_engine().connect() as conn:
+        rows = conn.execute(
+            text("SELECT COUNT(*) FROM query_checkpoints WHERE thread_id = :t"), {"t": thread_id}
+        ).scalar()
+    assert rows == 1
+
+
+def test_hot_tier_is_bounded_and_stale_entries_are_reloaded(thread_id, monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.query_checkpoint_hot_max_threads", 2)
+    saver = PostgresCheckpointSaver()
+    graph = _echo_graph(saver)
+    other_threads = [f"{thread_id}-{index}" for index in range(3)]
+    try:
+        for thread in [thread_id, *other_threads]:
+            graph.invoke({"messages": [HumanMessage(content="hi")]}, _config(thread))
+        assert saver.hot_stats()["threads"] == 2
+
+        # Another process advances a thread this saver still holds in memory
+        _echo_graph(PostgresCheckpointSaver()).invoke(
+            {"messages": [HumanMessage(content="elsewhere")]}, _config(other_threads[-1])
+        )
+        state = graph.get_state(_config(other_threads[-1]))
+        assert [message.content for message in state.values["messages"]][-1] == "turn 3: elsewhere"
+    finally:
+        for thread in other_threads:
+            saver.delete_thread(thread)
+
+
+def test_threads_over_the_size_cap_are_served_from_postgres(thread_id, monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.query_checkpoint_hot_max_thread_kb", 1)
+    saver = PostgresCheckpointSaver()
+    graph = _echo_graph(saver)
+
+    graph.invoke({"messages": [HumanMessage(content=secrets.token_hex(4000))]}, _config(thread_id))
+    assert saver.hot_stats()["threads"] == 0
+
+    result = graph.invoke({"messages": [HumanMessage(content="short")]}, _config(thread_id))
+    assert len(result["messages"]) == 4
+
+
+def test_interactive_analysis_conversations_are_shared_and_discarded(thread_id):
+    from app.api.routers.analysis.interactive import discard_interactive_session
+    from app.domain.queries import analyzer
+
+    interactive_agent = analyzer.create_file_analyzer_agent(max_iterations=3, interactive_mode=True)
+    assert isinstance(interactive_agent.checkpointer, PostgresCheckpointSaver)
+    # One-shot analyses are never resumed, so they keep no conversation
+    assert analyzer.create_file_analyzer_agent(max_iterations=3).checkpointer is None
+
+    _echo_graph(analyzer._file_analyzer_checkpointer).invoke(
+        {"messages": [HumanMessage(content="map this file")]}, _config(thread_id)
+    )
+    # Another API worker resumes the session from Postgres
+    assert PostgresCheckpointSaver().get_tuple(_config(thread_id)) is not None
+
+    discard_interactive_session(thread_id)
+    assert PostgresCheckpointSaver().get_tuple(_config(thread_id)) is None
@@ -0,0 +1,50 @@
+"""
+Tests for the planner cost guard (app.domain.queries.cost_guard).
+"""
+
+import pytest
+
+from app.db.session import get_engine
+from app.domain.queries.agent import _detect_postgresql_error, execute_sql_query
+from app.domain.queries.cost_guard import QueryCostExceeded, guard_query_cost
+
+CROSS_JOIN = "SELECT a.x, b.y FROM generate_series(1, 1000000) AS a(x), generate_series(1, 1000000) AS b(y)"
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.query_max_plan_cost", 1000000)
+    monkeypatch.setattr("app.core.config.settings.query_max_plan_rows", 10000000)
+
+
+def test_cheap_queries_run_unchanged(limits):
+    sql = "SELECT x FROM generate_series(1, 100) AS s(x) ORDER BY x"
+    with get_engine().connect() as conn:
+        assert guard_query_cost(conn, sql, row_limit=10) == sql
+
+
+def test_over_budget_query_is_rewritten_with_limit(limits):
+    with get_engine().connect() as conn:
+        rewritten = guard_query_cost(conn, CROSS_JOIN + ";", row_limit=10)
+        assert rewritten.endswith("LIMIT 10")
+        assert len(conn.exec_driver_sql(rewritten).fetchall()) == 10
+
+
+def test_unbounded_sort_is_rejected_with_recovery_hints(limits):
+    with get_engine().connect() as conn:
+        with pytest.raises(QueryCostExceeded) as rejected:
+            guard_query_cost(conn, CROSS_JOIN + " ORDER BY a.x + b.y", row_limit=10)
+
+    message = str(rejected.value)
+    assert message.startswith("ERROR: Query rejected by cost guard")
+    assert "ON condition" in message
+    recovery = _detect_postgresql_error(message)
+    assert recovery and "regenerate a narrower query" in recovery
+
+
+def test_agent_tool_returns_the_rejection(limits, monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.query_max_plan_rows", 0)
+    result = execute_sql_query.invoke(
+        "SELECT COUNT(*) FROM generate_series(1, 1000000) AS a(x), generate_series(1, 1000000) AS b(y)"
+    )
+    assert result.startswith("ERROR: Query rejected by cost guard")
@@ -0,0 +1,84 @@
+"""
+Tests for read-replica routing (app.db.session.get_read_engine).
+"""
+
+import uuid
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from app.core.config import settings
+from app.db import session as session_module
+from app.db.session import get_engine, get_read_engine
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    # The primary stands in for the replica; the replica engine is read-only either way
+    monkeypatch.setattr("app.core.config.settings.read_database_url", settings.database_url)
+    monkeypatch.setattr("app.core.config.settings.read_replica_freshness_seconds", 60)
+    monkeypatch.setattr(session_module, "_read_engine", None)
+    monkeypatch.setattr(session_module, "_replica_lag", (0.0, float("-inf")))
+    monkeypatch.setattr(session_module, "_recent_imports", (frozenset(), float("-inf")))
+    yield
+    if session_module._read_engine is not None:
+        session_module._read_engine.dispose()
+
+
+@pytest.fixture
+def table_names():
+    names = {"stale": f"replica_stale_{uuid.uuid4().hex[:8]}", "fresh": f"replica_fresh_{uuid.uuid4().hex[:8]}"}
+    import_id = str(uuid.uuid4())
+    with get_engine().begin() as conn:
+        conn.execute(text("""
+            INSERT INTO import_history (import_id, source_type, table_name, status)
+            VALUES (:id, 'api_direct', :t, 'success')
+        """), {"id": import_id, "t": names["fresh"]})
+    yield names
+    with get_engine().begin() as conn:
+        conn.execute(text("DELETE FROM import_history WHERE import_id = :id"), {"id": import_id})
+
+
+def test_primary_is_used_without_a_replica(monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.read_database_url", "")
+    assert get_read_engine(["anything"]) is get_engine()
+
+
+def test_reads_go_to_a_read_only_replica(replica, table_names):
+    engine = get_read_engine([table_names["stale"]])
+    assert engine is not get_engine()
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+        with pytest.raises(DBAPIError, match="read-only"):
+            conn.execute(text("CREATE TABLE replica_write_attempt (id INT)"))
+
+
+def test_recently_imported_tables_read_from_the_primary(replica, table_names):
+    primary = get_engine()
+    assert get_read_engine([table_names["fresh"]]) is primary
+    assert get_read_engine(sql=f'SELECT COUNT(*) FROM "{table_names["fresh"]}"') is primary
+    assert get_read_engine(sql=f'SELECT COUNT(*) FROM "{table_names["stale"]}"') is not primary
+    # Without knowing the tables read, any recent import keeps the read on the primary
+    assert get_read_engine() is primary
+
+
+def test_lagging_replica_falls_back_to_the_primary(replica, table_names, monkeypatch):
+    monkeypatch.setattr(session_module, "_replica_lag", (120.0, float("inf")))
+    assert get_read_engine([table_names["stale"]]) is get_engine()
+
+
+def test_recent_imports_are_cached_and_updated_by_local_imports(replica, table_names, monkeypatch):
+    local_table = f"replica_local_{uuid.uuid4().hex[:8]}"
+    assert get_read_engine([local_table]) is not get_engine()
+
+    queries = []
+    real_engine = session_module.get_engine
+    monkeypatch.setattr(session_module, "get_engine", lambda: queries.append(1) or real_engine())
+    # Within the check interval routed reads do not query the primary again
+    assert get_read_engine([table_names["stale"]]) is not real_engine()
+    assert queries == []
+
+    session_module.note_table_imported(local_table)
+    assert get_read_engine([local_table]) is real_engine()
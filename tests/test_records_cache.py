@@ -0,0 +1,143 @@
+"""
+Tests for the bounded parsed-records cache (app.core.records_cache).
+"""
+
+import io
+import json
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.api.dependencies import records_cache as shared_records_cache
+from app.core import records_cache as records_cache_module
+from app.core.records_cache import RecordsCache, estimate_records_bytes
+from app.db.session import get_engine
+from app.main import app
+
+MB = 1024 * 1024
+
+
+def _records(count: int, width: int = 50):
+    return [{"id": str(i), "payload": "x" * width} for i in range(count)]
+
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path):
+    monkeypatch.setattr("app.core.config.settings.records_cache_ttl_seconds", 300)
+    monkeypatch.setattr("app.core.config.settings.records_cache_max_memory_mb", 1)
+    monkeypatch.setattr("app.core.config.settings.records_cache_spill_min_mb", 64)
+    monkeypatch.setattr("app.core.config.settings.records_cache_max_disk_mb", 0)
+    monkeypatch.setattr("app.core.config.settings.records_cache_spill_dir", str(tmp_path))
+    monkeypatch.setattr("app.core.config.settings.records_cache_sweep_interval_seconds", 0)
+    instance = RecordsCache()
+    yield instance
+    instance.close()
+
+
+def test_memory_budget_evicts_least_recently_used(cache):
+    batch = _records(1200)
+    per_entry = estimate_records_bytes(batch)
+    assert MB / 3 < per_entry <= MB / 2
+
+    cache.put("a", batch)
+    cache.put("b", _records(1200))
+    assert cache.get("a") is batch  # "a" is now the most recently used
+    cache.put("c", _records(1200))
+
+    assert "a" in cache and "c" in cache
+    assert "b" not in cache
+    assert cache.stats()["memory_bytes"] <= MB
+
+
+def test_entries_expire_after_ttl_and_sweep_removes_them(cache, monkeypatch):
+    cache.put("a", _records(10))
+    cache.put("b", _records(10))
+
+    monkeypatch.setattr("app.core.config.settings.records_cache_ttl_seconds", 0)
+    assert cache.get("a") is None
+    assert cache.sweep() == 1
+    assert len(cache) == 0
+    assert cache.stats()["memory_bytes"] == 0
+
+
+def test_large_entries_spill_to_disk_and_reload(cache, monkeypatch, tmp_path):
+    monkeypatch.setattr("app.core.config.settings.records_cache_spill_min_mb", 0)
+    monkeypatch.setattr("app.core.config.settings.records_cache_max_disk_mb", 10)
+    monkeypatch.setattr(records_cache_module, "_arrow_available", lambda: False)
+    mixed = [{"id": 1, "name": "Ann", "score": 1.5}, {"id": "2", "name": None}]
+
+    assert cache.put("spilled", mixed, file_name="mixed.csv")
+
+    stats = cache.stats()
+    assert stats["spilled_entries"] == 1
+    assert stats["memory_bytes"] == 0
+    assert stats["disk_bytes"] > 0
+    assert cache.get("spilled") == mixed
+
+    spill_files = [name for _, _, names in os.walk(tmp_path) for name in names]
+    assert len(spill_files) == 1
+    cache.discard("spilled")
+    assert [name for _, _, names in os.walk(tmp_path) for name in names] == []
+
+
+def test_arrow_spill_round_trips_uniform_records(cache, monkeypatch):
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr("app.core.config.settings.records_cache_spill_min_mb", 0)
+    monkeypatch.setattr("app.core.config.settings.records_cache_max_disk_mb", 10)
+    records = [{"id": i, "name": f"row {i}", "score": i / 2, "flag": i % 2 == 0, "note": None} for i in range(100)]
+
+    cache.put("arrow", records)
+
+    assert cache._entries["arrow"].spill_format == "arrow"
+    assert cache.get("arrow") == records
+
+
+def test_oversized_entries_are_not_cached(cache):
+    assert cache.put("huge", _records(10000)) is False
+    assert "huge" not in cache
+
+
+def test_detect_mapping_records_are_reused_by_map_data(monkeypatch):
+    table_name = "test_records_cache_reuse"
+    csv_content = b"name,age\nAnn,30\nBen,40\n"
+    shared_records_cache.clear()
+
+    def _cleanup():
+        with get_engine().begin() as conn:
+            conn.execute(text(f'DROP TABLE IF EXISTS "{table_name}" CASCADE'))
+            conn.execute(text("DELETE FROM import_history WHERE table_name = :t"), {"t": table_name})
+            conn.execute(text("DELETE FROM file_imports WHERE table_name = :t"), {"t": table_name})
+
+    _cleanup()
+    client = TestClient(app)
+    try:
+        response = client.post("/detect-mapping", files={"file": ("cache.csv", io.BytesIO(csv_content), "text/csv")})
+        assert response.status_code == 200, response.text
+        assert len(shared_records_cache) == 1
+
+        parsed = []
+        from app.domain.imports import orchestrator
+        original = orchestrator.execute_data_import
+
+        def _spy(*args, **kwargs):
+            parsed.append(kwargs.get("pre_parsed_records"))
+            return original(*args, **kwargs)
+
+        monkeypatch.setattr(orchestrator, "execute_data_import", _spy)
+        response = client.post(
+            "/map-data",
+            files={"file": ("cache.csv", io.BytesIO(csv_content), "text/csv")},
+            data={"mapping_json": json.dumps({
+                "table_name": table_name,
+                "db_schema": {"name": "VARCHAR(255)", "age": "INTEGER"},
+                "mappings": {"name": "name", "age": "age"},
+                "duplicate_check": {"enabled": False},
+            })},
+        )
+        assert response.status_code == 200, response.text
+        assert parsed and parsed[0] is not None and len(parsed[0]) == 2
+    finally:
+        shared_records_cache.clear()
+        _cleanup()
@@ -0,0 +1,120 @@
+"""
+Tests for the running-query registry and cancellation (app.domain.queries.running).
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.core.api_key_auth import create_api_key, init_api_key_tables
+from app.db.session import get_db, get_engine
+from app.domain.queries.agent import execute_sql_query
+from app.domain.queries.running import (
+    QueryCancelled,
+    cancel_query,
+    list_running_queries,
+    register_query,
+    run_cancelling_on_disconnect,
+    running_queries,
+    track_query,
+)
+from app.main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def headers():
+    init_api_key_tables()
+    db = next(get_db())
+    try:
+        _, plain_key = create_api_key(db=db, app_name="test-running-queries", description="Running query tests")
+    finally:
+        db.close()
+    return {"X-API-Key": plain_key}
+
+
+def _wait_for_running(source, headers):
+    for _ in range(100):
+        queries = client.get("/queries/running", headers=headers).json()["queries"]
+        matching = [query for query in queries if query["source"] == source]
+        if matching:
+            return matching[0]
+        time.sleep(0.05)
+    raise AssertionError(f"No running {source} query was registered")
+
+
+def test_agent_query_is_listed_and_cancelled(headers):
+    result = {}
+
+    def run():
+        result["output"] = execute_sql_query.invoke(
+            {"sql_query": "SELECT pg_sleep(20)"}, {"configurable": {"thread_id": "thread-cancel"}}
+        )
+
+    worker = threading.Thread(target=run)
+    worker.start()
+    query = _wait_for_running("agent", headers)
+    assert query["thread_id"] == "thread-cancel"
+    assert query["sql"] == "SELECT pg_sleep(20)"
+    assert query["pid"] > 0
+
+    response = client.delete(f"/api/v1/queries/{query['query_id']}", headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["cancelled"] is True
+
+    worker.join(timeout=10)
+    assert not worker.is_alive()
+    assert "canceling statement due to user request" in result["output"]
+    assert query["query_id"] not in running_queries
+    assert client.delete(f"/queries/{query['query_id']}", headers=headers).status_code == 404
+
+
+def test_endpoints_require_an_api_key():
+    assert client.get("/queries/running").status_code == 401
+    assert client.delete("/api/v1/queries/anything").status_code == 401
+
+
+def test_pooled_connection_is_not_cancelled_after_its_query_ends():
+    with get_engine().connect() as conn:
+        query_id = register_query(conn, "SELECT 1", "export")
+        conn.execute(text("SELECT 1"))
+        # The query's transaction ends and the connection moves on, but the entry is left behind
+        conn.commit()
+        assert conn.execute(text("SHOW application_name")).scalar() != query_id
+
+        assert cancel_query(query_id) is None
+        assert query_id not in running_queries
+
+
+def test_listing_drops_entries_whose_backend_is_gone():
+    with get_engine().connect() as conn:
+        query_id = register_query(conn, "SELECT 1", "export")
+        assert query_id in [query["query_id"] for query in list_running_queries()]
+        conn.rollback()
+
+    assert query_id not in [query["query_id"] for query in list_running_queries()]
+    assert query_id not in running_queries
+
+
+class _DisconnectedRequest:
+    async def is_disconnected(self):
+        return True
+
+
+def test_client_disconnect_cancels_the_query():
+    def run_query(query_id):
+        with get_engine().connect() as conn:
+            with track_query(conn, "SELECT pg_sleep(20)", "export", query_id=query_id):
+                conn.execute(text("SELECT pg_sleep(20)"))
+
+    started = time.monotonic()
+    with pytest.raises(QueryCancelled):
+        asyncio.run(run_cancelling_on_disconnect(_DisconnectedRequest(), "disconnect-test", run_query, "disconnect-test"))
+
+    assert time.monotonic() - started < 10
+    assert "disconnect-test" not in running_queries
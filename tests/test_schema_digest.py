@@ -0,0 +1,98 @@
+"""
+Tests for the query agent's schema digest (app.domain.queries.schema_digest).
+"""
+
+import uuid
+
+import pytest
+from sqlalchemy import text
+
+from app.db.session import get_engine
+from app.domain.queries import schema_digest
+from app.domain.queries.schema_digest import (
+    estimate_tokens,
+    format_schema_digest,
+    load_schema_digests,
+    rank_tables,
+    refresh_schema_digest,
+)
+
+
+def _digest(table, columns, row_count=100, purpose=None):
+    return {
+        "table": table,
+        "row_count": row_count,
+        "purpose": purpose,
+        "domain": None,
+        "entities": [],
+        "columns": [{"name": name, "type": "text"} for name in columns],
+    }
+
+
+DIGESTS = {
+    "orders": _digest("orders", ["order_id", "customer_id", "amount", "status"], purpose="Customer purchase orders"),
+    "customers": _digest("customers", ["customer_id", "name", "email", "country"], row_count=50),
+    "web_traffic": _digest("web_traffic", ["page", "visits", "day"], row_count=10000),
+}
+
+
+def test_tables_are_ranked_by_lexical_relevance():
+    assert rank_tables("total order amount by status", DIGESTS)[0] == "orders"
+    assert rank_tables("customers in each country", DIGESTS)[0] == "customers"
+    # Without any matching terms the largest tables come first
+    assert rank_tables("hello", DIGESTS)[0] == "web_traffic"
+
+
+def test_digest_fits_the_token_budget():
+    full = format_schema_digest("order amount by status", DIGESTS, token_budget=10000)
+    assert "  - status: text" in full
+    assert '"customers"' in full and '"web_traffic"' in full
+
+    tight = format_schema_digest("order amount by status", DIGESTS, token_budget=110)
+    assert estimate_tokens(tight) <= 110
+    assert "  - status: text" in tight
+    assert "  - visits: text" not in tight
+    assert "web_traffic" in tight
+
+
+@pytest.fixture
+def digest_table(monkeypatch):
+    # Other suites drop every table they do not know about; re-create ours
+    monkeypatch.setattr(schema_digest, "_table_initialized", False)
+    table_name = f"digest_orders_{uuid.uuid4().hex[:8]}"
+    with get_engine().begin() as conn:
+        conn.execute(text(f'CREATE TABLE "{table_name}" (id SERIAL PRIMARY KEY, status TEXT, amount NUMERIC, _import_id UUID)'))
+        conn.execute(text(f"""
+            INSERT INTO "{table_name}" (status, amount)
+            SELECT (ARRAY['paid', 'pending', 'refunded'])[1 + i % 3], i FROM generate_series(1, 300) AS i
+        """))
+    yield table_name
+    with get_engine().begin() as conn:
+        conn.execute(text(f'DROP TABLE IF EXISTS "{table_name}"'))
+        conn.execute(text("DELETE FROM schema_digests WHERE table_name = :t"), {"t": table_name})
+
+
+def test_digest_is_built_from_statistics_and_follows_ddl(digest_table):
+    digest = load_schema_digests()[digest_table]
+
+    assert digest["row_count"] == 300
+    columns = {column["name"]: column for column in digest["columns"]}
+    assert set(columns) == {"status", "amount"}
+    assert sorted(columns["status"]["top_values"]) == ["paid", "pending", "refunded"]
+    assert columns["amount"]["range"] == ["1", "300"]
+
+    with get_engine().begin() as conn:
+        conn.execute(text(f'ALTER TABLE "{digest_table}" ADD COLUMN region TEXT'))
+    assert "region" in [column["name"] for column in load_schema_digests()[digest_table]["columns"]]
+
+    with get_engine().begin() as conn:
+        conn.execute(text(f'INSERT INTO "{digest_table}" (status, amount) VALUES (\'paid\', 1)'))
+    assert refresh_schema_digest(digest_table)["row_count"] == 301
+
+    with get_engine().begin() as conn:
+        conn.execute(text(f'DROP TABLE "{digest_table}"'))
+    assert digest_table not in load_schema_digests()
+    with get_engine().connect() as conn:
+        assert conn.execute(
+            text("SELECT COUNT(*) FROM schema_digests WHERE table_name = :t"), {"t": digest_table}
+        ).scalar() == 0
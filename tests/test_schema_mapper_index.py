@@ -0,0 +1,54 @@
+"""
+Tests for the cached column-match index behind schema_mapper.find_column_mapping.
+"""
+
+from app.domain.imports.schema_mapper import (
+    calculate_similarity,
+    find_column_mapping,
+    get_column_match_index,
+    normalize_column_name,
+)
+
+
+def _brute_force_fuzzy(source, targets, threshold):
+    best, best_score = None, 0.0
+    for target in targets:
+        score = calculate_similarity(normalize_column_name(source), normalize_column_name(target))
+        if score > best_score and score >= threshold:
+            best, best_score = target, score
+    return best
+
+
+def test_fuzzy_matches_agree_with_pairwise_scan():
+    targets = ["customer_identifier", "order_total", "order_date", "shipping_addr", "billing_addr", "sku_code"]
+    sources = ["Customer ID", "Order Totals", "Ship Address", "Bill Address", "SKU", "Unrelated Thing"]
+
+    mapping = find_column_mapping(sources, targets, similarity_threshold=0.6)
+
+    for source in sources:
+        assert mapping[source] == _brute_force_fuzzy(source, targets, 0.6)
+
+
+def test_exact_and_semantic_matches_take_priority():
+    mapping = find_column_mapping(
+        ["Email Address", "Surname", "Company"],
+        ["email", "last_name", "company_name", "emails"],
+    )
+
+    assert mapping == {
+        "Email Address": "email",
+        "Surname": "last_name",
+        "Company": "company_name",
+    }
+
+
+def test_index_is_cached_per_schema_and_returns_scored_candidates():
+    targets = ("first_name", "last_name", "full_name")
+    index = get_column_match_index(targets)
+    assert get_column_match_index(targets) is index
+    assert get_column_match_index(targets + ("email",)) is not index
+
+    candidates = index.scored_candidates("Last Nme", k=2)
+    assert [name for name, _ in candidates] == ["last_name", "first_name"]
+    assert candidates[0][1] > candidates[1][1]
+    assert candidates[0][1] == calculate_similarity("lastnme", "lastname")
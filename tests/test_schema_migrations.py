@@ -538,3 +538,200 @@ def test_drop_column_missing_name_raises():
 
     with pytest.raises(SchemaMigrationError):
         apply_schema_migrations(engine, table_name, migrations)
+
+
+def test_online_replace_column_backfills_in_batches(monkeypatch):
+    from app.db.session import get_engine
+
+    engine = get_engine()
+    table_name = "test_online_schema_migration"
+    monkeypatch.setattr(
+        "app.domain.imports.schema_migrations.settings.schema_migration_batch_size", 7
+    )
+    monkeypatch.setattr(
+        "app.domain.imports.schema_migrations.settings.schema_migration_batch_sleep_seconds", 0
+    )
+
+    with engine.begin() as conn:
+        conn.execute(text(f'DROP TABLE IF EXISTS "{table_name}"'))
+        conn.execute(
+            text(
+                f'''
+                CREATE TABLE "{table_name}" (
+                    _row_id SERIAL PRIMARY KEY,
+                    budget INTEGER
+                )
+                '''
+            )
+        )
+        conn.execute(
+            text(
+                f'''
+                INSERT INTO "{table_name}" (budget)
+                SELECT CASE WHEN n % 5 = 0 THEN NULL ELSE n * 10 END
+                FROM generate_series(1, 25) AS n
+                '''
+            )
+        )
+
+    migrations = [
+        {"action": "replace_column", "column_name": "budget", "new_type": "TEXT"},
+        {
+            "action": "add_column",
+            "new_column": {"name": "budget_copy", "type": "TEXT", "copy_from": "budget"},
+        },
+    ]
+    progress = []
+
+    try:
+        results = apply_schema_migrations(
+            engine, table_name, migrations, online=True, progress_callback=progress.append
+        )
+
+        assert [(r["action"], r["status"], r["mode"]) for r in results] == [
+            ("replace_column", "applied", "online"),
+            ("add_column", "applied", "online"),
+        ]
+        assert results[0]["rows_backfilled"] == 25
+        # 25 rows in batches of 7, for each of the two migrations
+        assert [p["batches"] for p in progress] == [1, 2, 3, 4, 1, 2, 3, 4]
+        assert progress[3]["last_row_id"] == 25
+
+        with engine.connect() as conn:
+            rows = conn.execute(
+                text(
+                    f'''
+                    SELECT budget, budget_legacy, budget_copy
+                    FROM "{table_name}"
+                    ORDER BY _row_id
+                    '''
+                )
+            ).fetchall()
+        assert rows[0] == ("10", 10, "10")
+        assert rows[4] == (None, None, None)
+
+        assert apply_schema_migrations(engine, table_name, migrations, online=True) == [
+            {
+                "action": "replace_column",
+                "old_column": "budget",
+                "new_column": "budget",
+                "status": "already_applied",
+            },
+            {
+                "action": "add_column",
+                "new_column": "budget_copy",
+                "status": "already_applied",
+            },
+        ]
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f'DROP TABLE IF EXISTS "{table_name}"'))
+
+
+def _create_online_table(engine, table_name, rows=25):
+    with engine.begin() as conn:
+        conn.execute(text(f'DROP TABLE IF EXISTS "{table_name}"'))
+        conn.execute(
+            text(f'CREATE TABLE "{table_name}" (_row_id SERIAL PRIMARY KEY, budget INTEGER)')
+        )
+        conn.execute(
+            text(
+                f'INSERT INTO "{table_name}" (budget) '
+                f'SELECT n * 10 FROM generate_series(1, {rows}) AS n'
+            )
+        )
+
+
+def _sync_triggers(engine, table_name):
+    with engine.connect() as conn:
+        return conn.execute(
+            text(
+                "SELECT tgname FROM pg_trigger "
+                "WHERE tgrelid = to_regclass(:table) AND NOT tgisinternal"
+            ),
+            {"table": f'"{table_name}"'},
+        ).fetchall()
+
+
+def test_online_backfill_keeps_rows_written_during_the_copy(monkeypatch):
+    from app.db.session import get_engine
+
+    engine = get_engine()
+    table_name = "test_online_schema_migration_writes"
+    monkeypatch.setattr(
+        "app.domain.imports.schema_migrations.settings.schema_migration_batch_size", 10
+    )
+    monkeypatch.setattr(
+        "app.domain.imports.schema_migrations.settings.schema_migration_batch_sleep_seconds", 0
+    )
+    _create_online_table(engine, table_name)
+
+    def write_during_backfill(progress):
+        if progress["batches"] != 1:
+            return
+        # Row 1 was already copied; row 20 is still ahead of the backfill
+        with engine.begin() as conn:
+            conn.execute(text(f'UPDATE "{table_name}" SET budget = 999 WHERE _row_id IN (1, 20)'))
+            conn.execute(text(f'INSERT INTO "{table_name}" (budget) VALUES (5)'))
+
+    migrations = [{"action": "replace_column", "column_name": "budget", "new_type": "TEXT"}]
+    try:
+        apply_schema_migrations(
+            engine, table_name, migrations, online=True, progress_callback=write_during_backfill
+        )
+
+        with engine.connect() as conn:
+            rows = dict(
+                conn.execute(
+                    text(f'SELECT _row_id, budget FROM "{table_name}" WHERE _row_id IN (1, 2, 20, 26)')
+                ).fetchall()
+            )
+        assert rows == {1: "999", 2: "20", 20: "999", 26: "5"}
+        assert _sync_triggers(engine, table_name) == []
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f'DROP TABLE IF EXISTS "{table_name}"'))
+
+
+def test_online_migration_failure_keeps_earlier_migrations(monkeypatch):
+    from app.db.session import get_engine
+
+    engine = get_engine()
+    table_name = "test_online_schema_migration_partial"
+    monkeypatch.setattr(
+        "app.domain.imports.schema_migrations.settings.schema_migration_batch_sleep_seconds", 0
+    )
+    _create_online_table(engine, table_name)
+
+    migrations = [
+        {"action": "replace_column", "column_name": "budget", "new_type": "TEXT"},
+        {
+            "action": "add_column",
+            "new_column": {
+                "name": "budget_total",
+                "type": "INTEGER",
+                "using_expression": '"missing_column" + 1',
+            },
+        },
+    ]
+    try:
+        with pytest.raises(SchemaMigrationError, match="1 earlier migration"):
+            apply_schema_migrations(engine, table_name, migrations, online=True)
+
+        # Each online migration commits on its own, so the first one stays applied
+        with engine.connect() as conn:
+            budget_type = conn.execute(
+                text(
+                    "SELECT data_type FROM information_schema.columns "
+                    "WHERE table_name = :table AND column_name = 'budget'"
+                ),
+                {"table": table_name},
+            ).scalar()
+        assert budget_type == "text"
+        assert _sync_triggers(engine, table_name) == []
+
+        results = apply_schema_migrations(engine, table_name, migrations[:1], online=True)
+        assert results[0]["status"] == "already_applied"
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f'DROP TABLE IF EXISTS "{table_name}"'))
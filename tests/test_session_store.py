@@ -0,0 +1,133 @@
+"""
+Tests for the bounded API session store (app.core.session_store).
+"""
+
+import types
+import uuid
+
+import pytest
+from sqlalchemy import text
+
+from app.api.routers.analysis.interactive import InteractiveSessionState
+from app.api.schemas.shared import AsyncTaskStatus
+from app.core import session_store as session_store_module
+from app.core.session_store import SessionStore
+from app.db.session import get_engine
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(session_store_module, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+@pytest.fixture
+def memory_settings(monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.session_store_backend", "memory")
+    monkeypatch.setattr("app.core.config.settings.session_store_ttl_seconds", 60)
+    monkeypatch.setattr("app.core.config.settings.session_store_max_entries", 3)
+    monkeypatch.setattr("app.core.config.settings.session_store_max_memory_mb", 1)
+
+
+@pytest.fixture
+def postgres_store(monkeypatch):
+    # Other suites drop every table they do not know about; re-create ours
+    monkeypatch.setattr(session_store_module, "_table_initialized", False)
+    monkeypatch.setattr("app.core.config.settings.session_store_backend", "postgres")
+    monkeypatch.setattr("app.core.config.settings.session_store_ttl_seconds", 60)
+    store = SessionStore(f"test-{uuid.uuid4().hex[:12]}")
+    yield store
+    store.clear()
+
+
+def test_memory_store_evicts_least_recently_used_past_entry_limit(memory_settings, clock):
+    store = SessionStore("tasks")
+    for key in ("a", "b", "c"):
+        store[key] = key.upper()
+    assert store.get("a") == "A"  # "a" is now the most recently used
+
+    store["d"] = "D"
+
+    assert sorted(store) == ["a", "c", "d"]
+    assert "b" not in store
+
+
+def test_memory_store_enforces_byte_budget(memory_settings, clock):
+    store = SessionStore("interactive")
+    store["first"] = "x" * (MB // 2)
+    store["second"] = "y" * (MB // 2)
+
+    assert list(store) == ["second"]
+    assert 0 < store.stats()["bytes"] <= MB
+
+    # A single value over the budget is still kept as the newest entry
+    store["huge"] = "z" * (2 * MB)
+    assert list(store) == ["huge"]
+
+
+def test_memory_store_sizes_records_without_pickling(memory_settings, clock, monkeypatch):
+    def _no_pickle(*args, **kwargs):
+        raise AssertionError("memory backend should not pickle values")
+
+    monkeypatch.setattr(session_store_module.pickle, "dumps", _no_pickle)
+    store = SessionStore("analysis")
+    store["small"] = {"status": "done", "rows": 3}
+    # ~600KB of record values nested in a session dict
+    store["records"] = {"analysis": {"records": [{"name": "x" * 600} for _ in range(1000)]}}
+
+    assert 600 * 1000 < store.stats()["bytes"] <= MB
+    assert store.get("small") == {"status": "done", "rows": 3}
+    store["more"] = {"records": [{"name": "y" * 600} for _ in range(1000)]}
+    assert list(store) == ["small", "more"]
+
+
+def test_memory_store_expires_idle_entries(memory_settings, clock):
+    store = SessionStore("analysis")
+    store["idle"] = 1
+    store["active"] = 2
+
+    clock[0] += 45
+    assert store["active"] == 2  # reading extends the lifetime
+    clock[0] += 30
+
+    assert store.get("idle") is None
+    assert store.pop("idle", None) is None
+    assert store["active"] == 2
+    assert store.stats()["entries"] == 1
+
+
+def test_postgres_store_is_shared_between_workers(postgres_store):
+    task = AsyncTaskStatus(task_id="t-1", status="processing", progress=40, message="Importing")
+    session = InteractiveSessionState(
+        file_id="file-1",
+        thread_id="thread-1",
+        file_metadata={"name": "demo.csv"},
+        sample=[{"a": 1}],
+        conversation=[{"role": "user", "content": "hi"}],
+    )
+    postgres_store["t-1"] = task
+    postgres_store["thread-1"] = session
+
+    other_worker = SessionStore(postgres_store.namespace)
+    assert other_worker["t-1"] == task
+    assert other_worker["thread-1"] == session
+    assert len(other_worker) == 2
+
+    assert other_worker.pop("thread-1").conversation == session.conversation
+    assert "thread-1" not in postgres_store
+
+
+def test_postgres_store_hides_expired_rows(postgres_store):
+    postgres_store["stale"] = {"status": "pending"}
+    with get_engine().begin() as conn:
+        conn.execute(
+            text("UPDATE api_sessions SET expires_at = NOW() - INTERVAL '1 second' WHERE namespace = :n"),
+            {"n": postgres_store.namespace},
+        )
+
+    assert postgres_store.get("stale") is None
+    assert len(postgres_store) == 0
+    assert postgres_store.pop("stale", None) is None
@@ -1,12 +1,21 @@
+import hashlib
+import io
+import re
+import threading
 import uuid
 from pathlib import Path
 
 import pytest
+from botocore.exceptions import ClientError
 
 from app.core.config import settings
+from app.integrations import storage
 from app.integrations.storage import (
+    StorageDownloadError,
     delete_file,
     download_file,
+    get_storage_client,
+    reset_storage_client,
     upload_file,
 )
 
@@ -41,3 +50,190 @@ def test_storage_upload_and_download_roundtrip():
         assert downloaded == data, "Downloaded content did not match uploaded content"
     finally:
         delete_file(file_path)
+
+
+class _RangedObjectClient:
+    """Minimal stand-in for a boto3 S3 client serving one object by byte range."""
+
+    def __init__(self, payload: bytes, etag: str = '"v1"', short_read_at=None):
+        self.payload = payload
+        self.etag = etag
+        self.short_read_at = short_read_at
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def get_object(self, Bucket, Key, Range=None, IfMatch=None):
+        with self._lock:
+            self.requests.append({"Range": Range, "IfMatch": IfMatch})
+        if Range is None:
+            return {"Body": io.BytesIO(self.payload), "ETag": self.etag}
+        if not self.payload:
+            raise ClientError({"Error": {"Code": "InvalidRange"}}, "GetObject")
+        start, end = (int(part) for part in re.match(r"bytes=(\d+)-(\d+)", Range).groups())
+        end = min(end, len(self.payload) - 1)
+        body = self.payload[start:end + 1]
+        if start == self.short_read_at:
+            body = body[:-1]
+        return {
+            "Body": io.BytesIO(body),
+            "ETag": self.etag,
+            "ContentRange": f"bytes {start}-{end}/{len(self.payload)}",
+        }
+
+
+@pytest.fixture
+def storage_settings(monkeypatch):
+    monkeypatch.setattr(settings, "storage_access_key_id", "key")
+    monkeypatch.setattr(settings, "storage_secret_access_key", "secret")
+    monkeypatch.setattr(settings, "storage_bucket_name", "bucket")
+    monkeypatch.setattr(settings, "storage_endpoint_url", "http://127.0.0.1:9")
+    reset_storage_client()
+    yield
+    reset_storage_client()
+
+
+def test_storage_client_is_reused_until_settings_change(storage_settings, monkeypatch):
+    first = get_storage_client()
+    assert get_storage_client() is first
+    assert first.meta.config.max_pool_connections == settings.storage_max_pool_connections
+
+    monkeypatch.setattr(settings, "storage_endpoint_url", "http://127.0.0.1:10")
+    second = get_storage_client()
+    assert second is not first
+    assert get_storage_client() is second
+
+
+def test_download_file_reassembles_parallel_ranges(storage_settings, monkeypatch):
+    payload = bytes(range(256)) * 40 + b"tail"
+    fake = _RangedObjectClient(payload)
+    monkeypatch.setattr(storage, "get_storage_client", lambda: fake)
+    # Shrink the part size below the payload so several ranges are fetched
+    part_size = 1000
+    monkeypatch.setattr(storage, "_download_part_size", lambda: part_size)
+
+    content = download_file("uploads/big.csv")
+    assert content == payload
+    # The preallocated buffer is handed back without a bytes() copy
+    assert isinstance(content, bytearray)
+
+    assert len(fake.requests) == -(-len(payload) // part_size)
+    assert all(request["IfMatch"] == '"v1"' for request in fake.requests[1:])
+
+
+def test_download_file_small_and_empty_objects_take_one_request(storage_settings, monkeypatch):
+    small = _RangedObjectClient(b"name,age\nAnn,30\n")
+    monkeypatch.setattr(storage, "get_storage_client", lambda: small)
+    assert download_file("uploads/small.csv") == b"name,age\nAnn,30\n"
+    assert len(small.requests) == 1
+
+    empty = _RangedObjectClient(b"")
+    monkeypatch.setattr(storage, "get_storage_client", lambda: empty)
+    assert download_file("uploads/empty.csv") == b""
+
+
+def test_download_file_rejects_short_part(storage_settings, monkeypatch):
+    fake = _RangedObjectClient(b"x" * 3000, short_read_at=1000)
+    monkeypatch.setattr(storage, "get_storage_client", lambda: fake)
+    monkeypatch.setattr(storage, "_download_part_size", lambda: 1000)
+
+    with pytest.raises(StorageDownloadError):
+        download_file("uploads/truncated.csv")
+
+
+class _MultipartClient:
+    """Records multipart calls and assembles the parts on completion."""
+
+    def __init__(self, fail_part=None):
+        self.fail_part = fail_part
+        self.parts = {}
+        self.objects = {}
+        self.aborted = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def create_multipart_upload(self, Bucket, Key, ContentType=None):
+        return {"UploadId": "upload-1"}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if PartNumber == self.fail_part:
+                raise ClientError({"Error": {"Code": "InternalError"}}, "UploadPart")
+            with self._lock:
+                self.parts[PartNumber] = bytes(Body)
+            return {"ETag": f'"etag-{PartNumber}"'}
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        numbers = [part["PartNumber"] for part in MultipartUpload["Parts"]]
+        self.objects[Key] = b"".join(self.parts[number] for number in numbers)
+        return {"ETag": '"combined"'}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.aborted.append(UploadId)
+
+
+MIB = 1024 * 1024
+
+
+def test_upload_stream_multipart_streams_parts_and_hashes(storage_settings, monkeypatch):
+    from app.integrations import storage_multipart
+
+    fake = _MultipartClient()
+    monkeypatch.setattr(storage_multipart, "get_storage_client", lambda: fake)
+    payload = bytes(range(256)) * (48 * 1024) + b"tail"  # 12MB + 4 bytes
+
+    result = storage_multipart.upload_stream_multipart(
+        io.BytesIO(payload), "big.csv", part_size=5 * MIB, concurrency=2
+    )
+
+    assert fake.objects["uploads/big.csv"] == payload
+    assert result["parts"] == 3
+    assert result["size"] == len(payload)
+    assert result["file_hash"] == hashlib.sha256(payload).hexdigest()
+    assert fake.max_in_flight <= 2
+
+
+def test_upload_stream_multipart_aborts_on_failed_part(storage_settings, monkeypatch):
+    from app.integrations import storage_multipart
+
+    fake = _MultipartClient(fail_part=2)
+    monkeypatch.setattr(storage_multipart, "get_storage_client", lambda: fake)
+
+    with pytest.raises(storage.StorageUploadError):
+        storage_multipart.upload_stream_multipart(io.BytesIO(b"x" * (11 * MIB)), "broken.csv")
+
+    assert fake.aborted == ["upload-1"]
+    assert fake.objects == {}
+
+
+def test_upload_endpoint_uses_multipart_for_large_files(storage_settings, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app.domain.uploads.uploaded_files import delete_uploaded_file, get_uploaded_file_by_id
+    from app.integrations import storage_multipart
+    from app.main import app
+
+    fake = _MultipartClient()
+    monkeypatch.setattr(storage_multipart, "get_storage_client", lambda: fake)
+    payload = b"id,value\n" + b"1,abcdefgh\n" * (600 * 1024)
+    file_name = f"test-multipart-{uuid.uuid4().hex}.csv"
+
+    response = TestClient(app).post(
+        "/upload-to-b2",
+        files={"file": (file_name, io.BytesIO(payload), "text/csv")},
+    )
+
+    assert response.status_code == 200, response.text
+    uploaded = response.json()["files"][0]
+    try:
+        assert fake.objects[f"uploads/{file_name}"] == payload
+        assert uploaded["file_size"] == len(payload)
+        assert get_uploaded_file_by_id(uploaded["id"])["file_hash"] == hashlib.sha256(payload).hexdigest()
+    finally:
+        delete_uploaded_file(uploaded["id"])
@@ -0,0 +1,72 @@
+"""
+Tests for the one-pass streaming sampler used before LLM analysis.
+"""
+
+import io
+import json
+
+import pytest
+from openpyxl import Workbook
+
+from app.domain.imports.processors.csv_processor import iter_excel_records, process_excel
+from app.domain.imports.processors.json_processor import iter_json_records, process_json
+from app.domain.queries.analyzer import (
+    HEAD_SAMPLE_ROWS,
+    StreamingSampler,
+    sample_file_data,
+    sample_file_stream,
+)
+
+
+@pytest.mark.parametrize("total", [0, 10, 50, 100, 500, 5000, 20000])
+@pytest.mark.parametrize("target, max_size", [(None, None), (None, 50), (30, None)])
+def test_sample_sizes_match_list_sampler(total, target, max_size):
+    records = [{"i": i} for i in range(total)]
+    sampler = StreamingSampler(target, max_size)
+    sampler.add_many(iter(records))
+
+    sample, total_rows = sampler.result()
+    expected, expected_total = sample_file_data(records, target, max_sample_size=max_size)
+
+    assert total_rows == expected_total
+    assert len(sample) == len(expected)
+    positions = [row["i"] for row in sample]
+    assert positions == sorted(set(positions))
+    head = min(HEAD_SAMPLE_ROWS, len(expected))
+    assert positions[:head] == list(range(head))
+
+
+def test_reservoir_covers_whole_file():
+    csv_content = b"id,name\n" + b"".join(f"{i},row{i}\n".encode() for i in range(20000))
+
+    sample, total_rows = sample_file_stream(csv_content, "csv", max_sample_size=50)
+
+    assert total_rows == 20000
+    assert len(sample) == 50
+    assert sample[0] == {"id": 0, "name": "row0"}
+    # Rows beyond the head come from across the file, not just its start
+    assert max(row["id"] for row in sample[HEAD_SAMPLE_ROWS:]) > 10000
+
+
+def test_json_and_excel_streams_match_full_parsers():
+    payload = [{"id": i, "tags": ["a", {"nested": "]"}]} for i in range(40)]
+    content = json.dumps(payload).encode()
+    assert list(iter_json_records(content)) == process_json(content)
+    assert list(iter_json_records(b'{"id": 1}')) == [{"id": 1}]
+    with pytest.raises(ValueError):
+        list(iter_json_records(b'[{"id": 1},]'))
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append([" Name ", "Score", None, "Score"])
+    for i in range(20):
+        sheet.append([f"n{i}", i + 0.5, None, i] if i != 3 else [None, None, None, None])
+    sheet.append([None, None, None, None])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+
+    streamed = list(iter_excel_records(buffer.getvalue()))
+    assert streamed == process_excel(buffer.getvalue())
+    sample, total_rows = sample_file_stream(buffer.getvalue(), "excel", max_sample_size=50)
+    assert total_rows == 20
+    assert sample == streamed
@@ -0,0 +1,103 @@
+"""
+Tests for the advisory-lock backed TableLockManager.
+
+Locks held by "another process" are simulated with a separate connection
+taking the same advisory lock directly.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import text
+
+from app.db.session import get_engine, get_lock_engine
+from app.utils.locks import (
+    TABLE_LOCK_NAMESPACE,
+    TableLockManager,
+    TableLockTimeoutError,
+)
+
+TABLE = "test_table_lock_target"
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    TableLockManager.reset_metrics()
+    yield
+    TableLockManager.reset_metrics()
+
+
+@contextmanager
+def _external_lock():
+    params = {"namespace": TABLE_LOCK_NAMESPACE, "table_name": TABLE}
+    with get_engine().connect() as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:namespace, hashtext(:table_name))"), params)
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:namespace, hashtext(:table_name))"), params)
+
+
+def test_exclusive_lock_times_out_when_held_elsewhere():
+    with _external_lock():
+        with pytest.raises(TableLockTimeoutError):
+            with TableLockManager.acquire(TABLE, timeout=0.2):
+                pass
+
+    metrics = TableLockManager.get_metrics()[TABLE]
+    assert metrics["timeouts"] == 1
+    assert metrics["acquired"] == 0
+
+    # Lock is free again once the other session releases it
+    with TableLockManager.acquire(TABLE, timeout=1):
+        pass
+    assert TableLockManager.get_metrics()[TABLE]["acquired"] == 1
+
+
+def test_held_lock_does_not_use_a_main_pool_connection():
+    main_pool = get_engine().pool
+    checked_out_before = main_pool.checkedout()
+
+    with TableLockManager.acquire(TABLE, timeout=1):
+        assert main_pool.checkedout() == checked_out_before
+        assert get_lock_engine().pool.checkedout() == 1
+        # The lock really is held for other sessions
+        with get_engine().connect() as conn:
+            assert conn.execute(
+                text("SELECT pg_try_advisory_lock(:namespace, hashtext(:table_name))"),
+                {"namespace": TABLE_LOCK_NAMESPACE, "table_name": TABLE},
+            ).scalar() is False
+
+
+def test_waiter_acquires_after_release_and_records_wait():
+    acquired = threading.Event()
+    release = threading.Event()
+
+    def _hold():
+        with TableLockManager.acquire(TABLE):
+            acquired.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=_hold)
+    holder.start()
+    assert acquired.wait(5)
+
+    threading.Timer(0.3, release.set).start()
+    start = time.monotonic()
+    with TableLockManager.acquire(TABLE, timeout=5):
+        waited = time.monotonic() - start
+    holder.join(5)
+
+    assert waited >= 0.25
+    metrics = TableLockManager.get_metrics()[TABLE]
+    assert metrics["acquired"] == 2
+    assert metrics["wait_seconds_max"] >= 0.25
+
+
+def test_nested_acquire_on_same_thread_is_reentrant():
+    with TableLockManager.acquire(TABLE, timeout=1):
+        with TableLockManager.acquire(TABLE, timeout=1):
+            pass
+    assert TableLockManager.get_metrics()[TABLE]["acquired"] == 1